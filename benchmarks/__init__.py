@@ -0,0 +1,18 @@
+"""
+Micro-benchmarks for TradeBit.
+
+Run a benchmark from the project root, e.g.:
+
+    python -m benchmarks.bench_async_client
+"""
+import os
+
+
+def setup_django():
+    """
+    Configure Django so benchmarks can import project modules.
+    """
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tradebit.settings.development')
+    django.setup()
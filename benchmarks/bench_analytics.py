@@ -0,0 +1,89 @@
+"""
+Time the portfolio analytics on a long synthetic history.
+
+Builds daily values for holdings bought at random over the years from
+simulated prices, then times each figure the analytics endpoint computes.
+Nothing touches the database:
+
+    python -m benchmarks.bench_analytics --years 10 --holdings 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks import setup_django
+
+setup_django()
+
+from portfolio import analytics  # noqa: E402
+
+
+def history(years, holdings, rng):
+    """
+    Simulate daily closes and the value of holdings bought along the way.
+
+    Returns:
+        Trading days, portfolio values, money invested per day, and the
+        benchmark's closes
+    """
+    count = years * analytics.TRADING_DAYS
+    days = np.busday_offset(np.datetime64('2015-01-01'), np.arange(count), roll='forward')
+    market = rng.normal(0.0004, 0.01, count)
+    drift = rng.normal(0.0, 0.012, (holdings, count))
+    prices = 100 * np.exp(np.cumsum(market + drift * rng.uniform(0.5, 1.5, (holdings, 1)), axis=1))
+
+    bought = np.sort(rng.integers(0, count, holdings))
+    quantity = rng.integers(1, 200, holdings).astype('f8')
+    held = np.arange(count) >= bought[:, None]
+    values = (np.where(held, prices, 0.0) * quantity[:, None]).sum(axis=0)
+    flows = np.bincount(bought, weights=quantity * prices[np.arange(holdings), bought], minlength=count)
+    benchmark = 10000 * np.exp(np.cumsum(market))
+    return days, values, flows, benchmark
+
+
+def timed(label, rounds, action):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = action()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<22} {elapsed * 1e3:9.3f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--holdings', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    days, values, flows, benchmark = history(args.years, args.holdings, rng)
+    print(
+        f"{args.holdings} holdings over {len(days)} trading days "
+        f"(simulated in {time.perf_counter() - start:.2f}s)"
+    )
+
+    amounts = -flows
+    amounts[0] -= values[0]
+    amounts[-1] += values[-1]
+    returns = timed("daily returns", args.rounds, lambda: analytics.daily_returns(values, flows))
+    benchmark_returns = benchmark[1:] / benchmark[:-1] - 1.0
+
+    rate = timed("xirr", args.rounds, lambda: analytics.xirr(days, amounts))
+    twr = timed("twr", args.rounds, lambda: analytics.time_weighted_return(returns))
+    drawdown = timed("max drawdown", args.rounds, lambda: analytics.max_drawdown(returns))
+    timed("rolling volatility", args.rounds, lambda: analytics.rolling_volatility(returns))
+    sharpe = timed("sharpe", args.rounds, lambda: analytics.sharpe_ratio(returns, 0.065))
+    beta = timed("beta", args.rounds, lambda: analytics.beta(returns, benchmark_returns))
+
+    print(
+        f"xirr {rate:.2%}  twr {twr:.2%}  max drawdown {drawdown[0]:.2%}  "
+        f"sharpe {sharpe:.2f}  beta {beta:.2f}"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare the sync and async Kite clients when fetching an account snapshot.
+
+Runs both against a local stub server with artificial per-request latency:
+
+    python -m benchmarks.bench_async_client --latency 0.05 --rounds 20
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import setup_django
+
+setup_django()
+
+from zerodha.async_client import AsyncKiteClient  # noqa: E402
+from zerodha.kite_client import KiteClient  # noqa: E402
+from zerodha.tests.stub_server import ACCOUNT_ROUTES, StubKiteServer, unlimited_rate_limiter  # noqa: E402
+
+INSTRUMENTS = ["NSE:INFY"]
+
+
+def sync_snapshot(client):
+    client.get_holdings()
+    client.get_positions()
+    client.get_orders()
+    client.get_quote(*INSTRUMENTS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub latency per request (s)')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    with StubKiteServer(ACCOUNT_ROUTES, latency=args.latency) as server:
+        client = KiteClient(api_key='key', api_secret='secret', access_token='token')
+        client.BASE_URL = server.url
+        client.rate_limiter = unlimited_rate_limiter()
+        async_client = AsyncKiteClient.from_client(client)
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            sync_snapshot(client)
+        sync_elapsed = time.perf_counter() - start
+
+        async def run_async():
+            for _ in range(args.rounds):
+                await async_client.fetch_account_snapshot(INSTRUMENTS)
+
+        start = time.perf_counter()
+        asyncio.run(run_async())
+        async_elapsed = time.perf_counter() - start
+
+    print(f"latency per request: {args.latency * 1000:.0f} ms, rounds: {args.rounds}")
+    print(f"sync  snapshot: {sync_elapsed / args.rounds * 1000:8.1f} ms/round")
+    print(f"async snapshot: {async_elapsed / args.rounds * 1000:8.1f} ms/round")
+    print(f"speedup: {sync_elapsed / async_elapsed:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
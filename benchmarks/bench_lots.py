@@ -0,0 +1,89 @@
+"""
+Measure lot matching on a large synthetic ledger.
+
+Compares the vectorized FIFO and average-cost engines used to rebuild
+lots with replaying the same trades one at a time through LotBook, the
+way trades are matched as they are appended:
+
+    python -m benchmarks.bench_lots --trades 1000000 --positions 5000
+"""
+import argparse
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from benchmarks import setup_django
+
+setup_django()
+
+from portfolio.lots import LotBook, QUANTITY_SCALE, average_cost, fifo_match  # noqa: E402
+
+
+def ledger(trades, positions, rng):
+    """
+    Build a ledger that never sells more than it holds, sorted by position.
+    """
+    groups = np.sort(rng.integers(0, positions, trades))
+    quantity = rng.integers(1, 500, trades) * QUANTITY_SCALE
+    price = np.round(rng.uniform(50, 5000, trades), 2)
+    want_sell = rng.random(trades) < 0.4
+    fraction = rng.random(trades)
+
+    is_buy = np.ones(trades, dtype=bool)
+    held = 0
+    for i in range(trades):
+        if i == 0 or groups[i] != groups[i - 1]:
+            held = 0
+        if want_sell[i] and held > 0:
+            is_buy[i] = False
+            quantity[i] = max(QUANTITY_SCALE, int(held * fraction[i]) // QUANTITY_SCALE * QUANTITY_SCALE)
+            held -= quantity[i]
+        else:
+            held += quantity[i]
+    return groups, is_buy, quantity, price
+
+
+def timed(label, count, action):
+    start = time.perf_counter()
+    result = action()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f}s  {count / elapsed:>12,.0f} trades/s")
+    return result
+
+
+def replay(groups, is_buy, quantity, price):
+    books = {}
+    scale = Decimal(QUANTITY_SCALE)
+    for i, (group, buy, units, value) in enumerate(
+        zip(groups.tolist(), is_buy.tolist(), quantity.tolist(), price.tolist())
+    ):
+        book = books.setdefault(group, LotBook())
+        if buy:
+            book.buy(i, Decimal(units) / scale, Decimal(repr(value)))
+        else:
+            book.sell(Decimal(units) / scale, Decimal(repr(value)))
+    return books
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trades', type=int, default=1000000)
+    parser.add_argument('--positions', type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    groups, is_buy, quantity, price = ledger(args.trades, args.positions, rng)
+    print(f"{args.trades:,} trades ({(~is_buy).sum():,} sells) in {args.positions:,} positions")
+
+    matched = timed("fifo_match (vectorized)", args.trades, lambda: fifo_match(groups, is_buy, quantity, price))
+    timed("average_cost (vectorized)", args.trades, lambda: average_cost(groups, is_buy, quantity, price))
+    books = timed("LotBook (one at a time)", args.trades, lambda: replay(groups, is_buy, quantity, price))
+
+    open_lots = sum(len(book.lots) for book in books.values())
+    print(f"{len(matched['quantity']):,} matches, {open_lots:,} open lots")
+    assert open_lots == int((matched['open_quantity'] > 0).sum())
+
+
+if __name__ == '__main__':
+    main()
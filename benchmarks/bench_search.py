@@ -0,0 +1,94 @@
+"""
+Measure stock search throughput and latency.
+
+Builds the index from a synthetic universe the size of NSE and BSE
+together, without touching the database, then replays a mix of exact,
+prefix, name and misspelt queries:
+
+    python -m benchmarks.bench_search --stocks 15000 --queries 20000
+"""
+import argparse
+import random
+import string
+import time
+
+import numpy as np
+
+from benchmarks import setup_django
+
+setup_django()
+
+from core.search import StockSearchIndex  # noqa: E402
+
+WORDS = [
+    'Tata', 'Reliance', 'Industries', 'Bank', 'Finance', 'Motors', 'Steel', 'Power',
+    'Pharma', 'Chemicals', 'Infra', 'Capital', 'Holdings', 'Textiles', 'Cement',
+    'Energy', 'Technologies', 'Consultancy', 'Services', 'Life', 'Insurance',
+]
+
+
+def universe(count, rng):
+    stocks, aliases = [], []
+    symbols = set()
+    while len(stocks) < count:
+        symbol = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 10)))
+        if symbol in symbols:
+            continue
+        symbols.add(symbol)
+        name = ' '.join(rng.sample(WORDS, rng.randint(2, 4))) + ' Ltd.'
+        stocks.append((len(stocks) + 1, symbol, name))
+        if rng.random() < 0.2:
+            aliases.append((len(stocks), f'{symbol}-BE'))
+    return stocks, aliases
+
+
+def typo(text, rng):
+    i = rng.randrange(len(text))
+    return text[:i] + rng.choice(string.ascii_uppercase) + text[i + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stocks', type=int, default=15000)
+    parser.add_argument('--queries', type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    stocks, aliases = universe(args.stocks, rng)
+
+    start = time.perf_counter()
+    index = StockSearchIndex(stocks, aliases)
+    build = time.perf_counter() - start
+
+    queries = []
+    for _ in range(args.queries):
+        _, symbol, name = rng.choice(stocks)
+        kind = rng.random()
+        if kind < 0.3:
+            queries.append(symbol)
+        elif kind < 0.7:
+            queries.append(symbol[:rng.randint(1, len(symbol))])
+        elif kind < 0.9:
+            queries.append(name.split()[rng.randrange(2)][:rng.randint(2, 6)])
+        else:
+            queries.append(typo(symbol, rng))
+
+    latencies = np.empty(len(queries))
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        began = time.perf_counter()
+        index.search(query, 10)
+        latencies[i] = time.perf_counter() - began
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(index)} stocks, {len(aliases)} aliases, built in {build * 1000:.0f} ms")
+    print(f"{len(queries)} queries in {elapsed:.2f}s: {len(queries) / elapsed:,.0f} queries/s")
+    print(
+        f"latency p50 {np.percentile(latencies, 50) * 1e6:.0f} us, "
+        f"p99 {np.percentile(latencies, 99) * 1e6:.0f} us, "
+        f"max {latencies.max() * 1e6:.0f} us"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure how many ticks per second the ticker decodes and stores.
+
+Replays synthetic quote-mode frames through the same path the live ticker
+uses (parse, then write to the shared table):
+
+    python -m benchmarks.bench_ticker --instruments 500 --frames 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks import setup_django
+
+setup_django()
+
+from zerodha.tick_table import TickTable  # noqa: E402
+from zerodha.ticker import (  # noqa: E402
+    MODE_FULL, MODE_QUOTE, FrameRecorder, ReplaySource, Tick, TickerService,
+    build_frame, encode_packet, parse_frame
+)
+
+
+def make_frames(instruments, frames, mode):
+    tokens = [256 * (i + 1) + 1 for i in range(instruments)]
+    result = []
+    for _ in range(frames):
+        packets = []
+        for token in tokens:
+            price = round(random.uniform(100, 3000), 2)
+            tick = Tick(token, mode, True, price, open=price, high=price, low=price,
+                        close=price, volume=random.randint(0, 10 ** 6))
+            packets.append(encode_packet(tick, mode))
+        result.append(build_frame(packets))
+    return tokens, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--instruments', type=int, default=500, help='Instruments per frame')
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--mode', choices=[MODE_QUOTE, MODE_FULL], default=MODE_QUOTE)
+    args = parser.parse_args()
+
+    tokens, frames = make_frames(args.instruments, args.frames, args.mode)
+    total = args.instruments * args.frames
+
+    start = time.perf_counter()
+    for frame in frames:
+        parse_frame(frame)
+    decode_elapsed = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recording = os.path.join(tmp, "frames.bin")
+        recorder = FrameRecorder(recording)
+        for frame in frames:
+            recorder.write(frame)
+        recorder.close()
+
+        table = TickTable.create(os.path.join(tmp, "ticks.bin"), capacity=len(tokens))
+        service = TickerService(ReplaySource(recording), table, mode=args.mode, tokens=lambda: tokens)
+
+        start = time.perf_counter()
+        stats = service.run()
+        replay_elapsed = time.perf_counter() - start
+
+        reader = TickTable.open(table.path)
+        start = time.perf_counter()
+        for _ in range(1000):
+            reader.get(tokens[:50])
+        read_elapsed = time.perf_counter() - start
+
+    print(f"{args.frames} frames x {args.instruments} instruments ({args.mode} mode)")
+    print(f"decode only:            {total / decode_elapsed:12,.0f} ticks/s")
+    print(f"replay, decode + store: {stats['written'] / replay_elapsed:12,.0f} ticks/s")
+    print(f"table read (50 instr):  {read_elapsed:12.3f} ms/read")
+
+
+if __name__ == '__main__':
+    main()
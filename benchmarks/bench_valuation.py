@@ -0,0 +1,61 @@
+"""
+Time the vectorized mark-to-market valuation.
+
+Values synthetic portfolios without touching the database, so the figures
+are pure compute:
+
+    python -m benchmarks.bench_valuation --holdings 5000 --rounds 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks import setup_django
+
+setup_django()
+
+from portfolio.valuation import PortfolioValuation, value_positions  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--holdings', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.holdings
+    quantity = rng.integers(1, 500, n).astype("f8")
+    avg_price = rng.uniform(10, 5000, n)
+    last_price = avg_price * rng.uniform(0.7, 1.5, n)
+    last_price[rng.random(n) < 0.01] = np.nan
+    close = last_price * rng.uniform(0.97, 1.03, n)
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        value_positions(quantity, avg_price, last_price, close)
+    compute = (time.perf_counter() - start) / args.rounds
+
+    valuation = PortfolioValuation(
+        holding_ids=list(range(n)),
+        symbols=[f"SYM{i}" for i in range(n)],
+        sectors=[f"Sector {i % 20}" for i in range(n)],
+        quantity=quantity,
+        avg_price=avg_price,
+        last_price=last_price,
+        close=close,
+    )
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        valuation.totals()
+        valuation.by_sector()
+    aggregate = (time.perf_counter() - start) / args.rounds
+
+    print(f"{n} holdings")
+    print(f"value positions:      {compute * 1e6:8.1f} us")
+    print(f"totals + sectors:     {aggregate * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
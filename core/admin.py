@@ -1,10 +1,10 @@
 from django.contrib import admin
-from core.models import Stock, StockAlias, Classification
+from core.models import Stock, StockAlias, Classification, CorporateAction
 
 
 @admin.register(Stock)
 class StockAdmin(admin.ModelAdmin):
-    list_display = ('symbol', 'name', 'sector', 'industry')
+    list_display = ('symbol', 'name', 'sector', 'industry', 'fmv_jan_2018')
     search_fields = ('symbol', 'name')
     list_filter = ('sector', 'industry')
 
@@ -20,3 +20,17 @@ class ClassificationAdmin(admin.ModelAdmin):
     list_display = ('name', 'type', 'description')
     search_fields = ('name', 'type')
     list_filter = ('type',)
+
+
+@admin.register(CorporateAction)
+class CorporateActionAdmin(admin.ModelAdmin):
+    list_display = (
+        'stock', 'action_type', 'ex_date', 'ratio_from', 'ratio_to', 'dividend',
+        'quantity_factor', 'price_factor', 'applied_at'
+    )
+    list_filter = ('action_type', 'ex_date')
+    search_fields = ('stock__symbol', 'stock__name')
+    readonly_fields = (
+        'quantity_factor', 'price_factor', 'applied_at', 'holdings_adjusted',
+        'transactions_adjusted', 'candles_adjusted', 'created_at', 'updated_at'
+    )
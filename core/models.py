@@ -23,11 +23,23 @@ class Stock(TimeStampedModel):
     sector = models.CharField(_('Sector'), max_length=100, blank=True, null=True)
     industry = models.CharField(_('Industry'), max_length=100, blank=True, null=True)
     is_active = models.BooleanField(_('Is Active'), default=True)
+    fmv_jan_2018 = models.DecimalField(
+        _('FMV on 31 Jan 2018'),
+        max_digits=15,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text=_('Highest price quoted on 31 Jan 2018, used for grandfathered capital gains')
+    )
 
     class Meta:
         verbose_name = _('Stock')
         verbose_name_plural = _('Stocks')
         ordering = ['symbol']
+        indexes = [
+            # Keyset pagination of active stocks
+            models.Index(fields=['is_active', 'symbol']),
+        ]
 
     def __str__(self):
         return f"{self.symbol} - {self.name}"
@@ -72,3 +84,112 @@ class Classification(TimeStampedModel):
 
     def __str__(self):
         return f"{self.type}: {self.name}"
+
+
+class CorporateAction(TimeStampedModel):
+    """
+    Model representing a split, bonus issue or dividend of a stock.
+
+    Pending actions are applied to holdings, trades and stored candles once
+    their ex-date arrives (see portfolio.corporate_actions), and the factors
+    used are recorded here.
+    """
+    TYPE_SPLIT = 'split'
+    TYPE_BONUS = 'bonus'
+    TYPE_DIVIDEND = 'dividend'
+    TYPE_CHOICES = [
+        (TYPE_SPLIT, _('Split')),
+        (TYPE_BONUS, _('Bonus')),
+        (TYPE_DIVIDEND, _('Dividend')),
+    ]
+
+    stock = models.ForeignKey(
+        Stock,
+        on_delete=models.CASCADE,
+        related_name='corporate_actions',
+        verbose_name=_('Stock')
+    )
+    action_type = models.CharField(
+        _('Type'),
+        max_length=10,
+        choices=TYPE_CHOICES
+    )
+    ex_date = models.DateField(
+        _('Ex-Date')
+    )
+    ratio_from = models.PositiveIntegerField(
+        _('Ratio From'),
+        default=1,
+        help_text=_('Split: shares before, as in 1:5. Bonus: bonus shares, as in 1:2')
+    )
+    ratio_to = models.PositiveIntegerField(
+        _('Ratio To'),
+        default=1,
+        help_text=_('Split: shares after, as in 1:5. Bonus: shares held, as in 1:2')
+    )
+    dividend = models.DecimalField(
+        _('Dividend'),
+        max_digits=15,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text=_('Dividend per share')
+    )
+    quantity_factor = models.DecimalField(
+        _('Quantity Factor'),
+        max_digits=20,
+        decimal_places=10,
+        blank=True,
+        null=True,
+        help_text=_('Multiplier applied to quantities before the ex-date')
+    )
+    price_factor = models.DecimalField(
+        _('Price Factor'),
+        max_digits=20,
+        decimal_places=10,
+        blank=True,
+        null=True,
+        help_text=_('Multiplier applied to prices before the ex-date')
+    )
+    applied_at = models.DateTimeField(
+        _('Applied At'),
+        blank=True,
+        null=True
+    )
+    holdings_adjusted = models.IntegerField(
+        _('Holdings Adjusted'),
+        default=0
+    )
+    transactions_adjusted = models.IntegerField(
+        _('Transactions Adjusted'),
+        default=0
+    )
+    candles_adjusted = models.IntegerField(
+        _('Candles Adjusted'),
+        default=0
+    )
+
+    class Meta:
+        verbose_name = _('Corporate Action')
+        verbose_name_plural = _('Corporate Actions')
+        unique_together = ['stock', 'action_type', 'ex_date']
+        ordering = ['ex_date', 'id']
+        indexes = [
+            # Pending actions due by a date
+            models.Index(fields=['applied_at', 'ex_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.stock.symbol} {self.action_type} on {self.ex_date}"
+
+    @property
+    def share_ratio(self):
+        """
+        Shares held after the ex-date per share held before it, as a
+        (numerator, denominator) pair.
+        """
+        if self.action_type == self.TYPE_SPLIT:
+            return self.ratio_to, self.ratio_from
+        if self.action_type == self.TYPE_BONUS:
+            return self.ratio_from + self.ratio_to, self.ratio_to
+        return 1, 1
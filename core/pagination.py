@@ -0,0 +1,196 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination.
+
+    Each page is fetched with a WHERE clause on the ordering columns of the
+    last row seen rather than an OFFSET, and no COUNT(*) is run, so every
+    page costs the same however deep it is. Rows inserted while a client is
+    paging never shift later pages.
+
+    The view sets the ordering with a `keyset_ordering` attribute, e.g.
+    `('-purchase_date', 'id')`. The primary key is appended when the
+    ordering doesn't already end in a unique field. An `?ordering=` from
+    OrderingFilter is honoured when all its fields are non-null columns.
+
+    Requests with a `page` parameter, and orderings keyset pagination can't
+    follow, fall back to PageNumberPagination.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    fallback_query_param = 'page'
+    fallback_class = PageNumberPagination
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.fallback = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        self.ordering = self.get_ordering(request, queryset, view)
+        if self.ordering is None or self.fallback_query_param in request.query_params:
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.fields = [self._get_field(queryset.model, name.lstrip('-')) for name in self.ordering]
+        values, reverse = self.decode_cursor(request)
+
+        ordering = [self._flip(name) for name in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_ordering(self, request, queryset, view) -> Optional[Tuple[str, ...]]:
+        """
+        Get the ordering to paginate by, or None if it can't be keyset paginated.
+        """
+        ordering = None
+        for backend in getattr(view, 'filter_backends', ()):
+            if issubclass(backend, OrderingFilter) and backend.ordering_param in request.query_params:
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, 'keyset_ordering', None) or queryset.model._meta.ordering
+        if not ordering:
+            return None
+
+        ordering = tuple(ordering)
+        model = queryset.model
+        try:
+            fields = [self._get_field(model, name.lstrip('-')) for name in ordering]
+        except FieldDoesNotExist:
+            return None
+        if any(field.null for field in fields):
+            return None
+        if not fields[-1].unique:
+            ordering += ('-pk' if ordering[-1].startswith('-') else 'pk',)
+        return ordering
+
+    def decode_cursor(self, request) -> Tuple[Optional[List[Any]], bool]:
+        """
+        Get the ordering values and direction encoded in the request's cursor.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = [field.to_python(value) for field, value in zip(self.fields, cursor['v'])]
+            if len(values) != len(self.fields):
+                raise ValueError(encoded)
+            return values, bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse: bool = False) -> str:
+        values = [self._value(row, field) for field in self.fields]
+        cursor = {'v': values, 'r': 1} if reverse else {'v': values}
+        encoded = base64.urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode('ascii'))
+        url = remove_query_param(self.base_url, self.fallback_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def _get_field(model, name: str):
+        if name == 'pk':
+            return model._meta.pk
+        field = model._meta.get_field(name)
+        if not field.concrete or field.is_relation and not field.many_to_one:
+            raise FieldDoesNotExist(name)
+        return field
+
+    @staticmethod
+    def _value(row, field) -> Any:
+        value = field.value_from_object(row)
+        return value if isinstance(value, (int, str)) else field.value_to_string(row)
+
+    @staticmethod
+    def _flip(name: str) -> str:
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    @classmethod
+    def _after(cls, ordering: Sequence[str], values: Sequence[Any]) -> Q:
+        """
+        Build the filter for rows after the given values in the ordering.
+
+        For (a, b, c) ascending this is a > x OR (a = x AND b > y) OR
+        (a = x AND b = y AND c > z).
+        """
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, values):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            column = name.lstrip('-')
+            condition |= equal & Q(**{f'{column}__{lookup}': value})
+            equal &= Q(**{column: value})
+        return condition
@@ -0,0 +1,119 @@
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from core.models import Stock, StockAlias
+from core.versioning import STOCK_TABLES, VersionedValue
+
+# Exchanges accepted in keys like NSE:INFY or INFY:NSE
+EXCHANGES = frozenset(['NSE', 'BSE', 'NFO', 'BFO', 'CDS', 'BCD', 'MCX'])
+
+
+class ResolvedSymbol(NamedTuple):
+    """
+    A symbol or alias resolved to a stock.
+    """
+    stock_id: int
+    symbol: str
+    exchange: Optional[str]
+
+
+def parse_key(key: str) -> Tuple[Optional[str], str]:
+    """
+    Split a key into its exchange and symbol.
+
+    Accepts 'INFY', 'NSE:INFY' (the Kite instrument format) and 'INFY:NSE'
+    (the format of Zerodha holdings' external IDs), in any case.
+
+    Returns:
+        Tuple of the exchange, None if the key has none, and the symbol
+    """
+    key = key.strip().upper()
+    first, sep, second = key.partition(':')
+    if sep:
+        if first in EXCHANGES:
+            return first, second.strip()
+        if second in EXCHANGES:
+            return second, first.strip()
+    return None, key
+
+
+class SymbolResolver:
+    """
+    Maps trading symbols and aliases to stocks without querying the database.
+
+    Symbols take precedence over aliases, and when several stocks share an
+    alias the oldest alias wins, like the lookups this replaces.
+    """
+    def __init__(self, symbols: Dict[str, int], aliases: Dict[str, int]):
+        """
+        Initialize the resolver.
+
+        Args:
+            symbols: Upper-case stock symbol -> stock ID
+            aliases: Upper-case alias -> stock ID
+        """
+        self._ids = {**aliases, **symbols}
+        self._symbols = {stock_id: symbol for symbol, stock_id in symbols.items()}
+
+    @classmethod
+    def from_database(cls) -> "SymbolResolver":
+        symbols = {
+            symbol.upper(): stock_id
+            for symbol, stock_id in Stock.objects.values_list('symbol', 'id').iterator()
+        }
+        aliases: Dict[str, int] = {}
+        for alias, stock_id in StockAlias.objects.order_by('id').values_list('alias', 'stock_id').iterator():
+            aliases.setdefault(alias.upper(), stock_id)
+        return cls(symbols, aliases)
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def resolve(self, key: str) -> Optional[ResolvedSymbol]:
+        """
+        Resolve a symbol, alias or exchange-qualified key.
+
+        Args:
+            key: E.g. 'INFY', 'NSE:INFY' or 'INFOSYS'
+
+        Returns:
+            The stock's ID and canonical symbol, with the exchange given in
+            the key, or None if no stock matches
+        """
+        exchange, symbol = parse_key(key)
+        stock_id = self._ids.get(symbol)
+        if stock_id is None:
+            return None
+        return ResolvedSymbol(stock_id, self._symbols[stock_id], exchange)
+
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, ResolvedSymbol]:
+        """
+        Resolve many keys at once.
+
+        Returns:
+            Dictionary of the keys that resolved to their stocks
+        """
+        resolved = {}
+        for key in keys:
+            match = self.resolve(key)
+            if match is not None:
+                resolved[key] = match
+        return resolved
+
+
+_resolver = VersionedValue(STOCK_TABLES, SymbolResolver.from_database)
+
+
+def get_symbol_resolver() -> SymbolResolver:
+    """
+    Get this process's symbol resolver, loading it if needed.
+
+    The maps are reloaded when stocks or aliases change; see VersionedValue.
+    """
+    return _resolver.get()
+
+
+def reset_symbol_resolver() -> None:
+    """
+    Drop the resolver so the next call reloads it.
+    """
+    _resolver.reset()
@@ -0,0 +1,246 @@
+import logging
+import re
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from core.models import Stock, StockAlias
+from core.versioning import STOCK_TABLES, VersionedValue
+
+logger = logging.getLogger(__name__)
+
+# Match kinds, best first
+MATCH_SYMBOL = 'symbol'
+MATCH_ALIAS = 'alias'
+MATCH_SYMBOL_PREFIX = 'symbol_prefix'
+MATCH_ALIAS_PREFIX = 'alias_prefix'
+MATCH_NAME_PREFIX = 'name_prefix'
+MATCH_FUZZY = 'fuzzy'
+
+# Share of a query's trigrams a fuzzy match must contain, and the shortest
+# query matched fuzzily
+MIN_SIMILARITY = 0.4
+FUZZY_MIN_LENGTH = 4
+
+_NON_ALNUM = re.compile(r'[^0-9A-Z]+')
+
+
+def normalize(text: str) -> str:
+    """
+    Normalize text for prefix matching: upper case, single spaces.
+    """
+    return ' '.join(text.upper().split())
+
+
+def trigrams(text: str) -> List[str]:
+    """
+    Get the distinct trigrams of text's letters and digits.
+
+    Words are padded with spaces so that their start and end count, which
+    favours matches on the beginning of symbols and names.
+    """
+    grams = set()
+    for word in _NON_ALNUM.split(text.upper()):
+        if word:
+            padded = f'  {word} '
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return sorted(grams)
+
+
+class _PrefixTable:
+    """
+    Sorted keys with the stock each one points at.
+
+    A binary search finds the first key with a given prefix, so listing
+    matches costs O(log n) plus the matches read.
+    """
+    def __init__(self, entries: Iterable[Tuple[str, int]]):
+        entries = sorted(entries)
+        self.keys = [key for key, _ in entries]
+        self.stocks = [stock for _, stock in entries]
+
+    def exact(self, query: str) -> Iterator[int]:
+        i = bisect_left(self.keys, query)
+        while i < len(self.keys) and self.keys[i] == query:
+            yield self.stocks[i]
+            i += 1
+
+    def prefixed(self, query: str) -> Iterator[int]:
+        i = bisect_left(self.keys, query)
+        while i < len(self.keys) and self.keys[i].startswith(query):
+            yield self.stocks[i]
+            i += 1
+
+
+class StockSearchIndex:
+    """
+    In-memory type-ahead index over stock symbols, aliases and names.
+
+    Results are ranked exact symbol, exact alias, symbol prefix, alias
+    prefix, then name prefix (of the name or any word in it). Queries
+    that match none of these are treated as typos and matched on shared
+    trigrams.
+    """
+    def __init__(
+        self,
+        stocks: Sequence[Tuple[int, str, str]],
+        aliases: Iterable[Tuple[int, str]] = ()
+    ):
+        """
+        Build the index.
+
+        Args:
+            stocks: (id, symbol, name) of each stock
+            aliases: (stock id, alias) pairs
+        """
+        self.ids = np.fromiter((row[0] for row in stocks), dtype='i8', count=len(stocks))
+        self.symbols = [row[1] for row in stocks]
+        self.names = [row[2] for row in stocks]
+        positions = {stock_id: i for i, stock_id in enumerate(self.ids.tolist())}
+
+        aliases = [
+            (normalize(alias), positions[stock_id])
+            for stock_id, alias in aliases if stock_id in positions
+        ]
+        self._symbols = _PrefixTable((normalize(symbol), i) for i, symbol in enumerate(self.symbols))
+        self._aliases = _PrefixTable(aliases)
+        self._names = _PrefixTable(
+            (key, i)
+            for i, name in enumerate(self.names)
+            for key in self._name_keys(normalize(name))
+        )
+
+        # Trigram -> positions of the stocks whose symbol, aliases or name
+        # contain it, plus the number of distinct trigrams per stock
+        postings: Dict[str, List[int]] = {}
+        texts: List[List[str]] = [[symbol, name] for symbol, name in zip(self.symbols, self.names)]
+        for alias, i in aliases:
+            texts[i].append(alias)
+        self.gram_counts = np.zeros(len(stocks), dtype='i4')
+        for i, parts in enumerate(texts):
+            grams = trigrams(' '.join(parts))
+            self.gram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(found, dtype='i4') for gram, found in postings.items()}
+
+    @classmethod
+    def from_database(cls) -> "StockSearchIndex":
+        """
+        Build the index from active stocks and their aliases.
+        """
+        stocks = list(Stock.objects.filter(is_active=True).values_list('id', 'symbol', 'name'))
+        aliases = StockAlias.objects.filter(stock__is_active=True).values_list('stock_id', 'alias')
+        return cls(stocks, aliases)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @staticmethod
+    def _name_keys(name: str) -> List[str]:
+        words = name.split(' ')
+        return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Find the stocks best matching what the user typed.
+
+        Args:
+            query: Text typed by the user
+            limit: Maximum number of results
+
+        Returns:
+            List of dictionaries with the stock's id, symbol and name and
+            the kind of match, best first
+        """
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+
+        found: Dict[int, str] = {}
+
+        def collect(matches: Iterator[int], kind: str) -> bool:
+            for i in matches:
+                if i not in found:
+                    found[i] = kind
+                    if len(found) >= limit:
+                        return True
+            return False
+
+        if (
+            collect(self._symbols.exact(query), MATCH_SYMBOL)
+            or collect(self._aliases.exact(query), MATCH_ALIAS)
+            or collect(self._symbols.prefixed(query), MATCH_SYMBOL_PREFIX)
+            or collect(self._aliases.prefixed(query), MATCH_ALIAS_PREFIX)
+            or collect(self._names.prefixed(query), MATCH_NAME_PREFIX)
+        ):
+            return self._results(found)
+
+        # Likely a typo; short queries share trigrams with too much to rank
+        if not found and len(query) >= FUZZY_MIN_LENGTH:
+            collect(iter(self.fuzzy(query, limit)), MATCH_FUZZY)
+        return self._results(found)
+
+    def fuzzy(self, query: str, limit: int) -> List[int]:
+        """
+        Get positions of stocks sharing the most trigrams with the query.
+        """
+        grams = trigrams(query)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not postings:
+            return []
+
+        shared = np.bincount(np.concatenate(postings), minlength=len(self))
+        candidates = np.flatnonzero(shared >= MIN_SIMILARITY * len(grams))
+        if not len(candidates):
+            return []
+
+        # Most shared trigrams first, then the stocks with the fewest
+        # trigrams overall (the closest in length)
+        order = np.lexsort((self.gram_counts[candidates], -shared[candidates]))
+        return candidates[order[:limit]].tolist()
+
+    def _results(self, found: Dict[int, str]) -> List[Dict[str, Any]]:
+        return [
+            {
+                'id': int(self.ids[i]),
+                'symbol': self.symbols[i],
+                'name': self.names[i],
+                'match': kind,
+            }
+            for i, kind in found.items()
+        ]
+
+
+def _build_index() -> StockSearchIndex:
+    started = time.perf_counter()
+    index = StockSearchIndex.from_database()
+    logger.info(
+        f"Built stock search index of {len(index)} stocks in "
+        f"{(time.perf_counter() - started) * 1000:.0f}ms"
+    )
+    return index
+
+
+_index = VersionedValue(STOCK_TABLES, _build_index)
+
+
+def get_search_index() -> StockSearchIndex:
+    """
+    Get this process's stock search index, building it if needed.
+
+    The index is rebuilt when stocks or aliases change; see VersionedValue.
+
+    Returns:
+        The StockSearchIndex
+    """
+    return _index.get()
+
+
+def reset_search_index() -> None:
+    """
+    Drop the index so the next search rebuilds it.
+    """
+    _index.reset()
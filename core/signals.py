@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Stock, StockAlias
+from core.versioning import STOCK_TABLES, bump
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+@receiver(post_save, sender=StockAlias)
+@receiver(post_delete, sender=StockAlias)
+def stock_tables_changed(sender, **kwargs):
+    """
+    Signal to rebuild the stock search index and symbol resolver after
+    stocks or aliases change.
+    """
+    bump(STOCK_TABLES)
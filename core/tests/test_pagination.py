@@ -0,0 +1,102 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from core.models import Stock
+from portfolio.models import Holding
+
+User = get_user_model()
+
+
+class KeysetPaginationTest(APITestCase):
+    """
+    Test suite for keyset pagination of the stock and holding lists.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.stocks = [
+            Stock.objects.create(symbol=f'SYM{i:02d}', name=f'Stock {i}', sector='Energy' if i % 2 else None)
+            for i in range(7)
+        ]
+
+    def walk(self, url, link='next'):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(response.data['results'])
+            url = response.data[link]
+        return seen
+
+    def test_walks_stocks_in_symbol_order(self):
+        url = reverse('stock-list') + '?page_size=3'
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        symbols = [stock['symbol'] for stock in self.walk(url)]
+
+        self.assertIsNone(response.data['previous'])
+        self.assertEqual(symbols, [stock.symbol for stock in self.stocks])
+
+    def test_previous_link(self):
+        first = self.client.get(reverse('stock-list') + '?page_size=3').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+        self.assertEqual(back['next'], first['next'])
+
+    def test_stable_under_inserts(self):
+        first = self.client.get(reverse('stock-list') + '?page_size=3').data
+        # Sorts before the next page, so would shift an offset-based page
+        Stock.objects.create(symbol='SYM00A', name='Inserted')
+
+        second = self.client.get(first['next']).data
+
+        self.assertEqual([stock['symbol'] for stock in second['results']], ['SYM03', 'SYM04', 'SYM05'])
+
+    def test_ordering_parameter(self):
+        url = reverse('stock-list') + '?page_size=2&ordering=-name'
+
+        names = [stock['name'] for stock in self.walk(url)]
+
+        self.assertEqual(names, sorted((stock.name for stock in self.stocks), reverse=True))
+
+    def test_nullable_ordering_falls_back_to_pages(self):
+        response = self.client.get(reverse('stock-list') + '?ordering=sector')
+
+        self.assertEqual(response.data['count'], 7)
+
+    def test_page_parameter_uses_page_numbers(self):
+        response = self.client.get(reverse('stock-list') + '?page=1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('stock-list') + '?cursor=not-a-cursor')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_holdings_with_equal_purchase_dates(self):
+        holdings = [
+            Holding.objects.create(
+                user=self.user, stock=stock, quantity=1, avg_price=100,
+                purchase_date=date(2023, 1, 1 + i // 3)
+            )
+            for i, stock in enumerate(self.stocks)
+        ]
+        expected = sorted(holdings, key=lambda holding: (-holding.purchase_date.toordinal(), holding.id))
+
+        seen = self.walk(reverse('holding-list') + '?page_size=2')
+
+        self.assertEqual([holding['id'] for holding in seen], [holding.id for holding in expected])
@@ -0,0 +1,85 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.models import Stock, StockAlias
+from core.resolver import ResolvedSymbol, SymbolResolver, get_symbol_resolver, parse_key, reset_symbol_resolver
+from zerodha.serializers import ZerodhaOrderRequestSerializer
+
+
+class SymbolResolverTest(SimpleTestCase):
+    """
+    Test suite for resolving symbols and aliases in memory.
+    """
+    def setUp(self):
+        self.resolver = SymbolResolver(
+            symbols={'INFY': 1, 'RELIANCE': 2, 'RIL': 3},
+            aliases={'INFOSYS': 1, 'RIL': 2}
+        )
+
+    def test_parse_key(self):
+        self.assertEqual(parse_key('INFY'), (None, 'INFY'))
+        self.assertEqual(parse_key(' nse:infy '), ('NSE', 'INFY'))
+        self.assertEqual(parse_key('INFY:BSE'), ('BSE', 'INFY'))
+        self.assertEqual(parse_key('FOO:BAR'), (None, 'FOO:BAR'))
+
+    def test_resolve(self):
+        self.assertEqual(self.resolver.resolve('infy'), ResolvedSymbol(1, 'INFY', None))
+        self.assertEqual(self.resolver.resolve('NSE:INFOSYS'), ResolvedSymbol(1, 'INFY', 'NSE'))
+        self.assertIsNone(self.resolver.resolve('TCS'))
+
+    def test_symbols_win_over_aliases(self):
+        self.assertEqual(self.resolver.resolve('RIL').stock_id, 3)
+
+    def test_resolve_many(self):
+        resolved = self.resolver.resolve_many(['INFY', 'BSE:RELIANCE', 'TCS'])
+
+        self.assertEqual(resolved, {
+            'INFY': ResolvedSymbol(1, 'INFY', None),
+            'BSE:RELIANCE': ResolvedSymbol(2, 'RELIANCE', 'BSE'),
+        })
+
+
+class SharedResolverTest(TestCase):
+    """
+    Test suite for the per-process resolver and its users.
+    """
+    def setUp(self):
+        reset_symbol_resolver()
+        self.stock = Stock.objects.create(symbol='INFY', name='Infosys Ltd.')
+        StockAlias.objects.create(stock=self.stock, alias='INFOSYS')
+
+    def tearDown(self):
+        reset_symbol_resolver()
+
+    @override_settings(STOCK_TABLES_RECHECK_SECONDS=3600)
+    def test_loaded_once_and_reloaded_on_changes(self):
+        get_symbol_resolver()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_symbol_resolver().resolve('INFOSYS').stock_id, self.stock.id)
+
+        tcs = Stock.objects.create(symbol='TCS', name='Tata Consultancy Services')
+
+        self.assertEqual(get_symbol_resolver().resolve('NSE:TCS').stock_id, tcs.id)
+
+    def order(self, **data):
+        return ZerodhaOrderRequestSerializer(data={
+            'exchange': 'NSE', 'transaction_type': 'BUY', 'quantity': 1,
+            'product': 'CNC', 'order_type': 'MARKET', **data
+        })
+
+    def test_order_symbol_normalized(self):
+        serializer = self.order(tradingsymbol='nse:infosys')
+
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['tradingsymbol'], 'INFY')
+
+    def test_order_unknown_symbol_passed_through(self):
+        serializer = self.order(tradingsymbol='NIFTY24JANFUT', exchange='NFO')
+
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['tradingsymbol'], 'NIFTY24JANFUT')
+
+    def test_order_exchange_mismatch(self):
+        serializer = self.order(tradingsymbol='BSE:INFY')
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('tradingsymbol', serializer.errors)
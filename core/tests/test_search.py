@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Stock, StockAlias
+from core.search import StockSearchIndex, get_search_index, reset_search_index
+
+User = get_user_model()
+
+
+class StockSearchIndexTest(SimpleTestCase):
+    """
+    Test suite for ranking in the stock search index.
+    """
+    def setUp(self):
+        self.index = StockSearchIndex(
+            stocks=[
+                (1, 'INFY', 'Infosys Ltd.'),
+                (2, 'INFIBEAM', 'Infibeam Avenues Ltd.'),
+                (3, 'TCS', 'Tata Consultancy Services Ltd.'),
+                (4, 'TATAMOTORS', 'Tata Motors Ltd.'),
+                (5, 'RELIANCE', 'Reliance Industries Ltd.'),
+                (6, 'M&M', 'Mahindra & Mahindra Ltd.'),
+            ],
+            aliases=[(1, 'INFOSYS'), (5, 'RIL'), (99, 'UNKNOWN')]
+        )
+
+    def search(self, query, limit=10):
+        return [(result['symbol'], result['match']) for result in self.index.search(query, limit)]
+
+    def test_exact_symbol_first(self):
+        self.assertEqual(self.search('infy')[0], ('INFY', 'symbol'))
+        self.assertEqual(self.search('m&m')[0], ('M&M', 'symbol'))
+
+    def test_alias(self):
+        self.assertEqual(self.search('RIL'), [('RELIANCE', 'alias')])
+
+    def test_ranking(self):
+        results = self.search('INF')
+
+        self.assertEqual(
+            results,
+            [('INFIBEAM', 'symbol_prefix'), ('INFY', 'symbol_prefix')]
+        )
+        self.assertEqual(self.search('Info'), [('INFY', 'alias_prefix')])
+        self.assertEqual(
+            self.search('tata'),
+            [('TATAMOTORS', 'symbol_prefix'), ('TCS', 'name_prefix')]
+        )
+
+    def test_name_word_prefix(self):
+        self.assertEqual(self.search('consult'), [('TCS', 'name_prefix')])
+        self.assertEqual(self.search('  tata   consultancy '), [('TCS', 'name_prefix')])
+
+    def test_fuzzy(self):
+        self.assertEqual(self.search('RELAINCE')[0], ('RELIANCE', 'fuzzy'))
+
+    def test_limit(self):
+        self.assertEqual(len(self.search('T', limit=1)), 1)
+        self.assertEqual(self.search(''), [])
+
+
+class StockSearchViewTest(TestCase):
+    """
+    Test suite for the stock search endpoint.
+    """
+    def setUp(self):
+        reset_search_index()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.stock = Stock.objects.create(symbol='HDFCBANK', name='HDFC Bank Ltd.')
+        Stock.objects.create(symbol='DELISTED', name='Delisted Ltd.', is_active=False)
+
+    def tearDown(self):
+        reset_search_index()
+
+    def test_search(self):
+        response = self.client.get(reverse('stock-search'), {'q': 'hdfc'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [
+            {'id': self.stock.id, 'symbol': 'HDFCBANK', 'name': 'HDFC Bank Ltd.', 'match': 'symbol_prefix'}
+        ])
+        self.assertEqual(self.client.get(reverse('stock-search'), {'q': 'DELISTED'}).data['results'], [])
+
+    def test_missing_query(self):
+        response = self.client.get(reverse('stock-search'))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(STOCK_TABLES_RECHECK_SECONDS=3600)
+    def test_rebuilt_after_changes(self):
+        index = get_search_index()
+        self.assertIs(get_search_index(), index)
+
+        StockAlias.objects.create(stock=self.stock, alias='HDFC')
+        self.assertEqual(get_search_index().search('HDFC')[0]['match'], 'alias')
+
+        # Bulk writes skip signals; they are picked up on the next recheck
+        index = get_search_index()
+        Stock.objects.bulk_create([Stock(symbol='HDFCLIFE', name='HDFC Life')])
+        self.assertIs(get_search_index(), index)
+        with override_settings(STOCK_TABLES_RECHECK_SECONDS=0):
+            self.assertEqual(len(get_search_index()), 2)
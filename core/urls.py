@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from core.views import StockViewSet, StockAliasViewSet, ClassificationViewSet
+from core.views import StockViewSet, StockAliasViewSet, ClassificationViewSet, StockSearchView
 
 router = DefaultRouter()
 router.register(r'stocks', StockViewSet)
@@ -8,5 +8,7 @@ router.register(r'stock-aliases', StockAliasViewSet)
 router.register(r'classifications', ClassificationViewSet)
 
 urlpatterns = [
+    # Before the router, which would treat "search" as a stock ID
+    path('stocks/search/', StockSearchView.as_view(), name='stock-search'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,119 @@
+import threading
+import time
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from core.models import Stock, StockAlias
+
+T = TypeVar('T')
+
+# Group of values built from the Stock and StockAlias tables
+STOCK_TABLES = 'stocks'
+
+# Group -> number of local changes, bumped by signals and bulk writes
+_versions: Dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+
+def bump(group: str) -> None:
+    """
+    Record that the tables behind a group of cached values changed.
+
+    Values in the group are rebuilt on their next use in this process.
+    """
+    with _versions_lock:
+        _versions[group] = _versions.get(group, 0) + 1
+
+
+def local_version(group: str) -> int:
+    return _versions.get(group, 0)
+
+
+def stock_tables_version() -> Tuple:
+    """
+    Fingerprint the Stock and StockAlias tables.
+
+    Any insert, update or delete through the ORM changes the row count or
+    the latest updated_at of one of them.
+    """
+    stocks = Stock.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    aliases = StockAlias.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    return stocks['count'], stocks['updated'], aliases['count'], aliases['updated']
+
+
+class VersionedValue(Generic[T]):
+    """
+    A value built from the database once per process and rebuilt when the
+    tables it comes from change.
+
+    Changes made by this process are seen at once through bump(). Changes
+    made by other processes are noticed by comparing a fingerprint of the
+    tables, at most once every STOCK_TABLES_RECHECK_SECONDS.
+    """
+    def __init__(
+        self,
+        group: str,
+        build: Callable[[], T],
+        fingerprint: Callable[[], Hashable] = stock_tables_version
+    ):
+        """
+        Initialize the value.
+
+        Args:
+            group: Name passed to bump() when the underlying tables change
+            build: Builds the value from the database
+            fingerprint: Returns something that changes with the tables
+        """
+        self.group = group
+        self.build = build
+        self.fingerprint = fingerprint
+        self._value: Optional[T] = None
+        self._local_version = -1
+        self._fingerprint: Optional[Hashable] = None
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+
+    def _is_current(self) -> bool:
+        recheck = getattr(settings, "STOCK_TABLES_RECHECK_SECONDS", 30)
+        return (
+            self._value is not None
+            and self._local_version == local_version(self.group)
+            and time.monotonic() - self._checked < recheck
+        )
+
+    def get(self) -> T:
+        """
+        Get the value, rebuilding it if its tables changed.
+        """
+        value = self._value
+        if self._is_current():
+            return value
+
+        with self._lock:
+            if self._is_current():
+                return self._value
+
+            version = local_version(self.group)
+            fingerprint = self.fingerprint()
+            if (
+                self._value is None
+                or version != self._local_version
+                or fingerprint != self._fingerprint
+            ):
+                self._value = self.build()
+            self._local_version = version
+            self._fingerprint = fingerprint
+            self._checked = time.monotonic()
+            return self._value
+
+    def reset(self) -> None:
+        """
+        Drop the value so the next get() rebuilds it.
+        """
+        with self._lock:
+            self._value = None
+            self._fingerprint = None
+            self._checked = float("-inf")
+
@@ -1,6 +1,9 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, views, status
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from core.models import Stock, StockAlias, Classification
+from core.pagination import KeysetPagination
+from core.search import get_search_index
 from core.serializers import StockSerializer, StockAliasSerializer, ClassificationSerializer
 
 
@@ -10,6 +13,8 @@ class StockViewSet(viewsets.ModelViewSet):
     """
     queryset = Stock.objects.all()
     serializer_class = StockSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('symbol',)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['sector', 'industry', 'is_active']
     search_fields = ['symbol', 'name']
@@ -37,3 +42,37 @@ class ClassificationViewSet(viewsets.ModelViewSet):
     filterset_fields = ['type']
     search_fields = ['name', 'type', 'description']
     ordering_fields = ['name', 'type']
+
+
+class StockSearchView(views.APIView):
+    """
+    API endpoint for type-ahead search of stocks by symbol, alias or name.
+    """
+    max_limit = 50
+
+    def get(self, request, format=None):
+        """
+        Return the stocks best matching the `q` parameter.
+        
+        Results come from an in-memory index ranked exact symbol, exact
+        alias, symbol prefix, alias prefix, then name prefix, with fuzzy
+        matches for queries that match nothing else.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {"error": "No search query provided"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response(
+                {"error": "limit must be a number"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, self.max_limit))
+        
+        results = get_search_index().search(query, limit)
+        return Response({"results": results}, status=status.HTTP_200_OK)
@@ -56,19 +56,30 @@ const ZerodhaIntegration: React.FC = () => {
     }
   );
   
-  // For syncing holdings
+  // For syncing holdings: the sync is queued, then polled until it finishes
   const syncHoldingsMutation = useMutation(
-    () => api.post('/zerodha/sync-holdings/'),
+    async () => {
+      let { data: job } = await api.post('/zerodha/sync-holdings/');
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        ({ data: job } = await api.get(`/zerodha/sync-jobs/${job.id}/`));
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || job.result?.message);
+      }
+      return job.result;
+    },
     {
-      onSuccess: (response) => {
-        const { created, updated, total } = response.data;
+      onSuccess: (result) => {
+        const { created, updated, total } = result;
         setStatus('success');
         setStatusMessage(`Holdings synced successfully! Created: ${created}, Updated: ${updated}, Total: ${total}`);
       },
       onError: (error: any) => {
         setStatus('error');
         setStatusMessage(
-          error.response?.data?.message ||
+          error.response?.data?.error ||
+          error.message ||
           'Failed to sync holdings. Please check your Zerodha connection.'
         );
       },
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from portfolio.models import Holding, HoldingClass
+from portfolio.models import (
+    Holding, HoldingClass, Lot, LotMatch, PortfolioSnapshot, PortfolioSummary, Position, Transaction,
+    Watchlist, WatchlistItem, WatchlistQuote
+)
 
 
 @admin.register(Holding)
@@ -21,3 +24,79 @@ class HoldingClassAdmin(admin.ModelAdmin):
         'holding__user__username',
         'holding__user__email'
     )
+
+
+@admin.register(PortfolioSummary)
+class PortfolioSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_value', 'total_holdings', 'updated_at')
+    search_fields = ('user__username', 'user__email')
+    readonly_fields = (
+        'user', 'total_value', 'total_holdings', 'sectors', 'classifications',
+        'top_holdings', 'created_at', 'updated_at'
+    )
+
+
+@admin.register(Transaction)
+class TransactionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'stock', 'transaction_type', 'quantity', 'price', 'trade_date')
+    list_filter = ('transaction_type', 'trade_date')
+    search_fields = ('stock__symbol', 'stock__name', 'user__username', 'user__email')
+    date_hierarchy = 'trade_date'
+
+
+@admin.register(Lot)
+class LotAdmin(admin.ModelAdmin):
+    list_display = ('user', 'stock', 'acquired_on', 'quantity', 'open_quantity', 'cost_price')
+    list_filter = ('acquired_on',)
+    search_fields = ('stock__symbol', 'user__username', 'user__email')
+    readonly_fields = (
+        'user', 'stock', 'transaction', 'acquired_on', 'quantity', 'open_quantity',
+        'cost_price', 'created_at', 'updated_at'
+    )
+
+
+@admin.register(LotMatch)
+class LotMatchAdmin(admin.ModelAdmin):
+    list_display = ('lot', 'sell', 'quantity', 'sale_price', 'realized_pnl')
+    search_fields = ('lot__stock__symbol', 'lot__user__username')
+    readonly_fields = ('lot', 'sell', 'quantity', 'sale_price', 'realized_pnl', 'created_at', 'updated_at')
+
+
+@admin.register(Position)
+class PositionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'stock', 'quantity', 'average_cost', 'realized_pnl')
+    search_fields = ('stock__symbol', 'user__username', 'user__email')
+    readonly_fields = ('user', 'stock', 'quantity', 'average_cost', 'realized_pnl', 'created_at', 'updated_at')
+
+
+@admin.register(PortfolioSnapshot)
+class PortfolioSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'market_value', 'cost', 'unrealized_pnl', 'total_holdings')
+    list_filter = ('date',)
+    search_fields = ('user__username', 'user__email')
+    date_hierarchy = 'date'
+    readonly_fields = (
+        'user', 'date', 'market_value', 'cost', 'unrealized_pnl', 'total_holdings',
+        'priced_holdings', 'holdings', 'created_at', 'updated_at'
+    )
+
+
+class WatchlistItemInline(admin.TabularInline):
+    model = WatchlistItem
+    raw_id_fields = ('stock',)
+    extra = 0
+
+
+@admin.register(Watchlist)
+class WatchlistAdmin(admin.ModelAdmin):
+    list_display = ('user', 'name', 'is_active', 'updated_at')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'user__username', 'user__email')
+    inlines = [WatchlistItemInline]
+
+
+@admin.register(WatchlistQuote)
+class WatchlistQuoteAdmin(admin.ModelAdmin):
+    list_display = ('instrument', 'last_price', 'close', 'fetched_at')
+    search_fields = ('instrument',)
+    readonly_fields = ('instrument', 'last_price', 'close', 'fetched_at', 'created_at', 'updated_at')
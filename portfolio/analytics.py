@@ -0,0 +1,372 @@
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Sum, When
+
+from portfolio.models import PortfolioSnapshot, Transaction
+from zerodha.candles import daily_closes, get_candle_store
+from zerodha.instruments import get_instrument_master
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+# Calendar days covered by each window, ending on the latest snapshot
+WINDOWS = {
+    '1m': 30,
+    '3m': 91,
+    '6m': 182,
+    '1y': 365,
+    '3y': 1095,
+    '5y': 1826,
+    'all': None,
+}
+DEFAULT_WINDOW = '1y'
+
+# Trading days in each rolling volatility figure
+ROLLING_DAYS = 21
+
+_GENERATION_KEY = 'portfolio-analytics:generation'
+
+
+def xirr(days: np.ndarray, amounts: np.ndarray) -> Optional[float]:
+    """
+    Get the annual rate at which dated cash flows have zero net present value.
+
+    The rate is solved for as x = log(1 + rate): NPV is evaluated over a
+    grid of rates at once to bracket the root, then refined with Newton
+    steps that fall back to bisection if they leave the bracket.
+
+    Args:
+        days: Dates of the flows as datetime64[D]
+        amounts: Flows; money put in is negative, money taken out positive
+
+    Returns:
+        The rate, or None if the flows have no sign change
+    """
+    amounts = np.asarray(amounts, dtype='f8')
+    if len(amounts) < 2 or not (amounts > 0).any() or not (amounts < 0).any():
+        return None
+    years = (days - days.min()).astype('f8') / 365.0
+    # Most days have no flow
+    years, amounts = years[amounts != 0], amounts[amounts != 0]
+
+    def npv(x):
+        return np.exp(-np.multiply.outer(x, years)) @ amounts
+
+    # Rates from -99.995% up; short windows annualize to very large rates
+    grid = np.linspace(-10.0, 20.0, 601)
+    values = npv(grid)
+    crossings = np.flatnonzero(np.sign(values[:-1]) * np.sign(values[1:]) <= 0)
+    if not len(crossings):
+        return None
+    low, high = grid[crossings[0]], grid[crossings[0] + 1]
+    low_sign = np.sign(values[crossings[0]])
+
+    x = (low + high) / 2
+    for _ in range(100):
+        discounted = np.exp(-x * years) * amounts
+        value, slope = discounted.sum(), -(years * discounted).sum()
+        if value == 0:
+            break
+        if np.sign(value) == low_sign:
+            low = x
+        else:
+            high = x
+        step = x - value / slope if slope else np.nan
+        previous, x = x, (step if low < step < high else (low + high) / 2)
+        if abs(x - previous) < 1e-14 * max(1.0, abs(x)):
+            break
+    return float(np.expm1(x))
+
+
+def daily_returns(values: np.ndarray, flows: np.ndarray) -> np.ndarray:
+    """
+    Get each day's return net of money added or withdrawn that day.
+
+    Flows are taken to arrive at the end of the day, so a day's return is
+    (value - flow) / previous value - 1. Days after a zero value return 0.
+
+    Args:
+        values: Portfolio value per day
+        flows: Money added (positive) or withdrawn (negative) per day
+
+    Returns:
+        Array one shorter than values
+    """
+    previous = values[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = (values[1:] - flows[1:]) / previous - 1.0
+    return np.where(previous > 0, returns, 0.0)
+
+
+def time_weighted_return(returns: np.ndarray) -> float:
+    return float(np.prod(1.0 + returns) - 1.0)
+
+
+def annualize(total: float, calendar_days: int) -> Optional[float]:
+    if calendar_days <= 0 or total <= -1:
+        return None
+    return float((1.0 + total) ** (365.0 / calendar_days) - 1.0)
+
+
+def max_drawdown(returns: np.ndarray) -> Tuple[float, int, int]:
+    """
+    Get the largest fall of the growth of 1 invested from a previous peak.
+
+    Returns:
+        (drawdown as a negative fraction, index of the peak, index of the
+        trough), where index 0 is the day before the first return
+    """
+    growth = np.concatenate([[1.0], np.cumprod(1.0 + returns)])
+    peaks = np.maximum.accumulate(growth)
+    drawdowns = growth / peaks - 1.0
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(growth[:trough + 1]))
+    return float(drawdowns[trough]), peak, trough
+
+
+def rolling_volatility(returns: np.ndarray, window: int = ROLLING_DAYS) -> np.ndarray:
+    """
+    Get the annualized standard deviation of each window of returns.
+
+    Returns:
+        Array with one value per full window, ending on each return from
+        the window-th onwards
+    """
+    if len(returns) < window or window < 2:
+        return np.empty(0)
+    sums = np.concatenate([[0.0], np.cumsum(returns)])
+    squares = np.concatenate([[0.0], np.cumsum(returns * returns)])
+    total = sums[window:] - sums[:-window]
+    total_squares = squares[window:] - squares[:-window]
+    variance = (total_squares - total * total / window) / (window - 1)
+    return np.sqrt(np.maximum(variance, 0.0) * TRADING_DAYS)
+
+
+def sharpe_ratio(returns: np.ndarray, risk_free: float) -> Optional[float]:
+    """
+    Get the annualized Sharpe ratio of daily returns.
+
+    Args:
+        returns: Daily returns
+        risk_free: Annual risk-free rate
+    """
+    if len(returns) < 2:
+        return None
+    deviation = returns.std(ddof=1)
+    if not deviation:
+        return None
+    excess = returns - ((1.0 + risk_free) ** (1.0 / TRADING_DAYS) - 1.0)
+    return float(excess.mean() / deviation * np.sqrt(TRADING_DAYS))
+
+
+def beta(returns: np.ndarray, benchmark_returns: np.ndarray) -> Optional[float]:
+    """
+    Get the beta of returns against a benchmark's returns on the same days,
+    skipping days either is missing.
+    """
+    both = np.isfinite(returns) & np.isfinite(benchmark_returns)
+    if both.sum() < 2:
+        return None
+    ours, theirs = returns[both], benchmark_returns[both]
+    variance = theirs.var(ddof=1)
+    if not variance:
+        return None
+    return float(np.cov(ours, theirs, ddof=1)[0, 1] / variance)
+
+
+def value_series(user_id: int, start: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get a user's snapshot dates, market values and costs from start on.
+    """
+    snapshots = PortfolioSnapshot.objects.filter(user_id=user_id)
+    if start is not None:
+        snapshots = snapshots.filter(date__gte=start)
+    rows = list(snapshots.order_by('date').values_list('date', 'market_value', 'cost'))
+    days = np.array([row[0] for row in rows], dtype='M8[D]')
+    values = np.fromiter((row[1] for row in rows), dtype='f8', count=len(rows))
+    costs = np.fromiter((row[2] for row in rows), dtype='f8', count=len(rows))
+    return days, values, costs
+
+
+def daily_flows(user_id: int, days: np.ndarray, costs: np.ndarray) -> np.ndarray:
+    """
+    Get the money added to (positive) or taken out of the portfolio that
+    arrived on each snapshot day.
+
+    Flows are net trade amounts: buys cost price plus fees, sells return
+    price less fees. A trade between snapshots counts on the next one.
+    Users who record no trades fall back to the change in cost, which
+    treats sold holdings as withdrawn at cost.
+    """
+    flows = np.zeros(len(days))
+    if len(days) < 2:
+        return flows
+    if not Transaction.objects.filter(user_id=user_id).exists():
+        flows[1:] = np.diff(costs)
+        return flows
+
+    amount = ExpressionWrapper(F('quantity') * F('price'), output_field=DecimalField())
+    rows = list(
+        Transaction.objects.filter(
+            user_id=user_id, trade_date__gt=days[0].item(), trade_date__lte=days[-1].item()
+        )
+        .values('trade_date')
+        .annotate(flow=Sum(Case(
+            When(transaction_type=Transaction.TYPE_BUY, then=amount + F('fees')),
+            default=F('fees') - amount,
+            output_field=DecimalField()
+        )))
+        .values_list('trade_date', 'flow')
+    )
+    if rows:
+        trade_days = np.array([row[0] for row in rows], dtype='M8[D]')
+        amounts = np.fromiter((row[1] for row in rows), dtype='f8', count=len(rows))
+        flows += np.bincount(np.searchsorted(days, trade_days), weights=amounts, minlength=len(days))
+    return flows
+
+
+def benchmark_closes(days: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Get the benchmark index's close on each day from stored daily candles.
+
+    Returns:
+        Closes (NaN where missing), or None if the benchmark is unknown
+    """
+    master = get_instrument_master()
+    if master is None:
+        return None
+    token = int(master.tokens_for_keys([getattr(settings, "ANALYTICS_BENCHMARK", "NSE:NIFTY 50")])[0])
+    if token < 0:
+        return None
+    return daily_closes(get_candle_store(), [token], days)[0]
+
+
+def compute(user_id: int, window: str = DEFAULT_WINDOW) -> Dict[str, Any]:
+    """
+    Compute a user's performance over a window of daily snapshots.
+
+    Args:
+        user_id: User to report on
+        window: One of WINDOWS
+
+    Returns:
+        Dictionary of the window's dates and values, xirr, twr and its
+        annualized rate, max_drawdown with its peak and trough dates,
+        volatility, sharpe, beta against the benchmark, and
+        rolling_volatility as a list of dates and values. Figures that
+        need more data than the window has are None.
+
+    Raises:
+        ValueError: If window is not one of WINDOWS
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window: {window}")
+
+    latest = PortfolioSnapshot.objects.filter(user_id=user_id).order_by('-date').values_list('date', flat=True).first()
+    start = None if latest is None or WINDOWS[window] is None else latest - timedelta(days=WINDOWS[window])
+    days, values, costs = value_series(user_id, start)
+    result = {
+        'window': window,
+        'start': None, 'end': None, 'days': len(days),
+        'start_value': None, 'end_value': None, 'net_flows': None,
+        'xirr': None, 'twr': None, 'twr_annualized': None,
+        'max_drawdown': None, 'drawdown_peak': None, 'drawdown_trough': None,
+        'volatility': None, 'sharpe': None, 'beta': None,
+        'benchmark': getattr(settings, "ANALYTICS_BENCHMARK", "NSE:NIFTY 50"),
+        'rolling_volatility': [],
+    }
+    if not len(days):
+        return result
+
+    flows = daily_flows(user_id, days, costs)
+    result.update({
+        'start': days[0].item(),
+        'end': days[-1].item(),
+        'start_value': float(values[0]),
+        'end_value': float(values[-1]),
+        'net_flows': float(flows.sum()),
+    })
+    if len(days) < 2:
+        return result
+
+    # Starting holdings count as invested on the first day, and what is
+    # held at the end as taken out on the last
+    amounts = -flows
+    amounts[0] -= values[0]
+    amounts[-1] += values[-1]
+    returns = daily_returns(values, flows)
+    twr = time_weighted_return(returns)
+    drawdown, peak, trough = max_drawdown(returns)
+    rolling = rolling_volatility(returns)
+
+    closes = benchmark_closes(days)
+    if closes is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['beta'] = beta(returns, closes[1:] / closes[:-1] - 1.0)
+
+    result.update({
+        'xirr': xirr(days, amounts),
+        'twr': twr,
+        'twr_annualized': annualize(twr, int((days[-1] - days[0]).astype(int))),
+        'max_drawdown': drawdown,
+        'drawdown_peak': days[peak].item(),
+        'drawdown_trough': days[trough].item(),
+        'volatility': float(returns.std(ddof=1) * np.sqrt(TRADING_DAYS)) if len(returns) > 1 else None,
+        'sharpe': sharpe_ratio(returns, getattr(settings, "ANALYTICS_RISK_FREE_RATE", 0.065)),
+        'rolling_volatility': [
+            {'date': day, 'value': float(value)}
+            for day, value in zip(days[ROLLING_DAYS:].tolist(), rolling)
+        ],
+    })
+    return result
+
+
+def _cache():
+    return caches[getattr(settings, "ANALYTICS_CACHE", "default")]
+
+
+def _cache_key(user_id: int, window: str) -> str:
+    generation = _cache().get(_GENERATION_KEY, 0)
+    return f"portfolio-analytics:{generation}:{user_id}:{window}"
+
+
+def get_analytics(user_id: int, window: str = DEFAULT_WINDOW) -> Dict[str, Any]:
+    """
+    Get a user's performance over a window, cached until their snapshots
+    or trades change.
+
+    Raises:
+        ValueError: If window is not one of WINDOWS
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window: {window}")
+    key = _cache_key(user_id, window)
+    result = _cache().get(key)
+    if result is None:
+        result = compute(user_id, window)
+        _cache().set(key, result, getattr(settings, "ANALYTICS_CACHE_TIMEOUT", 86400))
+    return result
+
+
+def invalidate(user_ids: Iterable[int]) -> None:
+    """
+    Drop the cached analytics of users, for every window.
+    """
+    _cache().delete_many([_cache_key(user_id, window) for user_id in set(user_ids) for window in WINDOWS])
+
+
+def invalidate_all() -> None:
+    """
+    Drop every cached analytics result, e.g. after benchmark candles are loaded.
+    """
+    cache = _cache()
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 1, None)
@@ -0,0 +1,200 @@
+import logging
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Min, Q, Value
+from django.utils import timezone
+
+from core.models import CorporateAction
+from portfolio import analytics, lots, summaries, tax
+from portfolio.models import Holding, Transaction
+from zerodha.candles import INTERVALS, CandleStore, get_candle_store, to_epoch
+from zerodha.instruments import get_instrument_master, today_ist
+from zerodha.quote_cache import IST
+
+logger = logging.getLogger(__name__)
+
+# Exchanges whose candles are adjusted for a stock's actions
+EXCHANGES = ('NSE', 'BSE')
+
+FACTOR_PLACES = Decimal('0.0000000001')
+
+# Holding sources refreshed from a broker, whose holdings show the new
+# shares once synced after the ex-date
+SYNCED_SOURCES = ('zerodha',)
+
+
+def _scaled(field: str, numerator: int, denominator: int, places: int) -> ExpressionWrapper:
+    # One multiplier rather than a division, which SQLite would do in
+    # integers for whole-number values
+    return ExpressionWrapper(
+        F(field) * Value(Decimal(numerator) / Decimal(denominator)),
+        output_field=DecimalField(max_digits=15, decimal_places=places)
+    )
+
+
+def candle_key(action: CorporateAction) -> str:
+    return f"corporate-action:{action.pk}"
+
+
+def dividend_factor(store: CandleStore, token: int, ex_date: date, dividend: Decimal) -> Optional[float]:
+    """
+    Get the factor that takes a dividend out of earlier prices: one less
+    the dividend's share of the last close before the ex-date.
+    """
+    closes = store.read(token, 'day', end=to_epoch(ex_date) - 1)['close']
+    if not len(closes) or closes[-1] <= float(dividend):
+        return None
+    return 1.0 - float(dividend) / float(closes[-1])
+
+
+def adjust_candles(action: CorporateAction, store: Optional[CandleStore] = None) -> Tuple[int, Optional[float]]:
+    """
+    Scale the stored candles of an action's stock from before its ex-date,
+    on every exchange and interval.
+
+    Series that already have the adjustment are skipped, so this can be
+    retried after a failure.
+
+    Returns:
+        Number of candles adjusted, and the price factor used (the first
+        exchange's, for dividends)
+    """
+    store = store or get_candle_store()
+    master = get_instrument_master()
+    numerator, denominator = action.share_ratio
+    price_factor = denominator / numerator if action.action_type != CorporateAction.TYPE_DIVIDEND else None
+    if master is None:
+        return 0, price_factor
+
+    tokens = master.tokens_for_keys([f"{exchange}:{action.stock.symbol}" for exchange in EXCHANGES])
+    recorded = price_factor
+    adjusted = 0
+    for token in tokens[tokens >= 0].tolist():
+        factor = price_factor
+        if action.action_type == CorporateAction.TYPE_DIVIDEND:
+            factor = dividend_factor(store, token, action.ex_date, action.dividend or Decimal(0))
+            if factor is None:
+                continue
+            recorded = factor if recorded is None else recorded
+        for interval in INTERVALS:
+            adjusted += store.adjust(
+                token, interval, action.ex_date, factor, numerator / denominator, candle_key(action)
+            )
+    return adjusted, recorded
+
+
+def apply_corporate_action(action: CorporateAction, store: Optional[CandleStore] = None) -> CorporateAction:
+    """
+    Apply a corporate action to everything recorded before its ex-date.
+
+    Splits and bonuses scale quantities up and prices down across every
+    user in one UPDATE per table: holdings bought before the ex-date
+    (synced ones only if not synced since, as those already show the new
+    shares), and trades before the ex-date, whose lots are then rebuilt. Summaries of
+    the users holding the stock are updated with the change in value (from
+    rounding), and their cached tax reports and analytics are dropped.
+    Dividends only adjust stored candles.
+
+    Args:
+        action: The action to apply
+        store: Candle store to adjust
+
+    Returns:
+        The action, with its factors and counts recorded
+    """
+    if action.applied_at is not None:
+        return action
+    candles, price_factor = adjust_candles(action, store)
+    numerator, denominator = action.share_ratio
+    ex_start = datetime.combine(action.ex_date, time.min, tzinfo=IST)
+    now = timezone.now()
+
+    changes: List[Tuple[int, int, Optional[str], Decimal, Decimal]] = []
+    first_trades = {}
+    with transaction.atomic():
+        action = CorporateAction.objects.select_for_update().select_related('stock').get(pk=action.pk)
+        if action.applied_at is not None:
+            return action
+
+        if numerator != denominator:
+            # Applying an action stamps its holdings with its applied_at, so
+            # a synced holding whose last change is one of those is still in
+            # the shares of before the ex-date. Other holdings are never
+            # re-synced, so later edits say nothing about their shares
+            adjusted_at = CorporateAction.objects.filter(
+                stock_id=action.stock_id, applied_at__isnull=False
+            ).values('applied_at')
+            holdings = Holding.objects.filter(
+                ~Q(source__in=SYNCED_SOURCES) | Q(updated_at__lt=ex_start) | Q(updated_at__in=adjusted_at),
+                stock_id=action.stock_id, purchase_date__lt=action.ex_date
+            )
+            before = {
+                row[0]: row[1:]
+                for row in holdings.filter(closed_at__isnull=True).values_list('id', 'user_id', 'quantity', 'avg_price')
+            }
+            action.holdings_adjusted = holdings.update(
+                quantity=_scaled('quantity', numerator, denominator, 4),
+                avg_price=_scaled('avg_price', denominator, numerator, 2),
+                updated_at=now
+            )
+            for holding_id, quantity, avg_price in (
+                Holding.objects.filter(id__in=list(before)).values_list('id', 'quantity', 'avg_price')
+            ):
+                user_id, old_quantity, old_price = before[holding_id]
+                changes.append((
+                    holding_id, user_id, action.stock.sector, old_quantity * old_price, quantity * avg_price
+                ))
+
+            trades = Transaction.objects.filter(stock_id=action.stock_id, trade_date__lt=action.ex_date)
+            first_trades = dict(trades.values('user_id').annotate(first=Min('trade_date')).values_list('user_id', 'first'))
+            action.transactions_adjusted = trades.update(
+                quantity=_scaled('quantity', numerator, denominator, 4),
+                price=_scaled('price', denominator, numerator, 2),
+                updated_at=now
+            )
+            if action.transactions_adjusted:
+                lots.rebuild_lots(stock_id=action.stock_id)
+
+        action.quantity_factor = (Decimal(numerator) / Decimal(denominator)).quantize(FACTOR_PLACES)
+        if numerator != denominator:
+            action.price_factor = (Decimal(denominator) / Decimal(numerator)).quantize(FACTOR_PLACES)
+        elif price_factor is not None:
+            action.price_factor = Decimal(repr(price_factor)).quantize(FACTOR_PLACES)
+        action.candles_adjusted = candles
+        action.applied_at = now
+        action.save()
+
+    summaries.apply_value_changes(changes)
+    for user_id, first in first_trades.items():
+        tax.invalidate(user_id, first)
+    analytics.invalidate(set(first_trades) | {change[1] for change in changes})
+    logger.info(
+        f"Applied {action}: {action.holdings_adjusted} holdings, "
+        f"{action.transactions_adjusted} trades, {candles} candles"
+    )
+    return action
+
+
+def apply_pending(day: Optional[date] = None, stock_ids: Optional[List[int]] = None) -> List[CorporateAction]:
+    """
+    Apply every corporate action not yet applied whose ex-date has come,
+    oldest first.
+
+    Args:
+        day: Apply actions with ex-dates up to this day; defaults to today (IST)
+        stock_ids: Only apply actions of these stocks
+
+    Returns:
+        The actions applied
+    """
+    pending = CorporateAction.objects.filter(applied_at__isnull=True, ex_date__lte=day or today_ist())
+    if stock_ids:
+        pending = pending.filter(stock_id__in=stock_ids)
+    store = get_candle_store()
+    return [
+        apply_corporate_action(action, store)
+        for action in pending.select_related('stock').order_by('ex_date', 'id')
+    ]
@@ -0,0 +1,297 @@
+import csv
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from portfolio.models import Holding, HoldingClass
+from portfolio.snapshots import candle_prices
+from portfolio.tax import _Echo
+from portfolio.valuation import PriceSource
+from zerodha.instruments import holding_instrument_key, today_ist
+from zerodha.ticker import get_live_quotes
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+FORMAT_PARQUET = 'parquet'
+FORMATS = (FORMAT_CSV, FORMAT_NDJSON, FORMAT_PARQUET)
+CONTENT_TYPES = {
+    FORMAT_CSV: 'text/csv',
+    FORMAT_NDJSON: 'application/x-ndjson',
+    FORMAT_PARQUET: 'application/vnd.apache.parquet',
+}
+
+# Rows fetched, priced and encoded at a time; also the Parquet row group size
+CHUNK_SIZE = 2000
+
+FIELDS = (
+    ('id', 'id'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('symbol', 'stock__symbol'),
+    ('name', 'stock__name'),
+    ('sector', 'stock__sector'),
+    ('quantity', 'quantity'),
+    ('avg_price', 'avg_price'),
+    ('purchase_date', 'purchase_date'),
+    ('source', 'source'),
+    ('external_id', 'external_id'),
+    ('closed_at', 'closed_at'),
+)
+CLASSIFICATION_COLUMNS = ('classifications',)
+MARKET_COLUMNS = ('cost', 'last_price', 'market_value', 'unrealized_pnl')
+
+
+def columns(classifications: bool = False, market_values: bool = False) -> List[str]:
+    """
+    Get the exported columns, in order.
+    """
+    names = [name for name, _ in FIELDS]
+    if classifications:
+        names.extend(CLASSIFICATION_COLUMNS)
+    if market_values:
+        names.extend(MARKET_COLUMNS)
+    return names
+
+
+def export_prices() -> PriceSource:
+    """
+    Build a price source for exports that never calls Kite: the ticker's
+    shared table first, then the last stored daily close.
+    """
+    closes = candle_prices(today_ist())
+
+    def fetch(instruments: List[str]) -> Dict[str, Tuple[float, Optional[float]]]:
+        prices = {
+            instrument: (quote["last_price"], quote["close"] or None)
+            for instrument, quote in get_live_quotes(instruments).items()
+        }
+        missing = [instrument for instrument in instruments if instrument not in prices]
+        if missing:
+            prices.update(closes(missing))
+        return prices
+
+    return fetch
+
+
+def _classifications(holding_ids: List[int]) -> Dict[int, List[str]]:
+    names: Dict[int, List[str]] = {}
+    for holding_id, name in (
+        HoldingClass.objects.filter(holding_id__in=holding_ids)
+        .order_by('classification__type', 'classification__name')
+        .values_list('holding_id', 'classification__name')
+    ):
+        names.setdefault(holding_id, []).append(name)
+    return names
+
+
+def iter_holdings(
+    user_ids: Optional[List[int]] = None,
+    classifications: bool = False,
+    market_values: bool = False,
+    prices: Optional[PriceSource] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Read holdings for export a chunk at a time.
+
+    Rows come straight from a values() iterator, so memory stays the same
+    however many holdings there are. Classifications take one query per
+    chunk, and prices are looked up once per instrument.
+
+    Args:
+        user_ids: Only export these users' holdings; None for every user
+        classifications: Add each holding's classification names
+        market_values: Add cost, last price, market value and unrealized
+            P&L; holdings without a price are valued at cost, and closed
+            holdings have no market value
+        prices: Where market prices come from; defaults to export_prices()
+        chunk_size: Rows per chunk
+
+    Yields:
+        Lists of row dictionaries keyed by column
+    """
+    holdings = Holding.objects.all()
+    if user_ids is not None:
+        holdings = holdings.filter(user_id__in=user_ids)
+    rows = holdings.order_by('user_id', 'id').values_list(*(field for _, field in FIELDS)).iterator(chunk_size)
+    names = [name for name, _ in FIELDS]
+    if market_values:
+        prices = prices or export_prices()
+    known: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+
+    while True:
+        chunk = [dict(zip(names, row)) for row in islice(rows, chunk_size)]
+        if not chunk:
+            return
+        if classifications:
+            found = _classifications([row['id'] for row in chunk])
+            for row in chunk:
+                row['classifications'] = found.get(row['id'], [])
+        if market_values:
+            instruments = [
+                holding_instrument_key(row['symbol'], row['source'], row['external_id']) for row in chunk
+            ]
+            missing = sorted(set(instruments) - set(known))
+            if missing:
+                quotes = prices(missing)
+                known.update({instrument: quotes.get(instrument, (None, None)) for instrument in missing})
+            for row, instrument in zip(chunk, instruments):
+                _add_market_value(row, known[instrument][0])
+        yield chunk
+
+
+def _add_market_value(row: Dict[str, Any], last_price: Optional[float]) -> None:
+    quantity, avg_price = float(row['quantity']), float(row['avg_price'])
+    row['cost'] = round(quantity * avg_price, 2)
+    if row['closed_at'] is not None:
+        row.update(last_price=None, market_value=None, unrealized_pnl=None)
+        return
+    price = avg_price if last_price is None else float(last_price)
+    row['last_price'] = None if last_price is None else round(price, 2)
+    row['market_value'] = round(quantity * price, 2)
+    row['unrealized_pnl'] = round(row['market_value'] - row['cost'], 2)
+
+
+def iter_csv(chunks: Iterable[List[Dict[str, Any]]], names: List[str]) -> Iterator[str]:
+    """
+    Encode exported rows as CSV, header first and one string per chunk.
+    Classifications are joined with semicolons.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(names)
+    for chunk in chunks:
+        lines = []
+        for row in chunk:
+            if 'classifications' in row:
+                row = {**row, 'classifications': '; '.join(row['classifications'])}
+            lines.append(writer.writerow([row[name] for name in names]))
+        yield ''.join(lines)
+
+
+def iter_ndjson(chunks: Iterable[List[Dict[str, Any]]], names: List[str]) -> Iterator[str]:
+    """
+    Encode exported rows as JSON Lines, one string per chunk. Decimals are
+    written as strings so no precision is lost.
+    """
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for chunk in chunks:
+        yield ''.join(encoder.encode({name: row[name] for name in names}) + '\n' for row in chunk)
+
+
+class _Spool:
+    """
+    Write-only file that hands its contents back as they are taken.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.buffer.extend(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def parquet_schema(names: List[str]):
+    """
+    Get the Parquet schema of the given export columns.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs pyarrow")
+    types = {
+        'id': pyarrow.int64(),
+        'user_id': pyarrow.int64(),
+        'quantity': pyarrow.decimal128(15, 4),
+        'avg_price': pyarrow.decimal128(15, 2),
+        'purchase_date': pyarrow.date32(),
+        'closed_at': pyarrow.timestamp('us', tz='UTC'),
+        'classifications': pyarrow.list_(pyarrow.string()),
+        'cost': pyarrow.float64(),
+        'last_price': pyarrow.float64(),
+        'market_value': pyarrow.float64(),
+        'unrealized_pnl': pyarrow.float64(),
+    }
+    return pyarrow.schema([(name, types.get(name, pyarrow.string())) for name in names])
+
+
+def iter_parquet(chunks: Iterable[List[Dict[str, Any]]], names: List[str]) -> Iterator[bytes]:
+    """
+    Encode exported rows as a Parquet file with one row group per chunk,
+    handing back each row group as soon as it is written.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    schema = parquet_schema(names)
+    spool = _Spool()
+    writer = pyarrow.parquet.ParquetWriter(spool, schema)
+    try:
+        for chunk in chunks:
+            writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
+            yield spool.take()
+    finally:
+        writer.close()
+    yield spool.take()
+
+
+def iter_export(
+    output: str,
+    user_ids: Optional[List[int]] = None,
+    classifications: bool = False,
+    market_values: bool = False,
+    prices: Optional[PriceSource] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[Any]:
+    """
+    Stream holdings in one of FORMATS.
+
+    Args:
+        output: One of FORMATS
+        user_ids, classifications, market_values, prices, chunk_size: As for
+            iter_holdings
+
+    Returns:
+        Iterator of str (CSV, NDJSON) or bytes (Parquet)
+
+    Raises:
+        ValueError: If the format is unknown
+        RuntimeError: If Parquet is asked for without pyarrow installed
+    """
+    names = columns(classifications, market_values)
+    if output == FORMAT_PARQUET:
+        # Check now rather than when the response starts streaming
+        parquet_schema(names)
+    elif output not in FORMATS:
+        raise ValueError(f"output must be one of {', '.join(FORMATS)}")
+
+    chunks = iter_holdings(user_ids, classifications, market_values, prices, chunk_size)
+    if output == FORMAT_CSV:
+        return iter_csv(chunks, names)
+    if output == FORMAT_NDJSON:
+        return iter_ndjson(chunks, names)
+    return iter_parquet(chunks, names)
@@ -0,0 +1,382 @@
+import codecs
+import csv
+import logging
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.resolver import get_symbol_resolver
+from portfolio.models import Holding
+from portfolio.summaries import refresh_summary
+
+try:
+    import openpyxl
+except ImportError:  # XLSX import is optional
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+# Accepted headers for each field, compared lower-cased with spaces as
+# underscores, so exports of most brokers load without editing
+HEADERS = {
+    'symbol': ('symbol', 'tradingsymbol', 'trading_symbol', 'scrip', 'stock'),
+    'quantity': ('quantity', 'qty', 'shares'),
+    'avg_price': ('avg_price', 'average_price', 'avg._price', 'price', 'buy_price', 'rate'),
+    'purchase_date': ('purchase_date', 'trade_date', 'buy_date', 'date'),
+    'notes': ('notes', 'remarks'),
+    'external_id': ('external_id', 'trade_id', 'order_id'),
+}
+REQUIRED = ('symbol', 'quantity', 'avg_price', 'purchase_date')
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d-%b-%Y', '%d %b %Y')
+
+# Sources an import may record. Synced sources such as 'zerodha' are left
+# out: the next sync would update or close holdings recorded under them
+SOURCES = ('import', 'manual', 'broker')
+
+CHUNK_SIZE = 1000
+# Row errors reported in full; later ones are only counted
+MAX_ERRORS = 1000
+
+_QUANTITY = Decimal('0.0001')
+_PRICE = Decimal('0.01')
+
+
+class ImportFileError(ValueError):
+    """
+    Raised when a file cannot be imported at all, e.g. a missing column.
+    """
+
+
+class RowError(NamedTuple):
+    """
+    Why one row of an import was rejected.
+    """
+    row: int
+    field: Optional[str]
+    error: str
+
+
+class ImportReport:
+    """
+    Outcome of an import: rows read and created, and the rows rejected.
+    """
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[RowError] = []
+        self.seconds = 0.0
+
+    def reject(self, error: RowError) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(error)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': [error._asdict() for error in self.errors],
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def iter_csv(file) -> Iterator[Sequence[Any]]:
+    """
+    Read rows of a CSV file opened in binary mode, a line at a time.
+
+    Raises:
+        ImportFileError: If the file is not UTF-8 or not valid CSV, when
+            the bad line is reached
+    """
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    try:
+        yield from reader
+    except UnicodeDecodeError:
+        raise ImportFileError(f"Line {reader.line_num + 1} is not UTF-8 text; save the file as UTF-8")
+    except csv.Error as e:
+        raise ImportFileError(f"Line {reader.line_num}: {str(e)}")
+
+
+def iter_xlsx(file) -> Iterator[Sequence[Any]]:
+    """
+    Read rows of an XLSX workbook's first sheet without loading it whole.
+
+    Raises:
+        ImportFileError: If openpyxl is not installed or the file is not a workbook
+    """
+    if openpyxl is None:
+        raise ImportFileError("XLSX import needs openpyxl")
+    try:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f"Not an XLSX workbook: {str(e)}")
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_rows(file, filename: str) -> Iterator[Sequence[Any]]:
+    """
+    Read rows of a CSV or XLSX file, picking the format by extension.
+
+    Raises:
+        ImportFileError: If the extension is neither
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return iter_csv(file)
+    if extension in ('.xlsx', '.xlsm'):
+        return iter_xlsx(file)
+    raise ImportFileError(f"Unsupported file type: {extension or filename}; use .csv or .xlsx")
+
+
+def map_header(header: Sequence[Any]) -> Dict[str, int]:
+    """
+    Find the column of each field in a header row.
+
+    Raises:
+        ImportFileError: If a required column is missing
+    """
+    positions = {
+        str(name or '').strip().lower().replace(' ', '_'): i
+        for i, name in reversed(list(enumerate(header)))
+    }
+    columns = {}
+    for field, names in HEADERS.items():
+        for name in names:
+            if name in positions:
+                columns[field] = positions[name]
+                break
+    missing = [field for field in REQUIRED if field not in columns]
+    if missing:
+        raise ImportFileError(f"Missing columns: {', '.join(missing)}")
+    return columns
+
+
+def _decimal(value: Any, places: Decimal, limit: int) -> Decimal:
+    if isinstance(value, float):
+        value = repr(value)
+    number = Decimal(str(value).replace(',', '').strip()).quantize(places)
+    if not number.is_finite() or abs(number) >= limit:
+        raise InvalidOperation
+    return number
+
+
+def _date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(text)
+
+
+def parse_row(
+    number: int,
+    values: Sequence[Any],
+    columns: Dict[str, int],
+    resolve,
+    today: date
+) -> Tuple[Optional[Dict[str, Any]], Optional[RowError]]:
+    """
+    Validate one row against the Holding model's constraints.
+
+    Args:
+        number: Row number in the file, for the error report
+        values: The row's cells
+        columns: Field -> column, from map_header
+        resolve: Maps a symbol or alias to a ResolvedSymbol, or None
+        today: Latest purchase date accepted
+
+    Returns:
+        The holding's fields, or the reason the row was rejected
+    """
+    def cell(field):
+        position = columns.get(field)
+        value = values[position] if position is not None and position < len(values) else None
+        return None if value is None or str(value).strip() == '' else value
+
+    for field in REQUIRED:
+        if cell(field) is None:
+            return None, RowError(number, field, "This field is required.")
+
+    match = resolve(str(cell('symbol')))
+    if match is None:
+        return None, RowError(number, 'symbol', f"Unknown symbol: {cell('symbol')}")
+    try:
+        quantity = _decimal(cell('quantity'), _QUANTITY, 10 ** 11)
+    except (InvalidOperation, ValueError):
+        return None, RowError(number, 'quantity', f"Invalid quantity: {cell('quantity')}")
+    if quantity <= 0:
+        return None, RowError(number, 'quantity', "Quantity must be positive.")
+    try:
+        avg_price = _decimal(cell('avg_price'), _PRICE, 10 ** 13)
+    except (InvalidOperation, ValueError):
+        return None, RowError(number, 'avg_price', f"Invalid price: {cell('avg_price')}")
+    if avg_price < 0:
+        return None, RowError(number, 'avg_price', "Price cannot be negative.")
+    try:
+        purchase_date = _date(cell('purchase_date'))
+    except ValueError:
+        return None, RowError(number, 'purchase_date', f"Invalid date: {cell('purchase_date')}")
+    if purchase_date > today:
+        return None, RowError(number, 'purchase_date', "Purchase date is in the future.")
+
+    notes, external_id = cell('notes'), cell('external_id')
+    return {
+        'stock_id': match.stock_id,
+        'quantity': quantity,
+        'avg_price': avg_price,
+        'purchase_date': purchase_date,
+        'notes': None if notes is None else str(notes),
+        'external_id': None if external_id is None else str(external_id)[:100],
+    }, None
+
+
+def _chunks(rows: Iterable[Sequence[Any]], size: int) -> Iterator[List[Tuple[int, Sequence[Any]]]]:
+    chunk = []
+    # Row 1 is the header
+    for number, values in enumerate(rows, start=2):
+        if not any(value is not None and str(value).strip() for value in values):
+            continue
+        chunk.append((number, values))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_holdings(
+    user,
+    file,
+    filename: str,
+    source: str = 'import',
+    chunk_size: int = CHUNK_SIZE
+) -> ImportReport:
+    """
+    Import holdings from a CSV or XLSX file.
+
+    The file is read a chunk of rows at a time. Symbols are resolved with
+    the in-memory resolver, rows are validated directly against the model's
+    constraints, and each chunk's valid rows are inserted with one
+    bulk_create. Rejected rows (bad values, unknown symbols, a stock
+    already held from that purchase date) are reported and skipped; the
+    rest of the file is still imported.
+
+    Args:
+        user: User to import holdings for
+        file: File opened in binary mode, e.g. an uploaded file
+        filename: Name of the file, whose extension gives its format
+        source: Source recorded on the holdings, one of SOURCES
+        chunk_size: Rows validated and inserted at a time
+
+    Returns:
+        An ImportReport
+
+    Raises:
+        ImportFileError: If the file cannot be read or lacks a required
+            column. Chunks before an unreadable line stay imported.
+        ValueError: If the source is not one of SOURCES
+    """
+    if source not in SOURCES:
+        raise ValueError(f"source must be one of {', '.join(SOURCES)}")
+    started = time.perf_counter()
+    report = ImportReport()
+    rows = iter_rows(file, filename)
+    header = next(rows, None)
+    if header is None:
+        raise ImportFileError("The file is empty")
+    columns = map_header(header)
+
+    resolve = get_symbol_resolver().resolve
+    today = timezone.localdate()
+    seen: Dict[Tuple[int, date], int] = {}
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            report.rows += len(chunk)
+            parsed = []
+            for number, values in chunk:
+                fields, error = parse_row(number, values, columns, resolve, today)
+                if error is None:
+                    key = (fields['stock_id'], fields['purchase_date'])
+                    if key in seen:
+                        error = RowError(number, 'purchase_date', f"Same stock and purchase date as row {seen[key]}.")
+                    else:
+                        seen[key] = number
+                if error is not None:
+                    report.reject(error)
+                else:
+                    parsed.append((number, fields))
+            report.created += _insert(user, parsed, source, report)
+    except ImportFileError as e:
+        if report.created:
+            # Earlier chunks are committed; say so rather than imply nothing was
+            raise ImportFileError(f"{str(e)} ({report.created} holdings before it were imported)")
+        raise
+    finally:
+        if report.created:
+            # bulk_create skips the signals that keep the summary current
+            refresh_summary(user.id)
+    report.seconds = time.perf_counter() - started
+    logger.info(
+        f"Imported {report.created} of {report.rows} holdings for user {user.id} "
+        f"({report.rows_per_second:.0f} rows/s)"
+    )
+    return report
+
+
+def _insert(user, parsed: List[Tuple[int, Dict[str, Any]]], source: str, report: ImportReport) -> int:
+    if not parsed:
+        return 0
+    existing = set(
+        Holding.objects.filter(
+            user=user,
+            stock_id__in={fields['stock_id'] for _, fields in parsed},
+            purchase_date__in={fields['purchase_date'] for _, fields in parsed}
+        ).values_list('stock_id', 'purchase_date')
+    )
+    holdings = []
+    numbers = []
+    for number, fields in parsed:
+        if (fields['stock_id'], fields['purchase_date']) in existing:
+            report.reject(RowError(number, 'purchase_date', "Already held from this purchase date."))
+            continue
+        holdings.append(Holding(user=user, source=source, **fields))
+        numbers.append(number)
+
+    try:
+        with transaction.atomic():
+            Holding.objects.bulk_create(holdings)
+        return len(holdings)
+    except IntegrityError:
+        # Rows written meanwhile by someone else; find them one at a time
+        pass
+
+    created = 0
+    for number, holding in zip(numbers, holdings):
+        try:
+            with transaction.atomic():
+                Holding.objects.bulk_create([holding])
+            created += 1
+        except IntegrityError:
+            report.reject(RowError(number, 'purchase_date', "Already held from this purchase date."))
+    return created
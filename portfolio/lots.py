@@ -0,0 +1,513 @@
+import logging
+from collections import deque
+from decimal import Decimal
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from django.db import transaction as db_transaction
+from django.db.models import Q, Sum
+
+from portfolio.models import Lot, LotMatch, Position, Transaction
+
+logger = logging.getLogger(__name__)
+
+METHOD_FIFO = 'fifo'
+METHOD_AVERAGE = 'average'
+METHODS = (METHOD_FIFO, METHOD_AVERAGE)
+
+# Quantities have four decimal places; the vectorized engine matches them
+# as integers in these units so that lots close exactly
+QUANTITY_SCALE = 10_000
+PRICE_PRECISION = Decimal('0.000001')
+
+# The average-cost scan renormalizes its running products before they
+# underflow; e^-500 leaves headroom for costs up to ~1e80
+_MAX_LOG_SHRINK = 500.0
+
+
+class OversoldError(ValueError):
+    """
+    Raised when a sell is larger than the open quantity before it.
+    """
+    def __init__(self, message: str, index: Optional[int] = None):
+        super().__init__(message)
+        self.index = index
+
+
+def _group_starts(groups: np.ndarray) -> np.ndarray:
+    starts = np.ones(len(groups), dtype=bool)
+    starts[1:] = groups[1:] != groups[:-1]
+    return starts
+
+
+def _exclusive_group_cumsum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Cumulative sum of values before each element, restarting at group starts.
+    """
+    total = np.cumsum(values)
+    before = total - values
+    start_index = np.maximum.accumulate(np.where(starts, np.arange(len(values)), 0))
+    return before - before[start_index]
+
+
+def fifo_match(
+    groups: np.ndarray,
+    is_buy: np.ndarray,
+    quantity: np.ndarray,
+    price: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Match sells to buys first in, first out, for many positions at once.
+
+    Within each group (a user's position in one stock) buys are laid end to
+    end on a number line by cumulative quantity, and so are sells. A sell
+    closes the buys its interval overlaps, so every match is found with a
+    sort and two binary searches rather than by replaying the trades.
+
+    Args:
+        groups: Position of each trade; trades must be sorted by group, then
+            in the order they happened
+        is_buy: Whether each trade is a buy
+        quantity: Quantity of each trade, positive. Pass integers (e.g. in
+            units of 1/QUANTITY_SCALE) for exact results
+        price: Cost per share for buys, proceeds per share for sells
+
+    Returns:
+        Dictionary of arrays: buy, sell and quantity for each match (trade
+        indices and matched quantity), realized_pnl per match, open_quantity
+        per trade (zero for sells) and realized_pnl_by_trade (zero for buys)
+
+    Raises:
+        OversoldError: If a sell exceeds the quantity bought before it
+    """
+    n = len(groups)
+    starts = _group_starts(groups)
+    buys = np.where(is_buy, quantity, 0)
+    sells = np.where(is_buy, 0, quantity)
+
+    buy_end = np.cumsum(buys)
+    buy_start = buy_end - buys
+    # Each group's sells are laid on the same line as its buys
+    offset = buy_start - _exclusive_group_cumsum(buys, starts)
+    sell_end = offset + _exclusive_group_cumsum(sells, starts) + sells
+    sell_start = sell_end - sells
+
+    oversold = np.flatnonzero(~is_buy & (sell_end > buy_end))
+    if len(oversold):
+        raise OversoldError(f"Sell at index {oversold[0]} exceeds the open quantity", int(oversold[0]))
+
+    buy_index = np.flatnonzero(is_buy & (quantity > 0))
+    sell_index = np.flatnonzero(~is_buy & (quantity > 0))
+    sell_starts, sell_ends = sell_start[sell_index], sell_end[sell_index]
+    buy_ends = buy_end[buy_index]
+
+    points = np.unique(np.concatenate([buy_start[buy_index], buy_ends, sell_starts, sell_ends]))
+    begin, length = points[:-1], np.diff(points)
+    k = np.searchsorted(sell_ends, begin, side='right')
+    covered = k < len(sell_index)
+    covered[covered] = sell_starts[k[covered]] <= begin[covered]
+
+    match_sell = sell_index[k[covered]]
+    match_buy = buy_index[np.searchsorted(buy_ends, begin[covered], side='right')]
+    match_quantity = length[covered]
+    pnl = match_quantity * (price[match_sell] - price[match_buy])
+
+    return {
+        'buy': match_buy,
+        'sell': match_sell,
+        'quantity': match_quantity,
+        'realized_pnl': pnl,
+        'open_quantity': buys - np.bincount(match_buy, weights=match_quantity, minlength=n).astype(buys.dtype),
+        'realized_pnl_by_trade': np.bincount(match_sell, weights=pnl, minlength=n),
+    }
+
+
+def average_cost(
+    groups: np.ndarray,
+    is_buy: np.ndarray,
+    quantity: np.ndarray,
+    price: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Track average cost and realized P&L for many positions at once.
+
+    Buys blend into the average cost of the open position; sells realize
+    the difference between their price and that average and leave it
+    unchanged. The running cost follows C[t] = r[t] * C[t-1] + b[t], where
+    r is the share of the position a sell keeps and b the cost a buy adds,
+    which is solved with cumulative products instead of a loop.
+
+    Args:
+        groups, is_buy, quantity, price: As for fifo_match
+
+    Returns:
+        Dictionary of per-trade arrays: position and average_cost after the
+        trade, and realized_pnl (zero for buys)
+
+    Raises:
+        OversoldError: If a sell exceeds the quantity bought before it
+    """
+    n = len(groups)
+    quantity = quantity.astype('f8')
+    price = price.astype('f8')
+    starts = _group_starts(groups)
+    signed = np.where(is_buy, quantity, -quantity)
+    position = _exclusive_group_cumsum(signed, starts) + signed
+    before = position - signed
+
+    oversold = np.flatnonzero(position < -1e-9)
+    if len(oversold):
+        raise OversoldError(f"Sell at index {oversold[0]} exceeds the open quantity", int(oversold[0]))
+    position = np.maximum(position, 0)
+
+    added = np.where(is_buy, quantity * price, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        keep = np.where(is_buy, 1.0, np.where(before > 0, position / before, 0.0))
+
+    # Runs of trades between resets: a new group, or a sell that closes
+    # the position (nothing is carried past it)
+    closed = keep == 0
+    run_start = starts.copy()
+    run_start[1:] |= closed[:-1]
+    log_keep = np.log(np.where(closed, 1.0, keep))
+    log_product = _exclusive_group_cumsum(log_keep, run_start) + log_keep
+
+    # Split runs whose products would underflow; those pieces carry the
+    # running cost over from the piece before
+    piece = np.floor(-log_product / _MAX_LOG_SHRINK).astype('i8')
+    piece_start = run_start.copy()
+    piece_start[1:] |= piece[1:] != piece[:-1]
+    start_index = np.maximum.accumulate(np.where(piece_start, np.arange(n), 0))
+    log_piece = log_product - (log_product[start_index] - log_keep[start_index])
+
+    scale = np.exp(log_piece)
+    cost = scale * (_exclusive_group_cumsum(added / scale, piece_start) + added / scale)
+    piece_starts = np.append(np.flatnonzero(piece_start), n)
+    for i in np.flatnonzero(piece_start & ~run_start).tolist():
+        end = piece_starts[np.searchsorted(piece_starts, i, side='right')]
+        cost[i:end] += cost[i - 1] * scale[i:end]
+    cost[closed] = 0.0
+
+    previous_cost = np.concatenate([[0.0], cost[:-1]])
+    previous_cost[run_start] = 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        average_before = np.where(before > 0, previous_cost / before, 0.0)
+        average_after = np.where(position > 0, cost / position, 0.0)
+
+    return {
+        'position': position,
+        'average_cost': average_after,
+        'realized_pnl': np.where(is_buy, 0.0, quantity * (price - average_before)),
+    }
+
+
+class LotMatchResult(NamedTuple):
+    """
+    The part of an open lot closed by a sell.
+    """
+    lot: Any
+    quantity: Decimal
+    realized_pnl: Decimal
+
+
+class LotBook:
+    """
+    Open lots of one position, for matching trades as they are appended.
+
+    Lots are (key, open quantity, cost price) entries in the order they
+    were bought. Appending a trade touches only the lots it closes.
+    """
+    def __init__(self, lots: Iterable[Tuple[Any, Decimal, Decimal]] = ()):
+        self.lots: Deque[List[Any]] = deque([key, quantity, cost] for key, quantity, cost in lots)
+
+    @property
+    def open_quantity(self) -> Decimal:
+        return sum((lot[1] for lot in self.lots), Decimal(0))
+
+    def buy(self, key: Any, quantity: Decimal, cost_price: Decimal) -> None:
+        self.lots.append([key, quantity, cost_price])
+
+    def sell(self, quantity: Decimal, sale_price: Decimal) -> List[LotMatchResult]:
+        """
+        Close the oldest lots for a sell.
+
+        Raises:
+            OversoldError: If the sell exceeds the open quantity; the book is
+                left unchanged
+        """
+        if quantity > self.open_quantity:
+            raise OversoldError(f"Cannot sell {quantity}, only {self.open_quantity} open")
+
+        matches = []
+        while quantity > 0:
+            lot = self.lots[0]
+            closed = min(quantity, lot[1])
+            matches.append(LotMatchResult(lot[0], closed, closed * (sale_price - lot[2])))
+            lot[1] -= closed
+            quantity -= closed
+            if lot[1] == 0:
+                self.lots.popleft()
+        return matches
+
+
+def net_price(trade: Transaction) -> Decimal:
+    """
+    Get a trade's price per share after fees: the cost of a buy, the
+    proceeds of a sell.
+    """
+    quantity = Decimal(trade.quantity)
+    fees = Decimal(trade.fees or 0) / quantity if quantity else Decimal(0)
+    price = Decimal(trade.price) + fees if trade.is_buy else Decimal(trade.price) - fees
+    return price.quantize(PRICE_PRECISION)
+
+
+def _make_lot(trade: Transaction) -> Lot:
+    return Lot(
+        user_id=trade.user_id,
+        stock_id=trade.stock_id,
+        transaction=trade,
+        acquired_on=trade.trade_date,
+        quantity=trade.quantity,
+        open_quantity=trade.quantity,
+        cost_price=net_price(trade),
+    )
+
+
+def _position_trades(user_id: int, stock_id: int):
+    return Transaction.objects.filter(user_id=user_id, stock_id=stock_id)
+
+
+def _add_to_position(position: Position, trade: Transaction) -> None:
+    """
+    Blend a buy into a position's average cost, or realize a sell against it.
+    """
+    quantity = Decimal(trade.quantity)
+    price = net_price(trade)
+    if trade.is_buy:
+        total = position.quantity + quantity
+        if total:
+            position.average_cost = (
+                (position.quantity * position.average_cost + quantity * price) / total
+            ).quantize(PRICE_PRECISION)
+        position.quantity = total
+        return
+    position.realized_pnl += (quantity * (price - position.average_cost)).quantize(PRICE_PRECISION)
+    position.quantity -= quantity
+    if position.quantity == 0:
+        position.average_cost = Decimal(0)
+
+
+def record_transaction(trade: Transaction) -> None:
+    """
+    Match a newly saved trade into its position's lots and average cost.
+
+    Trades appended in date order only touch the lots they open or close,
+    and the position's running average cost. A back-dated trade changes
+    which lots later sells closed and the average they sold at, so the
+    position is rebuilt instead.
+
+    Raises:
+        OversoldError: If a sell exceeds the open quantity
+    """
+    later = _position_trades(trade.user_id, trade.stock_id).filter(
+        Q(trade_date__gt=trade.trade_date) | Q(trade_date=trade.trade_date, id__gt=trade.id)
+    )
+    if later.exists():
+        rebuild_lots(trade.user_id, trade.stock_id)
+        return
+
+    with db_transaction.atomic():
+        position, _ = Position.objects.select_for_update().get_or_create(
+            user_id=trade.user_id, stock_id=trade.stock_id
+        )
+        if trade.is_buy:
+            _make_lot(trade).save()
+            _add_to_position(position, trade)
+            position.save()
+            return
+
+        open_lots = list(
+            Lot.objects.select_for_update()
+            .filter(user_id=trade.user_id, stock_id=trade.stock_id, open_quantity__gt=0)
+            .order_by('acquired_on', 'transaction_id')
+        )
+        book = LotBook((lot, lot.open_quantity, lot.cost_price) for lot in open_lots)
+        sale_price = net_price(trade)
+        matches = book.sell(Decimal(trade.quantity), sale_price)
+
+        for match in matches:
+            match.lot.open_quantity -= match.quantity
+        Lot.objects.bulk_update([match.lot for match in matches], ['open_quantity', 'updated_at'])
+        LotMatch.objects.bulk_create([
+            LotMatch(
+                lot=match.lot,
+                sell=trade,
+                quantity=match.quantity,
+                sale_price=sale_price,
+                realized_pnl=match.realized_pnl.quantize(PRICE_PRECISION),
+            )
+            for match in matches
+        ])
+        _add_to_position(position, trade)
+        position.save()
+
+
+def rebuild_lots(user_id: Optional[int] = None, stock_id: Optional[int] = None) -> int:
+    """
+    Recompute lots, matches and average-cost positions from the ledger in
+    one vectorized pass.
+
+    Used after trades are edited, deleted or back-dated, and to rebuild
+    everything (e.g. after a bulk import).
+
+    Args:
+        user_id: Only rebuild this user's positions
+        stock_id: Only rebuild positions in this stock
+
+    Returns:
+        Number of trades replayed
+
+    Raises:
+        OversoldError: If the ledger sells more than it bought; nothing is
+            changed
+    """
+    scope = {key: value for key, value in (('user_id', user_id), ('stock_id', stock_id)) if value is not None}
+    trades = list(Transaction.objects.filter(**scope).order_by('user_id', 'stock_id', 'trade_date', 'id'))
+    if not trades:
+        Lot.objects.filter(**scope).delete()
+        Position.objects.filter(**scope).delete()
+        return 0
+
+    n = len(trades)
+    keys: Dict[Tuple[int, int], int] = {}
+    groups = np.fromiter(
+        (keys.setdefault((trade.user_id, trade.stock_id), len(keys)) for trade in trades), dtype='i8', count=n
+    )
+    is_buy = np.fromiter((trade.is_buy for trade in trades), dtype=bool, count=n)
+    quantity = np.fromiter(
+        (int(Decimal(trade.quantity) * QUANTITY_SCALE) for trade in trades), dtype='i8', count=n
+    )
+    prices = [net_price(trade) for trade in trades]
+    try:
+        matched = fifo_match(groups, is_buy, quantity, np.zeros(n))
+    except OversoldError as e:
+        trade = trades[e.index]
+        raise OversoldError(
+            f"Sell {trade.id} of {trade.quantity} {trade.stock_id} exceeds the open quantity", e.index
+        )
+
+    lots = {i: _make_lot(trades[i]) for i in np.flatnonzero(is_buy).tolist()}
+    for i, lot in lots.items():
+        lot.open_quantity = Decimal(int(matched['open_quantity'][i])) / QUANTITY_SCALE
+
+    average = average_cost(groups, is_buy, quantity, np.array([float(price) for price in prices]))
+    starts = np.flatnonzero(_group_starts(groups))
+    ends = np.append(starts[1:], n) - 1
+    positions = [
+        Position(
+            user_id=trades[end].user_id,
+            stock_id=trades[end].stock_id,
+            quantity=Decimal(int(round(average['position'][end]))) / QUANTITY_SCALE,
+            average_cost=Decimal(repr(float(average['average_cost'][end]))).quantize(PRICE_PRECISION),
+            realized_pnl=(Decimal(repr(float(realized))) / QUANTITY_SCALE).quantize(PRICE_PRECISION),
+        )
+        for end, realized in zip(ends.tolist(), np.add.reduceat(average['realized_pnl'], starts).tolist())
+    ]
+
+    with db_transaction.atomic():
+        Lot.objects.filter(**scope).delete()
+        Position.objects.filter(**scope).delete()
+        Position.objects.bulk_create(positions, batch_size=1000)
+        Lot.objects.bulk_create(lots.values(), batch_size=1000)
+        LotMatch.objects.bulk_create(
+            (
+                LotMatch(
+                    lot=lots[buy],
+                    sell=trades[sell],
+                    quantity=Decimal(int(units)) / QUANTITY_SCALE,
+                    sale_price=prices[sell],
+                    realized_pnl=(
+                        Decimal(int(units)) / QUANTITY_SCALE * (prices[sell] - prices[buy])
+                    ).quantize(PRICE_PRECISION),
+                )
+                for buy, sell, units in zip(
+                    matched['buy'].tolist(), matched['sell'].tolist(), matched['quantity'].tolist()
+                )
+            ),
+            batch_size=1000
+        )
+    return n
+
+
+def position_pnl(user, method: str = METHOD_FIFO) -> List[Dict[str, Any]]:
+    """
+    Get open quantity, cost and realized P&L per stock for a user.
+
+    FIFO figures come from the stored lots, average-cost figures from the
+    stored positions.
+
+    Args:
+        user: User whose positions to report
+        method: METHOD_FIFO or METHOD_AVERAGE
+
+    Returns:
+        List of dictionaries per stock, ordered by symbol
+    """
+    if method == METHOD_FIFO:
+        return _fifo_pnl(user)
+    if method == METHOD_AVERAGE:
+        return _average_pnl(user)
+    raise ValueError(f"Unknown cost method: {method}")
+
+
+def _fifo_pnl(user) -> List[Dict[str, Any]]:
+    positions: Dict[int, Dict[str, Any]] = {}
+
+    def position(stock_id, symbol):
+        return positions.setdefault(stock_id, {
+            'stock': stock_id,
+            'symbol': symbol,
+            'open_quantity': Decimal(0),
+            'cost': Decimal(0),
+            'realized_pnl': Decimal(0),
+        })
+
+    for stock_id, symbol, open_quantity, cost_price in (
+        Lot.objects.filter(user=user, open_quantity__gt=0)
+        .values_list('stock_id', 'stock__symbol', 'open_quantity', 'cost_price')
+    ):
+        entry = position(stock_id, symbol)
+        entry['open_quantity'] += open_quantity
+        entry['cost'] += open_quantity * cost_price
+
+    for row in (
+        LotMatch.objects.filter(lot__user=user)
+        .values('lot__stock_id', 'lot__stock__symbol')
+        .annotate(realized=Sum('realized_pnl'))
+    ):
+        position(row['lot__stock_id'], row['lot__stock__symbol'])['realized_pnl'] += row['realized']
+
+    return [_rounded(entry) for entry in sorted(positions.values(), key=lambda entry: entry['symbol'])]
+
+
+def _average_pnl(user) -> List[Dict[str, Any]]:
+    return [
+        _rounded({
+            'stock': stock_id,
+            'symbol': symbol,
+            'open_quantity': quantity,
+            'cost': quantity * average,
+            'realized_pnl': realized,
+        })
+        for stock_id, symbol, quantity, average, realized in (
+            Position.objects.filter(user=user).order_by('stock__symbol')
+            .values_list('stock_id', 'stock__symbol', 'quantity', 'average_cost', 'realized_pnl')
+        )
+    ]
+
+
+def _rounded(entry: Dict[str, Any]) -> Dict[str, Any]:
+    entry['open_quantity'] = Decimal(entry['open_quantity']).quantize(Decimal('0.0001'))
+    entry['cost'] = Decimal(entry['cost']).quantize(Decimal('0.01'))
+    entry['realized_pnl'] = Decimal(entry['realized_pnl']).quantize(Decimal('0.01'))
+    return entry
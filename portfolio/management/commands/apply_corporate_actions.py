@@ -0,0 +1,53 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Stock
+from portfolio.corporate_actions import apply_pending
+from portfolio.lots import OversoldError
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply splits, bonuses and dividends whose ex-date has come to holdings, "
+        "transactions and stored candles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stock',
+            action='append',
+            dest='symbols',
+            help='Only apply actions of this stock symbol. May be given more than once.'
+        )
+        parser.add_argument(
+            '--date',
+            help='Apply actions with ex-dates up to this day (YYYY-MM-DD). Defaults to today.'
+        )
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Invalid date: {options['date']}")
+
+        stock_ids = None
+        if options['symbols']:
+            stocks = dict(Stock.objects.filter(symbol__in=options['symbols']).values_list('symbol', 'id'))
+            unknown = sorted(set(options['symbols']) - set(stocks))
+            if unknown:
+                raise CommandError(f"Unknown stocks: {', '.join(unknown)}")
+            stock_ids = list(stocks.values())
+
+        try:
+            applied = apply_pending(day, stock_ids)
+        except OversoldError as e:
+            raise CommandError(str(e))
+        for action in applied:
+            self.stdout.write(
+                f"{action}: {action.holdings_adjusted} holdings, {action.transactions_adjusted} "
+                f"transactions, {action.candles_adjusted} candles adjusted"
+            )
+        self.stdout.write(f"Applied {len(applied)} corporate actions")
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.models import PortfolioSummary
+from portfolio.summaries import diff_summary, rebuild_summary
+
+
+class Command(BaseCommand):
+    help = "Compare stored portfolio summaries with ones rebuilt from holdings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='Only check this user ID. May be given more than once.'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rebuild summaries that differ.'
+        )
+
+    def handle(self, *args, **options):
+        summaries = PortfolioSummary.objects.select_related('user').order_by('user_id')
+        if options['users']:
+            summaries = summaries.filter(user_id__in=options['users'])
+
+        checked = mismatched = 0
+        for summary in summaries.iterator():
+            checked += 1
+            differences = diff_summary(summary)
+            if not differences:
+                continue
+
+            mismatched += 1
+            self.stderr.write(f"User {summary.user_id} ({summary.user.username}):")
+            for field, (stored, expected) in differences.items():
+                self.stderr.write(f"  {field}: stored {stored}, expected {expected}")
+            if options['fix']:
+                rebuild_summary(summary.user_id)
+
+        action = "rebuilt" if options['fix'] else "differ"
+        self.stdout.write(f"Checked {checked} summaries, {mismatched} {action}")
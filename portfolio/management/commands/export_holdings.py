@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio import exports
+
+
+class Command(BaseCommand):
+    help = "Export holdings of every user, or of some, as CSV, JSON Lines or Parquet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to write.')
+        parser.add_argument(
+            '--output',
+            choices=exports.FORMATS,
+            help='Format to write. Defaults to the extension of the path.'
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='Only export this user ID. Repeat for several users.'
+        )
+        parser.add_argument(
+            '--classifications',
+            action='store_true',
+            help='Add the classification names of each holding.'
+        )
+        parser.add_argument(
+            '--market-values',
+            action='store_true',
+            help='Add cost, last price, market value and unrealized P&L from the ticker or stored closes.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=exports.CHUNK_SIZE,
+            help='Rows read and written at a time.'
+        )
+
+    def handle(self, *args, **options):
+        output = options['output'] or options['path'].rsplit('.', 1)[-1].lower()
+        started = time.perf_counter()
+        try:
+            content = exports.iter_export(
+                output,
+                user_ids=options['users'],
+                classifications=options['classifications'],
+                market_values=options['market_values'],
+                chunk_size=options['chunk_size']
+            )
+            if output == exports.FORMAT_PARQUET:
+                f = open(options['path'], 'wb')
+            else:
+                f = open(options['path'], 'w', newline='')
+            with f:
+                for part in content:
+                    f.write(part)
+                size = f.tell()
+        except (ValueError, RuntimeError, OSError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"Wrote {size} bytes of {output} to {options['path']} in {time.perf_counter() - started:.1f}s"
+        )
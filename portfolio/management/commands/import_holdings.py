@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.imports import CHUNK_SIZE, SOURCES, ImportFileError, import_holdings
+
+
+class Command(BaseCommand):
+    help = (
+        "Import holdings from a CSV or XLSX file with symbol, quantity, avg_price and "
+        "purchase_date columns. Rejected rows are reported; the rest are imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import.')
+        parser.add_argument('--user', required=True, help='Username to import the holdings for.')
+        parser.add_argument(
+            '--source', default='import', choices=SOURCES, help='Source recorded on the holdings.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE, help='Rows validated and inserted at a time.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Unknown user: {options['user']}")
+
+        try:
+            with open(options['path'], 'rb') as f:
+                report = import_holdings(
+                    user, f, options['path'], source=options['source'], chunk_size=options['chunk_size']
+                )
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"Imported {report.created} of {report.rows} rows in {report.seconds:.2f}s "
+            f"({report.rows_per_second:.0f} rows/s)"
+        )
+        for error in report.errors:
+            self.stderr.write(f"Row {error.row}: {error.field}: {error.error}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f"... and {report.failed - len(report.errors)} more rejected rows")
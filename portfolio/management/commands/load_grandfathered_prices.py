@@ -0,0 +1,52 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Stock
+from core.resolver import get_symbol_resolver
+from portfolio import tax
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the fair market values on 31 Jan 2018 used for grandfathered capital gains "
+        "from a CSV with symbol and price columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file, e.g. the highest prices from the 31 Jan 2018 bhavcopy.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='') as f:
+                rows = list(csv.DictReader(f))
+        except OSError as e:
+            raise CommandError(str(e))
+        if rows and not {'symbol', 'price'} <= set(rows[0]):
+            raise CommandError("CSV must have symbol and price columns")
+
+        resolver = get_symbol_resolver()
+        prices, unknown = {}, []
+        for row in rows:
+            resolved = resolver.resolve(row['symbol'])
+            if resolved is None:
+                unknown.append(row['symbol'])
+                continue
+            try:
+                prices[resolved.stock_id] = Decimal(row['price'])
+            except InvalidOperation:
+                raise CommandError(f"Invalid price for {row['symbol']}: {row['price']}")
+
+        now = timezone.now()
+        stocks = list(Stock.objects.filter(id__in=prices))
+        for stock in stocks:
+            stock.fmv_jan_2018 = prices[stock.id]
+            stock.updated_at = now
+        Stock.objects.bulk_update(stocks, ['fmv_jan_2018', 'updated_at'], batch_size=1000)
+        tax.invalidate_all()
+
+        self.stdout.write(f"Updated {len(stocks)} stocks")
+        if unknown:
+            self.stderr.write(f"Skipped {len(unknown)} unknown symbols: {', '.join(unknown[:20])}")
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio import tax
+from portfolio.lots import OversoldError, rebuild_lots
+
+
+class Command(BaseCommand):
+    help = "Rebuild lots, average-cost positions and realized P&L from the transaction ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='Only rebuild this user ID.'
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            help='Only rebuild positions in this stock ID.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            count = rebuild_lots(options['user'], options['stock'])
+        except OversoldError as e:
+            raise CommandError(str(e))
+        tax.invalidate_all()
+        self.stdout.write(f"Replayed {count} transactions in {time.perf_counter() - started:.1f}s")
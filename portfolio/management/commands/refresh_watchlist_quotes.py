@@ -0,0 +1,78 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.watchlists import quote_max_age, refresh_quotes
+from zerodha.kite_client import ZerodhaException
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Price every instrument on an active watchlist once per cycle into the watchlist quote "
+        "table, so users' watchlists are served from it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            default=getattr(settings, 'ZERODHA_TICKER_USER', None),
+            help='Username whose Zerodha session fetches the quotes. Defaults to ZERODHA_TICKER_USER.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds between refresh cycles; must be shorter than WATCHLIST_QUOTE_MAX_AGE.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run one cycle and exit.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['user']:
+            raise CommandError("Pass --user or set ZERODHA_TICKER_USER")
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user: {options['user']}")
+        if not options['once'] and options['interval'] >= quote_max_age():
+            raise CommandError(
+                f"--interval must be shorter than WATCHLIST_QUOTE_MAX_AGE ({quote_max_age():g}s), "
+                "or quotes lapse between cycles"
+            )
+
+        stopped = threading.Event()
+
+        def shutdown(signum, frame):
+            stopped.set()
+
+        if not options['once']:
+            signal.signal(signal.SIGTERM, shutdown)
+            signal.signal(signal.SIGINT, shutdown)
+
+        cycles = 0
+        while not stopped.is_set():
+            try:
+                counts = refresh_quotes(user.id)
+            except ZerodhaException as e:
+                if options['once']:
+                    raise CommandError(str(e))
+                self.stderr.write(f"Refresh failed: {str(e)}")
+            else:
+                cycles += 1
+                self.stdout.write(
+                    f"Watching {counts['instruments']} instruments: {counts['live']} from the ticker, "
+                    f"{counts['fetched']} quoted"
+                )
+            if options['once']:
+                break
+            stopped.wait(options['interval'])
+
+        self.stdout.write(f"Ran {cycles} refresh cycles")
@@ -0,0 +1,63 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.snapshots import backfill_snapshots, candle_prices, take_snapshots
+from zerodha.instruments import today_ist
+
+User = get_user_model()
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date: {value}")
+
+
+class Command(BaseCommand):
+    help = "Record end-of-day portfolio snapshots, or backfill them from stored daily candles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='Only snapshot this user ID. May be given more than once.'
+        )
+        parser.add_argument(
+            '--date',
+            help='Day to snapshot (YYYY-MM-DD). Past days are valued at stored daily closes. Defaults to today.'
+        )
+        parser.add_argument(
+            '--backfill-from',
+            help='Backfill every trading day from this date (YYYY-MM-DD) from stored daily closes.'
+        )
+        parser.add_argument(
+            '--to',
+            help='Last day to backfill (YYYY-MM-DD). Defaults to today.'
+        )
+
+    def handle(self, *args, **options):
+        today = today_ist()
+        if options['backfill_from']:
+            start = parse_date(options['backfill_from'])
+            end = parse_date(options['to']) if options['to'] else today
+            users = User.objects.filter(holdings__isnull=False).distinct().order_by('id')
+            if options['users']:
+                users = users.filter(id__in=options['users'])
+
+            total = 0
+            for user in users:
+                saved = backfill_snapshots(user, start, end)
+                total += saved
+                self.stdout.write(f"User {user.id} ({user.username}): {saved} days")
+            self.stdout.write(f"Backfilled {total} snapshots from {start} to {end}")
+            return
+
+        day = parse_date(options['date']) if options['date'] else today
+        prices = candle_prices(day) if day < today else None
+        saved = take_snapshots(day, options['users'], prices)
+        self.stdout.write(f"Saved {saved} snapshots for {day}")
@@ -52,12 +52,22 @@ class Holding(TimeStampedModel):
         null=True,
         help_text=_('ID used by the external system if imported')
     )
+    closed_at = models.DateTimeField(
+        _('Closed At'),
+        blank=True,
+        null=True,
+        help_text=_('When the holding disappeared from its external source')
+    )
 
     class Meta:
         verbose_name = _('Holding')
         verbose_name_plural = _('Holdings')
         unique_together = ['user', 'stock', 'purchase_date']
         ordering = ['-purchase_date']
+        indexes = [
+            # Keyset pagination of a user's holdings
+            models.Index(fields=['user', '-purchase_date', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.stock.symbol} ({self.quantity})"
@@ -94,3 +104,456 @@ class HoldingClass(TimeStampedModel):
 
     def __str__(self):
         return f"{self.holding.stock.symbol} - {self.classification.name}"
+
+
+class PortfolioSummary(TimeStampedModel):
+    """
+    Model holding a user's precomputed portfolio aggregates.
+
+    Kept up to date as holdings change (see portfolio.summaries), so reading
+    a summary is a single-row lookup. Values are at cost.
+    """
+    TOP_HOLDINGS = 5
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='portfolio_summary',
+        verbose_name=_('User')
+    )
+    total_value = models.DecimalField(
+        _('Total Value'),
+        max_digits=24,
+        decimal_places=6,
+        default=0
+    )
+    total_holdings = models.IntegerField(
+        _('Total Holdings'),
+        default=0
+    )
+    sectors = models.JSONField(
+        _('Sectors'),
+        default=dict,
+        help_text=_('Value per sector')
+    )
+    classifications = models.JSONField(
+        _('Classifications'),
+        default=dict,
+        help_text=_('Value per classification')
+    )
+    top_holdings = models.JSONField(
+        _('Top Holdings'),
+        default=list
+    )
+
+    class Meta:
+        verbose_name = _('Portfolio Summary')
+        verbose_name_plural = _('Portfolio Summaries')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.total_holdings} holdings"
+
+
+class Transaction(TimeStampedModel):
+    """
+    Model representing a buy or sell trade in a user's ledger.
+
+    Trades are matched into lots (see portfolio.lots) as they are recorded.
+    """
+    TYPE_BUY = 'buy'
+    TYPE_SELL = 'sell'
+    TYPE_CHOICES = [
+        (TYPE_BUY, _('Buy')),
+        (TYPE_SELL, _('Sell')),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='transactions',
+        verbose_name=_('User')
+    )
+    stock = models.ForeignKey(
+        'core.Stock',
+        on_delete=models.CASCADE,
+        related_name='transactions',
+        verbose_name=_('Stock')
+    )
+    transaction_type = models.CharField(
+        _('Type'),
+        max_length=10,
+        choices=TYPE_CHOICES
+    )
+    quantity = models.DecimalField(
+        _('Quantity'),
+        max_digits=15,
+        decimal_places=4
+    )
+    price = models.DecimalField(
+        _('Price'),
+        max_digits=15,
+        decimal_places=2
+    )
+    fees = models.DecimalField(
+        _('Fees'),
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        help_text=_('Brokerage, taxes and charges paid on the trade')
+    )
+    trade_date = models.DateField(
+        _('Trade Date')
+    )
+    source = models.CharField(
+        _('Source'),
+        max_length=50,
+        blank=True,
+        null=True,
+        help_text=_('Source of the trade (e.g., manual, zerodha, import)')
+    )
+    external_id = models.CharField(
+        _('External ID'),
+        max_length=100,
+        blank=True,
+        null=True,
+        help_text=_('ID used by the external system if imported')
+    )
+    notes = models.TextField(
+        _('Notes'),
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        verbose_name = _('Transaction')
+        verbose_name_plural = _('Transactions')
+        ordering = ['-trade_date', '-id']
+        indexes = [
+            # Replaying a user's trades in one stock in order
+            models.Index(fields=['user', 'stock', 'trade_date', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.transaction_type} {self.quantity} {self.stock.symbol}"
+
+    @property
+    def is_buy(self):
+        return self.transaction_type == self.TYPE_BUY
+
+
+class Lot(TimeStampedModel):
+    """
+    Model representing the shares bought by one buy transaction.
+
+    Sells consume lots first in, first out; open_quantity is what is left.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='lots',
+        verbose_name=_('User')
+    )
+    stock = models.ForeignKey(
+        'core.Stock',
+        on_delete=models.CASCADE,
+        related_name='lots',
+        verbose_name=_('Stock')
+    )
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.CASCADE,
+        related_name='lot',
+        verbose_name=_('Buy Transaction')
+    )
+    acquired_on = models.DateField(
+        _('Acquired On')
+    )
+    quantity = models.DecimalField(
+        _('Quantity'),
+        max_digits=15,
+        decimal_places=4
+    )
+    open_quantity = models.DecimalField(
+        _('Open Quantity'),
+        max_digits=15,
+        decimal_places=4
+    )
+    cost_price = models.DecimalField(
+        _('Cost Price'),
+        max_digits=18,
+        decimal_places=6,
+        help_text=_('Price per share including fees')
+    )
+
+    class Meta:
+        verbose_name = _('Lot')
+        verbose_name_plural = _('Lots')
+        ordering = ['acquired_on', 'transaction_id']
+        indexes = [
+            # Open lots of a user's stock in FIFO order
+            models.Index(fields=['user', 'stock', 'acquired_on', 'transaction']),
+        ]
+
+    def __str__(self):
+        return f"{self.stock.symbol} {self.open_quantity}/{self.quantity} @ {self.cost_price}"
+
+
+class LotMatch(TimeStampedModel):
+    """
+    Model representing the part of a lot closed by a sell transaction.
+    """
+    lot = models.ForeignKey(
+        Lot,
+        on_delete=models.CASCADE,
+        related_name='matches',
+        verbose_name=_('Lot')
+    )
+    sell = models.ForeignKey(
+        Transaction,
+        on_delete=models.CASCADE,
+        related_name='lot_matches',
+        verbose_name=_('Sell Transaction')
+    )
+    quantity = models.DecimalField(
+        _('Quantity'),
+        max_digits=15,
+        decimal_places=4
+    )
+    sale_price = models.DecimalField(
+        _('Sale Price'),
+        max_digits=18,
+        decimal_places=6,
+        help_text=_('Price per share net of fees')
+    )
+    realized_pnl = models.DecimalField(
+        _('Realized P&L'),
+        max_digits=24,
+        decimal_places=6
+    )
+
+    class Meta:
+        verbose_name = _('Lot Match')
+        verbose_name_plural = _('Lot Matches')
+        ordering = ['sell_id', 'lot_id']
+
+    def __str__(self):
+        return f"{self.quantity} of lot {self.lot_id} sold in {self.sell_id}"
+
+
+class Position(TimeStampedModel):
+    """
+    Model representing a user's position in one stock at average cost.
+
+    Kept up to date as trades are recorded, so average-cost P&L is read
+    rather than replayed from the ledger.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='positions',
+        verbose_name=_('User')
+    )
+    stock = models.ForeignKey(
+        'core.Stock',
+        on_delete=models.CASCADE,
+        related_name='positions',
+        verbose_name=_('Stock')
+    )
+    quantity = models.DecimalField(
+        _('Quantity'),
+        max_digits=15,
+        decimal_places=4,
+        default=0
+    )
+    average_cost = models.DecimalField(
+        _('Average Cost'),
+        max_digits=18,
+        decimal_places=6,
+        default=0,
+        help_text=_('Average price per open share including fees')
+    )
+    realized_pnl = models.DecimalField(
+        _('Realized P&L'),
+        max_digits=24,
+        decimal_places=6,
+        default=0
+    )
+
+    class Meta:
+        verbose_name = _('Position')
+        verbose_name_plural = _('Positions')
+        unique_together = ['user', 'stock']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.stock.symbol} {self.quantity} @ {self.average_cost}"
+
+
+class PortfolioSnapshot(TimeStampedModel):
+    """
+    Model representing a user's portfolio valued at the end of one day.
+
+    Per-holding figures are packed into parallel arrays in `holdings`, so a
+    day is one row however many holdings it has (see portfolio.snapshots).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='portfolio_snapshots',
+        verbose_name=_('User')
+    )
+    date = models.DateField(
+        _('Date')
+    )
+    market_value = models.DecimalField(
+        _('Market Value'),
+        max_digits=18,
+        decimal_places=2
+    )
+    cost = models.DecimalField(
+        _('Cost'),
+        max_digits=18,
+        decimal_places=2
+    )
+    unrealized_pnl = models.DecimalField(
+        _('Unrealized P&L'),
+        max_digits=18,
+        decimal_places=2
+    )
+    total_holdings = models.IntegerField(
+        _('Total Holdings'),
+        default=0
+    )
+    priced_holdings = models.IntegerField(
+        _('Priced Holdings'),
+        default=0,
+        help_text=_('Holdings with a price for the day; the rest are valued at cost')
+    )
+    holdings = models.JSONField(
+        _('Holdings'),
+        default=dict,
+        help_text=_('Per-holding arrays: holding, symbol, quantity, cost, market_value, unrealized_pnl')
+    )
+
+    class Meta:
+        verbose_name = _('Portfolio Snapshot')
+        verbose_name_plural = _('Portfolio Snapshots')
+        ordering = ['user', 'date']
+        # Also the index behind date range reads of a user's history
+        unique_together = ['user', 'date']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}: {self.market_value}"
+
+
+class Watchlist(TimeStampedModel):
+    """
+    Model representing a named list of stocks a user follows.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='watchlists',
+        verbose_name=_('User')
+    )
+    name = models.CharField(_('Name'), max_length=100)
+    description = models.TextField(_('Description'), blank=True, null=True)
+    is_active = models.BooleanField(
+        _('Active'),
+        default=True,
+        help_text=_('Inactive watchlists are kept but not priced by the quote refresher')
+    )
+
+    class Meta:
+        verbose_name = _('Watchlist')
+        verbose_name_plural = _('Watchlists')
+        unique_together = ['user', 'name']
+        ordering = ['name', 'id']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.name}"
+
+
+class WatchlistItem(TimeStampedModel):
+    """
+    Model representing a stock on a watchlist, on the exchange it is priced on.
+    """
+    EXCHANGE_NSE = 'NSE'
+    EXCHANGE_BSE = 'BSE'
+    EXCHANGE_CHOICES = [
+        (EXCHANGE_NSE, 'NSE'),
+        (EXCHANGE_BSE, 'BSE'),
+    ]
+
+    watchlist = models.ForeignKey(
+        Watchlist,
+        on_delete=models.CASCADE,
+        related_name='items',
+        verbose_name=_('Watchlist')
+    )
+    stock = models.ForeignKey(
+        'core.Stock',
+        on_delete=models.CASCADE,
+        related_name='watchlist_items',
+        verbose_name=_('Stock')
+    )
+    exchange = models.CharField(
+        _('Exchange'),
+        max_length=10,
+        choices=EXCHANGE_CHOICES,
+        default=EXCHANGE_NSE
+    )
+    notes = models.TextField(_('Notes'), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _('Watchlist Item')
+        verbose_name_plural = _('Watchlist Items')
+        unique_together = ['watchlist', 'stock', 'exchange']
+        ordering = ['watchlist', 'id']
+
+    def __str__(self):
+        return f"{self.watchlist.name} - {self.exchange}:{self.stock.symbol}"
+
+    @property
+    def instrument(self):
+        """
+        The 'exchange:tradingsymbol' key the item is priced by.
+        """
+        return f"{self.exchange}:{self.stock.symbol}"
+
+
+class WatchlistQuote(TimeStampedModel):
+    """
+    Model representing the last quote of a watched instrument.
+
+    Written by the watchlist quote refresher with one session and read by
+    every API worker, so users share one fetch per instrument.
+    """
+    instrument = models.CharField(
+        _('Instrument'),
+        max_length=64,
+        unique=True,
+        help_text=_("Instrument in the format 'exchange:tradingsymbol'")
+    )
+    last_price = models.DecimalField(
+        _('Last Price'),
+        max_digits=15,
+        decimal_places=2
+    )
+    close = models.DecimalField(
+        _('Previous Close'),
+        max_digits=15,
+        decimal_places=2,
+        blank=True,
+        null=True
+    )
+    fetched_at = models.DateTimeField(
+        _('Fetched At')
+    )
+
+    class Meta:
+        verbose_name = _('Watchlist Quote')
+        verbose_name_plural = _('Watchlist Quotes')
+        ordering = ['instrument']
+
+    def __str__(self):
+        return f"{self.instrument} {self.last_price}"
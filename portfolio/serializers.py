@@ -1,7 +1,11 @@
+from decimal import Decimal
+
+from django.db.models import Sum
 from rest_framework import serializers
-from portfolio.models import Holding, HoldingClass
+from portfolio.models import (
+    Holding, HoldingClass, Lot, PortfolioSnapshot, PortfolioSummary, Transaction, Watchlist, WatchlistItem
+)
 from core.serializers import StockSerializer, ClassificationSerializer
-from users.serializers import UserSerializer
 
 
 class HoldingSerializer(serializers.ModelSerializer):
@@ -9,7 +13,6 @@ class HoldingSerializer(serializers.ModelSerializer):
     Serializer for the Holding model.
     """
     stock_details = StockSerializer(source='stock', read_only=True)
-    user_details = UserSerializer(source='user', read_only=True)
     total_value = serializers.DecimalField(
         max_digits=15,
         decimal_places=2,
@@ -21,10 +24,10 @@ class HoldingSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'stock', 'quantity', 'avg_price',
             'purchase_date', 'notes', 'source', 'external_id',
-            'stock_details', 'user_details', 'total_value',
+            'stock_details', 'total_value', 'closed_at',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['closed_at', 'created_at', 'updated_at']
 
 
 class HoldingClassSerializer(serializers.ModelSerializer):
@@ -47,11 +50,229 @@ class HoldingClassSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class PortfolioSummarySerializer(serializers.Serializer):
+class PortfolioSummarySerializer(serializers.ModelSerializer):
     """
-    Serializer for portfolio summary information.
+    Serializer for the PortfolioSummary model.
     """
     total_value = serializers.DecimalField(max_digits=15, decimal_places=2)
-    total_holdings = serializers.IntegerField()
     sectors = serializers.DictField(child=serializers.DecimalField(max_digits=15, decimal_places=2))
-    top_holdings = HoldingSerializer(many=True)
+    classifications = serializers.DictField(
+        child=serializers.DecimalField(max_digits=15, decimal_places=2)
+    )
+
+    class Meta:
+        model = PortfolioSummary
+        fields = [
+            'total_value', 'total_holdings', 'sectors', 'classifications',
+            'top_holdings', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the Transaction model.
+    """
+    symbol = serializers.CharField(source='stock.symbol', read_only=True)
+
+    class Meta:
+        model = Transaction
+        fields = [
+            'id', 'stock', 'symbol', 'transaction_type', 'quantity', 'price',
+            'fees', 'trade_date', 'source', 'external_id', 'notes',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate_quantity(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Quantity must be positive")
+        return value
+
+    def validate(self, data):
+        """
+        Reject sells larger than the position they are appended to.
+
+        Back-dated and edited trades are checked when the position's lots
+        are rebuilt.
+        """
+        data = super().validate(data)
+        if self.instance is not None or data.get('transaction_type') != Transaction.TYPE_SELL:
+            return data
+
+        user = self.context['request'].user
+        open_quantity = Lot.objects.filter(
+            user=user, stock=data['stock']
+        ).aggregate(open=Sum('open_quantity'))['open'] or Decimal(0)
+        if data['quantity'] > open_quantity:
+            raise serializers.ValidationError(
+                {'quantity': f"Cannot sell {data['quantity']}, only {open_quantity} open"}
+            )
+        return data
+
+
+class LotSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the Lot model.
+    """
+    symbol = serializers.CharField(source='stock.symbol', read_only=True)
+
+    class Meta:
+        model = Lot
+        fields = [
+            'id', 'stock', 'symbol', 'transaction', 'acquired_on',
+            'quantity', 'open_quantity', 'cost_price'
+        ]
+        read_only_fields = fields
+
+
+class PositionPnLSerializer(serializers.Serializer):
+    """
+    Serializer for a stock's open position and realized P&L.
+    """
+    stock = serializers.IntegerField()
+    symbol = serializers.CharField()
+    open_quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    cost = serializers.DecimalField(max_digits=18, decimal_places=2)
+    realized_pnl = serializers.DecimalField(max_digits=18, decimal_places=2)
+
+
+class TaxYearSummarySerializer(serializers.Serializer):
+    """
+    Serializer for a financial year's capital gains totals.
+    """
+    financial_year = serializers.CharField()
+    rows = serializers.IntegerField()
+    stcg = serializers.DecimalField(max_digits=18, decimal_places=2)
+    ltcg = serializers.DecimalField(max_digits=18, decimal_places=2)
+    ltcg_exemption = serializers.DecimalField(max_digits=18, decimal_places=2)
+    taxable_ltcg = serializers.DecimalField(max_digits=18, decimal_places=2)
+
+
+class PortfolioSnapshotSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the daily totals of the PortfolioSnapshot model.
+    """
+    class Meta:
+        model = PortfolioSnapshot
+        fields = [
+            'date', 'market_value', 'cost', 'unrealized_pnl',
+            'total_holdings', 'priced_holdings'
+        ]
+        read_only_fields = fields
+
+
+class PortfolioSnapshotHoldingsSerializer(PortfolioSnapshotSerializer):
+    """
+    Serializer for the PortfolioSnapshot model, with per-holding arrays.
+    """
+    class Meta(PortfolioSnapshotSerializer.Meta):
+        fields = PortfolioSnapshotSerializer.Meta.fields + ['holdings']
+        read_only_fields = fields
+
+
+class RollingValueSerializer(serializers.Serializer):
+    """
+    Serializer for one day of a rolling figure.
+    """
+    date = serializers.DateField()
+    value = serializers.FloatField()
+
+
+class PortfolioAnalyticsSerializer(serializers.Serializer):
+    """
+    Serializer for a user's performance over a window.
+    """
+    window = serializers.CharField()
+    start = serializers.DateField(allow_null=True)
+    end = serializers.DateField(allow_null=True)
+    days = serializers.IntegerField()
+    start_value = serializers.FloatField(allow_null=True)
+    end_value = serializers.FloatField(allow_null=True)
+    net_flows = serializers.FloatField(allow_null=True)
+    xirr = serializers.FloatField(allow_null=True)
+    twr = serializers.FloatField(allow_null=True)
+    twr_annualized = serializers.FloatField(allow_null=True)
+    max_drawdown = serializers.FloatField(allow_null=True)
+    drawdown_peak = serializers.DateField(allow_null=True)
+    drawdown_trough = serializers.DateField(allow_null=True)
+    volatility = serializers.FloatField(allow_null=True)
+    sharpe = serializers.FloatField(allow_null=True)
+    beta = serializers.FloatField(allow_null=True)
+    benchmark = serializers.CharField()
+    rolling_volatility = RollingValueSerializer(many=True)
+
+
+class WatchlistItemSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the WatchlistItem model.
+    """
+    symbol = serializers.CharField(source='stock.symbol', read_only=True)
+
+    class Meta:
+        model = WatchlistItem
+        fields = ['id', 'watchlist', 'stock', 'symbol', 'exchange', 'notes', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate_watchlist(self, watchlist):
+        """
+        Only allow items on the requesting user's own watchlists.
+        """
+        request = self.context.get('request')
+        if request is not None and watchlist.user_id != request.user.id:
+            raise serializers.ValidationError("Watchlist not found.")
+        return watchlist
+
+
+class WatchlistSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the Watchlist model, with its items.
+    """
+    items = WatchlistItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Watchlist
+        fields = ['id', 'name', 'description', 'is_active', 'items', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate_name(self, name):
+        """
+        Names are unique per user; user is set by the view, so the model's
+        unique_together is not checked by the serializer.
+        """
+        request = self.context.get('request')
+        if request is not None:
+            others = Watchlist.objects.filter(user=request.user, name=name)
+            if self.instance is not None:
+                others = others.exclude(pk=self.instance.pk)
+            if others.exists():
+                raise serializers.ValidationError("You already have a watchlist with this name.")
+        return name
+
+
+class WatchlistQuoteItemSerializer(serializers.Serializer):
+    """
+    Serializer for a watchlist item with its price.
+    """
+    id = serializers.IntegerField()
+    stock = serializers.IntegerField()
+    symbol = serializers.CharField()
+    name = serializers.CharField()
+    exchange = serializers.CharField()
+    notes = serializers.CharField(allow_null=True)
+    last_price = serializers.FloatField(allow_null=True)
+    close = serializers.FloatField(allow_null=True)
+    change = serializers.FloatField(allow_null=True)
+    change_pct = serializers.FloatField(allow_null=True)
+    priced = serializers.BooleanField()
+
+
+class WatchlistQuotesSerializer(serializers.Serializer):
+    """
+    Serializer for a watchlist with prices of its items.
+    """
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    description = serializers.CharField(allow_null=True)
+    is_active = serializers.BooleanField()
+    items = WatchlistQuoteItemSerializer(many=True)
@@ -0,0 +1,181 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.models import Classification, Stock
+from portfolio import analytics, lots, summaries, tax
+from portfolio.models import Holding, HoldingClass, Transaction
+
+
+@receiver(pre_save, sender=Holding)
+def remember_holding_contribution(sender, instance, raw=False, **kwargs):
+    """
+    Signal to capture a holding's summary contribution before it changes.
+    """
+    if raw:
+        return
+    instance._summary_before = (
+        None if instance._state.adding else summaries.stored_contribution(instance.pk)
+    )
+
+
+@receiver(post_save, sender=Holding)
+def update_summary_for_holding(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal to apply a saved holding's change to the portfolio summary.
+    """
+    if raw:
+        return
+    before = getattr(instance, '_summary_before', None)
+    after = summaries.holding_contribution(instance)
+    if before == after:
+        return
+    keys = [] if created else summaries.holding_classification_keys(instance.pk)
+    summaries.apply_holding_change(before, after, instance.pk, keys)
+
+
+@receiver(post_delete, sender=Holding)
+def update_summary_for_deleted_holding(sender, instance, **kwargs):
+    """
+    Signal to remove a deleted holding from the portfolio summary.
+    
+    Its classifications are removed by the HoldingClass signals, which run
+    first since they are deleted before the holding.
+    """
+    summaries.apply_holding_change(summaries.holding_contribution(instance), None, instance.pk)
+
+
+@receiver(pre_save, sender=HoldingClass)
+def remember_holding_classification(sender, instance, raw=False, **kwargs):
+    """
+    Signal to capture the classification a holding had before it changes.
+    """
+    if raw or instance._state.adding:
+        instance._summary_before = None
+        return
+    old = HoldingClass.objects.select_related('classification').filter(pk=instance.pk).first()
+    instance._summary_before = old
+
+
+@receiver(post_save, sender=HoldingClass)
+def update_summary_for_holding_class(sender, instance, raw=False, **kwargs):
+    """
+    Signal to move a holding's value between classifications.
+    """
+    if raw:
+        return
+    old = getattr(instance, '_summary_before', None)
+    if old is not None and old.holding_id != instance.holding_id:
+        summaries.apply_classification_change(old.holding_id, str(old.classification), None)
+        old = None
+    summaries.apply_classification_change(
+        instance.holding_id,
+        None if old is None else str(old.classification),
+        str(instance.classification)
+    )
+
+
+@receiver(post_delete, sender=HoldingClass)
+def update_summary_for_deleted_holding_class(sender, instance, **kwargs):
+    """
+    Signal to remove a holding's value from a deleted classification.
+    """
+    classification = Classification.objects.filter(pk=instance.classification_id).first()
+    if classification is not None:
+        summaries.apply_classification_change(instance.holding_id, str(classification), None)
+
+
+@receiver(pre_save, sender=Classification)
+def remember_classification_name(sender, instance, raw=False, **kwargs):
+    """
+    Signal to capture a classification's name before it changes.
+    """
+    if raw or instance._state.adding:
+        instance._summary_before = None
+        return
+    instance._summary_before = Classification.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=Classification)
+def update_summaries_for_classification(sender, instance, raw=False, **kwargs):
+    """
+    Signal to rename a classification in the summaries that include it.
+    """
+    old = getattr(instance, '_summary_before', None)
+    if old is not None and str(old) != str(instance):
+        summaries.rebuild_summaries_for_classification(instance.pk)
+
+
+@receiver(pre_save, sender=Stock)
+def remember_stock_sector(sender, instance, raw=False, **kwargs):
+    """
+    Signal to capture a stock's sector before it changes.
+    """
+    if raw or instance._state.adding:
+        instance._summary_sector = None
+        instance._tax_fmv = None
+        return
+    instance._summary_sector, instance._tax_fmv = (
+        Stock.objects.filter(pk=instance.pk).values_list('sector', 'fmv_jan_2018').first()
+        or (None, None)
+    )
+
+
+@receiver(post_save, sender=Stock)
+def update_summaries_for_stock(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal to move the value of a stock's holdings to its new sector.
+    """
+    if raw or created:
+        return
+    old_sector = getattr(instance, '_summary_sector', None)
+    if (old_sector or None) != (instance.sector or None):
+        summaries.apply_sector_change(instance.pk, old_sector, instance.sector)
+    if getattr(instance, '_tax_fmv', None) != instance.fmv_jan_2018:
+        tax.invalidate_all()
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_transaction_position(sender, instance, raw=False, **kwargs):
+    """
+    Signal to capture the position a trade belonged to before it changes.
+    """
+    if raw or instance._state.adding:
+        instance._lots_before = None
+        return
+    instance._lots_before = (
+        Transaction.objects.filter(pk=instance.pk).values_list('user_id', 'stock_id', 'trade_date').first()
+    )
+
+
+@receiver(post_save, sender=Transaction)
+def update_lots_for_transaction(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal to match a new trade into lots, or rebuild the lots of an edited one.
+    """
+    if raw:
+        return
+    if created:
+        lots.record_transaction(instance)
+        tax.invalidate(instance.user_id, instance.trade_date)
+        analytics.invalidate([instance.user_id])
+        return
+    before = getattr(instance, '_lots_before', None)
+    if before is not None:
+        user_id, stock_id, trade_date = before
+        if (user_id, stock_id) != (instance.user_id, instance.stock_id):
+            lots.rebuild_lots(user_id, stock_id)
+        tax.invalidate(user_id, trade_date)
+        analytics.invalidate([user_id])
+    lots.rebuild_lots(instance.user_id, instance.stock_id)
+    tax.invalidate(instance.user_id, instance.trade_date)
+    analytics.invalidate([instance.user_id])
+
+
+@receiver(post_delete, sender=Transaction)
+def update_lots_for_deleted_transaction(sender, instance, **kwargs):
+    """
+    Signal to rebuild the lots of a position after one of its trades is deleted.
+    """
+    lots.rebuild_lots(instance.user_id, instance.stock_id)
+    tax.invalidate(instance.user_id, instance.trade_date)
+    analytics.invalidate([instance.user_id])
@@ -0,0 +1,234 @@
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from portfolio import analytics
+from portfolio.models import Holding, PortfolioSnapshot
+from portfolio.valuation import PortfolioValuation, PriceSource, cached_prices
+from zerodha.candles import CandleStore, daily_closes, get_candle_store, ist_days
+from zerodha.instruments import get_instrument_master, holding_instrument_key, today_ist
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+HOLDING_FIELDS = ('holding', 'symbol', 'quantity', 'cost', 'market_value', 'unrealized_pnl')
+UPDATE_FIELDS = [
+    'market_value', 'cost', 'unrealized_pnl', 'total_holdings', 'priced_holdings',
+    'holdings', 'updated_at',
+]
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(repr(round(float(value), 2)))
+
+
+def pack_snapshot(
+    user_id: int,
+    day: date,
+    holding_ids: List[int],
+    symbols: List[str],
+    quantity: np.ndarray,
+    cost: np.ndarray,
+    market_value: np.ndarray,
+    priced: np.ndarray
+) -> PortfolioSnapshot:
+    """
+    Build a day's snapshot from per-holding arrays.
+
+    Args:
+        user_id: User the holdings belong to
+        day: Day the holdings were valued on
+        holding_ids, symbols: Identify each holding
+        quantity, cost, market_value: Per-holding figures
+        priced: Whether each holding had a price (otherwise valued at cost)
+
+    Returns:
+        An unsaved PortfolioSnapshot
+    """
+    total_value, total_cost = float(market_value.sum()), float(cost.sum())
+    return PortfolioSnapshot(
+        user_id=user_id,
+        date=day,
+        market_value=_money(total_value),
+        cost=_money(total_cost),
+        unrealized_pnl=_money(total_value - total_cost),
+        total_holdings=len(holding_ids),
+        priced_holdings=int(priced.sum()),
+        holdings={
+            'holding': list(holding_ids),
+            'symbol': list(symbols),
+            'quantity': np.round(quantity, 4).tolist(),
+            'cost': np.round(cost, 2).tolist(),
+            'market_value': np.round(market_value, 2).tolist(),
+            'unrealized_pnl': np.round(market_value - cost, 2).tolist(),
+        },
+    )
+
+
+def unpack_holdings(snapshot: PortfolioSnapshot) -> List[Dict[str, Any]]:
+    """
+    Get a snapshot's per-holding figures as one dictionary per holding.
+    """
+    columns = [snapshot.holdings.get(field, []) for field in HOLDING_FIELDS]
+    return [dict(zip(HOLDING_FIELDS, values)) for values in zip(*columns)]
+
+
+def save_snapshots(snapshots: Iterable[PortfolioSnapshot]) -> int:
+    """
+    Insert snapshots, replacing any already taken for the same user and day.
+
+    Returns:
+        Number of snapshots saved
+    """
+    snapshots = list(snapshots)
+    PortfolioSnapshot.objects.bulk_create(
+        snapshots,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=UPDATE_FIELDS
+    )
+    analytics.invalidate(snapshot.user_id for snapshot in snapshots)
+    return len(snapshots)
+
+
+def candle_prices(day: date, store: Optional[CandleStore] = None) -> PriceSource:
+    """
+    Build a price source from stored daily candles: the close on or before
+    a day, and the close before that day.
+    """
+    def fetch(instruments: List[str]) -> Dict[str, Tuple[float, Optional[float]]]:
+        master = get_instrument_master()
+        if master is None or not instruments:
+            return {}
+        tokens = master.tokens_for_keys(instruments)
+        days = np.array([day - timedelta(days=1), day], dtype='M8[D]')
+        closes = daily_closes(store or get_candle_store(), tokens.tolist(), days)
+        return {
+            instrument: (float(close), None if np.isnan(previous) else float(previous))
+            for instrument, token, (previous, close) in zip(instruments, tokens.tolist(), closes)
+            if token >= 0 and not np.isnan(close)
+        }
+
+    return fetch
+
+
+def take_snapshots(
+    day: Optional[date] = None,
+    user_ids: Optional[List[int]] = None,
+    prices: Optional[PriceSource] = None
+) -> int:
+    """
+    Snapshot the open holdings of every user who has any.
+
+    Args:
+        day: Day to record the snapshots under; defaults to today (IST)
+        user_ids: Only snapshot these users
+        prices: Price source for every user; defaults to each user's
+            cached_prices (live ticker table, then quote cache)
+
+    Returns:
+        Number of snapshots saved
+    """
+    day = day or today_ist()
+    users = User.objects.filter(holdings__closed_at__isnull=True).distinct()
+    if user_ids:
+        users = users.filter(id__in=user_ids)
+
+    snapshots = []
+    for user in users.order_by('id'):
+        valuation = PortfolioValuation.for_user(user, prices or cached_prices(user.id))
+        values = valuation.values
+        snapshots.append(pack_snapshot(
+            user.id, day, valuation.holding_ids, valuation.symbols, valuation.quantity,
+            values['cost'], values['market_value'], values['priced']
+        ))
+    return save_snapshots(snapshots)
+
+
+def backfill_snapshots(
+    user,
+    start: date,
+    end: date,
+    store: Optional[CandleStore] = None
+) -> int:
+    """
+    Snapshot a user's holdings for each trading day in a range, valued at
+    stored daily closes.
+
+    A holding counts from its purchase date until it was closed, at its
+    current quantity. Trading days are the days any held instrument has a
+    daily candle. Days are valued together as (holding x day) arrays.
+
+    Args:
+        user: User to backfill
+        start: First day
+        end: Last day
+        store: Candle store to read closes from
+
+    Returns:
+        Number of snapshots saved
+    """
+    store = store or get_candle_store()
+    rows = list(
+        Holding.objects.filter(user=user, purchase_date__lte=end)
+        .values_list(
+            'id', 'stock__symbol', 'quantity', 'avg_price', 'purchase_date', 'closed_at',
+            'source', 'external_id'
+        )
+    )
+    master = get_instrument_master()
+    if not rows or master is None:
+        return 0
+
+    keys = [holding_instrument_key(row[1], row[6], row[7]) for row in rows]
+    unique_keys = sorted(set(keys))
+    tokens = master.tokens_for_keys(unique_keys).tolist()
+    positions = {key: i for i, key in enumerate(unique_keys)}
+    token_row = np.array([positions[key] for key in keys])
+
+    # Days with a daily candle for any held instrument
+    first, last = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+    traded = [ist_days(store.read(token, 'day', start, end)['timestamp']) for token in tokens if token >= 0]
+    days = np.unique(np.concatenate(traded)) if traded else np.empty(0, dtype='M8[D]')
+    days = days[(days >= first) & (days <= last)]
+    if not len(days):
+        return 0
+
+    closes = daily_closes(store, tokens, days)[token_row]
+    count = len(rows)
+    quantity = np.fromiter((row[2] for row in rows), dtype='f8', count=count)[:, None]
+    avg_price = np.fromiter((row[3] for row in rows), dtype='f8', count=count)[:, None]
+    bought = np.array([row[4] for row in rows], dtype='M8[D]')[:, None]
+    closed = np.array(
+        [timezone.localtime(row[5]).date() if row[5] else None for row in rows], dtype='M8[D]'
+    )[:, None]
+
+    held = (bought <= days) & (np.isnat(closed) | (closed > days))
+    priced = held & ~np.isnan(closes)
+    cost = np.where(held, quantity * avg_price, 0.0)
+    market_value = np.where(held, quantity * np.where(priced, closes, avg_price), 0.0)
+
+    holding_ids = [row[0] for row in rows]
+    symbols = [row[1] for row in rows]
+    snapshots = []
+    for column, day in enumerate(days.tolist()):
+        open_rows = np.flatnonzero(held[:, column])
+        if not len(open_rows):
+            continue
+        snapshots.append(pack_snapshot(
+            user.id, day,
+            [holding_ids[i] for i in open_rows],
+            [symbols[i] for i in open_rows],
+            quantity[open_rows, 0],
+            cost[open_rows, column],
+            market_value[open_rows, column],
+            priced[open_rows, column]
+        ))
+    return save_snapshots(snapshots)
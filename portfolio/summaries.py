@@ -0,0 +1,372 @@
+import heapq
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.utils import timezone
+
+from portfolio.models import Holding, HoldingClass, PortfolioSummary
+
+ZERO = Decimal(0)
+PRECISION = Decimal("0.000001")
+UNKNOWN_SECTOR = 'Unknown'
+
+
+def _amount(value: Decimal) -> str:
+    return str(value.quantize(PRECISION))
+
+
+def _decimal(value, places: int) -> Decimal:
+    # Unsaved instances may hold floats or strings; round them as the database does
+    return Decimal(str(value)).quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+
+
+def _classification_key(classification_type: str, name: str) -> str:
+    return f"{classification_type}: {name}"
+
+
+class Contribution(NamedTuple):
+    """
+    What one open holding adds to its owner's summary.
+    """
+    user_id: int
+    value: Decimal
+    sector: str
+
+
+def holding_contribution(holding: Holding) -> Optional[Contribution]:
+    """
+    Get a holding's contribution, or None if it is closed.
+    """
+    if holding.closed_at is not None:
+        return None
+    return Contribution(
+        user_id=holding.user_id,
+        value=_decimal(holding.quantity, 4) * _decimal(holding.avg_price, 2),
+        sector=holding.stock.sector or UNKNOWN_SECTOR,
+    )
+
+
+def stored_contribution(holding_id: int) -> Optional[Contribution]:
+    """
+    Get the contribution of a holding as currently stored in the database.
+    """
+    holding = Holding.objects.select_related('stock').filter(pk=holding_id).first()
+    return None if holding is None else holding_contribution(holding)
+
+
+def holding_classification_keys(holding_id: int) -> List[str]:
+    return [
+        _classification_key(classification_type, name)
+        for classification_type, name in HoldingClass.objects.filter(holding_id=holding_id)
+        .values_list('classification__type', 'classification__name')
+    ]
+
+
+def _top_holding(holding_id, stock_id, symbol, name, sector, quantity, avg_price, purchase_date):
+    return {
+        'id': holding_id,
+        'stock': stock_id,
+        'stock_details': {'id': stock_id, 'symbol': symbol, 'name': name, 'sector': sector},
+        'quantity': str(quantity),
+        'avg_price': str(avg_price),
+        'purchase_date': purchase_date.isoformat(),
+        'total_value': _amount(quantity * avg_price),
+    }
+
+
+_TOP_HOLDING_FIELDS = (
+    'id', 'stock_id', 'stock__symbol', 'stock__name', 'stock__sector',
+    'quantity', 'avg_price', 'purchase_date'
+)
+
+
+def _top_holdings(user_id: int) -> List[Dict[str, Any]]:
+    value = ExpressionWrapper(F('quantity') * F('avg_price'), output_field=DecimalField())
+    rows = (
+        Holding.objects.filter(user_id=user_id, closed_at__isnull=True)
+        .annotate(value=value)
+        .order_by('-value', 'id')
+        .values_list(*_TOP_HOLDING_FIELDS)[:PortfolioSummary.TOP_HOLDINGS]
+    )
+    return [_top_holding(*row) for row in rows]
+
+
+def compute_summary(user_id: int) -> Dict[str, Any]:
+    """
+    Compute a user's summary from scratch.
+
+    Args:
+        user_id: ID of the user
+
+    Returns:
+        Dictionary with the fields of PortfolioSummary
+    """
+    total_value = ZERO
+    sectors: Dict[str, Decimal] = {}
+    values: Dict[int, Decimal] = {}
+
+    rows = list(
+        Holding.objects.filter(user_id=user_id, closed_at__isnull=True)
+        .values_list(*_TOP_HOLDING_FIELDS)
+    )
+    for row in rows:
+        value = row[5] * row[6]
+        values[row[0]] = value
+        total_value += value
+        sector = row[4] or UNKNOWN_SECTOR
+        sectors[sector] = sectors.get(sector, ZERO) + value
+
+    classifications: Dict[str, Decimal] = {}
+    for holding_id, classification_type, name in (
+        HoldingClass.objects.filter(holding__user_id=user_id, holding__closed_at__isnull=True)
+        .values_list('holding_id', 'classification__type', 'classification__name')
+    ):
+        key = _classification_key(classification_type, name)
+        classifications[key] = classifications.get(key, ZERO) + values[holding_id]
+
+    top = heapq.nsmallest(
+        PortfolioSummary.TOP_HOLDINGS, rows, key=lambda row: (-values[row[0]], row[0])
+    )
+    return {
+        'total_value': total_value.quantize(PRECISION),
+        'total_holdings': len(rows),
+        'sectors': {key: _amount(value) for key, value in sectors.items() if value},
+        'classifications': {key: _amount(value) for key, value in classifications.items() if value},
+        'top_holdings': [_top_holding(*row) for row in top],
+    }
+
+
+def refresh_summary(user_id: int) -> None:
+    """
+    Recompute a user's stored summary, if they have one.
+
+    Used after bulk changes that bypass model signals, such as a holdings
+    sync. Users without a summary get one built on first read.
+    """
+    PortfolioSummary.objects.filter(user_id=user_id).update(
+        updated_at=timezone.now(), **compute_summary(user_id)
+    )
+
+
+def rebuild_summary(user_id: int) -> PortfolioSummary:
+    """
+    Recompute and store a user's summary, creating it if needed.
+    """
+    summary, _ = PortfolioSummary.objects.update_or_create(
+        user_id=user_id, defaults=compute_summary(user_id)
+    )
+    return summary
+
+
+def get_summary(user) -> PortfolioSummary:
+    """
+    Get a user's summary, building it if it doesn't exist yet.
+    """
+    summary = PortfolioSummary.objects.filter(user=user).first()
+    return summary if summary is not None else rebuild_summary(user.id)
+
+
+def _add(mapping: Dict[str, str], key: str, delta: Decimal) -> None:
+    value = Decimal(mapping.get(key, '0')) + delta
+    if value:
+        mapping[key] = _amount(value)
+    else:
+        mapping.pop(key, None)
+
+
+def apply_delta(
+    user_id: int,
+    value: Decimal = ZERO,
+    holdings: int = 0,
+    sectors: Optional[Dict[str, Decimal]] = None,
+    classifications: Optional[Dict[str, Decimal]] = None,
+    touched_holding: Optional[int] = None,
+    touched_value: Optional[Decimal] = None
+) -> None:
+    """
+    Apply a change to a user's stored summary.
+
+    Users without a summary are skipped; theirs is built on first read.
+
+    Args:
+        user_id: ID of the user
+        value: Change in total value
+        holdings: Change in the number of open holdings
+        sectors: Change in value per sector
+        classifications: Change in value per classification
+        touched_holding: ID of the holding that changed, used to decide
+            whether the top holdings need to be recomputed
+        touched_value: Its value after the change, None if closed or deleted
+    """
+    with transaction.atomic():
+        summary = PortfolioSummary.objects.select_for_update().filter(user_id=user_id).first()
+        if summary is None:
+            return
+
+        summary.total_value += value
+        summary.total_holdings += holdings
+        for key, delta in (sectors or {}).items():
+            _add(summary.sectors, key, delta)
+        for key, delta in (classifications or {}).items():
+            _add(summary.classifications, key, delta)
+
+        if touched_holding is not None:
+            top = summary.top_holdings
+            top_ids = {holding['id'] for holding in top}
+            smallest = Decimal(top[-1]['total_value']) if top else ZERO
+            if (
+                touched_holding in top_ids
+                or (touched_value is not None
+                    and (len(top) < PortfolioSummary.TOP_HOLDINGS or touched_value >= smallest))
+            ):
+                summary.top_holdings = _top_holdings(user_id)
+
+        summary.save()
+
+
+def apply_holding_change(
+    before: Optional[Contribution],
+    after: Optional[Contribution],
+    holding_id: int,
+    classification_keys: Iterable[str] = ()
+) -> None:
+    """
+    Update summaries for a holding going from one contribution to another.
+
+    Args:
+        before: Contribution before the change, None if it was closed or new
+        after: Contribution after the change, None if closed or deleted
+        holding_id: ID of the holding
+        classification_keys: Classifications of the holding
+    """
+    if before == after:
+        return
+    keys = list(classification_keys)
+
+    for user_id in {c.user_id for c in (before, after) if c is not None}:
+        old = before if before is not None and before.user_id == user_id else None
+        new = after if after is not None and after.user_id == user_id else None
+
+        sectors: Dict[str, Decimal] = {}
+        if old is not None:
+            sectors[old.sector] = sectors.get(old.sector, ZERO) - old.value
+        if new is not None:
+            sectors[new.sector] = sectors.get(new.sector, ZERO) + new.value
+        delta = (new.value if new else ZERO) - (old.value if old else ZERO)
+
+        apply_delta(
+            user_id,
+            value=delta,
+            holdings=(new is not None) - (old is not None),
+            sectors=sectors,
+            classifications={key: delta for key in keys},
+            touched_holding=holding_id,
+            touched_value=new.value if new else None
+        )
+
+
+def apply_classification_change(holding_id: int, removed: Optional[str], added: Optional[str]) -> None:
+    """
+    Move a holding's value between classifications in its owner's summary.
+    """
+    contribution = stored_contribution(holding_id)
+    if contribution is None or removed == added:
+        return
+
+    classifications: Dict[str, Decimal] = {}
+    if removed is not None:
+        classifications[removed] = -contribution.value
+    if added is not None:
+        classifications[added] = contribution.value
+    apply_delta(contribution.user_id, classifications=classifications)
+
+
+def apply_sector_change(stock_id: int, old_sector: Optional[str], new_sector: Optional[str]) -> None:
+    """
+    Move the value of a stock's open holdings to its new sector.
+    """
+    old_sector = old_sector or UNKNOWN_SECTOR
+    new_sector = new_sector or UNKNOWN_SECTOR
+    if old_sector == new_sector:
+        return
+
+    per_user: Dict[int, Decimal] = {}
+    for user_id, quantity, avg_price in (
+        Holding.objects.filter(stock_id=stock_id, closed_at__isnull=True)
+        .values_list('user_id', 'quantity', 'avg_price')
+    ):
+        per_user[user_id] = per_user.get(user_id, ZERO) + quantity * avg_price
+
+    for user_id, value in per_user.items():
+        apply_delta(user_id, sectors={old_sector: -value, new_sector: value})
+        # Top holdings embed the stock's sector
+        PortfolioSummary.objects.filter(user_id=user_id).update(top_holdings=_top_holdings(user_id))
+
+
+def apply_value_changes(changes: Iterable[Tuple[int, int, Optional[str], Decimal, Decimal]]) -> None:
+    """
+    Apply bulk changes to open holdings, e.g. from a corporate action, to
+    their owners' summaries.
+
+    Args:
+        changes: (holding_id, user_id, sector, old value, new value) of each
+            changed holding
+    """
+    per_user: Dict[int, List[Tuple[int, str, Decimal]]] = {}
+    for holding_id, user_id, sector, old, new in changes:
+        per_user.setdefault(user_id, []).append((holding_id, sector or UNKNOWN_SECTOR, new - old))
+    if not per_user:
+        return
+
+    keys: Dict[int, List[str]] = {}
+    for holding_id, classification_type, name in (
+        HoldingClass.objects.filter(holding_id__in=[c[0] for rows in per_user.values() for c in rows])
+        .values_list('holding_id', 'classification__type', 'classification__name')
+    ):
+        keys.setdefault(holding_id, []).append(_classification_key(classification_type, name))
+
+    for user_id, rows in per_user.items():
+        value = ZERO
+        sectors: Dict[str, Decimal] = {}
+        classifications: Dict[str, Decimal] = {}
+        for holding_id, sector, delta in rows:
+            value += delta
+            sectors[sector] = sectors.get(sector, ZERO) + delta
+            for key in keys.get(holding_id, ()):
+                classifications[key] = classifications.get(key, ZERO) + delta
+        apply_delta(user_id, value=value, sectors=sectors, classifications=classifications)
+        # Top holdings embed quantities and prices
+        PortfolioSummary.objects.filter(user_id=user_id).update(top_holdings=_top_holdings(user_id))
+
+
+def rebuild_summaries_for_classification(classification_id: int) -> None:
+    """
+    Rebuild the stored summaries of users holding a classified holding.
+    """
+    user_ids = (
+        HoldingClass.objects.filter(classification_id=classification_id)
+        .values_list('holding__user_id', flat=True)
+        .distinct()
+    )
+    for user_id in PortfolioSummary.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True):
+        rebuild_summary(user_id)
+
+
+def diff_summary(summary: PortfolioSummary) -> Dict[str, Any]:
+    """
+    Compare a stored summary with one computed from scratch.
+
+    Returns:
+        Dictionary of field -> (stored, expected) for fields that differ
+    """
+    expected = compute_summary(summary.user_id)
+    differences = {}
+    for field, value in expected.items():
+        stored = getattr(summary, field)
+        if field == 'total_value':
+            stored = Decimal(stored).quantize(PRECISION)
+        if stored != value:
+            differences[field] = (stored, value)
+    return differences
@@ -0,0 +1,288 @@
+import csv
+import logging
+import tempfile
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from portfolio.models import LotMatch
+
+try:
+    import openpyxl
+except ImportError:  # XLSX export is optional
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+TERM_SHORT = 'short'
+TERM_LONG = 'long'
+
+# Listed shares bought on or before this date have their cost stepped up to
+# the FMV on it (section 55(2)(ac)), for long-term gains on sales from
+# 1 Apr 2018, when such gains stopped being exempt
+GRANDFATHERING_DATE = date(2018, 1, 31)
+LTCG_TAXABLE_FROM = date(2018, 4, 1)
+
+# Long-term gains exempt each financial year, by the year it starts from
+LTCG_EXEMPTIONS = [
+    (2018, Decimal('100000')),
+    (2024, Decimal('125000')),
+]
+
+COLUMNS = [
+    'financial_year', 'symbol', 'quantity', 'acquired_on', 'sold_on', 'holding_days',
+    'term', 'buy_price', 'fmv_jan_2018', 'cost_of_acquisition', 'sale_price',
+    'sale_value', 'gain',
+]
+
+_CENTS = Decimal('0.01')
+_GENERATION_KEY = 'tax-report:generation'
+
+
+def financial_year(day: date) -> int:
+    """
+    Get the year an Indian financial year (April to March) starts in.
+    """
+    return day.year if day.month >= 4 else day.year - 1
+
+
+def fy_label(year: int) -> str:
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+def parse_fy(text: str) -> int:
+    """
+    Parse a financial year given as "2023-24" or "2023".
+
+    Raises:
+        ValueError: If text is not a financial year
+    """
+    start, _, end = text.strip().partition('-')
+    year = int(start)
+    if len(start) != 4 or (end and int(end) != (year + 1) % 100):
+        raise ValueError(f"Invalid financial year: {text}")
+    return year
+
+
+def fy_bounds(year: int) -> Tuple[date, date]:
+    return date(year, 4, 1), date(year + 1, 3, 31)
+
+
+def is_long_term(acquired_on: date, sold_on: date) -> bool:
+    """
+    Whether listed equity was held for more than 12 months.
+    """
+    try:
+        anniversary = acquired_on.replace(year=acquired_on.year + 1)
+    except ValueError:  # Bought on 29 February
+        anniversary = date(acquired_on.year + 1, 3, 1)
+    return sold_on > anniversary
+
+
+def grandfathered_price(buy_price: Decimal, fmv: Optional[Decimal], sale_price: Decimal) -> Decimal:
+    """
+    Get the cost per share of grandfathered shares: the higher of what was
+    paid and the FMV on 31 Jan 2018, with the FMV capped at the sale price.
+    """
+    if fmv is None:
+        return buy_price
+    return max(buy_price, min(fmv, sale_price))
+
+
+def ltcg_exemption(year: int) -> Decimal:
+    exemption = Decimal(0)
+    for start, amount in LTCG_EXEMPTIONS:
+        if year >= start:
+            exemption = amount
+    return exemption
+
+
+def _cache():
+    return caches[getattr(settings, "TAX_REPORT_CACHE", "default")]
+
+
+def _cache_key(user_id: int, year: int) -> str:
+    generation = _cache().get(_GENERATION_KEY, 0)
+    return f"tax-report:{generation}:{user_id}:{year}"
+
+
+def invalidate(user_id: int, since: date) -> None:
+    """
+    Drop a user's cached reports for the financial years a trade on `since`
+    can change: sells are matched to earlier buys, so only that year and
+    the ones after it.
+    """
+    first, last = financial_year(since), financial_year(timezone.localdate())
+    _cache().delete_many([_cache_key(user_id, year) for year in range(first, max(first, last) + 1)])
+
+
+def invalidate_all() -> None:
+    """
+    Drop every cached report, e.g. after lots are rebuilt in bulk or
+    grandfathering prices change.
+    """
+    cache = _cache()
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 1, None)
+
+
+def _gain_rows(user_id: int, year: int) -> Iterator[List[Any]]:
+    start, end = fy_bounds(year)
+    matches = (
+        LotMatch.objects.filter(
+            lot__user_id=user_id, sell__trade_date__gte=start, sell__trade_date__lte=end
+        )
+        .order_by('sell__trade_date', 'sell_id', 'lot__acquired_on', 'lot__transaction_id')
+        .values_list(
+            'lot__stock__symbol', 'quantity', 'lot__acquired_on', 'sell__trade_date',
+            'lot__cost_price', 'lot__stock__fmv_jan_2018', 'sale_price'
+        )
+    )
+    label = fy_label(year)
+    for symbol, quantity, acquired_on, sold_on, buy_price, fmv, sale_price in matches.iterator(chunk_size=2000):
+        long_term = is_long_term(acquired_on, sold_on)
+        grandfathered = long_term and acquired_on <= GRANDFATHERING_DATE and sold_on >= LTCG_TAXABLE_FROM
+        cost_price = grandfathered_price(buy_price, fmv, sale_price) if grandfathered else buy_price
+        cost = (quantity * cost_price).quantize(_CENTS)
+        sale_value = (quantity * sale_price).quantize(_CENTS)
+        yield [
+            label, symbol, quantity, acquired_on, sold_on, (sold_on - acquired_on).days,
+            TERM_LONG if long_term else TERM_SHORT, buy_price,
+            fmv if grandfathered else None, cost, sale_price, sale_value, sale_value - cost,
+        ]
+
+
+def _summarize(year: int, rows: Iterable[List[Any]]) -> Dict[str, Any]:
+    gains = {TERM_SHORT: Decimal(0), TERM_LONG: Decimal(0)}
+    count = 0
+    for row in rows:
+        gains[row[6]] += row[12]
+        count += 1
+
+    ltcg = gains[TERM_LONG]
+    if year < financial_year(LTCG_TAXABLE_FROM):
+        exemption = max(ltcg, Decimal(0))  # Exempt under section 10(38)
+    else:
+        exemption = min(ltcg_exemption(year), max(ltcg, Decimal(0)))
+    return {
+        'financial_year': fy_label(year),
+        'rows': count,
+        'stcg': gains[TERM_SHORT],
+        'ltcg': ltcg,
+        'ltcg_exemption': exemption,
+        'taxable_ltcg': max(ltcg - exemption, Decimal(0)),
+    }
+
+
+def iter_year(user_id: int, year: int) -> Iterator[List[Any]]:
+    """
+    Yield a user's realized gains for a financial year, one row per lot
+    closed by a sell.
+
+    Rows come from the cache if the year was reported since its trades last
+    changed. Otherwise they are read in chunks and cached once the year has
+    been streamed in full.
+
+    Args:
+        user_id: User to report on
+        year: Year the financial year starts in
+
+    Yields:
+        Lists of values in COLUMNS order
+    """
+    key = _cache_key(user_id, year)
+    cached = _cache().get(key)
+    if cached is not None:
+        yield from cached['rows']
+        return
+
+    rows = []
+    for row in _gain_rows(user_id, year):
+        rows.append(row)
+        yield row
+    _cache().set(
+        key,
+        {'rows': rows, 'summary': _summarize(year, rows)},
+        getattr(settings, "TAX_REPORT_CACHE_TIMEOUT", 86400)
+    )
+
+
+def year_summary(user_id: int, year: int) -> Dict[str, Any]:
+    """
+    Get a user's short- and long-term gains for a financial year.
+
+    Returns:
+        Dictionary with the financial year, number of rows, stcg, ltcg, the
+        ltcg_exemption used and taxable_ltcg
+    """
+    cached = _cache().get(_cache_key(user_id, year))
+    if cached is not None:
+        return cached['summary']
+    return _summarize(year, iter_year(user_id, year))
+
+
+def report_years(user_id: int) -> List[int]:
+    """
+    Get the financial years in which a user sold shares, oldest first.
+    """
+    months = LotMatch.objects.filter(lot__user_id=user_id).dates('sell__trade_date', 'month')
+    return sorted({financial_year(month) for month in months})
+
+
+def iter_rows(user_id: int, years: Iterable[int]) -> Iterator[List[Any]]:
+    for year in years:
+        yield from iter_year(user_id, year)
+
+
+class _Echo:
+    """
+    File-like object that hands back what is written to it.
+    """
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(rows: Iterable[List[Any]]) -> Iterator[str]:
+    """
+    Encode report rows as CSV lines, header first.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_xlsx(rows: Iterable[List[Any]], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Encode report rows as an XLSX workbook.
+
+    openpyxl's write-only mode keeps only the current row in memory but has
+    to finish the file before it can be read, so the workbook is spooled to
+    a temporary file and streamed from there.
+
+    Raises:
+        RuntimeError: If openpyxl is not installed
+    """
+    if openpyxl is None:
+        raise RuntimeError("XLSX export needs openpyxl")
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Capital gains')
+    sheet.append(COLUMNS)
+    for row in rows:
+        sheet.append(row)
+
+    with tempfile.TemporaryFile() as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
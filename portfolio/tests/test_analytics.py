@@ -0,0 +1,182 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Stock
+from portfolio import analytics
+from portfolio.models import PortfolioSnapshot, Transaction
+
+User = get_user_model()
+
+
+class AnalyticsMathTest(SimpleTestCase):
+    """
+    Test suite for the vectorized return and risk figures.
+    """
+    def test_xirr(self):
+        days = np.array(['2023-01-01', '2024-01-01'], dtype='M8[D]')
+        self.assertAlmostEqual(analytics.xirr(days, [-1000.0, 1100.0]), 0.1, places=9)
+
+        # Irregular flows: the rate found discounts them to zero
+        days = np.array(['2023-01-01', '2023-03-15', '2023-09-01', '2024-06-30'], dtype='M8[D]')
+        amounts = np.array([-1000.0, -500.0, 200.0, 1500.0])
+        rate = analytics.xirr(days, amounts)
+        years = (days - days[0]).astype(float) / 365
+        self.assertAlmostEqual(float((amounts / (1 + rate) ** years).sum()), 0.0, places=6)
+
+        self.assertIsNone(analytics.xirr(days, [100.0, 100.0, 100.0, 100.0]))
+
+    def test_xirr_large_loss(self):
+        days = np.array(['2023-01-01', '2023-07-01'], dtype='M8[D]')
+        rate = analytics.xirr(days, [-1000.0, 100.0])
+        self.assertAlmostEqual((1 + rate) ** (181 / 365), 0.1, places=9)
+
+    def test_returns_exclude_flows(self):
+        values = np.array([100.0, 110.0, 220.0, 231.0])
+        flows = np.array([0.0, 0.0, 100.0, 0.0])
+        returns = analytics.daily_returns(values, flows)
+
+        np.testing.assert_allclose(returns, [0.1, 120 / 110 - 1, 0.05])
+        self.assertAlmostEqual(analytics.time_weighted_return(returns), 1.1 * 120 / 110 * 1.05 - 1)
+        np.testing.assert_array_equal(analytics.daily_returns(np.array([0.0, 50.0]), np.array([0.0, 50.0])), [0.0])
+
+    def test_max_drawdown(self):
+        returns = np.array([0.1, -0.2, 0.05, -0.1, 0.5])
+        drawdown, peak, trough = analytics.max_drawdown(returns)
+
+        self.assertAlmostEqual(drawdown, 0.8 * 1.05 * 0.9 - 1)
+        self.assertEqual((peak, trough), (1, 4))
+
+    def test_rolling_volatility(self):
+        returns = np.random.default_rng(0).normal(0, 0.01, 100)
+        rolling = analytics.rolling_volatility(returns, 21)
+
+        expected = [returns[i - 21:i].std(ddof=1) * np.sqrt(252) for i in range(21, 101)]
+        np.testing.assert_allclose(rolling, expected)
+        self.assertEqual(len(analytics.rolling_volatility(returns[:10], 21)), 0)
+
+    def test_sharpe_and_beta(self):
+        benchmark = np.random.default_rng(1).normal(0.0005, 0.01, 250)
+        returns = 2 * benchmark + 0.0001
+
+        self.assertAlmostEqual(analytics.beta(returns, benchmark), 2.0)
+        self.assertAlmostEqual(
+            analytics.sharpe_ratio(returns, 0.0),
+            returns.mean() / returns.std(ddof=1) * np.sqrt(252)
+        )
+        with_gaps = benchmark.copy()
+        with_gaps[::3] = np.nan
+        self.assertAlmostEqual(analytics.beta(returns, with_gaps), 2.0)
+        self.assertIsNone(analytics.sharpe_ratio(np.zeros(5), 0.0))
+
+
+class PortfolioAnalyticsTest(TestCase):
+    """
+    Test suite for analytics over a user's snapshots and trades.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.stock = Stock.objects.create(symbol='INFY', name='Infosys')
+        self.start = date(2024, 1, 1)
+        self.values = [1000.0, 1100.0, 1650.0, 1600.0, 1700.0]
+        for i, value in enumerate(self.values):
+            PortfolioSnapshot.objects.create(
+                user=self.user, date=self.start + timedelta(days=i),
+                market_value=Decimal(repr(value)), cost=Decimal('1000.00'), unrealized_pnl=Decimal(0)
+            )
+        # 500 invested on the third day
+        self.add_trade(self.start - timedelta(days=10), '10', '100.00')
+        self.add_trade(self.start + timedelta(days=2), '5', '99.00', fees='5.00')
+
+    def add_trade(self, trade_date, quantity, price, fees='0'):
+        return Transaction.objects.create(
+            user=self.user, stock=self.stock, transaction_type=Transaction.TYPE_BUY,
+            quantity=Decimal(quantity), price=Decimal(price), fees=Decimal(fees), trade_date=trade_date
+        )
+
+    def test_compute(self):
+        with patch('portfolio.analytics.benchmark_closes', return_value=np.array([100, 105, 110, 105, 110.0])):
+            result = analytics.compute(self.user.id, 'all')
+
+        self.assertEqual((result['start'], result['end'], result['days']), (self.start, date(2024, 1, 5), 5))
+        self.assertEqual(result['net_flows'], 500.0)
+        returns = [0.1, 1150 / 1100 - 1, 1600 / 1650 - 1, 1700 / 1600 - 1]
+        self.assertAlmostEqual(result['twr'], np.prod(1 + np.array(returns)) - 1)
+        self.assertAlmostEqual(result['max_drawdown'], 1600 / 1650 - 1)
+        self.assertEqual(result['drawdown_peak'], date(2024, 1, 3))
+        self.assertEqual(result['drawdown_trough'], date(2024, 1, 4))
+        self.assertIsNotNone(result['beta'])
+        self.assertEqual(result['rolling_volatility'], [])
+
+        # NPV of -1000 on day 0, -500 on day 2 and +1700 on day 4 is zero
+        years = np.array([0, 2, 4]) / 365
+        npv = (np.array([-1000.0, -500.0, 1700.0]) / (1 + result['xirr']) ** years).sum()
+        self.assertAlmostEqual(npv, 0.0, places=6)
+
+    def test_cost_changes_without_trades(self):
+        Transaction.objects.all().delete()
+        PortfolioSnapshot.objects.filter(date=date(2024, 1, 3)).update(cost=Decimal('1500.00'))
+        PortfolioSnapshot.objects.filter(date__gt=date(2024, 1, 3)).update(cost=Decimal('1500.00'))
+
+        result = analytics.compute(self.user.id, 'all')
+        self.assertEqual(result['net_flows'], 500.0)
+
+    def test_window(self):
+        result = analytics.compute(self.user.id, '1m')
+        self.assertEqual(result['days'], 5)
+        self.assertEqual(analytics.compute(User.objects.create_user(username='empty').id, '1y')['days'], 0)
+        with self.assertRaises(ValueError):
+            analytics.compute(self.user.id, '2w')
+
+    def test_cached_until_trades_change(self):
+        first = analytics.get_analytics(self.user.id, 'all')
+        with self.assertNumQueries(0):
+            self.assertEqual(analytics.get_analytics(self.user.id, 'all'), first)
+
+        self.add_trade(self.start + timedelta(days=3), '1', '100.00')
+        self.assertEqual(analytics.get_analytics(self.user.id, 'all')['net_flows'], 600.0)
+
+
+class PortfolioAnalyticsViewTest(TestCase):
+    """
+    Test suite for the portfolio analytics endpoint.
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        for i, value in enumerate(['100.00', '110.00', '99.00']):
+            PortfolioSnapshot.objects.create(
+                user=self.user, date=date(2024, 1, 1) + timedelta(days=i),
+                market_value=Decimal(value), cost=Decimal('100.00'), unrealized_pnl=Decimal(value) - 100
+            )
+        self.url = reverse('portfolio-analytics')
+
+    def test_get_analytics(self):
+        response = self.client.get(self.url, {'window': 'all'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['window'], 'all')
+        self.assertEqual(response.data['days'], 3)
+        self.assertAlmostEqual(response.data['twr'], -0.01)
+        self.assertAlmostEqual(response.data['max_drawdown'], -0.1)
+        self.assertEqual(response.data['drawdown_peak'], '2024-01-02')
+
+    def test_invalid_window(self):
+        response = self.client.get(self.url, {'window': '2w'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
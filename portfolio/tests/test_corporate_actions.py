@@ -0,0 +1,182 @@
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import CorporateAction, Stock
+from portfolio.corporate_actions import apply_corporate_action, apply_pending
+from portfolio.models import Holding, Lot, PortfolioSummary, Transaction
+from portfolio.summaries import compute_summary, get_summary
+from zerodha.candles import CandleStore
+from zerodha.instruments import InstrumentMaster
+from zerodha.tests.test_candles import day_candles
+from zerodha.tests.test_instruments import csv_rows
+
+User = get_user_model()
+
+
+class CorporateActionTest(TestCase):
+    """
+    Test suite for applying splits, bonuses and dividends.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.infy = Stock.objects.create(symbol='INFY', name='Infosys', sector='Technology')
+        self.holding = Holding.objects.create(
+            user=self.user, stock=self.infy, quantity=Decimal('7'),
+            avg_price=Decimal('1500.00'), purchase_date=date(2024, 1, 10)
+        )
+        # Synced after the ex-date, so already in new shares
+        self.synced = Holding.objects.create(
+            user=self.user, stock=self.infy, quantity=Decimal('50'),
+            avg_price=Decimal('310.00'), purchase_date=date(2024, 2, 10), source='zerodha'
+        )
+        Holding.objects.filter(pk=self.holding.pk).update(
+            updated_at=timezone.make_aware(datetime(2024, 1, 10))
+        )
+        self.add_trade(Transaction.TYPE_BUY, '10', '1500.00', date(2024, 1, 10))
+        self.add_trade(Transaction.TYPE_SELL, '4', '1600.00', date(2024, 3, 1))
+        self.add_trade(Transaction.TYPE_BUY, '10', '310.00', date(2024, 7, 1))
+        get_summary(self.user)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = CandleStore(self.tmp.name)
+        self.store.write(408065, 'day', day_candles(date(2024, 5, 30), [1500, 1510, 300, 305]))
+        patcher = patch(
+            'portfolio.corporate_actions.get_instrument_master',
+            return_value=InstrumentMaster.from_rows(csv_rows())
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_trade(self, transaction_type, quantity, price, trade_date):
+        return Transaction.objects.create(
+            user=self.user, stock=self.infy, transaction_type=transaction_type,
+            quantity=Decimal(quantity), price=Decimal(price), trade_date=trade_date
+        )
+
+    def add_action(self, action_type, ratio_from=1, ratio_to=1, dividend=None, ex_date=date(2024, 6, 1)):
+        return CorporateAction.objects.create(
+            stock=self.infy, action_type=action_type, ex_date=ex_date,
+            ratio_from=ratio_from, ratio_to=ratio_to, dividend=dividend
+        )
+
+    def test_split(self):
+        action = apply_corporate_action(self.add_action(CorporateAction.TYPE_SPLIT, 1, 5), self.store)
+
+        self.assertEqual((action.quantity_factor, action.price_factor), (Decimal(5), Decimal('0.2')))
+        self.assertEqual(
+            (action.holdings_adjusted, action.transactions_adjusted, action.candles_adjusted), (1, 2, 2)
+        )
+        self.holding.refresh_from_db()
+        self.assertEqual((self.holding.quantity, self.holding.avg_price), (Decimal('35'), Decimal('300')))
+        self.synced.refresh_from_db()
+        self.assertEqual(self.synced.quantity, Decimal('50'))
+
+        trades = Transaction.objects.order_by('trade_date')
+        self.assertEqual(
+            [(t.quantity, t.price) for t in trades],
+            [(Decimal('50'), Decimal('300')), (Decimal('20'), Decimal('320')), (Decimal('10'), Decimal('310'))]
+        )
+        lot = Lot.objects.get(acquired_on=date(2024, 1, 10))
+        self.assertEqual((lot.quantity, lot.open_quantity, lot.cost_price), (Decimal(50), Decimal(30), Decimal(300)))
+        self.assertEqual(lot.matches.get().realized_pnl, Decimal(400))
+
+        candles = self.store.read(408065, 'day')
+        self.assertEqual(candles['close'].tolist(), [300, 302, 300, 305])
+        self.assertEqual(candles['volume'].tolist(), [500, 500, 100, 100])
+
+    def test_summary_updated_in_place(self):
+        apply_corporate_action(self.add_action(CorporateAction.TYPE_SPLIT, 1, 5), self.store)
+
+        summary = PortfolioSummary.objects.get(user=self.user)
+        expected = compute_summary(self.user.id)
+        self.assertEqual(summary.total_value, expected['total_value'])
+        self.assertEqual(summary.sectors, expected['sectors'])
+        self.assertEqual(summary.top_holdings, expected['top_holdings'])
+
+    def test_bonus_keeps_fractions(self):
+        action = apply_corporate_action(self.add_action(CorporateAction.TYPE_BONUS, 1, 2), self.store)
+
+        self.assertEqual(action.quantity_factor, Decimal('1.5'))
+        self.holding.refresh_from_db()
+        self.assertEqual((self.holding.quantity, self.holding.avg_price), (Decimal('10.5'), Decimal('1000')))
+
+    def test_pending_actions_applied_in_turn(self):
+        self.add_action(CorporateAction.TYPE_SPLIT, 1, 2, ex_date=date(2024, 5, 1))
+        self.add_action(CorporateAction.TYPE_BONUS, 1, 1, ex_date=date(2024, 6, 10))
+        with patch('portfolio.corporate_actions.get_candle_store', return_value=self.store):
+            applied = apply_pending(date(2024, 6, 10))
+
+        self.assertEqual([action.holdings_adjusted for action in applied], [1, 1])
+        self.holding.refresh_from_db()
+        self.assertEqual((self.holding.quantity, self.holding.avg_price), (Decimal('28'), Decimal('375')))
+        self.synced.refresh_from_db()
+        self.assertEqual(self.synced.quantity, Decimal('50'))
+        trade = Transaction.objects.get(trade_date=date(2024, 1, 10))
+        self.assertEqual((trade.quantity, trade.price), (Decimal('40'), Decimal('375')))
+
+    def test_unsynced_holdings_edited_after_ex_date(self):
+        imported = Holding.objects.create(
+            user=self.user, stock=self.infy, quantity=Decimal('10'), avg_price=Decimal('1000.00'),
+            purchase_date=date(2020, 1, 1), source='import'
+        )
+        self.holding.notes = 'Edited after the ex-date'
+        self.holding.save()
+        self.add_action(CorporateAction.TYPE_SPLIT, 1, 2, ex_date=date(2022, 6, 1))
+        with patch('portfolio.corporate_actions.get_candle_store', return_value=self.store):
+            action, = apply_pending(date(2022, 6, 1))
+
+        self.assertEqual(action.holdings_adjusted, 1)
+        imported.refresh_from_db()
+        self.assertEqual((imported.quantity, imported.avg_price), (Decimal('20'), Decimal('500')))
+
+        action = apply_corporate_action(self.add_action(CorporateAction.TYPE_SPLIT, 1, 2), self.store)
+        self.assertEqual(action.holdings_adjusted, 2)
+        self.holding.refresh_from_db()
+        self.assertEqual(self.holding.quantity, Decimal('14'))
+        self.synced.refresh_from_db()
+        self.assertEqual(self.synced.quantity, Decimal('50'))
+
+    def test_dividend_adjusts_candles_only(self):
+        action = apply_corporate_action(
+            self.add_action(CorporateAction.TYPE_DIVIDEND, dividend=Decimal('15.10')),
+            self.store
+        )
+
+        self.assertEqual(action.price_factor, Decimal('0.99'))
+        self.assertEqual(action.transactions_adjusted, 0)
+        self.holding.refresh_from_db()
+        self.assertEqual(self.holding.quantity, Decimal('7'))
+        closes = self.store.read(408065, 'day')['close'].tolist()
+        self.assertEqual([round(close, 6) for close in closes], [1485, 1494.9, 300, 305])
+
+    def test_applied_once(self):
+        self.add_action(CorporateAction.TYPE_SPLIT, 1, 5)
+        with patch('portfolio.corporate_actions.get_candle_store', return_value=self.store):
+            self.assertEqual(len(apply_pending(date(2024, 5, 31))), 0)
+            self.assertEqual(len(apply_pending(date(2024, 6, 1))), 1)
+            self.assertEqual(len(apply_pending(date(2024, 6, 1))), 0)
+
+        self.holding.refresh_from_db()
+        self.assertEqual(self.holding.quantity, Decimal('35'))
+        # Candles already adjusted are skipped on a retry
+        self.assertEqual(self.store.adjust(408065, 'day', date(2024, 6, 1), 0.2, 5, 'corporate-action:1'), 0)
+
+    def test_command(self):
+        self.add_action(CorporateAction.TYPE_SPLIT, 1, 5)
+        out = StringIO()
+        with patch('portfolio.corporate_actions.get_candle_store', return_value=self.store):
+            call_command('apply_corporate_actions', '--stock', 'INFY', '--date', '2024-06-30', stdout=out)
+
+        self.assertIn('Applied 1 corporate actions', out.getvalue())
+        self.assertIsNotNone(CorporateAction.objects.get().applied_at)
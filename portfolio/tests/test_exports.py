@@ -0,0 +1,143 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Classification, Stock
+from portfolio import exports
+from portfolio.models import Holding, HoldingClass
+
+User = get_user_model()
+
+
+def content(response):
+    return b''.join(
+        part if isinstance(part, bytes) else part.encode() for part in response.streaming_content
+    )
+
+
+class ExportHoldingsTest(TestCase):
+    """
+    Test suite for streaming holdings exports.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='testpass123'
+        )
+        infy = Stock.objects.create(symbol='INFY', name='Infosys', sector='Technology')
+        tcs = Stock.objects.create(symbol='TCS', name='Tata Consultancy Services', sector='Technology')
+        self.infy = Holding.objects.create(
+            user=self.user, stock=infy, quantity=Decimal('10'),
+            avg_price=Decimal('1500.50'), purchase_date=date(2024, 1, 10)
+        )
+        self.tcs = Holding.objects.create(
+            user=self.user, stock=tcs, quantity=Decimal('2'), avg_price=Decimal('3000.00'),
+            purchase_date=date(2024, 1, 11), source='zerodha', external_id='TCS:BSE'
+        )
+        Holding.objects.create(
+            user=self.user, stock=tcs, quantity=Decimal('1'), avg_price=Decimal('2900.00'),
+            purchase_date=date(2023, 1, 11), closed_at=timezone.now()
+        )
+        Holding.objects.create(
+            user=self.other, stock=infy, quantity=Decimal('5'),
+            avg_price=Decimal('1400.00'), purchase_date=date(2024, 1, 10)
+        )
+        for name in ('Long Term', 'Core'):
+            HoldingClass.objects.create(
+                holding=self.infy, classification=Classification.objects.create(name=name, type='Strategy')
+            )
+        self.prices = {'NSE:INFY': (1600.0, 1590.0)}
+
+    def fetch(self, instruments):
+        self.asked = getattr(self, 'asked', []) + [instruments]
+        return {instrument: self.prices[instrument] for instrument in instruments if instrument in self.prices}
+
+    def test_rows(self):
+        chunks = list(exports.iter_holdings(
+            [self.user.id], classifications=True, market_values=True, prices=self.fetch, chunk_size=2
+        ))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        rows = [row for chunk in chunks for row in chunk]
+        self.assertEqual([row['symbol'] for row in rows], ['INFY', 'TCS', 'TCS'])
+        self.assertEqual(rows[0]['classifications'], ['Core', 'Long Term'])
+        self.assertEqual(
+            [rows[0][name] for name in exports.MARKET_COLUMNS], [15005.0, 1600.0, 16000.0, 995.0]
+        )
+        # Unpriced holdings count at cost; closed ones have no market value
+        self.assertEqual([rows[1][name] for name in exports.MARKET_COLUMNS], [6000.0, None, 6000.0, 0.0])
+        self.assertEqual([rows[2][name] for name in exports.MARKET_COLUMNS], [2900.0, None, None, None])
+        # Each instrument is priced once
+        self.assertEqual(self.asked, [['BSE:TCS', 'NSE:INFY'], ['NSE:TCS']])
+
+    def test_csv_and_ndjson(self):
+        lines = list(csv.reader(''.join(exports.iter_export('csv', [self.user.id], classifications=True)).splitlines()))
+        self.assertEqual(lines[0], exports.columns(classifications=True))
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[1][6:9], ['10.0000', '1500.50', '2024-01-10'])
+        self.assertEqual(lines[1][-1], 'Core; Long Term')
+
+        rows = [json.loads(line) for line in ''.join(exports.iter_export('ndjson')).splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['avg_price'], '1500.50')
+        self.assertEqual(rows[-1]['username'], 'other')
+
+    @unittest.skipUnless(exports.pyarrow, "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow
+
+        data = b''.join(exports.iter_export('parquet', market_values=True, prices=self.fetch, chunk_size=3))
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(data))
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(table.column('quantity').to_pylist()[0], Decimal('10.0000'))
+        self.assertEqual(table.column('market_value').to_pylist()[0], 16000.0)
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with patch('portfolio.exports.export_prices', return_value=self.fetch):
+            response = client.get(reverse('holding-export'), {'output': 'ndjson', 'market_values': 'true'})
+            rows = [json.loads(line) for line in content(response).decode().splitlines()]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([row['user_id'] for row in rows], [self.user.id] * 3)
+        self.assertEqual(rows[0]['market_value'], 16000.0)
+
+        response = client.get(reverse('holding-export'), {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.get(reverse('holding-export'), {'all_users': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = client.get(reverse('holding-export'), {'all_users': 'true'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(len(content(response).decode().splitlines()), 5)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'holdings.csv')
+            out = StringIO()
+            call_command('export_holdings', path, '--user', str(self.other.id), stdout=out)
+            with open(path, newline='') as f:
+                rows = list(csv.DictReader(f))
+
+        self.assertIn('of csv', out.getvalue())
+        self.assertEqual([(row['username'], row['symbol']) for row in rows], [('other', 'INFY')])
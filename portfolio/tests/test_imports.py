@@ -0,0 +1,168 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Stock, StockAlias
+from portfolio.imports import ImportFileError, import_holdings, openpyxl
+from portfolio.models import Holding, PortfolioSummary
+from portfolio.summaries import get_summary
+
+User = get_user_model()
+
+
+def csv_file(*lines):
+    return BytesIO(('\n'.join(lines) + '\n').encode('utf-8-sig'))
+
+
+class ImportHoldingsTest(TestCase):
+    """
+    Test suite for bulk holdings import.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.infy = Stock.objects.create(symbol='INFY', name='Infosys', sector='Technology')
+        self.tcs = Stock.objects.create(symbol='TCS', name='Tata Consultancy Services', sector='Technology')
+        StockAlias.objects.create(stock=self.infy, alias='INFOSYS')
+
+    def test_import_with_bad_rows(self):
+        Holding.objects.create(
+            user=self.user, stock=self.tcs, quantity=Decimal('1'),
+            avg_price=Decimal('3000.00'), purchase_date=date(2024, 2, 1)
+        )
+        tomorrow = (date.today() + timedelta(days=2)).isoformat()
+        report = import_holdings(self.user, csv_file(
+            'Symbol,Qty,Average Price,Trade Date,Notes',
+            'INFY,10,1500.50,2024-01-10,first',
+            'infosys,"1,000",1400,15/01/2024,',
+            'UNKNOWN,5,100,2024-01-10,',
+            'TCS,-1,3000,2024-01-10,',
+            'TCS,2,abc,2024-01-10,',
+            'TCS,2,3000,10-Jan-2024,',
+            ',,,,',
+            'TCS,2,3000,2024-02-01,',
+            'INFY,1,1500,2024-01-10,',
+            f'TCS,2,3000,{tomorrow},',
+        ), 'holdings.csv', chunk_size=3)
+
+        self.assertEqual((report.rows, report.created, report.failed), (9, 3, 6))
+        self.assertEqual(
+            sorted((error.row, error.field) for error in report.errors),
+            [(4, 'symbol'), (5, 'quantity'), (6, 'avg_price'), (9, 'purchase_date'),
+             (10, 'purchase_date'), (11, 'purchase_date')]
+        )
+        self.assertIn('row 2', report.errors[3].error)
+        holdings = Holding.objects.filter(source='import').order_by('purchase_date', 'stock__symbol')
+        self.assertEqual(
+            [(h.stock.symbol, h.quantity, h.avg_price, h.purchase_date) for h in holdings],
+            [
+                ('INFY', Decimal('10'), Decimal('1500.50'), date(2024, 1, 10)),
+                ('TCS', Decimal('2'), Decimal('3000'), date(2024, 1, 10)),
+                ('INFY', Decimal('1000'), Decimal('1400'), date(2024, 1, 15)),
+            ]
+        )
+        self.assertEqual(holdings[0].notes, 'first')
+        self.assertIsNone(holdings[1].notes)
+
+    def test_summary_refreshed(self):
+        get_summary(self.user)
+        import_holdings(self.user, csv_file('symbol,quantity,avg_price,purchase_date', 'INFY,10,100,2024-01-10'), 'a.csv')
+
+        summary = PortfolioSummary.objects.get(user=self.user)
+        self.assertEqual(summary.total_value, Decimal('1000'))
+
+    def test_file_errors(self):
+        with self.assertRaisesRegex(ImportFileError, 'avg_price'):
+            import_holdings(self.user, csv_file('symbol,quantity,purchase_date'), 'a.csv')
+        with self.assertRaisesRegex(ImportFileError, 'empty'):
+            import_holdings(self.user, BytesIO(b''), 'a.csv')
+        with self.assertRaises(ImportFileError):
+            import_holdings(self.user, BytesIO(b''), 'a.pdf')
+        with self.assertRaisesRegex(ValueError, 'source'):
+            import_holdings(self.user, csv_file('symbol,quantity,avg_price,purchase_date'), 'a.csv', source='zerodha')
+
+    def test_bad_encoding_after_first_chunk(self):
+        get_summary(self.user)
+        data = (
+            b'symbol,quantity,avg_price,purchase_date,notes\n'
+            b'INFY,10,100,2024-01-10,\n'
+            b'TCS,1,3000,2024-01-10,\n'
+            b'INFY,5,100,2024-01-11,Bought \x96 cp1252\n'
+        )
+        with self.assertRaisesRegex(ImportFileError, 'Line 4 is not UTF-8.*2 holdings before it were imported'):
+            import_holdings(self.user, BytesIO(data), 'holdings.csv', chunk_size=2)
+
+        self.assertEqual(Holding.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(PortfolioSummary.objects.get(user=self.user).total_value, Decimal('4000'))
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        upload = SimpleUploadedFile('holdings.csv', b'symbol,quantity,avg_price,purchase_date\n\x96,1,1,2024-01-10\n')
+        response = client.post(reverse('holding-import-file'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @unittest.skipUnless(openpyxl, "openpyxl is not installed")
+    def test_xlsx(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['tradingsymbol', 'quantity', 'average_price', 'date'])
+        workbook.active.append(['INFY', 10, 1500.5, date(2024, 1, 10)])
+        workbook.active.append(['TCS', 2.5, 3000, '2024-01-11'])
+        buffer = BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        report = import_holdings(self.user, buffer, 'holdings.xlsx')
+        self.assertEqual((report.created, report.failed), (2, 0))
+        self.assertEqual(Holding.objects.get(stock=self.infy).avg_price, Decimal('1500.50'))
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        upload = SimpleUploadedFile(
+            'holdings.csv', b'symbol,quantity,avg_price,purchase_date\nINFY,10,100,2024-01-10\nFOO,1,1,2024-01-10\n'
+        )
+        response = client.post(reverse('holding-import-file'), {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['errors'], [{'row': 3, 'field': 'symbol', 'error': 'Unknown symbol: FOO'}])
+        self.assertIn('rows_per_second', response.data)
+
+        response = client.post(reverse('holding-import-file'), {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        upload = SimpleUploadedFile('holdings.csv', b'symbol,quantity\nINFY,10\n')
+        response = client.post(reverse('holding-import-file'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # A synced source would let the next sync close the imported holdings
+        for source in ('zerodha', 'x' * 51):
+            upload = SimpleUploadedFile('holdings.csv', b'symbol,quantity,avg_price,purchase_date\nTCS,1,1,2024-01-10\n')
+            response = client.post(
+                reverse('holding-import-file'), {'file': upload, 'source': source}, format='multipart'
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Holding.objects.filter(stock=self.tcs).exists())
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'holdings.csv')
+            with open(path, 'w') as f:
+                f.write('symbol,quantity,avg_price,purchase_date\nINFY,10,100,2024-01-10\nTCS,0,1,2024-01-10\n')
+            out, err = StringIO(), StringIO()
+            call_command('import_holdings', path, '--user', 'testuser', '--source', 'broker', stdout=out, stderr=err)
+
+        self.assertIn('Imported 1 of 2 rows', out.getvalue())
+        self.assertIn('Row 3: quantity', err.getvalue())
+        self.assertEqual(Holding.objects.get().source, 'broker')
@@ -0,0 +1,261 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Stock
+from portfolio.lots import (
+    LotBook, OversoldError, average_cost, fifo_match, position_pnl, rebuild_lots
+)
+from portfolio.models import Lot, LotMatch, Position, Transaction
+
+User = get_user_model()
+
+
+class LotEngineTest(SimpleTestCase):
+    """
+    Test suite for the vectorized FIFO and average-cost engines.
+    """
+    def setUp(self):
+        # Two positions: buy 10, buy 5, sell 12, buy 4, sell 7 / buy 3, sell 3
+        self.groups = np.array([0, 0, 0, 0, 0, 1, 1])
+        self.is_buy = np.array([True, True, False, True, False, True, False])
+        self.quantity = np.array([10, 5, 12, 4, 7, 3, 3])
+        self.price = np.array([100.0, 130.0, 150.0, 120.0, 110.0, 50.0, 40.0])
+
+    def test_fifo_match(self):
+        result = fifo_match(self.groups, self.is_buy, self.quantity, self.price)
+
+        matches = list(zip(result['buy'].tolist(), result['sell'].tolist(), result['quantity'].tolist()))
+        self.assertEqual(matches, [(0, 2, 10), (1, 2, 2), (1, 4, 3), (3, 4, 4), (5, 6, 3)])
+        self.assertEqual(result['open_quantity'].tolist(), [0, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(
+            result['realized_pnl_by_trade'].tolist(),
+            [0, 0, 10 * 50 + 2 * 20, 0, 3 * -20 + 4 * -10, 0, -30]
+        )
+
+    def test_average_cost(self):
+        result = average_cost(self.groups, self.is_buy, self.quantity, self.price)
+
+        average = (10 * 100 + 5 * 130) / 15
+        after_buy = (3 * average + 4 * 120) / 7
+        self.assertAlmostEqual(result['realized_pnl'][2], 12 * (150 - average))
+        self.assertAlmostEqual(result['average_cost'][3], after_buy)
+        self.assertAlmostEqual(result['realized_pnl'][4], 7 * (110 - after_buy))
+        self.assertEqual(result['position'].tolist(), [10, 15, 3, 7, 0, 3, 0])
+
+    def test_oversold(self):
+        quantity = self.quantity.copy()
+        quantity[6] = 4
+
+        for engine in (fifo_match, average_cost):
+            with self.assertRaises(OversoldError) as raised:
+                engine(self.groups, self.is_buy, quantity, self.price)
+            self.assertEqual(raised.exception.index, 6)
+
+    def test_matches_lot_book(self):
+        rng = np.random.default_rng(0)
+        groups = np.sort(rng.integers(0, 20, 2000))
+        is_buy = np.ones(len(groups), dtype=bool)
+        quantity = rng.integers(1, 100, len(groups))
+        price = rng.uniform(10, 100, len(groups))
+        books, realized = {}, np.zeros(len(groups))
+        for i, group in enumerate(groups.tolist()):
+            book = books.setdefault(group, LotBook())
+            held = book.open_quantity
+            if held and rng.random() < 0.4:
+                is_buy[i] = False
+                quantity[i] = rng.integers(1, int(held) + 1)
+                realized[i] = sum(
+                    match.realized_pnl
+                    for match in book.sell(Decimal(int(quantity[i])), Decimal(price[i]))
+                )
+            else:
+                book.buy(i, Decimal(int(quantity[i])), Decimal(price[i]))
+
+        result = fifo_match(groups, is_buy, quantity, price)
+
+        np.testing.assert_allclose(result['realized_pnl_by_trade'], realized)
+        open_lots = {key: int(quantity) for book in books.values() for key, quantity, _ in book.lots}
+        self.assertEqual(
+            {i: int(units) for i, units in enumerate(result['open_quantity'].tolist()) if units},
+            open_lots
+        )
+
+    def test_lot_book_oversold_unchanged(self):
+        book = LotBook([('a', Decimal('5'), Decimal('10'))])
+
+        with self.assertRaises(OversoldError):
+            book.sell(Decimal('6'), Decimal('12'))
+        self.assertEqual(book.open_quantity, Decimal('5'))
+
+
+class LedgerTest(TestCase):
+    """
+    Test suite for keeping lots in step with the transaction ledger.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.stock = Stock.objects.create(symbol='INFY', name='Infosys')
+
+    def trade(self, transaction_type, quantity, price, day, fees='0'):
+        return Transaction.objects.create(
+            user=self.user, stock=self.stock, transaction_type=transaction_type,
+            quantity=Decimal(quantity), price=Decimal(price), fees=Decimal(fees),
+            trade_date=date(2023, 1, day)
+        )
+
+    def open_lots(self):
+        return list(
+            Lot.objects.filter(user=self.user).order_by('acquired_on', 'transaction_id')
+            .values_list('open_quantity', flat=True)
+        )
+
+    def test_appended_trades(self):
+        self.trade('buy', '10', '100', 1, fees='10')
+        self.trade('buy', '5', '130', 2)
+        sell = self.trade('sell', '12', '150', 3, fees='12')
+
+        self.assertEqual(self.open_lots(), [Decimal('0'), Decimal('3')])
+        self.assertEqual(Lot.objects.get(quantity=10).cost_price, Decimal('101'))
+        realized = sum(match.realized_pnl for match in LotMatch.objects.filter(sell=sell))
+        self.assertEqual(realized, 10 * (Decimal('149') - 101) + 2 * (Decimal('149') - 130))
+
+    def test_backdated_trade_rebuilds(self):
+        self.trade('buy', '10', '100', 5)
+        self.trade('sell', '4', '120', 6)
+        self.trade('buy', '2', '90', 1)
+
+        self.assertEqual(self.open_lots(), [Decimal('0'), Decimal('8')])
+        self.assertEqual(
+            list(LotMatch.objects.order_by('lot__acquired_on').values_list('lot__cost_price', 'quantity')),
+            [(Decimal('90'), Decimal('2')), (Decimal('100'), Decimal('2'))]
+        )
+
+    def test_edit_and_delete(self):
+        buy = self.trade('buy', '10', '100', 1)
+        sell = self.trade('sell', '4', '120', 2)
+
+        sell.quantity = Decimal('6')
+        sell.save()
+        self.assertEqual(self.open_lots(), [Decimal('4')])
+
+        sell.delete()
+        self.assertEqual(self.open_lots(), [Decimal('10')])
+        self.assertFalse(LotMatch.objects.exists())
+
+        buy.delete()
+        self.assertFalse(Lot.objects.exists())
+
+    def test_rebuild_matches_incremental(self):
+        for day, (kind, quantity, price) in enumerate(
+            [('buy', '10', '100'), ('buy', '7.5', '110'), ('sell', '12.25', '120'),
+             ('buy', '3', '90'), ('sell', '8', '95')],
+            start=1
+        ):
+            self.trade(kind, quantity, price, day)
+        incremental = set(LotMatch.objects.values_list('lot__transaction_id', 'sell_id', 'quantity', 'realized_pnl'))
+
+        rebuild_lots(self.user.id)
+
+        self.assertEqual(
+            set(LotMatch.objects.values_list('lot__transaction_id', 'sell_id', 'quantity', 'realized_pnl')),
+            incremental
+        )
+        self.assertEqual(self.open_lots(), [Decimal('0'), Decimal('0'), Decimal('0.25')])
+
+    def test_average_position_kept_incrementally(self):
+        for day, (kind, quantity, price, fees) in enumerate(
+            [('buy', '10', '100', '10'), ('buy', '7.5', '110', '0'), ('sell', '12.25', '120', '5'),
+             ('buy', '3', '90', '0'), ('sell', '8', '95', '0')],
+            start=1
+        ):
+            self.trade(kind, quantity, price, day, fees=fees)
+        position = Position.objects.get(user=self.user, stock=self.stock)
+        incremental = (position.quantity, position.average_cost, position.realized_pnl)
+
+        rebuild_lots(self.user.id)
+
+        position = Position.objects.get(user=self.user, stock=self.stock)
+        self.assertEqual(position.quantity, incremental[0])
+        self.assertAlmostEqual(position.average_cost, incremental[1], places=4)
+        self.assertAlmostEqual(position.realized_pnl, incremental[2], places=4)
+        with self.assertNumQueries(1):
+            average, = position_pnl(self.user, 'average')
+        self.assertEqual(average['open_quantity'], Decimal('0.2500'))
+        self.assertEqual(average['realized_pnl'], incremental[2].quantize(Decimal('0.01')))
+
+    def test_position_pnl(self):
+        self.trade('buy', '10', '100', 1)
+        self.trade('buy', '10', '200', 2)
+        self.trade('sell', '10', '180', 3)
+
+        fifo, = position_pnl(self.user)
+        average, = position_pnl(self.user, 'average')
+
+        self.assertEqual(fifo['open_quantity'], Decimal('10.0000'))
+        self.assertEqual(fifo['cost'], Decimal('2000.00'))
+        self.assertEqual(fifo['realized_pnl'], Decimal('800.00'))
+        self.assertEqual(average['cost'], Decimal('1500.00'))
+        self.assertEqual(average['realized_pnl'], Decimal('300.00'))
+
+
+class TransactionViewTest(TestCase):
+    """
+    Test suite for the transaction, lot and P&L endpoints.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.stock = Stock.objects.create(symbol='INFY', name='Infosys')
+
+    def post(self, transaction_type, quantity, day):
+        return self.client.post(reverse('transaction-list'), {
+            'stock': self.stock.id, 'transaction_type': transaction_type,
+            'quantity': quantity, 'price': '100.00', 'trade_date': f'2023-01-{day:02d}'
+        })
+
+    def test_create_and_list(self):
+        self.assertEqual(self.post('buy', '10', 1).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.post('sell', '4', 2).status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(reverse('transaction-list'))
+        self.assertEqual([row['transaction_type'] for row in response.data['results']], ['sell', 'buy'])
+
+        lots = self.client.get(reverse('lot-list'), {'open': 'true'}).data['results']
+        self.assertEqual([lot['open_quantity'] for lot in lots], ['6.0000'])
+
+        response = self.client.get(reverse('portfolio-pnl'))
+        self.assertEqual(response.data['positions'][0]['open_quantity'], '6.0000')
+
+    def test_oversold_rejected(self):
+        self.post('buy', '10', 2)
+
+        self.assertEqual(self.post('sell', '11', 3).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post('sell', '5', 1).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_delete_rejected_when_oversold(self):
+        self.post('buy', '10', 1)
+        self.post('sell', '10', 2)
+        buy = Transaction.objects.get(transaction_type='buy')
+
+        response = self.client.delete(reverse('transaction-detail', args=[buy.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Transaction.objects.filter(pk=buy.pk).exists())
+
+    def test_invalid_method(self):
+        response = self.client.get(reverse('portfolio-pnl'), {'method': 'lifo'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from core.models import Classification, Stock
+from portfolio.models import Holding, HoldingClass
+
+User = get_user_model()
+
+
+class ListQueryCountTest(APITestCase):
+    """
+    Test suite pinning list endpoints to a constant number of queries.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.classifications = [
+            Classification.objects.create(name=f'Class {i}', type='Theme') for i in range(3)
+        ]
+        self.count = 0
+
+    def add_holdings(self, count):
+        for _ in range(count):
+            stock = Stock.objects.create(symbol=f'SYM{self.count}', name=f'Stock {self.count}')
+            holding = Holding.objects.create(
+                user=self.user, stock=stock, quantity=1, avg_price=100,
+                purchase_date=date(2023, 1, 1) + timedelta(days=self.count)
+            )
+            HoldingClass.objects.create(
+                holding=holding, classification=self.classifications[self.count % 3]
+            )
+            self.count += 1
+
+    def count_queries(self, url, expected_results):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), expected_results)
+        return len(queries)
+
+    def assert_constant(self, url):
+        self.add_holdings(2)
+        small = self.count_queries(url, 2)
+        self.add_holdings(48)
+        large = self.count_queries(url, 50)
+
+        self.assertEqual(small, large)
+        # At most a pagination count plus the page itself
+        self.assertLessEqual(large, 2)
+
+    def test_holdings(self):
+        self.assert_constant(reverse('holding-list'))
+
+    def test_holdings_search(self):
+        self.assert_constant(reverse('holding-list') + '?search=SYM&ordering=avg_price')
+
+    def test_holding_classes(self):
+        self.assert_constant(reverse('holdingclass-list'))
+
+    def test_no_user_details(self):
+        self.add_holdings(1)
+
+        response = self.client.get(reverse('holding-list'))
+
+        self.assertNotIn('user_details', response.data['results'][0])
+        self.assertNotIn('user_details', self.client.get(
+            reverse('holdingclass-list')
+        ).data['results'][0]['holding_details'])
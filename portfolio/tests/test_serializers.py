@@ -40,7 +40,7 @@ class HoldingSerializerTest(TestCase):
             set([
                 'id', 'user', 'stock', 'quantity', 'avg_price',
                 'purchase_date', 'notes', 'source', 'external_id',
-                'stock_details', 'user_details', 'total_value',
+                'stock_details', 'total_value', 'closed_at',
                 'created_at', 'updated_at'
             ])
         )
@@ -0,0 +1,123 @@
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Stock
+from portfolio.models import Holding, PortfolioSnapshot
+from portfolio.snapshots import backfill_snapshots, take_snapshots, unpack_holdings
+from zerodha.candles import CandleStore
+from zerodha.instruments import InstrumentMaster
+from zerodha.tests.test_candles import day_candles
+from zerodha.tests.test_instruments import csv_rows
+
+User = get_user_model()
+
+
+class PortfolioSnapshotTest(TestCase):
+    """
+    Test suite for taking and backfilling daily portfolio snapshots.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.infy = Stock.objects.create(symbol='INFY', name='Infosys')
+        self.reliance = Stock.objects.create(symbol='RELIANCE', name='Reliance')
+        self.infy_holding = self.add_holding(self.infy, '10', '100.00', date(2024, 1, 2))
+        self.reliance_holding = self.add_holding(self.reliance, '2', '1000.00', date(2024, 1, 4))
+
+    def add_holding(self, stock, quantity, avg_price, purchase_date):
+        return Holding.objects.create(
+            user=self.user, stock=stock, quantity=Decimal(quantity),
+            avg_price=Decimal(avg_price), purchase_date=purchase_date
+        )
+
+    def test_take_snapshots(self):
+        prices = {'NSE:INFY': (120.0, 118.0)}
+        saved = take_snapshots(date(2024, 2, 1), prices=lambda instruments: prices)
+
+        self.assertEqual(saved, 1)
+        snapshot = PortfolioSnapshot.objects.get(user=self.user, date=date(2024, 2, 1))
+        # RELIANCE has no price and is valued at cost
+        self.assertEqual(snapshot.market_value, Decimal('3200.00'))
+        self.assertEqual(snapshot.cost, Decimal('3000.00'))
+        self.assertEqual(snapshot.unrealized_pnl, Decimal('200.00'))
+        self.assertEqual((snapshot.total_holdings, snapshot.priced_holdings), (2, 1))
+        holdings = {row['symbol']: row for row in unpack_holdings(snapshot)}
+        self.assertEqual(holdings['INFY']['market_value'], 1200.0)
+        self.assertEqual(holdings['INFY']['holding'], self.infy_holding.id)
+
+    def test_retaking_a_day_replaces_it(self):
+        take_snapshots(date(2024, 2, 1), prices=lambda instruments: {'NSE:INFY': (120.0, None)})
+        take_snapshots(date(2024, 2, 1), prices=lambda instruments: {'NSE:INFY': (130.0, None)})
+
+        snapshot = PortfolioSnapshot.objects.get(user=self.user)
+        self.assertEqual(snapshot.market_value, Decimal('3300.00'))
+
+    def test_backfill_from_daily_closes(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = CandleStore(tmp.name)
+        store.write(408065, 'day', day_candles(date(2024, 1, 2), [101, 102, 103, 104]))
+        store.write(738561, 'day', day_candles(date(2024, 1, 3), [1010, 1020]))
+        master = InstrumentMaster.from_rows(csv_rows())
+
+        with patch('portfolio.snapshots.get_instrument_master', return_value=master):
+            saved = backfill_snapshots(self.user, date(2024, 1, 1), date(2024, 1, 5), store=store)
+
+        self.assertEqual(saved, 4)
+        snapshots = {s.date: s for s in PortfolioSnapshot.objects.filter(user=self.user)}
+        self.assertEqual(sorted(snapshots), [date(2024, 1, d) for d in (2, 3, 4, 5)])
+        self.assertEqual(snapshots[date(2024, 1, 2)].market_value, Decimal('1010.00'))
+        self.assertEqual(snapshots[date(2024, 1, 3)].total_holdings, 1)
+        # RELIANCE is held from the 4th; its close carries over to the 5th
+        self.assertEqual(snapshots[date(2024, 1, 4)].market_value, Decimal('3070.00'))
+        self.assertEqual(snapshots[date(2024, 1, 5)].market_value, Decimal('3080.00'))
+        self.assertEqual(snapshots[date(2024, 1, 5)].priced_holdings, 2)
+
+
+class PortfolioHistoryViewTest(TestCase):
+    """
+    Test suite for the portfolio history endpoint.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        for day, value in ((1, '100.00'), (2, '110.00'), (3, '105.00')):
+            PortfolioSnapshot.objects.create(
+                user=self.user, date=date(2024, 1, day), market_value=Decimal(value),
+                cost=Decimal('100.00'), unrealized_pnl=Decimal(value) - 100,
+                total_holdings=1, priced_holdings=1,
+                holdings={'holding': [1], 'symbol': ['INFY'], 'market_value': [float(value)]}
+            )
+        self.url = reverse('portfolio-history')
+
+    def test_history_range(self):
+        response = self.client.get(self.url, {'from': '2024-01-02', 'to': '2024-01-03'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        snapshots = response.data['snapshots']
+        self.assertEqual([s['date'] for s in snapshots], ['2024-01-02', '2024-01-03'])
+        self.assertEqual(snapshots[0]['market_value'], '110.00')
+        self.assertNotIn('holdings', snapshots[0])
+
+    def test_history_with_holdings(self):
+        response = self.client.get(self.url, {'holdings': 'true'})
+
+        self.assertEqual(len(response.data['snapshots']), 3)
+        self.assertEqual(response.data['snapshots'][0]['holdings']['symbol'], ['INFY'])
+
+    def test_invalid_date(self):
+        response = self.client.get(self.url, {'from': 'yesterday'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
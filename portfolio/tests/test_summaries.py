@@ -0,0 +1,147 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Classification, Stock
+from portfolio.models import Holding, HoldingClass, PortfolioSummary
+from portfolio.summaries import compute_summary, diff_summary, get_summary
+
+User = get_user_model()
+
+
+class PortfolioSummaryTest(TestCase):
+    """
+    Test suite for the incrementally maintained portfolio summary.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.reliance = Stock.objects.create(symbol='RELIANCE', name='Reliance', sector='Energy')
+        self.infy = Stock.objects.create(symbol='INFY', name='Infosys', sector='Technology')
+        self.large_cap = Classification.objects.create(name='Large Cap', type='Market Cap')
+        self.long_term = Classification.objects.create(name='Long Term', type='Horizon')
+        self.holding = self.add_holding(self.reliance, '10', '2000.00')
+        HoldingClass.objects.create(holding=self.holding, classification=self.large_cap)
+        get_summary(self.user)
+
+    def add_holding(self, stock, quantity, avg_price, user=None):
+        return Holding.objects.create(
+            user=user or self.user, stock=stock, quantity=quantity,
+            avg_price=avg_price, purchase_date=date(2023, 5, 1)
+        )
+
+    def summary(self):
+        summary = PortfolioSummary.objects.get(user=self.user)
+        self.assertEqual(diff_summary(summary), {})
+        return summary
+
+    def test_built_on_first_read(self):
+        summary = self.summary()
+
+        self.assertEqual(summary.total_value, Decimal('20000'))
+        self.assertEqual(summary.total_holdings, 1)
+        self.assertEqual(summary.sectors, {'Energy': '20000.000000'})
+        self.assertEqual(summary.classifications, {'Market Cap: Large Cap': '20000.000000'})
+        self.assertEqual([h['id'] for h in summary.top_holdings], [self.holding.id])
+
+    def test_holding_created_updated_and_deleted(self):
+        infy = self.add_holding(self.infy, 5, 1500.5)
+        self.assertEqual(self.summary().total_value, Decimal('27502.5'))
+
+        infy.quantity = Decimal('2.5')
+        infy.save()
+        summary = self.summary()
+        self.assertEqual(summary.sectors['Technology'], '3751.250000')
+        self.assertEqual([h['id'] for h in summary.top_holdings], [self.holding.id, infy.id])
+
+        self.holding.delete()
+        summary = self.summary()
+        self.assertEqual(summary.total_holdings, 1)
+        self.assertEqual(summary.sectors, {'Technology': '3751.250000'})
+        self.assertEqual(summary.classifications, {})
+
+    def test_holding_closed_and_reopened(self):
+        self.holding.closed_at = timezone.now()
+        self.holding.save()
+        summary = self.summary()
+        self.assertEqual(summary.total_holdings, 0)
+        self.assertEqual(summary.top_holdings, [])
+
+        self.holding.closed_at = None
+        self.holding.save()
+        self.assertEqual(self.summary().total_holdings, 1)
+
+    def test_holding_moved_to_another_user(self):
+        other = User.objects.create_user(
+            username='otheruser', email='other@example.com', password='testpass123'
+        )
+        get_summary(other)
+
+        self.holding.user = other
+        self.holding.save()
+
+        self.assertEqual(self.summary().total_holdings, 0)
+        self.assertEqual(diff_summary(other.portfolio_summary), {})
+        self.assertEqual(other.portfolio_summary.total_holdings, 1)
+
+    def test_classification_changes(self):
+        holding_class = HoldingClass.objects.create(holding=self.holding, classification=self.long_term)
+        self.assertIn('Horizon: Long Term', self.summary().classifications)
+
+        holding_class.delete()
+        self.assertNotIn('Horizon: Long Term', self.summary().classifications)
+
+        self.large_cap.name = 'Mega Cap'
+        self.large_cap.save()
+        self.assertEqual(self.summary().classifications, {'Market Cap: Mega Cap': '20000.000000'})
+
+    def test_sector_change(self):
+        self.reliance.sector = 'Oil & Gas'
+        self.reliance.save()
+
+        summary = self.summary()
+        self.assertEqual(summary.sectors, {'Oil & Gas': '20000.000000'})
+        self.assertEqual(summary.top_holdings[0]['stock_details']['sector'], 'Oil & Gas')
+
+    def test_users_without_summary_are_skipped(self):
+        other = User.objects.create_user(
+            username='otheruser', email='other@example.com', password='testpass123'
+        )
+        self.add_holding(self.infy, 1, 100, user=other)
+
+        self.assertFalse(PortfolioSummary.objects.filter(user=other).exists())
+        self.assertEqual(get_summary(other).total_holdings, 1)
+
+    def test_check_command_finds_and_fixes_drift(self):
+        # Queryset updates skip the signals
+        Holding.objects.filter(id=self.holding.id).update(quantity=20)
+        out, err = StringIO(), StringIO()
+
+        call_command('check_portfolio_summaries', stdout=out, stderr=err)
+        self.assertIn('1 differ', out.getvalue())
+        self.assertIn('total_value', err.getvalue())
+
+        call_command('check_portfolio_summaries', '--fix', stdout=out, stderr=err)
+        self.assertEqual(self.summary().total_value, Decimal('40000'))
+
+    def test_summary_view(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        with self.assertNumQueries(1):
+            response = client.get(reverse('portfolio-summary'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_value'], '20000.00')
+        self.assertEqual(response.data['sectors'], {'Energy': '20000.00'})
+        self.assertEqual(response.data['classifications'], {'Market Cap: Large Cap': '20000.00'})
+        self.assertEqual(response.data['top_holdings'], compute_summary(self.user.id)['top_holdings'])
@@ -0,0 +1,152 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Stock
+from portfolio import tax
+from portfolio.models import Transaction
+
+User = get_user_model()
+
+
+class TaxRulesTest(SimpleTestCase):
+    """
+    Test suite for holding periods, financial years and grandfathering.
+    """
+    def test_financial_year(self):
+        self.assertEqual(tax.financial_year(date(2024, 3, 31)), 2023)
+        self.assertEqual(tax.financial_year(date(2024, 4, 1)), 2024)
+        self.assertEqual(tax.fy_label(2023), '2023-24')
+        self.assertEqual(tax.fy_label(1999), '1999-00')
+        self.assertEqual(tax.parse_fy('2023-24'), 2023)
+        self.assertEqual(tax.parse_fy('2023'), 2023)
+        for text in ('2023-25', '23-24', 'FY24'):
+            with self.assertRaises(ValueError):
+                tax.parse_fy(text)
+
+    def test_long_term_after_twelve_months(self):
+        self.assertFalse(tax.is_long_term(date(2022, 6, 15), date(2023, 6, 15)))
+        self.assertTrue(tax.is_long_term(date(2022, 6, 15), date(2023, 6, 16)))
+        self.assertFalse(tax.is_long_term(date(2020, 2, 29), date(2021, 3, 1)))
+        self.assertTrue(tax.is_long_term(date(2020, 2, 29), date(2021, 3, 2)))
+
+    def test_grandfathered_price(self):
+        # Higher of cost and FMV, FMV capped at the sale price
+        self.assertEqual(tax.grandfathered_price(Decimal(100), Decimal(150), Decimal(200)), 150)
+        self.assertEqual(tax.grandfathered_price(Decimal(100), Decimal(150), Decimal(120)), 120)
+        self.assertEqual(tax.grandfathered_price(Decimal(100), Decimal(150), Decimal(90)), 100)
+        self.assertEqual(tax.grandfathered_price(Decimal(100), None, Decimal(200)), 100)
+
+
+class TaxReportTest(TestCase):
+    """
+    Test suite for the capital gains report and its cache.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.stock = Stock.objects.create(symbol='INFY', name='Infosys', fmv_jan_2018=Decimal('1150'))
+        self.trade('buy', '10', '1000', date(2017, 5, 1))
+        self.trade('buy', '10', '1400', date(2023, 1, 10))
+        self.trade('sell', '15', '1500', date(2023, 6, 1))
+
+    def tearDown(self):
+        cache.clear()
+
+    def trade(self, transaction_type, quantity, price, trade_date):
+        return Transaction.objects.create(
+            user=self.user, stock=self.stock, transaction_type=transaction_type,
+            quantity=Decimal(quantity), price=Decimal(price), trade_date=trade_date
+        )
+
+    def rows(self, **params):
+        response = self.client.get(reverse('tax-report'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_report(self):
+        long_term, short_term = self.rows(fy='2023-24')
+
+        self.assertEqual(long_term['term'], 'long')
+        self.assertEqual(long_term['fmv_jan_2018'], '1150.00')
+        self.assertEqual(long_term['cost_of_acquisition'], '11500.00')
+        self.assertEqual(long_term['gain'], '3500.00')
+        self.assertEqual(short_term['term'], 'short')
+        self.assertEqual(short_term['quantity'], '5.0000')
+        self.assertEqual(short_term['gain'], '500.00')
+        self.assertEqual(short_term['fmv_jan_2018'], '')
+
+    def test_summary(self):
+        response = self.client.get(reverse('tax-summary'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['years'], [{
+            'financial_year': '2023-24', 'rows': 2, 'stcg': '500.00', 'ltcg': '3500.00',
+            'ltcg_exemption': '3500.00', 'taxable_ltcg': '0.00',
+        }])
+
+    def test_cached_until_trades_change(self):
+        self.rows(fy='2023-24')
+        with self.assertNumQueries(0):
+            tax.year_summary(self.user.id, 2023)
+
+        self.trade('sell', '5', '1600', date(2023, 9, 1))
+
+        summary = tax.year_summary(self.user.id, 2023)
+        self.assertEqual(summary['rows'], 3)
+        self.assertEqual(summary['stcg'], Decimal('1500.00'))
+
+    def test_earlier_years_kept_for_new_trades(self):
+        self.trade('buy', '1', '1000', date(2024, 5, 1))
+        self.rows(fy='2023-24')
+
+        self.trade('sell', '1', '1100', date(2024, 6, 1))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(list(tax.iter_year(self.user.id, 2023))), 2)
+
+    def test_fmv_change_invalidates(self):
+        self.rows(fy='2023-24')
+
+        self.stock.fmv_jan_2018 = Decimal('1200')
+        self.stock.save()
+
+        self.assertEqual(tax.year_summary(self.user.id, 2023)['ltcg'], Decimal('3000.00'))
+
+    def test_invalid_parameters(self):
+        for params in ({'fy': '2023-25'}, {'output': 'pdf'}):
+            response = self.client.get(reverse('tax-report'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(tax.openpyxl, "openpyxl is not installed")
+    def test_xlsx(self):
+        response = self.client.get(reverse('tax-report'), {'fy': '2023', 'output': 'xlsx'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+
+    def test_load_grandfathered_prices(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('symbol,price\nNSE:INFY,1160.5\nUNKNOWN,10\n')
+        self.addCleanup(os.remove, f.name)
+
+        call_command('load_grandfathered_prices', f.name, stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.fmv_jan_2018, Decimal('1160.50'))
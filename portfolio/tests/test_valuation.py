@@ -0,0 +1,127 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Stock
+from portfolio.models import Holding
+from portfolio.valuation import PortfolioValuation, cached_prices, value_positions
+
+User = get_user_model()
+
+
+class ValuePositionsTest(SimpleTestCase):
+    """
+    Test suite for the vectorized valuation.
+    """
+    def test_values(self):
+        values = value_positions(
+            quantity=np.array([10.0, 5.0, 2.0]),
+            avg_price=np.array([100.0, 200.0, 50.0]),
+            last_price=np.array([110.0, 180.0, np.nan]),
+            close=np.array([105.0, np.nan, np.nan])
+        )
+
+        np.testing.assert_array_equal(values["priced"], [True, True, False])
+        np.testing.assert_allclose(values["market_value"], [1100.0, 900.0, 100.0])
+        np.testing.assert_allclose(values["unrealized_pnl"], [100.0, -100.0, 0.0])
+        np.testing.assert_allclose(values["day_change"], [50.0, 0.0, 0.0])
+        np.testing.assert_allclose(values["weight"], [1100 / 2100, 900 / 2100, 100 / 2100])
+
+    def test_empty(self):
+        empty = np.array([])
+        values = value_positions(empty, empty, empty, empty)
+
+        self.assertEqual(len(values["weight"]), 0)
+
+
+class PortfolioValuationTest(TestCase):
+    """
+    Test suite for valuing a user's holdings.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.reliance = Stock.objects.create(symbol='RELIANCE', name='Reliance', sector='Energy')
+        self.infy = Stock.objects.create(symbol='INFY', name='Infosys', sector='Technology')
+        self.tcs = Stock.objects.create(symbol='TCS', name='TCS')
+        self.add_holding(self.reliance, '10', '2000.00')
+        self.add_holding(self.infy, '5', '1500.00', source='zerodha', external_id='INFY:BSE')
+        self.add_holding(self.tcs, '2', '3000.00')
+        self.prices = {
+            'NSE:RELIANCE': (2200.0, 2190.0),
+            'BSE:INFY': (1400.0, None),
+        }
+
+    def add_holding(self, stock, quantity, avg_price, **kwargs):
+        return Holding.objects.create(
+            user=self.user, stock=stock, quantity=Decimal(quantity),
+            avg_price=Decimal(avg_price), purchase_date=date(2023, 5, 1), **kwargs
+        )
+
+    def price_source(self, instruments):
+        self.requested = instruments
+        return {key: self.prices[key] for key in instruments if key in self.prices}
+
+    def test_totals(self):
+        valuation = PortfolioValuation.for_user(self.user, prices=self.price_source)
+        totals = valuation.totals()
+
+        self.assertEqual(self.requested, ['BSE:INFY', 'NSE:RELIANCE', 'NSE:TCS'])
+        self.assertEqual(totals['total_cost'], 33500.0)
+        self.assertEqual(totals['market_value'], 22000.0 + 7000.0 + 6000.0)
+        self.assertEqual(totals['unrealized_pnl'], 1500.0)
+        self.assertEqual(totals['day_change'], 100.0)
+
+    def test_as_dict(self):
+        data = PortfolioValuation.for_user(self.user, prices=self.price_source).as_dict(limit=2)
+
+        self.assertEqual(data['total_holdings'], 3)
+        self.assertEqual(data['priced_holdings'], 2)
+        self.assertEqual(data['sectors'], {'Energy': 22000.0, 'Technology': 7000.0, 'Unknown': 6000.0})
+        self.assertEqual([h['symbol'] for h in data['holdings']], ['RELIANCE', 'INFY'])
+        self.assertEqual(data['holdings'][1]['unrealized_pnl'], -500.0)
+
+    def test_closed_holdings_excluded(self):
+        Holding.objects.filter(stock=self.tcs).update(closed_at='2024-01-02T00:00:00Z')
+
+        valuation = PortfolioValuation.for_user(self.user, prices=self.price_source)
+
+        self.assertEqual(len(valuation), 2)
+
+    @patch('portfolio.valuation.ZerodhaService.get_quotes')
+    @patch('portfolio.valuation.get_live_quotes')
+    def test_cached_prices_prefers_ticker(self, mock_live_quotes, mock_get_quotes):
+        mock_live_quotes.return_value = {'NSE:INFY': {'last_price': 1600.0, 'close': 1590.0}}
+        mock_get_quotes.return_value = {
+            'NSE:TCS': {'last_price': 3500.0, 'ohlc': {'close': 3480.0}}
+        }
+
+        prices = cached_prices(self.user.id)(['NSE:INFY', 'NSE:TCS'])
+
+        self.assertEqual(prices, {'NSE:INFY': (1600.0, 1590.0), 'NSE:TCS': (3500.0, 3480.0)})
+        mock_get_quotes.assert_called_once_with(self.user.id, ['NSE:TCS'], 'ohlc')
+
+    @patch('portfolio.valuation.ZerodhaService.get_quotes', side_effect=Exception('no client'))
+    @patch('portfolio.valuation.get_live_quotes', return_value={})
+    def test_live_summary_view(self, mock_live_quotes, mock_get_quotes):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.get(reverse('portfolio-summary-live'), {'limit': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['priced_holdings'], 0)
+        self.assertEqual(response.data['market_value'], 33500.0)
+        self.assertEqual(len(response.data['holdings']), 1)
+
+        for limit in ('0', '-1', 'abc'):
+            response = client.get(reverse('portfolio-summary-live'), {'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
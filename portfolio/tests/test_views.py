@@ -3,6 +3,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from core.models import Stock, Classification
 from portfolio.models import Holding, HoldingClass
 
@@ -94,6 +95,43 @@ class HoldingViewSetTest(APITestCase):
         self.assertEqual(Holding.objects.count(), 0)
 
 
+class ClosedHoldingViewTest(APITestCase):
+    """
+    Test suite for closed holdings in the holding list.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.stock = Stock.objects.create(symbol='RELIANCE', name='Reliance Industries Ltd.')
+        self.holding = Holding.objects.create(
+            user=self.user, stock=self.stock, quantity=Decimal('10'),
+            avg_price=Decimal('2000.00'), purchase_date='2023-05-01'
+        )
+
+    def test_list_hides_closed_holdings(self):
+        closed = Holding.objects.create(
+            user=self.user, stock=self.stock, quantity=Decimal('5'), avg_price=Decimal('1900.00'),
+            purchase_date='2022-05-01', source='zerodha', closed_at=timezone.now()
+        )
+        url = reverse('holding-list')
+
+        response = self.client.get(url)
+        self.assertEqual([holding['id'] for holding in response.data['results']], [self.holding.id])
+        self.assertIsNone(response.data['results'][0]['closed_at'])
+
+        response = self.client.get(url, {'include_closed': 'true'})
+        self.assertEqual([holding['id'] for holding in response.data['results']], [self.holding.id, closed.id])
+        self.assertIsNotNone(response.data['results'][1]['closed_at'])
+
+        response = self.client.get(reverse('holding-detail', args=[closed.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
 class HoldingClassViewSetTest(APITestCase):
     """
     Test suite for the HoldingClassViewSet API endpoints.
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Stock
+from portfolio.models import Watchlist, WatchlistItem, WatchlistQuote
+from portfolio.watchlists import refresh_quotes, user_watchlists, watched_instruments
+from zerodha.quote_cache import QuoteCache
+
+User = get_user_model()
+
+
+def ohlc(*instruments):
+    return {
+        instrument: {"last_price": 110.0, "ohlc": {"close": 100.0}}
+        for instrument in instruments
+    }
+
+
+class WatchlistTest(TestCase):
+    """
+    Test suite for watchlists and their shared quotes.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='testpass123'
+        )
+        self.infy = Stock.objects.create(symbol='INFY', name='Infosys', sector='Technology')
+        self.tcs = Stock.objects.create(symbol='TCS', name='Tata Consultancy Services', sector='Technology')
+        self.reliance = Stock.objects.create(symbol='RELIANCE', name='Reliance Industries', sector='Energy')
+
+        self.tech = Watchlist.objects.create(user=self.user, name='Tech')
+        WatchlistItem.objects.create(watchlist=self.tech, stock=self.infy)
+        WatchlistItem.objects.create(watchlist=self.tech, stock=self.tcs)
+        energy = Watchlist.objects.create(user=self.user, name='Energy')
+        WatchlistItem.objects.create(watchlist=energy, stock=self.infy)
+        WatchlistItem.objects.create(watchlist=energy, stock=self.reliance, exchange='BSE')
+        self.others = Watchlist.objects.create(user=self.other, name='Tech')
+        WatchlistItem.objects.create(watchlist=self.others, stock=self.infy)
+        archived = Watchlist.objects.create(user=self.other, name='Old', is_active=False)
+        WatchlistItem.objects.create(watchlist=archived, stock=self.reliance)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_watched_instruments(self):
+        self.assertEqual(watched_instruments(), ['BSE:RELIANCE', 'NSE:INFY', 'NSE:TCS'])
+        self.assertEqual(watched_instruments([self.other.id]), ['NSE:INFY'])
+
+    def test_quotes_fetched_once_and_shared(self):
+        client = MagicMock()
+        client.get_ohlc.side_effect = ohlc
+        # Only the refresher's user has a session, and the in-process quote
+        # cache keeps nothing, so users are served from the shared table
+        with patch('zerodha.services.get_quote_cache', return_value=QuoteCache(ttl=lambda: 0)), \
+                patch(
+                    'zerodha.services.ZerodhaService.get_client_for_user',
+                    side_effect=lambda user_id: client if user_id == self.other.id else None
+                ) as get_client, \
+                patch('portfolio.watchlists.get_live_quotes', return_value={}):
+            counts = refresh_quotes(self.other.id)
+            mine = user_watchlists(self.user)
+            self.assertEqual(get_client.call_count, 1)
+            theirs = user_watchlists(self.other)
+
+            WatchlistQuote.objects.update(fetched_at=timezone.now() - timedelta(hours=1))
+            stale = user_watchlists(self.user)
+
+        self.assertEqual(counts, {"instruments": 3, "live": 0, "fetched": 3})
+        self.assertEqual(WatchlistQuote.objects.count(), 3)
+        # Users read what the refresher fetched; only the inactive watchlist,
+        # which it skips, needs a fetch of its own
+        self.assertEqual(
+            [call.args for call in client.get_ohlc.call_args_list],
+            [('BSE:RELIANCE', 'NSE:INFY', 'NSE:TCS'), ('NSE:RELIANCE',)]
+        )
+        self.assertEqual([watchlist['name'] for watchlist in mine], ['Energy', 'Tech'])
+        self.assertTrue(all(item['priced'] for watchlist in mine for item in watchlist['items']))
+        infy = mine[1]['items'][0]
+        self.assertEqual(
+            (infy['symbol'], infy['last_price'], infy['change'], infy['change_pct'], infy['priced']),
+            ('INFY', 110.0, 10.0, 10.0, True)
+        )
+        self.assertEqual(theirs[0]['items'][0]['last_price'], 110.0)
+        self.assertEqual(theirs[1]['items'][0]['last_price'], 110.0)
+        self.assertFalse(any(item['priced'] for watchlist in stale for item in watchlist['items']))
+
+    def test_quotes_endpoint(self):
+        prices = MagicMock(return_value={'NSE:INFY': (110.0, 100.0)})
+        with patch('portfolio.watchlists.watchlist_prices', return_value=prices), \
+                self.assertNumQueries(2):
+            response = self.client.get(reverse('watchlist-quotes'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        prices.assert_called_once_with(['BSE:RELIANCE', 'NSE:INFY', 'NSE:TCS'])
+        self.assertEqual([len(watchlist['items']) for watchlist in response.data['watchlists']], [2, 2])
+        self.assertEqual(response.data['watchlists'][0]['items'][0]['change_pct'], 10.0)
+        self.assertFalse(response.data['watchlists'][1]['items'][1]['priced'])
+
+    def test_crud(self):
+        response = self.client.post(reverse('watchlist-list'), {'name': 'Banks'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        banks = Watchlist.objects.get(pk=response.data['id'])
+        self.assertEqual(banks.user, self.user)
+
+        response = self.client.post(reverse('watchlist-list'), {'name': 'Tech'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            reverse('watchlistitem-list'), {'watchlist': banks.id, 'stock': self.infy.id, 'exchange': 'NSE'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['symbol'], 'INFY')
+
+        response = self.client.post(
+            reverse('watchlistitem-list'), {'watchlist': self.others.id, 'stock': self.tcs.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('watchlist-list'))
+        self.assertEqual([watchlist['name'] for watchlist in response.data['results']], ['Banks', 'Energy', 'Tech'])
+        self.assertEqual(response.data['results'][0]['items'][0]['symbol'], 'INFY')
+        response = self.client.get(reverse('watchlistitem-list'), {'watchlist': self.tech.id})
+        self.assertEqual(len(response.data['results']), 2)
+
+        response = self.client.delete(reverse('watchlist-detail', args=[self.others.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_command(self):
+        out = StringIO()
+        with patch(
+            'portfolio.management.commands.refresh_watchlist_quotes.refresh_quotes',
+            return_value={"instruments": 3, "live": 1, "fetched": 2}
+        ) as refresh:
+            call_command('refresh_watchlist_quotes', '--user', 'other', '--once', stdout=out)
+
+        refresh.assert_called_once_with(self.other.id)
+        self.assertIn('Watching 3 instruments: 1 from the ticker, 2 quoted', out.getvalue())
+
+        with self.assertRaisesRegex(CommandError, 'WATCHLIST_QUOTE_MAX_AGE'):
+            call_command('refresh_watchlist_quotes', '--user', 'other', '--interval', '600')
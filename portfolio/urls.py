@@ -1,12 +1,26 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from portfolio.views import HoldingViewSet, HoldingClassViewSet, PortfolioSummaryView
+from portfolio.views import (
+    HoldingViewSet, HoldingClassViewSet, PortfolioSummaryView, PortfolioLiveSummaryView,
+    TransactionViewSet, LotViewSet, PositionPnLView, TaxReportView, TaxSummaryView,
+    PortfolioHistoryView, PortfolioAnalyticsView, WatchlistViewSet, WatchlistItemViewSet
+)
 
 router = DefaultRouter()
 router.register(r'holdings', HoldingViewSet, basename='holding')
 router.register(r'holding-classes', HoldingClassViewSet, basename='holdingclass')
+router.register(r'transactions', TransactionViewSet, basename='transaction')
+router.register(r'lots', LotViewSet, basename='lot')
+router.register(r'watchlists', WatchlistViewSet, basename='watchlist')
+router.register(r'watchlist-items', WatchlistItemViewSet, basename='watchlistitem')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('summary/', PortfolioSummaryView.as_view(), name='portfolio-summary'),
+    path('summary/live/', PortfolioLiveSummaryView.as_view(), name='portfolio-summary-live'),
+    path('history/', PortfolioHistoryView.as_view(), name='portfolio-history'),
+    path('analytics/', PortfolioAnalyticsView.as_view(), name='portfolio-analytics'),
+    path('pnl/', PositionPnLView.as_view(), name='portfolio-pnl'),
+    path('tax/report/', TaxReportView.as_view(), name='tax-report'),
+    path('tax/summary/', TaxSummaryView.as_view(), name='tax-summary'),
 ]
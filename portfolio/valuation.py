@@ -0,0 +1,232 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from portfolio.models import Holding
+from zerodha.instruments import holding_instrument_key
+from zerodha.services import ZerodhaService
+from zerodha.ticker import get_live_quotes
+
+logger = logging.getLogger(__name__)
+
+# Takes 'exchange:tradingsymbol' keys and returns (last price, previous close)
+# for the instruments it has prices for
+PriceSource = Callable[[List[str]], Dict[str, Tuple[float, Optional[float]]]]
+
+
+def cached_prices(user_id: int) -> PriceSource:
+    """
+    Build a price source that never waits on Zerodha when it can avoid it.
+
+    Prices come from the ticker's shared table first; instruments it hasn't
+    seen go through the shared quote cache, using the user's session for
+    cache misses.
+
+    Args:
+        user_id: User whose Zerodha session is used for cache misses
+
+    Returns:
+        A PriceSource
+    """
+    def fetch(instruments: List[str]) -> Dict[str, Tuple[float, Optional[float]]]:
+        prices = {
+            instrument: (quote["last_price"], quote["close"] or None)
+            for instrument, quote in get_live_quotes(instruments).items()
+        }
+        missing = [instrument for instrument in instruments if instrument not in prices]
+        if not missing:
+            return prices
+
+        try:
+            quotes = ZerodhaService.get_quotes(user_id, missing, "ohlc")
+        except Exception as e:
+            logger.warning(f"No quotes for valuation of user {user_id}: {str(e)}")
+            quotes = {}
+        for instrument, quote in quotes.items():
+            close = (quote.get("ohlc") or {}).get("close")
+            prices[instrument] = (quote.get("last_price"), close or None)
+        return prices
+
+    return fetch
+
+
+def value_positions(
+    quantity: np.ndarray,
+    avg_price: np.ndarray,
+    last_price: np.ndarray,
+    close: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Mark positions to market in one vectorized pass.
+
+    Positions without a last price (NaN) are valued at cost, and positions
+    without a previous close have no day change.
+
+    Args:
+        quantity: Quantity held per position
+        avg_price: Average purchase price per position
+        last_price: Last traded price per position, NaN if unknown
+        close: Previous close per position, NaN if unknown
+
+    Returns:
+        Dictionary of per-position arrays: priced, last_price, cost,
+        market_value, unrealized_pnl, day_change and weight
+    """
+    priced = ~np.isnan(last_price)
+    last_price = np.where(priced, last_price, avg_price)
+    previous = np.where(np.isnan(close), last_price, close)
+
+    cost = quantity * avg_price
+    market_value = quantity * last_price
+    total = market_value.sum()
+
+    return {
+        "priced": priced,
+        "last_price": last_price,
+        "cost": cost,
+        "market_value": market_value,
+        "unrealized_pnl": market_value - cost,
+        "day_change": quantity * (last_price - previous),
+        "weight": market_value / total if total else np.zeros_like(market_value),
+    }
+
+
+def _pct(numerator: float, denominator: float) -> float:
+    return numerator * 100 / denominator if denominator else 0.0
+
+
+class PortfolioValuation:
+    """
+    Market value, unrealized P&L and day change of a set of holdings.
+    """
+    def __init__(
+        self,
+        holding_ids: List[int],
+        symbols: List[str],
+        sectors: List[str],
+        quantity: np.ndarray,
+        avg_price: np.ndarray,
+        last_price: np.ndarray,
+        close: np.ndarray
+    ):
+        self.holding_ids = holding_ids
+        self.symbols = symbols
+        self.sectors = sectors
+        codes: Dict[str, int] = {}
+        self.sector_codes = np.fromiter(
+            (codes.setdefault(sector, len(codes)) for sector in sectors), dtype="i8", count=len(sectors)
+        )
+        self.sector_names = list(codes)
+        self.quantity = quantity
+        self.avg_price = avg_price
+        self.values = value_positions(quantity, avg_price, last_price, close)
+
+    @classmethod
+    def for_user(cls, user, prices: Optional[PriceSource] = None) -> "PortfolioValuation":
+        """
+        Value a user's open holdings.
+
+        Args:
+            user: User whose holdings to value
+            prices: Where prices come from; defaults to cached_prices(user.id)
+
+        Returns:
+            A PortfolioValuation
+        """
+        rows = list(
+            Holding.objects.filter(user=user, closed_at__isnull=True)
+            .values_list(
+                'id', 'stock__symbol', 'stock__sector', 'quantity', 'avg_price',
+                'source', 'external_id'
+            )
+        )
+        instruments = [holding_instrument_key(row[1], row[5], row[6]) for row in rows]
+        quotes = (prices or cached_prices(user.id))(sorted(set(instruments))) if rows else {}
+        missing = (np.nan, np.nan)
+        found = [quotes.get(instrument, missing) for instrument in instruments]
+
+        count = len(rows)
+        return cls(
+            holding_ids=[row[0] for row in rows],
+            symbols=[row[1] for row in rows],
+            sectors=[row[2] or 'Unknown' for row in rows],
+            quantity=np.fromiter((row[3] for row in rows), dtype="f8", count=count),
+            avg_price=np.fromiter((row[4] for row in rows), dtype="f8", count=count),
+            last_price=np.fromiter(
+                (np.nan if price[0] is None else price[0] for price in found), dtype="f8", count=count
+            ),
+            close=np.fromiter(
+                (np.nan if price[1] is None else price[1] for price in found), dtype="f8", count=count
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.holding_ids)
+
+    def totals(self) -> Dict[str, float]:
+        """
+        Get portfolio-wide totals.
+        """
+        values = self.values
+        cost = float(values["cost"].sum())
+        market_value = float(values["market_value"].sum())
+        pnl = market_value - cost
+        day_change = float(values["day_change"].sum())
+        return {
+            "total_cost": cost,
+            "market_value": market_value,
+            "unrealized_pnl": pnl,
+            "unrealized_pnl_pct": _pct(pnl, cost),
+            "day_change": day_change,
+            "day_change_pct": _pct(day_change, market_value - day_change),
+        }
+
+    def by_sector(self) -> Dict[str, float]:
+        """
+        Get market value per sector.
+        """
+        totals = np.bincount(
+            self.sector_codes, weights=self.values["market_value"], minlength=len(self.sector_names)
+        )
+        return {name: float(total) for name, total in sorted(zip(self.sector_names, totals))}
+
+    def positions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get per-holding figures, largest market value first.
+
+        Args:
+            limit: Only return this many positions
+        """
+        values = self.values
+        order = np.argsort(-values["market_value"], kind="stable")[:limit]
+        return [
+            {
+                "id": self.holding_ids[i],
+                "symbol": self.symbols[i],
+                "sector": self.sectors[i],
+                "quantity": float(self.quantity[i]),
+                "avg_price": float(self.avg_price[i]),
+                "last_price": round(float(values["last_price"][i]), 2),
+                "priced": bool(values["priced"][i]),
+                "cost": round(float(values["cost"][i]), 2),
+                "market_value": round(float(values["market_value"][i]), 2),
+                "unrealized_pnl": round(float(values["unrealized_pnl"][i]), 2),
+                "day_change": round(float(values["day_change"][i]), 2),
+                "weight": round(float(values["weight"][i]), 6),
+            }
+            for i in order
+        ]
+
+    def as_dict(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get the valuation in the shape returned by the live summary API.
+        """
+        data = {key: round(value, 2) for key, value in self.totals().items()}
+        data.update({
+            "total_holdings": len(self),
+            "priced_holdings": int(self.values["priced"].sum()),
+            "sectors": {sector: round(value, 2) for sector, value in self.by_sector().items()},
+            "holdings": self.positions(limit),
+        })
+        return data
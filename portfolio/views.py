@@ -1,12 +1,30 @@
-from django.db.models import Sum, Count, F, ExpressionWrapper, DecimalField
-from django.db.models.functions import Coalesce
+from datetime import date
+
+from django.db import transaction as db_transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, filters, views, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
-from portfolio.models import Holding, HoldingClass
+from core.pagination import KeysetPagination
+from portfolio import analytics, exports, tax
+from portfolio.imports import SOURCES as IMPORT_SOURCES, ImportFileError, import_holdings
+from portfolio.lots import METHODS, METHOD_FIFO, OversoldError, position_pnl
+from portfolio.models import (
+    Holding, HoldingClass, Lot, PortfolioSnapshot, Transaction, Watchlist, WatchlistItem
+)
+from portfolio.summaries import get_summary
+from portfolio.valuation import PortfolioValuation
+from portfolio.watchlists import user_watchlists
 from portfolio.serializers import (
-    HoldingSerializer, HoldingClassSerializer, PortfolioSummarySerializer
+    HoldingSerializer, HoldingClassSerializer, PortfolioSummarySerializer,
+    TransactionSerializer, LotSerializer, PositionPnLSerializer, TaxYearSummarySerializer,
+    PortfolioSnapshotSerializer, PortfolioSnapshotHoldingsSerializer, PortfolioAnalyticsSerializer,
+    WatchlistSerializer, WatchlistItemSerializer, WatchlistQuotesSerializer
 )
 
 
@@ -15,6 +33,8 @@ class HoldingViewSet(viewsets.ModelViewSet):
     API endpoint that allows holdings to be viewed or edited.
     """
     serializer_class = HoldingSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-purchase_date', 'id')
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['user', 'stock', 'source']
     search_fields = ['stock__symbol', 'stock__name', 'notes']
@@ -23,8 +43,14 @@ class HoldingViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         This view should return a list of all holdings for the currently authenticated user.
+
+        Closed holdings (sold, per the last sync) are left out of the list
+        unless `include_closed=true` is passed.
         """
-        return Holding.objects.filter(user=self.request.user)
+        queryset = Holding.objects.filter(user=self.request.user).select_related('stock')
+        if self.action == 'list' and self.request.query_params.get('include_closed') not in ('true', '1'):
+            queryset = queryset.filter(closed_at__isnull=True)
+        return queryset
 
     def perform_create(self, serializer):
         """
@@ -35,6 +61,68 @@ class HoldingViewSet(viewsets.ModelViewSet):
         else:
             serializer.save()
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_file(self, request):
+        """
+        Import holdings from an uploaded CSV or XLSX file.
+
+        Valid rows are created even when others are rejected; the response
+        lists the rejected rows with their errors.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+        source = request.data.get('source') or 'import'
+        if source not in IMPORT_SOURCES:
+            return Response(
+                {"error": f"source must be one of {', '.join(IMPORT_SOURCES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            report = import_holdings(request.user, upload, upload.name, source=source)
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict(), status=status.HTTP_201_CREATED if report.created else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Stream holdings as CSV, JSON Lines or Parquet.
+
+        Pass `output` (csv, ndjson or parquet; default csv),
+        `classifications=true` to add classification names and
+        `market_values=true` to add cost, last price, market value and
+        unrealized P&L. Staff can pass `all_users=true` to export every
+        user's holdings.
+        """
+        output = request.query_params.get('output', exports.FORMAT_CSV)
+        if output not in exports.FORMATS:
+            return Response(
+                {"error": f"output must be one of {', '.join(exports.FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if output == exports.FORMAT_PARQUET and exports.pyarrow is None:
+            return Response(
+                {"error": "Parquet export is not available; install pyarrow"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        all_users = request.query_params.get('all_users') in ('true', '1')
+        if all_users and not request.user.is_staff:
+            return Response(
+                {"error": "Only staff can export all users"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        content = exports.iter_export(
+            output,
+            user_ids=None if all_users else [request.user.id],
+            classifications=request.query_params.get('classifications') in ('true', '1'),
+            market_values=request.query_params.get('market_values') in ('true', '1')
+        )
+        response = StreamingHttpResponse(content, content_type=exports.CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="holdings.{output}"'
+        return response
+
 
 class HoldingClassViewSet(viewsets.ModelViewSet):
     """
@@ -49,7 +137,11 @@ class HoldingClassViewSet(viewsets.ModelViewSet):
         This view should return a list of all holding classifications for holdings
         owned by the currently authenticated user.
         """
-        return HoldingClass.objects.filter(holding__user=self.request.user)
+        return (
+            HoldingClass.objects.filter(holding__user=self.request.user)
+            .select_related('holding__stock', 'classification')
+            .order_by('id')
+        )
 
 
 class PortfolioSummaryView(views.APIView):
@@ -60,39 +152,301 @@ class PortfolioSummaryView(views.APIView):
         """
         Return a summary of the user's portfolio.
         """
-        user = request.user
-        
-        # Calculate total portfolio value
-        holdings = Holding.objects.filter(user=user)
-        value_expr = ExpressionWrapper(
-            F('quantity') * F('avg_price'), 
-            output_field=DecimalField()
-        )
-        
-        holdings = holdings.annotate(value=value_expr)
-        total_value = holdings.aggregate(total=Coalesce(Sum('value'), 0))['total']
-        total_holdings = holdings.count()
+        # Kept up to date as holdings change, so this is a single-row read
+        summary = get_summary(request.user)
         
-        # Group by sector
-        sector_values = {}
-        sector_groups = holdings.values('stock__sector').annotate(
-            sector_value=Sum('value')
-        )
-        
-        for group in sector_groups:
-            sector = group['stock__sector'] or 'Unknown'
-            sector_values[sector] = group['sector_value']
-        
-        # Get top holdings by value
-        top_holdings = holdings.order_by('-value')[:5]
+        serializer = PortfolioSummarySerializer(summary)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class PortfolioLiveSummaryView(views.APIView):
+    """
+    API endpoint that values the user's portfolio at market prices.
+    """
+    def get(self, request, format=None):
+        """
+        Return market value, unrealized P&L, day change and weights.
         
-        # Create response data
-        response_data = {
-            'total_value': total_value,
-            'total_holdings': total_holdings,
-            'sectors': sector_values,
-            'top_holdings': top_holdings
-        }
+        Prices come from the live ticker table or the shared quote cache.
+        Holdings without a price are valued at cost and counted out of
+        `priced_holdings`. Pass `limit` to return only the largest holdings.
+        """
+        limit = request.query_params.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+                if limit < 1:
+                    raise ValueError(limit)
+            except ValueError:
+                return Response(
+                    {"error": "limit must be a positive integer"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
-        serializer = PortfolioSummarySerializer(response_data)
+        valuation = PortfolioValuation.for_user(request.user)
+        return Response(valuation.as_dict(limit), status=status.HTTP_200_OK)
+
+
+class TransactionViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint that allows ledger transactions to be viewed or edited.
+
+    Saving or deleting a trade updates the lots of its position; changes
+    that would leave a sell larger than the shares bought before it are
+    rejected.
+    """
+    serializer_class = TransactionSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-trade_date', '-id')
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['stock', 'transaction_type', 'source']
+    ordering_fields = ['trade_date', 'quantity', 'price']
+
+    def get_queryset(self):
+        """
+        This view should return a list of all trades of the currently authenticated user.
+        """
+        return Transaction.objects.filter(user=self.request.user).select_related('stock')
+
+    def _matched(self, action, *args):
+        try:
+            with db_transaction.atomic():
+                action(*args)
+        except OversoldError as e:
+            raise ValidationError({'quantity': str(e)})
+
+    def perform_create(self, serializer):
+        self._matched(lambda: serializer.save(user=self.request.user))
+
+    def perform_update(self, serializer):
+        self._matched(serializer.save)
+
+    def perform_destroy(self, instance):
+        self._matched(instance.delete)
+
+
+class LotViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint that lists the user's lots, oldest first.
+
+    Pass `open=true` for lots with shares left.
+    """
+    serializer_class = LotSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['stock']
+
+    def get_queryset(self):
+        """
+        This view should return a list of all lots of the currently authenticated user.
+        """
+        queryset = Lot.objects.filter(user=self.request.user).select_related('stock')
+        if self.request.query_params.get('open') in ('true', '1'):
+            queryset = queryset.filter(open_quantity__gt=0)
+        return queryset
+
+
+class PositionPnLView(views.APIView):
+    """
+    API endpoint that reports open positions and realized P&L per stock.
+    """
+    def get(self, request, format=None):
+        """
+        Return open quantity, cost and realized P&L per stock.
+
+        Pass `method=average` for average-cost figures instead of FIFO.
+        """
+        method = request.query_params.get('method', METHOD_FIFO)
+        if method not in METHODS:
+            return Response(
+                {"error": f"method must be one of {', '.join(METHODS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        positions = PositionPnLSerializer(position_pnl(request.user, method), many=True).data
+        return Response({"method": method, "positions": positions}, status=status.HTTP_200_OK)
+
+
+def _report_years(request):
+    """
+    Get the financial years asked for with `fy`, or every year with sells.
+
+    Raises:
+        ValueError: If `fy` is not a financial year
+    """
+    fy = request.query_params.get('fy')
+    if fy:
+        return [tax.parse_fy(fy)]
+    return tax.report_years(request.user.id)
+
+
+class TaxReportView(views.APIView):
+    """
+    API endpoint that downloads realized capital gains as CSV or XLSX.
+    """
+    CONTENT_TYPES = {
+        'csv': 'text/csv',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    }
+
+    def get(self, request, format=None):
+        """
+        Stream one row per lot closed by a sell, classified short or long
+        term, with grandfathered cost for shares bought before February 2018.
+
+        Pass `fy` (e.g. 2023-24) for one financial year, and `output=xlsx`
+        for a workbook instead of CSV.
+        """
+        output = request.query_params.get('output', 'csv')
+        if output not in self.CONTENT_TYPES:
+            return Response(
+                {"error": "output must be csv or xlsx"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if output == 'xlsx' and tax.openpyxl is None:
+            return Response(
+                {"error": "XLSX export is not available; install openpyxl"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            years = _report_years(request)
+        except ValueError:
+            return Response(
+                {"error": "fy must be a financial year such as 2023-24"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = tax.iter_rows(request.user.id, years)
+        content = tax.iter_csv(rows) if output == 'csv' else tax.iter_xlsx(rows)
+        name = 'capital-gains' + (f'-{tax.fy_label(years[0])}' if request.query_params.get('fy') else '')
+        response = StreamingHttpResponse(content, content_type=self.CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="{name}.{output}"'
+        return response
+
+
+class TaxSummaryView(views.APIView):
+    """
+    API endpoint that totals short- and long-term gains per financial year.
+    """
+    def get(self, request, format=None):
+        """
+        Return gains per financial year, oldest first. Pass `fy` for one year.
+        """
+        try:
+            years = _report_years(request)
+        except ValueError:
+            return Response(
+                {"error": "fy must be a financial year such as 2023-24"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        summaries = [tax.year_summary(request.user.id, year) for year in years]
+        serializer = TaxYearSummarySerializer(summaries, many=True)
+        return Response({"years": serializer.data}, status=status.HTTP_200_OK)
+
+
+class PortfolioHistoryView(views.APIView):
+    """
+    API endpoint that returns the user's daily portfolio snapshots.
+    """
+    def get(self, request, format=None):
+        """
+        Return daily market value, cost and unrealized P&L, oldest first.
+
+        Pass `from` and `to` (YYYY-MM-DD) to limit the range, and
+        `holdings=true` to include the per-holding arrays.
+        """
+        snapshots = PortfolioSnapshot.objects.filter(user=request.user).order_by('date')
+        try:
+            if request.query_params.get('from'):
+                snapshots = snapshots.filter(date__gte=date.fromisoformat(request.query_params['from']))
+            if request.query_params.get('to'):
+                snapshots = snapshots.filter(date__lte=date.fromisoformat(request.query_params['to']))
+        except ValueError:
+            return Response(
+                {"error": "from and to must be dates (YYYY-MM-DD)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.query_params.get('holdings') in ('true', '1'):
+            serializer = PortfolioSnapshotHoldingsSerializer(snapshots, many=True)
+        else:
+            # Charts only need the totals; skip reading the packed holdings
+            fields = PortfolioSnapshotSerializer.Meta.fields
+            serializer = PortfolioSnapshotSerializer(snapshots.values(*fields), many=True)
+        return Response({"snapshots": serializer.data}, status=status.HTTP_200_OK)
+
+
+class PortfolioAnalyticsView(views.APIView):
+    """
+    API endpoint that reports the user's portfolio performance.
+    """
+    def get(self, request, format=None):
+        """
+        Return XIRR, time-weighted return, drawdown, volatility, Sharpe
+        ratio and beta over a window of daily snapshots.
+
+        Pass `window` as one of 1m, 3m, 6m, 1y (default), 3y, 5y or all.
+        """
+        window = request.query_params.get('window', analytics.DEFAULT_WINDOW)
+        if window not in analytics.WINDOWS:
+            return Response(
+                {"error": f"window must be one of {', '.join(analytics.WINDOWS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = PortfolioAnalyticsSerializer(analytics.get_analytics(request.user.id, window))
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class WatchlistViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint that allows watchlists to be viewed or edited.
+    """
+    serializer_class = WatchlistSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['is_active']
+
+    def get_queryset(self):
+        """
+        This view should return a list of all watchlists of the currently authenticated user.
+        """
+        return (
+            Watchlist.objects.filter(user=self.request.user)
+            .prefetch_related(Prefetch('items', queryset=WatchlistItem.objects.select_related('stock').order_by('id')))
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def quotes(self, request):
+        """
+        Return all of the user's watchlists with prices, in one response.
+
+        Prices come from the live ticker table, then the WatchlistQuote
+        table kept by refresh_watchlist_quotes; only instruments in neither
+        are quoted with the user's own Zerodha session. Items without a
+        price have `priced` false.
+        """
+        serializer = WatchlistQuotesSerializer(user_watchlists(request.user), many=True)
+        return Response({"watchlists": serializer.data}, status=status.HTTP_200_OK)
+
+
+class WatchlistItemViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint that allows watchlist items to be viewed or edited.
+    """
+    serializer_class = WatchlistItemSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['watchlist', 'stock', 'exchange']
+
+    def get_queryset(self):
+        """
+        This view should return a list of all items on watchlists of the
+        currently authenticated user.
+        """
+        return (
+            WatchlistItem.objects.filter(watchlist__user=self.request.user)
+            .select_related('stock')
+            .order_by('watchlist', 'id')
+        )
@@ -0,0 +1,203 @@
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from portfolio.models import Watchlist, WatchlistItem, WatchlistQuote
+from portfolio.valuation import PriceSource
+from zerodha.services import ZerodhaService
+from zerodha.ticker import get_live_quotes
+
+logger = logging.getLogger(__name__)
+
+QUOTE_MODE = 'ohlc'
+
+
+def quote_max_age() -> float:
+    """
+    Seconds a refreshed quote is served to watchlists.
+    """
+    return getattr(settings, 'WATCHLIST_QUOTE_MAX_AGE', 180)
+
+
+def watched_instruments(user_ids: Optional[List[int]] = None) -> List[str]:
+    """
+    Get the instruments on any active watchlist, each once.
+
+    Args:
+        user_ids: Only look at these users' watchlists
+
+    Returns:
+        Sorted 'exchange:tradingsymbol' keys
+    """
+    items = WatchlistItem.objects.filter(watchlist__is_active=True)
+    if user_ids is not None:
+        items = items.filter(watchlist__user_id__in=user_ids)
+    return sorted({
+        f"{exchange}:{symbol}"
+        for exchange, symbol in items.values_list('exchange', 'stock__symbol').distinct()
+    })
+
+
+def refresh_quotes(user_id: int) -> Dict[str, int]:
+    """
+    Run one refresh cycle: price the union of every active watchlist once.
+
+    Instruments the ticker is streaming are skipped. The rest are fetched
+    in one batched quote request with one user's session and written to
+    the WatchlistQuote table, which every API worker reads; the cost grows
+    with distinct instruments, not with users. Quotes older than
+    quote_max_age() are dropped.
+
+    Args:
+        user_id: User whose Zerodha session fetches the quotes
+
+    Returns:
+        Counts of instruments watched, found in the ticker table and
+        fetched from Zerodha
+
+    Raises:
+        ZerodhaException: If the session is unavailable or the fetch fails
+    """
+    instruments = watched_instruments()
+    live = get_live_quotes(instruments)
+    missing = [instrument for instrument in instruments if instrument not in live]
+    quotes = ZerodhaService.get_quotes(user_id, missing, QUOTE_MODE) if missing else {}
+
+    now = timezone.now()
+    WatchlistQuote.objects.bulk_create(
+        [
+            WatchlistQuote(
+                instrument=instrument,
+                last_price=quote['last_price'],
+                close=(quote.get('ohlc') or {}).get('close') or None,
+                fetched_at=now,
+            )
+            for instrument, quote in quotes.items()
+            if quote.get('last_price') is not None
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['instrument'],
+        update_fields=['last_price', 'close', 'fetched_at', 'updated_at']
+    )
+    WatchlistQuote.objects.filter(fetched_at__lt=now - timedelta(seconds=quote_max_age())).delete()
+    return {"instruments": len(instruments), "live": len(live), "fetched": len(quotes)}
+
+
+def refreshed_quotes(instruments: List[str]) -> Dict[str, Tuple[float, Optional[float]]]:
+    """
+    Get the prices the refresher stored for instruments, if still fresh.
+
+    Returns:
+        (last price, previous close) indexed by the instrument
+    """
+    since = timezone.now() - timedelta(seconds=quote_max_age())
+    return {
+        instrument: (float(last_price), None if close is None else float(close))
+        for instrument, last_price, close in WatchlistQuote.objects.filter(
+            instrument__in=instruments, fetched_at__gte=since
+        ).values_list('instrument', 'last_price', 'close')
+    }
+
+
+def watchlist_prices(user_id: int) -> PriceSource:
+    """
+    Build a price source for watchlists: the ticker's shared table, then
+    the quotes stored by the refresher. Only instruments neither has are
+    fetched with the user's session; without one they go unpriced.
+
+    Args:
+        user_id: User whose Zerodha session is used for the rest
+
+    Returns:
+        A PriceSource
+    """
+    def fetch(instruments: List[str]) -> Dict[str, Tuple[float, Optional[float]]]:
+        prices = {
+            instrument: (quote["last_price"], quote["close"] or None)
+            for instrument, quote in get_live_quotes(instruments).items()
+        }
+        missing = [instrument for instrument in instruments if instrument not in prices]
+        if missing:
+            prices.update(refreshed_quotes(missing))
+            missing = [instrument for instrument in missing if instrument not in prices]
+        if not missing:
+            return prices
+
+        try:
+            quotes = ZerodhaService.get_quotes(user_id, missing, QUOTE_MODE)
+        except Exception as e:
+            logger.warning(f"No quotes for {len(missing)} watched instruments of user {user_id}: {str(e)}")
+            quotes = {}
+        for instrument, quote in quotes.items():
+            close = (quote.get("ohlc") or {}).get("close")
+            prices[instrument] = (quote.get("last_price"), close or None)
+        return prices
+
+    return fetch
+
+
+def price_fields(last_price: Optional[float], close: Optional[float]) -> Dict[str, Any]:
+    """
+    Get the price figures shown for a watchlist item.
+    """
+    if last_price is None:
+        return {"last_price": None, "close": close, "change": None, "change_pct": None, "priced": False}
+    change = last_price - close if close else None
+    return {
+        "last_price": round(last_price, 2),
+        "close": None if close is None else round(close, 2),
+        "change": None if change is None else round(change, 2),
+        "change_pct": None if change is None else round(change * 100 / close, 2),
+        "priced": True,
+    }
+
+
+def user_watchlists(user, prices: Optional[PriceSource] = None) -> List[Dict[str, Any]]:
+    """
+    Get all of a user's watchlists with prices.
+
+    Watchlists and their items take two queries, and the user's distinct
+    instruments are priced in one call, then fanned out to every item.
+
+    Args:
+        user: User whose watchlists to get
+        prices: Where prices come from; defaults to watchlist_prices(user.id)
+
+    Returns:
+        List of watchlists, each with its items and their prices
+    """
+    watchlists = list(
+        Watchlist.objects.filter(user=user).prefetch_related(
+            Prefetch('items', queryset=WatchlistItem.objects.select_related('stock').order_by('id'))
+        )
+    )
+    instruments = sorted({item.instrument for watchlist in watchlists for item in watchlist.items.all()})
+    quotes = (prices or watchlist_prices(user.id))(instruments) if instruments else {}
+    missing = (None, None)
+
+    return [
+        {
+            "id": watchlist.id,
+            "name": watchlist.name,
+            "description": watchlist.description,
+            "is_active": watchlist.is_active,
+            "items": [
+                {
+                    "id": item.id,
+                    "stock": item.stock_id,
+                    "symbol": item.stock.symbol,
+                    "name": item.stock.name,
+                    "exchange": item.exchange,
+                    "notes": item.notes,
+                    **price_fields(*quotes.get(item.instrument, missing)),
+                }
+                for item in watchlist.items.all()
+            ],
+        }
+        for watchlist in watchlists
+    ]
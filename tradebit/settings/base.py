@@ -160,3 +160,80 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+
+# Seconds between checks for stock changes made by other processes, after
+# which the in-memory stock search index and symbol resolver are rebuilt
+STOCK_TABLES_RECHECK_SECONDS = 30
+
+# Zerodha settings
+# Seconds a successful Kite session validation is trusted before re-checking
+ZERODHA_CLIENT_VALIDATION_TTL = int(os.environ.get('ZERODHA_CLIENT_VALIDATION_TTL', 300))
+
+# Timeout in seconds for requests to the Kite API
+ZERODHA_HTTP_TIMEOUT = float(os.environ.get('ZERODHA_HTTP_TIMEOUT', 10))
+
+# Connection pool shared by all KiteClient instances in a process
+ZERODHA_HTTP_POOL = {
+    'pool_connections': 4,
+    'pool_maxsize': int(os.environ.get('ZERODHA_HTTP_POOL_MAXSIZE', 16)),
+    'pool_block': False,
+    'keepalive': True,
+    'keepalive_idle': 60,
+}
+
+# Kite API rate limits as (requests per second, burst) per endpoint class;
+# see zerodha.rate_limit.DEFAULT_RATE_LIMITS for the defaults
+ZERODHA_RATE_LIMITS = {}
+
+# Set to a file path to share rate limit budgets between all workers on a host
+ZERODHA_RATE_LIMIT_FILE = os.environ.get('ZERODHA_RATE_LIMIT_FILE')
+
+# Retries for 429/5xx responses and connection errors
+ZERODHA_RETRY_POLICY = {
+    'max_retries': 3,
+    'backoff_base': 0.5,
+    'backoff_max': 8.0,
+}
+
+# Quote cache: 'memory' for a per-process cache, or a CACHES alias to share
+# quotes between workers. TTLs are in seconds.
+ZERODHA_QUOTE_CACHE_BACKEND = os.environ.get('ZERODHA_QUOTE_CACHE_BACKEND', 'memory')
+ZERODHA_QUOTE_TTL_MARKET = 0.5
+ZERODHA_QUOTE_TTL_CLOSED = 300
+
+# Daily snapshots of the Kite instrument master
+ZERODHA_INSTRUMENTS_DIR = os.environ.get(
+    'ZERODHA_INSTRUMENTS_DIR', str(BASE_DIR / 'var' / 'instruments')
+)
+
+# Sync jobs left running longer than this many seconds (e.g. by a worker that
+# was killed) are requeued when a worker starts
+ZERODHA_SYNC_JOB_TIMEOUT = 600
+
+# Shared last-price table written by the run_ticker process and read by API
+# workers. Put it on a tmpfs such as /dev/shm to keep it in memory.
+ZERODHA_TICKER_TABLE = os.environ.get('ZERODHA_TICKER_TABLE', str(BASE_DIR / 'var' / 'ticks.bin'))
+ZERODHA_TICKER_CAPACITY = 4096
+
+# Historical candles, one directory per interval and instrument token
+ZERODHA_CANDLES_DIR = os.environ.get('ZERODHA_CANDLES_DIR', str(BASE_DIR / 'var' / 'candles'))
+
+# User whose Zerodha session the ticker connects with
+ZERODHA_TICKER_USER = os.environ.get('ZERODHA_TICKER_USER')
+
+# Seconds a quote written by refresh_watchlist_quotes is served to watchlists;
+# keep it above the refresh interval so quotes don't lapse between cycles
+WATCHLIST_QUOTE_MAX_AGE = 180
+
+# Capital gains reports are cached per user and financial year in this CACHES
+# alias, and dropped when the year's trades change
+TAX_REPORT_CACHE = 'default'
+TAX_REPORT_CACHE_TIMEOUT = 86400
+
+# Portfolio analytics are cached per user and window in this CACHES alias, and
+# dropped when the user's snapshots or trades change. Beta is measured against
+# the benchmark's stored daily candles; Sharpe ratios use an annual risk-free rate.
+ANALYTICS_CACHE = 'default'
+ANALYTICS_CACHE_TIMEOUT = 86400
+ANALYTICS_BENCHMARK = 'NSE:NIFTY 50'
+ANALYTICS_RISK_FREE_RATE = 0.065
@@ -12,6 +12,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 api_patterns = [
     path('users/', include('users.urls')),
+    path('core/', include('core.urls')),
     path('portfolio/', include('portfolio.urls')),
     path('zerodha/', include('zerodha.urls')),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
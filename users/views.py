@@ -8,6 +8,7 @@ from users.serializers import (
     UserSerializer, UserSettingsSerializer, RegisterSerializer, 
     ChangePasswordSerializer, ZerodhaCredentialsSerializer
 )
+from zerodha.registry import client_registry
 
 User = get_user_model()
 
@@ -90,6 +91,7 @@ class ZerodhaCredentialsView(APIView):
             user_settings.zerodha_api_key = serializer.validated_data['api_key']
             user_settings.zerodha_api_secret = serializer.validated_data['api_secret']
             user_settings.save()
+            client_registry.evict(request.user.id)
             
             return Response(
                 {"message": "Zerodha credentials updated successfully."},
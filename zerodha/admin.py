@@ -1,4 +1,10 @@
 from django.contrib import admin
+from zerodha.models import SyncJob
 
-# Zerodha app uses the UserSettings model from users app
-# No models to register in the admin site yet
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'kind', 'status', 'created_at', 'started_at', 'finished_at')
+    search_fields = ('user__username', 'user__email')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('result', 'error', 'started_at', 'finished_at')
@@ -0,0 +1,165 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from pydantic import BaseModel, Field
+
+from zerodha.kite_client import KiteClient, KiteHolding, KiteOrder
+
+logger = logging.getLogger(__name__)
+
+
+class AccountSnapshot(BaseModel):
+    """
+    Pydantic model for everything the dashboard needs from one account.
+    """
+    holdings: List[KiteHolding] = Field(default_factory=list)
+    positions: Dict[str, Any] = Field(default_factory=dict)
+    orders: List[KiteOrder] = Field(default_factory=list)
+    quotes: Dict[str, Any] = Field(default_factory=dict)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Get the executor that runs broker calls for all async clients.
+
+    It is sized to the shared HTTP pool so that concurrent calls never need
+    more connections than the pool keeps alive.
+
+    Returns:
+        The shared ThreadPoolExecutor
+    """
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                pool_config = getattr(settings, "ZERODHA_HTTP_POOL", {})
+                _executor = ThreadPoolExecutor(
+                    max_workers=pool_config.get("pool_maxsize", 16),
+                    thread_name_prefix="kite-async"
+                )
+    return _executor
+
+
+class AsyncKiteClient:
+    """
+    Asyncio client for the Zerodha Kite API.
+
+    Calls are dispatched to a shared worker pool on top of a regular
+    KiteClient, so they go through the same pooled connections and request
+    handling, while awaiting callers can run several of them concurrently.
+    Safe to use from async Django views since it never touches the ORM.
+    """
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        access_token: Optional[str] = None,
+        client: Optional[KiteClient] = None
+    ):
+        """
+        Initialize the async client.
+
+        Args:
+            api_key: The API key issued by Zerodha
+            api_secret: The API secret issued by Zerodha
+            access_token: Access token for authentication (optional)
+            client: Existing KiteClient to wrap instead of building a new one
+        """
+        self.client = client or KiteClient(
+            api_key=api_key,
+            api_secret=api_secret,
+            access_token=access_token
+        )
+
+    @classmethod
+    def from_client(cls, client: KiteClient) -> "AsyncKiteClient":
+        """
+        Wrap an existing (e.g. cached) KiteClient.
+        """
+        return cls(client=client)
+
+    async def _call(self, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_executor(), functools.partial(func, *args, **kwargs)
+        )
+
+    async def get_profile(self) -> Dict:
+        return await self._call(self.client.get_profile)
+
+    async def get_holdings(self) -> List[KiteHolding]:
+        return await self._call(self.client.get_holdings)
+
+    async def get_positions(self) -> Dict:
+        return await self._call(self.client.get_positions)
+
+    async def get_orders(self) -> List[KiteOrder]:
+        return await self._call(self.client.get_orders)
+
+    async def get_order_history(self, order_id: str) -> List[Dict]:
+        return await self._call(self.client.get_order_history, order_id)
+
+    async def get_quote(self, *instruments: str) -> Dict:
+        return await self._call(self.client.get_quote, *instruments)
+
+    async def get_ohlc(self, *instruments: str) -> Dict:
+        return await self._call(self.client.get_ohlc, *instruments)
+
+    async def get_ltp(self, *instruments: str) -> Dict:
+        return await self._call(self.client.get_ltp, *instruments)
+
+    async def place_order(self, **order_params) -> str:
+        return await self._call(self.client.place_order, **order_params)
+
+    async def is_session_valid(self) -> bool:
+        return await self._call(self.client.is_session_valid)
+
+    async def fetch_account_snapshot(
+        self, instruments: Optional[List[str]] = None
+    ) -> AccountSnapshot:
+        """
+        Fetch holdings, positions, orders and quotes concurrently.
+
+        Args:
+            instruments: Instruments to quote, as 'exchange:tradingsymbol'.
+                Defaults to the account's holdings, which are then quoted
+                as soon as they arrive.
+
+        Returns:
+            AccountSnapshot with all four results
+
+        Raises:
+            ZerodhaException: If any of the calls fail
+        """
+        calls = [self.get_holdings(), self.get_positions(), self.get_orders()]
+        if instruments:
+            calls.append(self.get_quote(*instruments))
+
+        results = await asyncio.gather(*calls)
+        holdings, positions, orders = results[:3]
+
+        if instruments:
+            quotes = results[3]
+        elif holdings:
+            quotes = await self.get_quote(
+                *[f"{holding.exchange}:{holding.tradingsymbol}" for holding in holdings]
+            )
+        else:
+            quotes = {}
+
+        return AccountSnapshot(
+            holdings=holdings,
+            positions=positions or {},
+            orders=orders,
+            quotes=quotes or {}
+        )
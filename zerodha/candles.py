@@ -0,0 +1,535 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from django.conf import settings
+
+from zerodha.quote_cache import IST
+
+logger = logging.getLogger(__name__)
+
+# Candle intervals offered by Kite, with their length in seconds and the
+# longest range one historical data request may cover
+INTERVALS: Dict[str, Tuple[int, int]] = {
+    "minute": (60, 60),
+    "3minute": (180, 100),
+    "5minute": (300, 100),
+    "10minute": (600, 100),
+    "15minute": (900, 200),
+    "30minute": (1800, 200),
+    "60minute": (3600, 400),
+    "day": (86400, 2000),
+}
+
+# One file per column; timestamps are Unix seconds of the candle's start
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "i8"),
+    ("oi", "i8"),
+    ("timestamp", "i8"),
+)
+CANDLE_DTYPE = np.dtype([("timestamp", "i8")] + [column for column in COLUMNS if column[0] != "timestamp"])
+COVERAGE_FILE = "coverage.json"
+ADJUSTMENTS_FILE = "adjustments.json"
+_IST_OFFSET = int(IST.utcoffset(None).total_seconds())
+
+Moment = Union[date, datetime, int]
+
+
+def candles_dir() -> str:
+    return str(getattr(
+        settings, "ZERODHA_CANDLES_DIR",
+        os.path.join(settings.BASE_DIR, "var", "candles")
+    ))
+
+
+def to_epoch(moment: Moment, end_of_day: bool = False) -> int:
+    """
+    Convert a date, datetime or Unix time to Unix seconds.
+
+    Dates and naive datetimes are taken as IST, like Kite's timestamps.
+
+    Args:
+        moment: Time to convert
+        end_of_day: For dates, use the last second of the day instead of
+            the first
+    """
+    if isinstance(moment, (int, np.integer)):
+        return int(moment)
+    if not isinstance(moment, datetime):
+        moment = datetime.combine(moment, datetime.max.time() if end_of_day else datetime.min.time())
+        moment = moment.replace(microsecond=0)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=IST)
+    return int(moment.timestamp())
+
+
+def from_epoch(seconds: int) -> datetime:
+    return datetime.fromtimestamp(seconds, IST)
+
+
+def ist_days(timestamps: np.ndarray) -> np.ndarray:
+    """
+    Get the IST calendar day of each Unix timestamp, as datetime64[D].
+    """
+    return ((np.asarray(timestamps, dtype="i8") + _IST_OFFSET) // 86400).astype("M8[D]")
+
+
+def _check_interval(interval: str) -> None:
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown candle interval: {interval}")
+
+
+def merge_ranges(ranges: Sequence[Tuple[int, int]], step: int = 1) -> List[Tuple[int, int]]:
+    """
+    Merge inclusive (start, end) ranges that overlap or are within step of
+    each other.
+    """
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + step:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def subtract_ranges(start: int, end: int, covered: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Get the parts of the inclusive range [start, end] outside covered.
+    """
+    gaps = []
+    cursor = start
+    for low, high in merge_ranges(covered):
+        if high < cursor:
+            continue
+        if low > end:
+            break
+        if low > cursor:
+            gaps.append((cursor, low - 1))
+        cursor = max(cursor, high + 1)
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class Candles:
+    """
+    A range of one instrument's candles, as read-only column views.
+
+    Arrays are slices of the memory-mapped column files, so reading a
+    range copies nothing until the values are used.
+    """
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns["timestamp"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @property
+    def times(self) -> np.ndarray:
+        """
+        Candle start times as datetime64 seconds (UTC).
+        """
+        return self.columns["timestamp"].view("M8[s]")
+
+    def to_array(self) -> np.ndarray:
+        """
+        Copy the candles into an array of CANDLE_DTYPE.
+        """
+        array = np.empty(len(self), dtype=CANDLE_DTYPE)
+        for name in CANDLE_DTYPE.names:
+            array[name] = self.columns[name]
+        return array
+
+
+def _empty_columns() -> Dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+
+class CandleStore:
+    """
+    Historical OHLCV candles per instrument token and interval, on disk.
+
+    Each instrument has a directory per interval holding one flat file per
+    column. Appending newer candles only extends those files; readers map
+    them and slice out a time range with a binary search over timestamps.
+
+    The timestamp column is written last, and its length is the number of
+    complete rows, so readers never see a half-appended candle. Writes that
+    land before existing candles rewrite the instrument's directory and
+    swap it in. Writers take a per-instrument file lock; readers take none.
+
+    The store also records which time ranges have been fetched, including
+    ranges with no candles (holidays, nights), so missing_ranges() only
+    asks the broker for what was never fetched, and which adjustments
+    (e.g. for splits) its candles have had.
+    """
+    def __init__(self, base: Optional[str] = None):
+        self.base = base or candles_dir()
+        self._lock = threading.Lock()
+
+    def path(self, instrument_token: int, interval: str) -> str:
+        _check_interval(interval)
+        return os.path.join(self.base, interval, str(int(instrument_token)))
+
+    def instruments(self, interval: str) -> List[int]:
+        """
+        Get the instrument tokens with candles stored for an interval.
+        """
+        _check_interval(interval)
+        directory = os.path.join(self.base, interval)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(name) for name in os.listdir(directory) if name.isdigit())
+
+    @staticmethod
+    def _rows(directory: str) -> int:
+        try:
+            return os.path.getsize(os.path.join(directory, "timestamp")) // 8
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _map(directory: str, rows: int) -> Dict[str, np.ndarray]:
+        if not rows:
+            return _empty_columns()
+        return {
+            name: np.memmap(os.path.join(directory, name), dtype=dtype, mode="r", shape=(rows,))
+            for name, dtype in COLUMNS
+        }
+
+    def read(
+        self,
+        instrument_token: int,
+        interval: str,
+        start: Optional[Moment] = None,
+        end: Optional[Moment] = None
+    ) -> Candles:
+        """
+        Read candles starting between start and end (inclusive).
+
+        Args:
+            instrument_token: Instrument to read
+            interval: Candle interval, e.g. 'day' or '5minute'
+            start: Earliest candle start; dates are taken as IST
+            end: Latest candle start; dates include the whole day
+
+        Returns:
+            Candles, possibly empty
+        """
+        directory = self.path(instrument_token, interval)
+        columns = self._map(directory, self._rows(directory))
+        timestamps = columns["timestamp"]
+        first = 0 if start is None else int(np.searchsorted(timestamps, to_epoch(start), side="left"))
+        last = len(timestamps) if end is None else int(
+            np.searchsorted(timestamps, to_epoch(end, end_of_day=True), side="right")
+        )
+        return Candles({name: column[first:last] for name, column in columns.items()})
+
+    def last_timestamp(self, instrument_token: int, interval: str) -> Optional[int]:
+        directory = self.path(instrument_token, interval)
+        rows = self._rows(directory)
+        if not rows:
+            return None
+        return int(np.memmap(os.path.join(directory, "timestamp"), dtype="i8", mode="r", shape=(rows,))[-1])
+
+    def coverage(self, instrument_token: int, interval: str) -> List[Tuple[int, int]]:
+        """
+        Get the inclusive (start, end) Unix time ranges already fetched.
+        """
+        try:
+            with open(os.path.join(self.path(instrument_token, interval), COVERAGE_FILE)) as f:
+                return [tuple(pair) for pair in json.load(f)]
+        except (OSError, ValueError):
+            return []
+
+    def missing_ranges(
+        self,
+        instrument_token: int,
+        interval: str,
+        start: Moment,
+        end: Moment
+    ) -> List[Tuple[int, int]]:
+        """
+        Get the parts of [start, end] that were never fetched.
+
+        Returns:
+            Inclusive (start, end) Unix time ranges, oldest first
+        """
+        return subtract_ranges(
+            to_epoch(start), to_epoch(end, end_of_day=True), self.coverage(instrument_token, interval)
+        )
+
+    @contextmanager
+    def _locked(self, directory: str) -> Iterator[None]:
+        os.makedirs(os.path.dirname(directory), exist_ok=True)
+        with self._lock, open(f"{directory}.lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _write_coverage(directory: str, ranges: List[Tuple[int, int]]) -> None:
+        tmp = os.path.join(directory, f"{COVERAGE_FILE}.tmp")
+        with open(tmp, "w") as f:
+            json.dump([list(pair) for pair in ranges], f)
+        os.replace(tmp, os.path.join(directory, COVERAGE_FILE))
+
+    def write(
+        self,
+        instrument_token: int,
+        interval: str,
+        candles: np.ndarray,
+        covered: Optional[Tuple[Moment, Moment]] = None
+    ) -> int:
+        """
+        Store candles, replacing stored ones with the same start time.
+
+        Args:
+            instrument_token: Instrument the candles belong to
+            interval: Candle interval
+            candles: Array of CANDLE_DTYPE, in any order
+            covered: Range the candles were fetched for, recorded as fetched
+                even where it has no candles. Candles written without it
+                are fetched again by gap filling
+
+        Returns:
+            Number of candles written
+        """
+        candles = np.asarray(candles, dtype=CANDLE_DTYPE)
+        if len(candles):
+            # Sort by time, keeping the last of any duplicates
+            order = np.argsort(candles["timestamp"], kind="stable")
+            candles = candles[order]
+            keep = np.append(candles["timestamp"][1:] != candles["timestamp"][:-1], True)
+            candles = candles[keep]
+
+        directory = self.path(instrument_token, interval)
+        with self._locked(directory):
+            os.makedirs(directory, exist_ok=True)
+            ranges = self.coverage(instrument_token, interval)
+            if covered is not None:
+                ranges.append((to_epoch(covered[0]), to_epoch(covered[1], end_of_day=True)))
+            ranges = merge_ranges(ranges, INTERVALS[interval][0])
+
+            rows = self._rows(directory)
+            last = self.last_timestamp(instrument_token, interval)
+            if len(candles) and last is not None and candles["timestamp"][0] <= last:
+                self._rewrite(directory, rows, candles, ranges)
+            else:
+                self._append(directory, rows, candles)
+                self._write_coverage(directory, ranges)
+        return len(candles)
+
+    @staticmethod
+    def _append(directory: str, rows: int, candles: np.ndarray) -> None:
+        # Columns longer than the timestamps are left over from an append
+        # that was interrupted; drop the partial rows first
+        for name, dtype in COLUMNS:
+            path = os.path.join(directory, name)
+            with open(path, "ab") as f:
+                size = rows * np.dtype(dtype).itemsize
+                if f.tell() != size:
+                    f.truncate(size)
+                f.write(np.ascontiguousarray(candles[name], dtype=dtype).tobytes())
+                f.flush()
+
+    def _rewrite(
+        self,
+        directory: str,
+        rows: int,
+        candles: np.ndarray,
+        ranges: List[Tuple[int, int]]
+    ) -> None:
+        existing = Candles(self._map(directory, rows)).to_array()
+        replaced = np.isin(existing["timestamp"], candles["timestamp"])
+        merged = np.concatenate([existing[~replaced], candles])
+        merged = merged[np.argsort(merged["timestamp"], kind="stable")]
+        self._replace(directory, merged, ranges, self._adjustments(directory))
+
+    @staticmethod
+    def _adjustments(directory: str) -> List[str]:
+        try:
+            with open(os.path.join(directory, ADJUSTMENTS_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def adjustments(self, instrument_token: int, interval: str) -> List[str]:
+        """
+        Get the keys of the adjustments applied to an instrument's candles.
+        """
+        return self._adjustments(self.path(instrument_token, interval))
+
+    def adjust(
+        self,
+        instrument_token: int,
+        interval: str,
+        before: Moment,
+        price_factor: float,
+        volume_factor: float,
+        key: str
+    ) -> int:
+        """
+        Scale the candles that start before a time, e.g. for a split.
+
+        The adjusted candles and the key are swapped in together, so an
+        adjustment is applied once however often it is retried.
+
+        Args:
+            instrument_token: Instrument to adjust
+            interval: Candle interval
+            before: Candles starting before this are adjusted; dates are IST
+            price_factor: Multiplier for open, high, low and close
+            volume_factor: Multiplier for volume and open interest
+            key: Identifies the adjustment
+
+        Returns:
+            Number of candles adjusted, 0 if the key was already applied
+        """
+        directory = self.path(instrument_token, interval)
+        if not os.path.isdir(directory):
+            return 0
+        with self._locked(directory):
+            applied = self._adjustments(directory)
+            rows = self._rows(directory)
+            if key in applied or not rows:
+                return 0
+            candles = Candles(self._map(directory, rows)).to_array()
+            count = int(np.searchsorted(candles["timestamp"], to_epoch(before), side="left"))
+            if count:
+                adjusted = candles[:count]
+                for name in ("open", "high", "low", "close"):
+                    adjusted[name] *= price_factor
+                for name in ("volume", "oi"):
+                    adjusted[name] = np.rint(adjusted[name] * volume_factor)
+            self._replace(directory, candles, self.coverage(instrument_token, interval), applied + [key])
+        return count
+
+    def _replace(
+        self,
+        directory: str,
+        candles: np.ndarray,
+        ranges: List[Tuple[int, int]],
+        adjustments: List[str]
+    ) -> None:
+        tmp = f"{directory}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        self._append(tmp, 0, candles)
+        self._write_coverage(tmp, ranges)
+        if adjustments:
+            with open(os.path.join(tmp, ADJUSTMENTS_FILE), "w") as f:
+                json.dump(adjustments, f)
+
+        # Readers holding maps of the old files keep them after the swap
+        old = f"{directory}.old-{os.getpid()}"
+        os.replace(directory, old)
+        os.replace(tmp, directory)
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def parse_historical(rows: Sequence[Sequence]) -> np.ndarray:
+    """
+    Convert candles as returned by Kite's historical data API into an
+    array of CANDLE_DTYPE.
+
+    Args:
+        rows: [timestamp, open, high, low, close, volume] lists, with open
+            interest as a seventh value when requested
+    """
+    candles = np.zeros(len(rows), dtype=CANDLE_DTYPE)
+    for i, row in enumerate(rows):
+        candles[i] = (
+            to_epoch(datetime.fromisoformat(row[0]) if isinstance(row[0], str) else row[0]),
+            row[1], row[2], row[3], row[4], row[5], row[6] if len(row) > 6 else 0,
+        )
+    return candles
+
+
+def request_ranges(interval: str, start: int, end: int) -> List[Tuple[int, int]]:
+    """
+    Split [start, end] into ranges no longer than one historical data
+    request may cover.
+    """
+    _check_interval(interval)
+    span = INTERVALS[interval][1] * 86400
+    return [(low, min(low + span - 1, end)) for low in range(start, end + 1, span)]
+
+
+def settled_until(interval: str, now: Optional[float] = None) -> int:
+    """
+    Get the latest time whose candle can no longer change: the start of
+    the current candle, minus a second.
+    """
+    now = int(now if now is not None else time.time())
+    length = INTERVALS[interval][0]
+    if interval == "day":
+        today = datetime.fromtimestamp(now, IST).date()
+        return to_epoch(today) - 1
+    return now - now % length - 1
+
+
+_store: Optional[CandleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_candle_store() -> CandleStore:
+    """
+    Get the candle store under ZERODHA_CANDLES_DIR.
+    """
+    global _store
+    with _store_lock:
+        if _store is None or _store.base != candles_dir():
+            _store = CandleStore()
+        return _store
+
+
+def daily_closes(
+    store: CandleStore,
+    tokens: Sequence[int],
+    days: np.ndarray
+) -> np.ndarray:
+    """
+    Get the last close on or before each day for many instruments.
+
+    Args:
+        store: Store to read daily candles from
+        tokens: Instrument tokens
+        days: Dates as datetime64[D]
+
+    Returns:
+        Array of shape (len(tokens), len(days)), NaN before an instrument's
+        first candle
+    """
+    closes = np.full((len(tokens), len(days)), np.nan)
+    if not len(days):
+        return closes
+    # Daily candles start at midnight IST; a day's close is the candle
+    # starting before the next midnight
+    day_ends = days.astype("M8[s]").astype("i8") - _IST_OFFSET + 86400 - 1
+    for row, token in enumerate(tokens):
+        candles = store.read(token, "day")
+        if not len(candles):
+            continue
+        position = np.searchsorted(candles["timestamp"], day_ends, side="right") - 1
+        found = position >= 0
+        closes[row, found] = candles["close"][position[found]]
+    return closes
@@ -0,0 +1,128 @@
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from django.db import connection
+from django.utils import timezone
+
+from users.models import UserSettings
+from zerodha.rate_limit import RateLimiter
+from zerodha.services import ZerodhaService
+
+logger = logging.getLogger(__name__)
+
+
+def connected_user_ids() -> List[int]:
+    """
+    Get the users whose Zerodha session is still usable.
+
+    Returns:
+        IDs of users with an access token and an unexpired session
+    """
+    return list(
+        UserSettings.objects.filter(
+            zerodha_access_token__isnull=False,
+            zerodha_session_expiry__gt=timezone.now()
+        )
+        .exclude(zerodha_access_token='')
+        .order_by('user_id')
+        .values_list('user_id', flat=True)
+    )
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of values, 0.0 if empty.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+@dataclass
+class FleetRefreshReport:
+    """
+    Outcome of refreshing holdings for many users.
+    """
+    elapsed: float = 0.0
+    latencies: Dict[int, float] = field(default_factory=dict)
+    failures: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def succeeded(self) -> int:
+        return self.total - len(self.failures)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get throughput and latency figures for the run.
+        """
+        latencies = list(self.latencies.values())
+        return {
+            "users": self.total,
+            "succeeded": self.succeeded,
+            "failed": len(self.failures),
+            "elapsed": self.elapsed,
+            "throughput": self.total / self.elapsed if self.elapsed else 0.0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "latency_max": max(latencies, default=0.0),
+        }
+
+
+def refresh_holdings(
+    user_ids: List[int],
+    concurrency: int = 4,
+    rate: float = 5.0,
+    burst: Optional[float] = None,
+    sync: Optional[Callable[[int], Dict[str, Any]]] = None
+) -> FleetRefreshReport:
+    """
+    Sync holdings for many users in parallel.
+
+    Args:
+        user_ids: Users to sync
+        concurrency: Maximum number of syncs running at once
+        rate: Syncs started per second across all users
+        burst: Syncs that may start back to back; defaults to concurrency
+        sync: Callable syncing one user, defaults to ZerodhaService.sync_holdings
+
+    Returns:
+        FleetRefreshReport with per-user latency and failures
+    """
+    sync = sync or ZerodhaService.sync_holdings
+    limiter = RateLimiter(limits={"fleet": (rate, burst or concurrency)})
+    report = FleetRefreshReport()
+    lock = threading.Lock()
+
+    def refresh(user_id: int) -> None:
+        limiter.acquire("fleet")
+        started = time.perf_counter()
+        try:
+            result = sync(user_id)
+            error = None if result.get("success") else result.get("message", "Sync failed")
+        except Exception as e:
+            logger.exception(f"Holdings refresh failed for user {user_id}")
+            error = str(e)
+        finally:
+            connection.close()
+
+        with lock:
+            report.latencies[user_id] = time.perf_counter() - started
+            if error is not None:
+                report.failures[user_id] = error
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fleet-sync") as executor:
+        list(executor.map(refresh, user_ids))
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,418 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+from django.conf import settings
+
+from zerodha.quote_cache import IST
+
+logger = logging.getLogger(__name__)
+
+# One fixed-width record per instrument; strings are stored as bytes
+INSTRUMENT_DTYPE = np.dtype([
+    ("instrument_token", "i8"),
+    ("exchange_token", "i8"),
+    ("tradingsymbol", "S40"),
+    ("name", "S64"),
+    ("exchange", "S8"),
+    ("segment", "S16"),
+    ("instrument_type", "S8"),
+    ("expiry", "M8[D]"),
+    ("strike", "f8"),
+    ("tick_size", "f8"),
+    ("lot_size", "i4"),
+    ("last_price", "f8"),
+    ("isin", "S12"),
+])
+
+KEY_DTYPE = "S49"  # exchange + ':' + tradingsymbol
+CHUNK_ROWS = 16384
+FILES = ("instruments", "token_order", "keys", "key_order", "isins", "isin_order")
+
+
+class Instrument(NamedTuple):
+    """
+    A single row of the instrument master.
+    """
+    instrument_token: int
+    exchange_token: int
+    tradingsymbol: str
+    name: str
+    exchange: str
+    segment: str
+    instrument_type: str
+    expiry: Optional[date]
+    strike: float
+    tick_size: float
+    lot_size: int
+    last_price: float
+    isin: Optional[str]
+
+    @property
+    def key(self) -> str:
+        return f"{self.exchange}:{self.tradingsymbol}"
+
+
+def _to_float(value: Optional[str]) -> float:
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _to_int(value: Optional[str]) -> int:
+    try:
+        return int(float(value)) if value else 0
+    except ValueError:
+        return 0
+
+
+def _to_bytes(value: Optional[str]) -> bytes:
+    return (value or "").strip().encode("utf-8")
+
+
+class InstrumentMaster:
+    """
+    Compact, indexed copy of the Kite instrument dump.
+
+    Rows live in a single structured NumPy array (memory-mapped when loaded
+    from disk), with sorted index arrays for lookups by instrument_token,
+    'exchange:tradingsymbol' and ISIN. Lookups are binary searches, so the
+    master costs a few MB and no per-row Python objects.
+    """
+    def __init__(
+        self,
+        records: np.ndarray,
+        token_order: np.ndarray,
+        keys: np.ndarray,
+        key_order: np.ndarray,
+        isins: np.ndarray,
+        isin_order: np.ndarray,
+        as_of: Optional[date] = None
+    ):
+        self.records = records
+        self.token_order = token_order
+        self.keys = keys
+        self.key_order = key_order
+        self.isins = isins
+        self.isin_order = isin_order
+        self.as_of = as_of
+        self._sorted_tokens = records["instrument_token"][token_order]
+
+    @classmethod
+    def from_records(cls, records: np.ndarray, as_of: Optional[date] = None) -> "InstrumentMaster":
+        """
+        Build the master and its indexes from an array of INSTRUMENT_DTYPE.
+        """
+        token_order = np.argsort(records["instrument_token"], kind="stable")
+
+        row_keys = np.char.add(np.char.add(records["exchange"], b":"), records["tradingsymbol"])
+        key_order = np.argsort(row_keys, kind="stable")
+
+        with_isin = np.flatnonzero(records["isin"] != b"")
+        isin_order = with_isin[np.argsort(records["isin"][with_isin], kind="stable")]
+
+        return cls(
+            records=records,
+            token_order=token_order,
+            keys=row_keys[key_order].astype(KEY_DTYPE),
+            key_order=key_order,
+            isins=records["isin"][isin_order],
+            isin_order=isin_order,
+            as_of=as_of
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, str]], as_of: Optional[date] = None) -> "InstrumentMaster":
+        """
+        Build the master from CSV rows, consuming them as a stream.
+
+        Rows are packed into fixed-size chunks as they arrive, so memory use
+        is bounded by the packed size rather than the parsed CSV.
+
+        Args:
+            rows: Dictionaries as produced by KiteClient.iter_instruments
+            as_of: Date the dump was taken
+
+        Returns:
+            An InstrumentMaster
+        """
+        chunks: List[np.ndarray] = []
+        chunk = np.zeros(CHUNK_ROWS, dtype=INSTRUMENT_DTYPE)
+        filled = 0
+
+        for row in rows:
+            expiry = row.get("expiry")
+            chunk[filled] = (
+                _to_int(row.get("instrument_token")),
+                _to_int(row.get("exchange_token")),
+                _to_bytes(row.get("tradingsymbol")),
+                _to_bytes(row.get("name")),
+                _to_bytes(row.get("exchange")),
+                _to_bytes(row.get("segment")),
+                _to_bytes(row.get("instrument_type")),
+                np.datetime64(expiry, "D") if expiry else np.datetime64("NaT", "D"),
+                _to_float(row.get("strike")),
+                _to_float(row.get("tick_size")),
+                _to_int(row.get("lot_size")),
+                _to_float(row.get("last_price")),
+                _to_bytes(row.get("isin")),
+            )
+            filled += 1
+            if filled == CHUNK_ROWS:
+                chunks.append(chunk)
+                chunk = np.zeros(CHUNK_ROWS, dtype=INSTRUMENT_DTYPE)
+                filled = 0
+
+        chunks.append(chunk[:filled])
+        return cls.from_records(np.concatenate(chunks), as_of=as_of)
+
+    def save(self, directory: str) -> None:
+        """
+        Write the master and its indexes as .npy files.
+
+        Files are written to a temporary directory first and swapped in, so
+        readers never see a half-written master.
+        """
+        tmp = f"{directory}.tmp-{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        np.save(os.path.join(tmp, "instruments.npy"), self.records)
+        for name in FILES[1:]:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.replace(tmp, directory)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "InstrumentMaster":
+        """
+        Load a master saved with save().
+
+        Args:
+            directory: Directory the master was saved to
+            mmap: Memory-map the arrays instead of reading them into memory,
+                so that processes on a host share the pages
+
+        Returns:
+            An InstrumentMaster
+        """
+        mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in FILES
+        }
+        try:
+            as_of = date.fromisoformat(os.path.basename(os.path.normpath(directory)))
+        except ValueError:
+            as_of = None
+        return cls(records=arrays.pop("instruments"), as_of=as_of, **arrays)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _row(self, index: int) -> Instrument:
+        record = self.records[index]
+        expiry = record["expiry"]
+        isin = record["isin"].decode()
+        return Instrument(
+            instrument_token=int(record["instrument_token"]),
+            exchange_token=int(record["exchange_token"]),
+            tradingsymbol=record["tradingsymbol"].decode(),
+            name=record["name"].decode(),
+            exchange=record["exchange"].decode(),
+            segment=record["segment"].decode(),
+            instrument_type=record["instrument_type"].decode(),
+            expiry=None if np.isnat(expiry) else expiry.astype(date),
+            strike=float(record["strike"]),
+            tick_size=float(record["tick_size"]),
+            lot_size=int(record["lot_size"]),
+            last_price=float(record["last_price"]),
+            isin=isin or None,
+        )
+
+    @staticmethod
+    def _search(sorted_values: np.ndarray, value) -> Optional[int]:
+        position = int(np.searchsorted(sorted_values, value))
+        if position < len(sorted_values) and sorted_values[position] == value:
+            return position
+        return None
+
+    def by_token(self, instrument_token: int) -> Optional[Instrument]:
+        """
+        Look up an instrument by its instrument_token.
+        """
+        position = self._search(self._sorted_tokens, instrument_token)
+        return None if position is None else self._row(self.token_order[position])
+
+    def by_key(self, key: str) -> Optional[Instrument]:
+        """
+        Look up an instrument by 'exchange:tradingsymbol', e.g. 'NSE:INFY'.
+        """
+        position = self._search(self.keys, key.upper().encode("utf-8"))
+        return None if position is None else self._row(self.key_order[position])
+
+    def by_symbol(self, tradingsymbol: str, exchange: str = "NSE") -> Optional[Instrument]:
+        """
+        Look up an instrument by trading symbol on an exchange.
+        """
+        return self.by_key(f"{exchange}:{tradingsymbol}")
+
+    def by_isin(self, isin: str, exchange: Optional[str] = None) -> Optional[Instrument]:
+        """
+        Look up an instrument by ISIN, preferring the given exchange.
+
+        Only available when the dump includes an 'isin' column.
+        """
+        value = isin.upper().encode("utf-8")
+        start = int(np.searchsorted(self.isins, value, side="left"))
+        end = int(np.searchsorted(self.isins, value, side="right"))
+        matches = [self._row(self.isin_order[i]) for i in range(start, end)]
+        for instrument in matches:
+            if exchange is None or instrument.exchange == exchange:
+                return instrument
+        return matches[0] if matches else None
+
+    def tokens_for_keys(self, keys: List[str]) -> np.ndarray:
+        """
+        Resolve many 'exchange:tradingsymbol' keys at once.
+
+        Args:
+            keys: Instrument keys
+
+        Returns:
+            Array of instrument tokens, with -1 for unknown keys
+        """
+        if not keys or not len(self.keys):
+            return np.full(len(keys), -1, dtype="i8")
+
+        wanted = np.array([key.upper().encode("utf-8") for key in keys], dtype=KEY_DTYPE)
+        positions = np.minimum(np.searchsorted(self.keys, wanted), len(self.keys) - 1)
+        found = self.keys[positions] == wanted
+        tokens = self.records["instrument_token"][self.key_order[positions]]
+        return np.where(found, tokens, -1)
+
+
+def holding_instrument_key(symbol: str, source: Optional[str] = None, external_id: Optional[str] = None) -> str:
+    """
+    Get the 'exchange:tradingsymbol' key a holding is priced by.
+
+    Zerodha holdings keep the exchange they were synced from in their
+    external_id ('SYMBOL:EXCHANGE'); other holdings are priced on NSE.
+    """
+    exchange = "NSE"
+    if source == "zerodha" and external_id and ":" in external_id:
+        exchange = external_id.rsplit(":", 1)[1]
+    return f"{exchange}:{symbol}"
+
+
+def instruments_dir() -> str:
+    return str(getattr(
+        settings, "ZERODHA_INSTRUMENTS_DIR",
+        os.path.join(settings.BASE_DIR, "var", "instruments")
+    ))
+
+
+def today_ist() -> date:
+    return datetime.now(IST).date()
+
+
+def latest_snapshot_dir(base: Optional[str] = None) -> Optional[str]:
+    """
+    Get the directory of the most recent saved master, if any.
+    """
+    base = base or instruments_dir()
+    if not os.path.isdir(base):
+        return None
+    dated = []
+    for name in os.listdir(base):
+        try:
+            dated.append((date.fromisoformat(name), name))
+        except ValueError:
+            continue
+    return os.path.join(base, max(dated)[1]) if dated else None
+
+
+def refresh_instrument_master(client, exchanges: Optional[List[str]] = None, keep: int = 3) -> InstrumentMaster:
+    """
+    Download the instrument dump and save it as today's master.
+
+    Args:
+        client: KiteClient to download with; the dump needs no session
+        exchanges: Exchanges to include, or None for all of them
+        keep: Number of daily snapshots to keep on disk
+
+    Returns:
+        The new InstrumentMaster
+    """
+    def rows():
+        for exchange in exchanges or [None]:
+            yield from client.iter_instruments(exchange)
+
+    as_of = today_ist()
+    master = InstrumentMaster.from_rows(rows(), as_of=as_of)
+
+    base = instruments_dir()
+    master.save(os.path.join(base, as_of.isoformat()))
+
+    snapshots = sorted(name for name in os.listdir(base) if name[:4].isdigit() and "tmp" not in name)
+    for name in snapshots[:-keep]:
+        shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+
+    logger.info(f"Saved instrument master for {as_of} with {len(master)} instruments")
+    reset_instrument_master()
+    return master
+
+
+_master: Optional[InstrumentMaster] = None
+_master_dir: Optional[str] = None
+_master_checked = float("-inf")
+_master_lock = threading.Lock()
+RECHECK_SECONDS = 60
+
+
+def get_instrument_master() -> Optional[InstrumentMaster]:
+    """
+    Get the most recent instrument master saved on disk.
+
+    The master is memory-mapped once per process and swapped for a newer
+    snapshot when one appears (checked at most once a minute).
+
+    Returns:
+        The InstrumentMaster, or None if none has been downloaded yet
+    """
+    global _master, _master_dir, _master_checked
+
+    now = time.monotonic()
+    if now - _master_checked < RECHECK_SECONDS:
+        return _master
+
+    with _master_lock:
+        _master_checked = now
+        directory = latest_snapshot_dir()
+        if directory is None:
+            return _master
+        if directory != _master_dir:
+            try:
+                _master = InstrumentMaster.load(directory)
+                _master_dir = directory
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load instrument master from {directory}: {str(e)}")
+        return _master
+
+
+def reset_instrument_master() -> None:
+    """
+    Forget the loaded master so the next call reloads it from disk.
+    """
+    global _master, _master_dir, _master_checked
+
+    with _master_lock:
+        _master = None
+        _master_dir = None
+        _master_checked = float("-inf")
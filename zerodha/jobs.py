@@ -0,0 +1,228 @@
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from zerodha.models import SyncJob
+from zerodha.services import ZerodhaService
+
+logger = logging.getLogger(__name__)
+
+
+def _sync_holdings(user_id: int) -> Dict[str, Any]:
+    return ZerodhaService.sync_holdings(user_id)
+
+
+# Job kind -> callable taking the user id and returning a JSON-serializable
+# result with a "success" flag, like the ZerodhaService methods
+JOB_HANDLERS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    SyncJob.KIND_SYNC_HOLDINGS: _sync_holdings,
+}
+
+
+def enqueue_job(user_id: int, kind: str = SyncJob.KIND_SYNC_HOLDINGS) -> Tuple[SyncJob, bool]:
+    """
+    Queue a job for a user unless an identical one is already in flight.
+
+    Args:
+        user_id: ID of the user the job runs for
+        kind: Kind of job, one of SyncJob.KIND_CHOICES
+
+    Returns:
+        Tuple of the job and whether it was newly created. When a job of the
+        same kind is already queued or running for the user, that job is
+        returned instead.
+    """
+    in_flight = SyncJob.objects.filter(user_id=user_id, kind=kind, status__in=SyncJob.IN_FLIGHT)
+
+    job = in_flight.first()
+    if job is not None:
+        return job, False
+
+    try:
+        with transaction.atomic():
+            return SyncJob.objects.create(user_id=user_id, kind=kind), True
+    except IntegrityError:
+        # Another request queued the same job between our check and insert
+        job = in_flight.first()
+        if job is None:
+            raise
+        return job, False
+
+
+def claim_job(per_user_limit: int = 1) -> Optional[SyncJob]:
+    """
+    Take the oldest queued job whose user isn't at their concurrency limit.
+
+    Rows are locked with SKIP LOCKED, so several workers can claim from the
+    queue at once without handing out the same job twice.
+
+    Args:
+        per_user_limit: Maximum number of running jobs per user
+
+    Returns:
+        The claimed job, now marked running, or None if nothing is runnable
+    """
+    busy_users = (
+        SyncJob.objects.filter(status=SyncJob.STATUS_RUNNING)
+        .values('user_id')
+        .annotate(running=Count('id'))
+        .filter(running__gte=per_user_limit)
+        .values('user_id')
+    )
+
+    with transaction.atomic():
+        job = (
+            SyncJob.objects.select_for_update(skip_locked=True)
+            .filter(status=SyncJob.STATUS_QUEUED)
+            .exclude(user_id__in=busy_users)
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = SyncJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+    return job
+
+
+def run_job(job: SyncJob) -> SyncJob:
+    """
+    Run a claimed job and store its result.
+
+    Args:
+        job: Job in the running state
+
+    Returns:
+        The job, marked succeeded or failed
+    """
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+        result = handler(job.user_id)
+    except Exception as e:
+        logger.exception(f"Job {job.id} ({job.kind}) for user {job.user_id} failed")
+        job.status = SyncJob.STATUS_FAILED
+        job.result = None
+        job.error = str(e)
+    else:
+        job.result = result
+        if result.get("success"):
+            job.status = SyncJob.STATUS_SUCCEEDED
+            job.error = None
+        else:
+            job.status = SyncJob.STATUS_FAILED
+            job.error = result.get("message")
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at', 'updated_at'])
+    return job
+
+
+def requeue_stale_jobs(timeout: Optional[float] = None) -> int:
+    """
+    Put back jobs left running by a worker that died.
+
+    Args:
+        timeout: Seconds after which a running job is considered abandoned;
+            defaults to the ZERODHA_SYNC_JOB_TIMEOUT setting
+
+    Returns:
+        Number of jobs requeued
+    """
+    if timeout is None:
+        timeout = getattr(settings, "ZERODHA_SYNC_JOB_TIMEOUT", 600)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return SyncJob.objects.filter(
+        status=SyncJob.STATUS_RUNNING, started_at__lt=cutoff
+    ).update(status=SyncJob.STATUS_QUEUED, started_at=None, updated_at=timezone.now())
+
+
+class SyncWorker:
+    """
+    Thread pool that drains the sync job queue.
+
+    Any number of workers, in one or several processes, can share the queue.
+    The per-user limit is checked against the database when claiming, so it
+    holds across workers.
+    """
+    def __init__(self, workers: int = 4, per_user_limit: int = 1, poll_interval: float = 1.0):
+        """
+        Initialize the worker.
+
+        Args:
+            workers: Number of jobs run at the same time
+            per_user_limit: Maximum number of running jobs per user
+            poll_interval: Seconds to wait between polls of an empty queue
+        """
+        self.workers = workers
+        self.per_user_limit = per_user_limit
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self.processed = 0
+
+    def run(self, once: bool = False) -> int:
+        """
+        Claim and run jobs until stopped.
+
+        Args:
+            once: Return as soon as the queue is drained instead of polling
+
+        Returns:
+            Number of jobs processed
+        """
+        requeued = requeue_stale_jobs()
+        if requeued:
+            logger.warning(f"Requeued {requeued} abandoned sync jobs")
+
+        active: Set[Future] = set()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sync-job")
+        try:
+            while not self._stop.is_set():
+                claimed = False
+                while len(active) < self.workers:
+                    job = claim_job(self.per_user_limit)
+                    if job is None:
+                        break
+                    claimed = True
+                    active.add(executor.submit(self._run, job))
+
+                if not active and not claimed:
+                    if once:
+                        break
+                    close_old_connections()
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                done, active = wait(active, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                self.processed += len(done)
+        finally:
+            executor.shutdown(wait=True)
+            self.processed += len(active)
+        return self.processed
+
+    def stop(self) -> None:
+        """
+        Stop claiming jobs; running jobs are allowed to finish.
+        """
+        self._stop.set()
+
+    @staticmethod
+    def _run(job: SyncJob) -> Optional[SyncJob]:
+        try:
+            return run_job(job)
+        except Exception:
+            # Storing the result failed; the job is requeued once it goes stale
+            logger.exception(f"Could not record the outcome of job {job.id}")
+            return None
+        finally:
+            connection.close()
@@ -1,11 +1,22 @@
+import csv
 import logging
 import json
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 
+import numpy as np
 import requests
 from django.conf import settings
 from pydantic import BaseModel, Field
+from urllib3.exceptions import NewConnectionError
+
+from zerodha.candles import (
+    CANDLE_DTYPE, CandleStore, Moment, parse_historical, request_ranges, settled_until, to_epoch, from_epoch
+)
+from zerodha.rate_limit import endpoint_class, get_rate_limiter, get_retry_policy
+from zerodha.transport import get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +82,12 @@ class KiteClient:
     BASE_URL = "https://api.kite.trade"
     LOGIN_URL = "https://kite.zerodha.com/connect/login"
     
+    # Maximum instruments per request for /quote and for /quote/ltp, /quote/ohlc
+    QUOTE_BATCH_SIZE = 500
+    LTP_BATCH_SIZE = 1000
+    # Maximum chunks of one quote request fetched at the same time
+    QUOTE_CONCURRENCY = 4
+    
     def __init__(
         self, 
         api_key: Optional[str] = None, 
@@ -88,7 +105,12 @@ class KiteClient:
         self.api_key = api_key
         self.api_secret = api_secret
         self.access_token = access_token
-        self._session = requests.Session()
+        self.timeout = getattr(settings, "ZERODHA_HTTP_TIMEOUT", 10)
+        self.rate_limiter = get_rate_limiter()
+        self.retry_policy = get_retry_policy()
+        
+        # Connections come from the process-wide pool shared by all clients
+        self._session = get_transport().mount(requests.Session())
         
         # Add a default user agent
         self._session.headers.update({
@@ -96,6 +118,77 @@ class KiteClient:
             "User-Agent": "TradeBit/1.0"
         })
     
+    def _auth_headers(self) -> Dict[str, str]:
+        """
+        Get the Authorization header for the current session, if any.
+        """
+        if self.access_token:
+            return {"Authorization": f"Token {self.api_key}:{self.access_token}"}
+        return {}
+    
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        url: str,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send a request under the rate limiter, retrying transient failures.
+        
+        Each attempt first takes a token from the budget for the endpoint's
+        class. Responses with 429/5xx and connection errors are retried with
+        jittered exponential backoff (honoring Retry-After), except that
+        requests which change state are never retried once they may have
+        reached Zerodha, so orders can't be placed twice.
+        
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint, used to pick the rate limit budget
+            url: Full URL to request
+            **kwargs: Passed on to requests.Session.request
+            
+        Returns:
+            The final response, which may still be an error response
+            
+        Raises:
+            requests.RequestException: If the last attempt failed to connect
+        """
+        budget = endpoint_class(method, endpoint)
+        attempt = 0
+        
+        while True:
+            self.rate_limiter.acquire(budget, self.api_key)
+            
+            try:
+                response = self._session.request(
+                    method=method,
+                    url=url,
+                    timeout=self.timeout,
+                    **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                reason = getattr(e.args[0], "reason", None) if e.args else None
+                connect_failed = (
+                    isinstance(e, requests.ConnectTimeout)
+                    or isinstance(reason, NewConnectionError)
+                )
+                if not self.retry_policy.should_retry_error(method, connect_failed, attempt):
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                logger.warning(f"Retrying {method} {endpoint} in {delay:.2f}s after error: {str(e)}")
+            else:
+                if not self.retry_policy.should_retry_status(method, response.status_code, attempt):
+                    return response
+                delay = self.retry_policy.delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(
+                    f"Retrying {method} {endpoint} in {delay:.2f}s after HTTP {response.status_code}"
+                )
+                response.close()
+            
+            time.sleep(delay)
+            attempt += 1
+    
     def _make_request(
         self, 
         method: str, 
@@ -123,22 +216,20 @@ class KiteClient:
         url = f"{self.BASE_URL}{endpoint}"
         
         # Set default headers
-        request_headers = {}
-        if self.access_token:
-            request_headers["Authorization"] = f"Token {self.api_key}:{self.access_token}"
+        request_headers = self._auth_headers()
         
         # Update with any additional headers
         if headers:
             request_headers.update(headers)
         
         try:
-            response = self._session.request(
+            response = self._send(
                 method=method,
+                endpoint=endpoint,
                 url=url,
                 params=params,
                 data=data,
-                headers=request_headers,
-                timeout=10  # 10 second timeout
+                headers=request_headers
             )
             
             # Raise exception if status code indicates an error
@@ -379,18 +470,53 @@ class KiteClient:
         Returns:
             List of instruments
             
+        Raises:
+            ZerodhaException: If instrument retrieval fails
+        """
+        return list(self.iter_instruments(exchange))
+    
+    def iter_instruments(self, exchange: Optional[str] = None) -> Iterator[Dict[str, str]]:
+        """
+        Stream the instrument dump row by row.
+        
+        The dump is a CSV of tens of thousands of rows, so it is parsed as it
+        is downloaded instead of being loaded into memory first.
+        
+        Args:
+            exchange: Optional filter by exchange (NSE, BSE, etc.)
+            
+        Yields:
+            One dictionary per instrument, keyed by CSV column
+            
         Raises:
             ZerodhaException: If instrument retrieval fails
         """
         endpoint = "/instruments"
         if exchange:
             endpoint += f"/{exchange}"
-            
-        return self._make_request("GET", endpoint)
+        
+        try:
+            response = self._send(
+                method="GET",
+                endpoint=endpoint,
+                url=f"{self.BASE_URL}{endpoint}",
+                headers=self._auth_headers(),
+                stream=True
+            )
+            with response:
+                response.raise_for_status()
+                lines = (line.decode("utf-8") for line in response.iter_lines() if line)
+                yield from csv.DictReader(lines)
+        except requests.RequestException as e:
+            logger.error(f"Request error: {str(e)}")
+            raise ZerodhaException(f"Failed to get instruments: {str(e)}")
     
     def get_quote(self, *instruments: str) -> Dict:
         """
-        Get quotes for instruments.
+        Get full quotes (including market depth) for instruments.
+        
+        Large requests are split into chunks of QUOTE_BATCH_SIZE, fetched
+        concurrently under the rate limiter and merged.
         
         Args:
             instruments: List of instruments in the format 'exchange:tradingsymbol'
@@ -401,8 +527,145 @@ class KiteClient:
         Raises:
             ZerodhaException: If quote retrieval fails
         """
-        params = {"i": instruments}
-        return self._make_request("GET", "/quote", params=params)
+        return self._get_quotes("/quote", instruments, self.QUOTE_BATCH_SIZE)
+    
+    def get_ohlc(self, *instruments: str) -> Dict:
+        """
+        Get last price and OHLC for instruments, without market depth.
+        
+        Args:
+            instruments: List of instruments in the format 'exchange:tradingsymbol'
+            
+        Returns:
+            Dictionary of OHLC quotes indexed by the instrument
+            
+        Raises:
+            ZerodhaException: If quote retrieval fails
+        """
+        return self._get_quotes("/quote/ohlc", instruments, self.LTP_BATCH_SIZE)
+    
+    def get_ltp(self, *instruments: str) -> Dict:
+        """
+        Get only the last traded price for instruments.
+        
+        Args:
+            instruments: List of instruments in the format 'exchange:tradingsymbol'
+            
+        Returns:
+            Dictionary of last prices indexed by the instrument
+            
+        Raises:
+            ZerodhaException: If quote retrieval fails
+        """
+        return self._get_quotes("/quote/ltp", instruments, self.LTP_BATCH_SIZE)
+    
+    def _get_quotes(self, endpoint: str, instruments: Tuple[str, ...], batch_size: int) -> Dict:
+        """
+        Fetch a quote endpoint in chunks of at most batch_size instruments.
+        
+        Args:
+            endpoint: Quote endpoint to request
+            instruments: Instruments in the format 'exchange:tradingsymbol'
+            batch_size: Maximum instruments Kite accepts per request
+            
+        Returns:
+            Merged dictionary of quotes indexed by the instrument
+        """
+        unique = list(dict.fromkeys(instruments))
+        chunks = [unique[i:i + batch_size] for i in range(0, len(unique), batch_size)]
+        
+        if not chunks:
+            return {}
+        if len(chunks) == 1:
+            return self._make_request("GET", endpoint, params={"i": chunks[0]}) or {}
+        
+        # A per-call pool, so chunks never wait on a pool the caller is running in
+        with ThreadPoolExecutor(max_workers=min(len(chunks), self.QUOTE_CONCURRENCY)) as pool:
+            results = pool.map(
+                lambda chunk: self._make_request("GET", endpoint, params={"i": chunk}),
+                chunks
+            )
+            quotes = {}
+            for result in results:
+                quotes.update(result or {})
+        return quotes
+    
+    def get_historical_data(
+        self,
+        instrument_token: int,
+        interval: str,
+        from_date: Moment,
+        to_date: Moment,
+        continuous: bool = False,
+        oi: bool = False,
+        store: Optional[CandleStore] = None
+    ) -> np.ndarray:
+        """
+        Get historical OHLCV candles for an instrument.
+        
+        Ranges longer than Kite allows per request for the interval are
+        fetched in consecutive requests. With a store, only the parts of the
+        range it has never fetched are requested; the new candles are saved
+        to it and the whole range is read back from it. Candles that may
+        still change (the current day or interval) are fetched again next time.
+        
+        Args:
+            instrument_token: Instrument to fetch
+            interval: Candle interval, e.g. 'day', 'minute' or '15minute'
+            from_date: Start of the range; dates and naive datetimes are IST
+            to_date: End of the range (inclusive)
+            continuous: Stitch expired futures contracts together
+            oi: Include open interest
+            store: CandleStore to fill gaps in and read from
+            
+        Returns:
+            Array of CANDLE_DTYPE ordered by time
+            
+        Raises:
+            ZerodhaException: If a request fails
+        """
+        start, end = to_epoch(from_date), to_epoch(to_date, end_of_day=True)
+        if store is None:
+            chunks = [
+                self._fetch_candles(instrument_token, interval, low, high, continuous, oi)
+                for low, high in request_ranges(interval, start, end)
+            ]
+            return np.concatenate(chunks) if chunks else np.empty(0, dtype=CANDLE_DTYPE)
+        
+        settled = settled_until(interval)
+        for gap_start, gap_end in store.missing_ranges(instrument_token, interval, start, end):
+            for low, high in request_ranges(interval, gap_start, gap_end):
+                candles = self._fetch_candles(instrument_token, interval, low, high, continuous, oi)
+                covered = (low, min(high, settled)) if low <= settled else None
+                store.write(instrument_token, interval, candles, covered=covered)
+        return store.read(instrument_token, interval, start, end).to_array()
+    
+    def _fetch_candles(
+        self,
+        instrument_token: int,
+        interval: str,
+        start: int,
+        end: int,
+        continuous: bool,
+        oi: bool
+    ) -> np.ndarray:
+        """
+        Fetch one request's worth of candles.
+        """
+        data = self._make_request(
+            "GET",
+            f"/instruments/historical/{int(instrument_token)}/{interval}",
+            params={
+                "from": from_epoch(start).strftime("%Y-%m-%d %H:%M:%S"),
+                "to": from_epoch(end).strftime("%Y-%m-%d %H:%M:%S"),
+                "continuous": int(continuous),
+                "oi": int(oi),
+            }
+        )
+        try:
+            return parse_historical((data or {}).get("candles") or [])
+        except (TypeError, ValueError, IndexError) as e:
+            raise ZerodhaException(f"Failed to parse historical data: {str(e)}")
     
     def is_session_valid(self) -> bool:
         """
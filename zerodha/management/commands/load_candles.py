@@ -0,0 +1,135 @@
+import csv
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio import analytics
+from zerodha.candles import CANDLE_DTYPE, INTERVALS, get_candle_store, to_epoch
+from zerodha.instruments import get_instrument_master
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load OHLCV candles from CSV files into the candle store. Files need timestamp "
+        "(or date), open, high, low and close columns, and may have volume and oi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='CSV files to load.')
+        parser.add_argument(
+            '--interval',
+            choices=list(INTERVALS),
+            default='day',
+            help='Interval of the candles.'
+        )
+        parser.add_argument(
+            '--token',
+            type=int,
+            help='Instrument token of every row. Otherwise rows need an instrument_token or symbol column.'
+        )
+        parser.add_argument(
+            '--symbol',
+            help="Instrument of every row as 'exchange:tradingsymbol', e.g. NSE:INFY."
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100000,
+            help='Rows parsed and written at a time.'
+        )
+
+    def handle(self, *args, **options):
+        self.store = get_candle_store()
+        self.interval = options['interval']
+        self.default_token = options['token']
+        if options['symbol']:
+            self.default_token = self.resolve([options['symbol']])[0]
+            if self.default_token < 0:
+                raise CommandError(f"Unknown instrument: {options['symbol']}")
+
+        started = time.perf_counter()
+        # Token -> (first, last) candle loaded, recorded as fetched at the end
+        self.spans: Dict[int, Tuple[int, int]] = {}
+        total = 0
+        for path in options['paths']:
+            try:
+                with open(path, newline='') as f:
+                    total += self.load(csv.DictReader(f), options['chunk_size'])
+            except OSError as e:
+                raise CommandError(str(e))
+
+        for token, span in self.spans.items():
+            self.store.write(token, self.interval, np.empty(0, dtype=CANDLE_DTYPE), covered=span)
+        if self.spans:
+            # Betas are measured against stored benchmark closes
+            analytics.invalidate_all()
+        self.stdout.write(
+            f"Loaded {total} candles for {len(self.spans)} instruments "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def resolve(self, keys: List[str]) -> np.ndarray:
+        master = get_instrument_master()
+        if master is None:
+            raise CommandError("No instrument master; run refresh_instruments first")
+        return master.tokens_for_keys(keys)
+
+    def load(self, reader: csv.DictReader, chunk_size: int) -> int:
+        fields = set(reader.fieldnames or [])
+        time_field = 'timestamp' if 'timestamp' in fields else 'date'
+        missing = {time_field, 'open', 'high', 'low', 'close'} - fields
+        if missing:
+            raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+        if self.default_token is None and not fields & {'instrument_token', 'symbol'}:
+            raise CommandError("Pass --token or --symbol, or add an instrument_token or symbol column")
+
+        loaded = 0
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) == chunk_size:
+                loaded += self.write(rows, time_field)
+                rows = []
+        return loaded + self.write(rows, time_field)
+
+    def write(self, rows: List[Dict[str, str]], time_field: str) -> int:
+        if not rows:
+            return 0
+
+        candles = np.zeros(len(rows), dtype=CANDLE_DTYPE)
+        try:
+            for i, row in enumerate(rows):
+                candles[i] = (
+                    to_epoch(datetime.fromisoformat(row[time_field].strip())),
+                    row['open'], row['high'], row['low'], row['close'],
+                    int(float(row.get('volume') or 0)), int(float(row.get('oi') or 0)),
+                )
+        except ValueError as e:
+            raise CommandError(f"Invalid row {rows[i]}: {str(e)}")
+
+        if self.default_token is not None:
+            tokens = np.full(len(rows), self.default_token, dtype='i8')
+        elif 'instrument_token' in rows[0]:
+            tokens = np.array([int(row['instrument_token']) for row in rows], dtype='i8')
+        else:
+            tokens = self.resolve([row['symbol'] for row in rows])
+            unknown = np.flatnonzero(tokens < 0)
+            if len(unknown):
+                raise CommandError(f"Unknown instrument: {rows[unknown[0]]['symbol']}")
+
+        order = np.argsort(tokens, kind='stable')
+        boundaries = np.flatnonzero(np.diff(tokens[order])) + 1
+        for group in np.split(order, boundaries):
+            token = int(tokens[group[0]])
+            batch = candles[group]
+            self.store.write(token, self.interval, batch)
+            # Up to the end of the last candle
+            first = int(batch['timestamp'].min())
+            last = int(batch['timestamp'].max()) + INTERVALS[self.interval][0] - 1
+            if token in self.spans:
+                first, last = min(first, self.spans[token][0]), max(last, self.spans[token][1])
+            self.spans[token] = (first, last)
+        return len(rows)
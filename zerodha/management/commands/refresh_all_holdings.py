@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+
+from zerodha.fleet import connected_user_ids, refresh_holdings
+from zerodha.jobs import enqueue_job
+
+
+class Command(BaseCommand):
+    help = "Sync holdings for every user with a live Zerodha session."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Maximum number of syncs running at once.'
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=5.0,
+            help='Syncs started per second across all users.'
+        )
+        parser.add_argument(
+            '--burst',
+            type=float,
+            default=None,
+            help='Syncs that may start back to back. Defaults to the concurrency.'
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Queue sync jobs for run_sync_worker instead of syncing here.'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = connected_user_ids()
+        self.stdout.write(f"Found {len(user_ids)} users with a live Zerodha session")
+
+        if options['enqueue']:
+            queued = sum(enqueue_job(user_id)[1] for user_id in user_ids)
+            self.stdout.write(f"Queued {queued} sync jobs ({len(user_ids) - queued} already in flight)")
+            return
+
+        report = refresh_holdings(
+            user_ids,
+            concurrency=options['concurrency'],
+            rate=options['rate'],
+            burst=options['burst']
+        )
+        summary = report.summary()
+
+        self.stdout.write(
+            f"Synced {summary['succeeded']}/{summary['users']} users in {summary['elapsed']:.1f}s "
+            f"({summary['throughput']:.2f} users/s)"
+        )
+        self.stdout.write(
+            f"Latency p50 {summary['latency_p50']:.2f}s, p95 {summary['latency_p95']:.2f}s, "
+            f"max {summary['latency_max']:.2f}s"
+        )
+        for user_id, error in sorted(report.failures.items()):
+            self.stderr.write(f"User {user_id}: {error}")
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Stock
+from zerodha.instruments import refresh_instrument_master
+from zerodha.kite_client import KiteClient, ZerodhaException
+
+
+class Command(BaseCommand):
+    help = "Download the Kite instrument dump and save it as today's instrument master."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--exchange',
+            action='append',
+            dest='exchanges',
+            help='Only include this exchange (repeatable). Defaults to all exchanges.'
+        )
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=3,
+            help='Number of daily snapshots to keep on disk.'
+        )
+        parser.add_argument(
+            '--update-stocks',
+            action='store_true',
+            help='Replace placeholder stock names (equal to the symbol) with instrument names.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            master = refresh_instrument_master(KiteClient(), options['exchanges'], options['keep'])
+        except ZerodhaException as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Saved {len(master)} instruments for {master.as_of}")
+
+        if options['update_stocks']:
+            updated = []
+            now = timezone.now()
+            for stock in Stock.objects.all().only('id', 'symbol', 'name'):
+                if stock.name != stock.symbol:
+                    continue
+                instrument = master.by_symbol(stock.symbol, 'NSE') or master.by_symbol(stock.symbol, 'BSE')
+                if instrument is not None and instrument.name:
+                    stock.name = instrument.name
+                    stock.updated_at = now
+                    updated.append(stock)
+
+            # Bumping updated_at lets API processes see the new names
+            Stock.objects.bulk_update(updated, ['name', 'updated_at'], batch_size=500)
+            self.stdout.write(f"Updated names of {len(updated)} stocks")
@@ -0,0 +1,51 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from zerodha.jobs import SyncWorker
+
+
+class Command(BaseCommand):
+    help = "Run queued Zerodha sync jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of jobs to run at the same time.'
+        )
+        parser.add_argument(
+            '--per-user',
+            type=int,
+            default=1,
+            help='Maximum number of running jobs per user.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls of an empty queue.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is drained instead of polling for new jobs.'
+        )
+
+    def handle(self, *args, **options):
+        worker = SyncWorker(
+            workers=options['workers'],
+            per_user_limit=options['per_user'],
+            poll_interval=options['poll_interval']
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write("Stopping after running jobs finish...")
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        processed = worker.run(once=options['once'])
+        self.stdout.write(f"Processed {processed} jobs")
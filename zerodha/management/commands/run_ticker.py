@@ -0,0 +1,99 @@
+import signal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from users.models import UserSettings
+from zerodha.tick_table import TickTable, tick_table_path
+from zerodha.ticker import (
+    MODE_FULL, MODE_LTP, MODE_QUOTE, FrameRecorder, KiteWebSocketSource,
+    ReplaySource, TickerService
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream live ticks for all held and watched instruments into the shared price table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            default=getattr(settings, 'ZERODHA_TICKER_USER', None),
+            help='Username whose Zerodha session to connect with. Defaults to ZERODHA_TICKER_USER.'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=[MODE_LTP, MODE_QUOTE, MODE_FULL],
+            default=MODE_QUOTE,
+            help='Subscription mode.'
+        )
+        parser.add_argument(
+            '--replay',
+            help='Play frames from a recording instead of connecting to Kite.'
+        )
+        parser.add_argument(
+            '--speed',
+            type=float,
+            default=None,
+            help='Replay at this multiple of the recorded pace (default: as fast as possible).'
+        )
+        parser.add_argument(
+            '--record',
+            help='Append every frame received to this file, for later replay.'
+        )
+        parser.add_argument(
+            '--refresh-interval',
+            type=float,
+            default=60.0,
+            help='Seconds between checks for newly held, watched or sold instruments.'
+        )
+
+    def get_source(self, options):
+        if options['replay']:
+            return ReplaySource(options['replay'], speed=options['speed'])
+
+        if not options['user']:
+            raise CommandError("Pass --user or set ZERODHA_TICKER_USER")
+        try:
+            user_settings = UserSettings.objects.get(user__username=options['user'])
+        except UserSettings.DoesNotExist:
+            raise CommandError(f"No settings for user {options['user']}")
+
+        expiry = user_settings.zerodha_session_expiry
+        if not user_settings.zerodha_access_token or (expiry and expiry <= timezone.now()):
+            raise CommandError(f"User {options['user']} has no live Zerodha session")
+        return KiteWebSocketSource(user_settings.zerodha_api_key, user_settings.zerodha_access_token)
+
+    def handle(self, *args, **options):
+        source = self.get_source(options)
+        table = TickTable.create(
+            tick_table_path(), getattr(settings, 'ZERODHA_TICKER_CAPACITY', 4096)
+        )
+        recorder = FrameRecorder(options['record']) if options['record'] else None
+        service = TickerService(
+            source,
+            table,
+            mode=options['mode'],
+            refresh_interval=options['refresh_interval'],
+            recorder=recorder
+        )
+
+        def shutdown(signum, frame):
+            service.stop()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        try:
+            stats = service.run()
+        finally:
+            if recorder is not None:
+                recorder.close()
+
+        self.stdout.write(
+            f"Processed {stats['frames']} frames, {stats['ticks']} ticks "
+            f"({stats['written']} written to {table.path})"
+        )
@@ -1,5 +1,91 @@
 from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from core.models import TimeStampedModel
 
-# The zerodha app doesn't require specific models as it uses UserSettings from users app
-# for storing API credentials and tokens.
-# This file is kept for Django convention, but it's empty.
+# API credentials and tokens live in UserSettings in the users app.
+
+
+class SyncJob(TimeStampedModel):
+    """
+    Model representing a queued background job for a user's Zerodha account.
+    """
+    KIND_SYNC_HOLDINGS = 'sync_holdings'
+    KIND_CHOICES = [
+        (KIND_SYNC_HOLDINGS, _('Sync Holdings')),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, _('Queued')),
+        (STATUS_RUNNING, _('Running')),
+        (STATUS_SUCCEEDED, _('Succeeded')),
+        (STATUS_FAILED, _('Failed')),
+    ]
+    IN_FLIGHT = (STATUS_QUEUED, STATUS_RUNNING)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='sync_jobs',
+        verbose_name=_('User')
+    )
+    kind = models.CharField(
+        _('Kind'),
+        max_length=50,
+        choices=KIND_CHOICES,
+        default=KIND_SYNC_HOLDINGS
+    )
+    status = models.CharField(
+        _('Status'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED
+    )
+    result = models.JSONField(
+        _('Result'),
+        blank=True,
+        null=True
+    )
+    error = models.TextField(
+        _('Error'),
+        blank=True,
+        null=True
+    )
+    started_at = models.DateTimeField(
+        _('Started At'),
+        blank=True,
+        null=True
+    )
+    finished_at = models.DateTimeField(
+        _('Finished At'),
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        verbose_name = _('Sync Job')
+        verbose_name_plural = _('Sync Jobs')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            # At most one queued or running job of each kind per user, so
+            # repeated requests join the job already in flight
+            models.UniqueConstraint(
+                fields=['user', 'kind'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_in_flight_sync_job'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.user} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
@@ -0,0 +1,267 @@
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, time as dtime, timedelta, timezone as dt_timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+IST = dt_timezone(timedelta(hours=5, minutes=30))
+# Pre-open starts at 09:00 and the closing session ends at 15:30
+MARKET_OPEN = dtime(9, 0)
+MARKET_CLOSE = dtime(15, 30)
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """
+    Whether NSE/BSE equity markets are in session (exchange holidays aside).
+
+    Args:
+        now: Time to check, defaults to the current time
+
+    Returns:
+        True on weekdays between pre-open and close, IST
+    """
+    local = (now or datetime.now(dt_timezone.utc)).astimezone(IST)
+    return local.weekday() < 5 and MARKET_OPEN <= local.time() < MARKET_CLOSE
+
+
+def quote_ttl(now: Optional[datetime] = None) -> float:
+    """
+    Seconds a cached quote stays fresh.
+
+    Returns:
+        ZERODHA_QUOTE_TTL_MARKET during market hours, otherwise
+        ZERODHA_QUOTE_TTL_CLOSED
+    """
+    if is_market_open(now):
+        return getattr(settings, "ZERODHA_QUOTE_TTL_MARKET", 0.5)
+    return getattr(settings, "ZERODHA_QUOTE_TTL_CLOSED", 300)
+
+
+class QuoteCacheBackend:
+    """
+    Storage for cached quotes.
+    """
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Return the fresh entries among keys.
+        """
+        raise NotImplementedError
+
+    def set_many(self, values: Dict[str, Any], ttl: float) -> None:
+        """
+        Store entries that stay fresh for ttl seconds.
+        """
+        raise NotImplementedError
+
+
+class MemoryQuoteBackend(QuoteCacheBackend):
+    """
+    Quote storage local to the current process.
+    """
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    found[key] = entry[1]
+        return found
+
+    def set_many(self, values: Dict[str, Any], ttl: float) -> None:
+        expires = time.monotonic() + ttl
+        with self._lock:
+            if len(self._entries) + len(values) > self.max_entries:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            for key, value in values.items():
+                self._entries[key] = (expires, value)
+
+
+class DjangoQuoteBackend(QuoteCacheBackend):
+    """
+    Quote storage in a Django cache, e.g. Redis shared by all workers.
+
+    Django cache timeouts are whole seconds on some backends, so each entry
+    carries its own expiry and sub-second TTLs are enforced on read.
+    """
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            key: entry[1]
+            for key, entry in self.cache.get_many(keys).items()
+            if entry[0] > now
+        }
+
+    def set_many(self, values: Dict[str, Any], ttl: float) -> None:
+        expires = time.time() + ttl
+        self.cache.set_many(
+            {key: (expires, value) for key, value in values.items()},
+            timeout=max(1, math.ceil(ttl))
+        )
+
+
+class QuoteCache:
+    """
+    Shared cache of instrument quotes with request coalescing.
+
+    Quotes are cached per instrument, so users holding the same symbols share
+    entries. When several threads miss on the same instrument at once, only
+    one upstream fetch is made and the others wait for its result.
+    """
+    def __init__(
+        self,
+        backend: Optional[QuoteCacheBackend] = None,
+        ttl: Optional[Callable[[], float]] = None,
+        wait_timeout: float = 30.0
+    ):
+        """
+        Initialize the quote cache.
+
+        Args:
+            backend: Where quotes are stored; defaults to process memory
+            ttl: Callable returning the TTL in seconds; defaults to quote_ttl
+            wait_timeout: Seconds to wait on another thread's in-flight fetch
+        """
+        self.backend = backend or MemoryQuoteBackend()
+        self.ttl = ttl or quote_ttl
+        self.wait_timeout = wait_timeout
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "upstream_calls": 0}
+
+    def get(
+        self,
+        instruments: Iterable[str],
+        fetch: Callable[..., Dict],
+        kind: str = "quote"
+    ) -> Dict[str, Any]:
+        """
+        Get quotes, fetching only the instruments that aren't cached.
+
+        Args:
+            instruments: Instruments in the format 'exchange:tradingsymbol'
+            fetch: Upstream call taking instruments as positional arguments,
+                e.g. KiteClient.get_quote
+            kind: Kind of quote ('quote', 'ohlc' or 'ltp'); kinds are cached
+                separately since their payloads differ
+
+        Returns:
+            Dictionary of quotes indexed by the instrument. Instruments the
+            upstream doesn't know are left out.
+
+        Raises:
+            ZerodhaException: If the upstream fetch fails
+        """
+        instruments = list(dict.fromkeys(instruments))
+        keys = {instrument: f"{kind}:{instrument}" for instrument in instruments}
+
+        cached = self.backend.get_many(list(keys.values()))
+        quotes = {
+            instrument: cached[key] for instrument, key in keys.items() if key in cached
+        }
+
+        owned: Dict[str, Future] = {}
+        waiting: Dict[str, Future] = {}
+        with self._lock:
+            for instrument, key in keys.items():
+                if instrument in quotes:
+                    continue
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = Future()
+                    owned[instrument] = future
+                else:
+                    waiting[instrument] = future
+
+            self._stats["hits"] += len(quotes)
+            self._stats["misses"] += len(owned)
+            self._stats["coalesced"] += len(waiting)
+            if owned:
+                self._stats["upstream_calls"] += 1
+
+        if owned:
+            quotes.update(self._fetch(owned, keys, fetch))
+
+        for instrument, future in waiting.items():
+            quote = future.result(timeout=self.wait_timeout)
+            if quote is not None:
+                quotes[instrument] = quote
+
+        return quotes
+
+    def _fetch(self, owned: Dict[str, Future], keys: Dict[str, str], fetch: Callable) -> Dict:
+        try:
+            fetched = fetch(*owned) or {}
+            self.backend.set_many(
+                {keys[instrument]: quote for instrument, quote in fetched.items() if instrument in keys},
+                self.ttl()
+            )
+        except BaseException as e:
+            for future in owned.values():
+                future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                for instrument in owned:
+                    self._inflight.pop(keys[instrument], None)
+
+        for instrument, future in owned.items():
+            future.set_result(fetched.get(instrument))
+        return {instrument: fetched[instrument] for instrument in owned if instrument in fetched}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters since the cache was created.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["inflight"] = len(self._inflight)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_quote_cache: Optional[QuoteCache] = None
+_quote_cache_lock = threading.Lock()
+
+
+def get_quote_cache() -> QuoteCache:
+    """
+    Get the process-wide quote cache.
+
+    The ZERODHA_QUOTE_CACHE_BACKEND setting picks the storage: 'memory' for
+    process memory, or the alias of a Django cache to share quotes between
+    workers.
+
+    Returns:
+        The shared QuoteCache
+    """
+    global _quote_cache
+
+    if _quote_cache is None:
+        with _quote_cache_lock:
+            if _quote_cache is None:
+                alias = getattr(settings, "ZERODHA_QUOTE_CACHE_BACKEND", "memory")
+                backend = MemoryQuoteBackend() if alias == "memory" else DjangoQuoteBackend(alias)
+                _quote_cache = QuoteCache(backend=backend)
+    return _quote_cache
@@ -0,0 +1,262 @@
+import fcntl
+import json
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Requests per second and burst size for each endpoint class, per API key.
+# See https://kite.trade/docs/connect/v3/exceptions/#api-rate-limit
+DEFAULT_RATE_LIMITS = {
+    "quote": (1, 1),
+    "historical": (3, 3),
+    "orders": (10, 10),
+    "general": (10, 10),
+}
+
+
+def endpoint_class(method: str, endpoint: str) -> str:
+    """
+    Classify a Kite API call into one of the rate limit budgets.
+
+    Args:
+        method: HTTP method
+        endpoint: API endpoint, e.g. '/quote/ltp'
+
+    Returns:
+        One of 'quote', 'historical', 'orders' or 'general'
+    """
+    if endpoint.startswith("/quote"):
+        return "quote"
+    if endpoint.startswith("/instruments/historical"):
+        return "historical"
+    if endpoint.startswith("/orders") and method.upper() != "GET":
+        return "orders"
+    return "general"
+
+
+class BucketStore:
+    """
+    Storage for token bucket state.
+
+    Implementations must make `reserve` atomic for every process that shares
+    the store.
+    """
+    def reserve(self, key: str, rate: float, capacity: float, now: float) -> float:
+        """
+        Take a token from a bucket, borrowing against the future if empty.
+
+        Args:
+            key: Bucket key
+            rate: Tokens added per second
+            capacity: Maximum tokens the bucket can hold
+            now: Current wall clock time
+
+        Returns:
+            Seconds the caller must wait before using its token
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _take(state: Optional[Tuple[float, float]], rate: float, capacity: float, now: float):
+        tokens, updated = state if state else (capacity, now)
+        tokens = min(capacity, tokens + max(now - updated, 0) * rate) - 1
+        wait = 0.0 if tokens >= 0 else -tokens / rate
+        return (tokens, now), wait
+
+
+class MemoryBucketStore(BucketStore):
+    """
+    Bucket store local to the current process.
+    """
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, rate: float, capacity: float, now: float) -> float:
+        with self._lock:
+            self._buckets[key], wait = self._take(self._buckets.get(key), rate, capacity, now)
+        return wait
+
+
+class FileBucketStore(BucketStore):
+    """
+    Bucket store kept in a locked file, shared by all processes on a host.
+
+    This is a local stand-in for a networked store such as Redis: gunicorn
+    workers on the same machine draw from one budget per API key.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def reserve(self, key: str, rate: float, capacity: float, now: float) -> float:
+        with self._lock, open(self.path, "a+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                try:
+                    buckets = json.loads(handle.read() or "{}")
+                except ValueError:
+                    buckets = {}
+
+                state, wait = self._take(buckets.get(key), rate, capacity, now)
+                buckets[key] = state
+
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(buckets))
+                handle.flush()
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+        return wait
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter with one budget per endpoint class and API key.
+    """
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        store: Optional[BucketStore] = None
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            limits: Map of endpoint class to (requests per second, burst)
+            store: Where bucket state lives; defaults to process memory
+        """
+        self.limits = {**DEFAULT_RATE_LIMITS, **(limits or {})}
+        self.store = store or MemoryBucketStore()
+
+    def acquire(self, budget: str, api_key: Optional[str] = None) -> float:
+        """
+        Block until a request in the given budget may be sent.
+
+        Args:
+            budget: Endpoint class, see endpoint_class()
+            api_key: API key the budget belongs to
+
+        Returns:
+            Seconds spent waiting
+        """
+        rate, capacity = self.limits.get(budget, self.limits["general"])
+        wait = self.store.reserve(f"{api_key or '-'}:{budget}", rate, capacity, time.time())
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RetryPolicy:
+    """
+    Jittered exponential backoff for transient Kite API failures.
+    """
+    RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @staticmethod
+    def is_idempotent(method: str) -> bool:
+        return method.upper() in ("GET", "HEAD")
+
+    def should_retry_status(self, method: str, status_code: int, attempt: int) -> bool:
+        """
+        Whether a response with this status should be retried.
+
+        Requests that change state (e.g. placing an order) are only retried
+        on 429, which Kite returns before the request is processed. A 5xx
+        could mean the order went through, so retrying could duplicate it.
+        """
+        if attempt >= self.max_retries or status_code not in self.RETRYABLE_STATUS:
+            return False
+        return status_code == 429 or self.is_idempotent(method)
+
+    def should_retry_error(self, method: str, connect_failed: bool, attempt: int) -> bool:
+        """
+        Whether a request that failed without a response should be retried.
+
+        Non-idempotent requests are only retried if the connection was never
+        established, i.e. nothing was sent.
+        """
+        if attempt >= self.max_retries:
+            return False
+        return connect_failed or self.is_idempotent(method)
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Seconds to wait before the next attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed, starting at 0
+            retry_after: Value of the Retry-After header, if any
+
+        Returns:
+            Retry-After if given, otherwise full-jitter exponential backoff
+        """
+        honored = parse_retry_after(retry_after)
+        if honored is not None:
+            return min(honored, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds or as an HTTP date.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the process-wide rate limiter configured from settings.
+
+    Uses a FileBucketStore when ZERODHA_RATE_LIMIT_FILE is set, so that all
+    workers on the host share budgets; otherwise budgets are per process.
+
+    Returns:
+        The shared RateLimiter
+    """
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                path = getattr(settings, "ZERODHA_RATE_LIMIT_FILE", None)
+                _rate_limiter = RateLimiter(
+                    limits=getattr(settings, "ZERODHA_RATE_LIMITS", None),
+                    store=FileBucketStore(path) if path else None
+                )
+    return _rate_limiter
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    Build the retry policy configured in settings.
+    """
+    return RetryPolicy(**getattr(settings, "ZERODHA_RETRY_POLICY", {}))
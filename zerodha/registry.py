@@ -0,0 +1,144 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from zerodha.kite_client import KiteClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RegistryEntry:
+    """
+    A cached Kite client together with the credentials it was built from.
+    """
+    client: KiteClient
+    api_key: str
+    access_token: Optional[str]
+    valid_until: Optional[datetime] = None
+
+    def matches(self, api_key: str, access_token: Optional[str]) -> bool:
+        return self.api_key == api_key and self.access_token == access_token
+
+    def is_validated(self, now: datetime) -> bool:
+        return self.valid_until is not None and now < self.valid_until
+
+
+class KiteClientRegistry:
+    """
+    Process-level registry of KiteClient instances keyed by user.
+
+    Each user has at most one entry, tagged with the API key and access token
+    it was built from. Entries remember the last successful session validation
+    so that callers don't hit the Zerodha API just to check the session before
+    every real request.
+    """
+    def __init__(self, validation_ttl: Optional[int] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            validation_ttl: Seconds a successful session validation is trusted
+                for. Defaults to the ZERODHA_CLIENT_VALIDATION_TTL setting.
+        """
+        self._validation_ttl = validation_ttl
+        self._entries: Dict[int, RegistryEntry] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def validation_ttl(self) -> timedelta:
+        ttl = self._validation_ttl
+        if ttl is None:
+            ttl = getattr(settings, "ZERODHA_CLIENT_VALIDATION_TTL", 300)
+        return timedelta(seconds=ttl)
+
+    def get_client(
+        self,
+        user_id: int,
+        api_key: str,
+        api_secret: str,
+        access_token: Optional[str] = None,
+        session_expiry: Optional[datetime] = None,
+        factory: Callable[..., KiteClient] = KiteClient
+    ) -> KiteClient:
+        """
+        Return a client for the user, reusing a cached one when possible.
+
+        Args:
+            user_id: ID of the user the client belongs to
+            api_key: Zerodha API key
+            api_secret: Zerodha API secret
+            access_token: Current access token, if any
+            session_expiry: When the access token expires, if known
+            factory: Callable used to build a new client
+
+        Returns:
+            A KiteClient, validated against the API if it has an access token
+        """
+        now = timezone.now()
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or not entry.matches(api_key, access_token):
+                entry = RegistryEntry(
+                    client=factory(
+                        api_key=api_key,
+                        api_secret=api_secret,
+                        access_token=access_token
+                    ),
+                    api_key=api_key,
+                    access_token=access_token
+                )
+                self._entries[user_id] = entry
+            elif entry.is_validated(now):
+                return entry.client
+
+        if not access_token:
+            return entry.client
+
+        # Validate outside the lock so a slow upstream doesn't block other users
+        if entry.client.is_session_valid():
+            valid_until = now + self.validation_ttl
+            expiry = self._aware(session_expiry)
+            if expiry is not None:
+                valid_until = min(valid_until, expiry)
+            entry.valid_until = valid_until
+        else:
+            logger.info(f"Zerodha session invalid for user {user_id}")
+            entry.valid_until = None
+
+        return entry.client
+
+    def evict(self, user_id: int) -> None:
+        """
+        Drop the cached client for a user, e.g. after their credentials change.
+
+        Args:
+            user_id: ID of the user to evict
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """
+        Drop all cached clients.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _aware(value: Optional[datetime]) -> Optional[datetime]:
+        if value is not None and timezone.is_naive(value):
+            return timezone.make_aware(value)
+        return value
+
+
+client_registry = KiteClientRegistry()
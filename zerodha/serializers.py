@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from typing import Dict, List, Any
 
+from core.resolver import get_symbol_resolver, parse_key
+from zerodha.models import SyncJob
+
 
 class ZerodhaHoldingSerializer(serializers.Serializer):
     """
@@ -54,6 +57,23 @@ class ZerodhaOrderRequestSerializer(serializers.Serializer):
     trailing_stoploss = serializers.FloatField(required=False, allow_null=True)
     tag = serializers.CharField(required=False, allow_null=True)
 
+    def validate(self, attrs):
+        """
+        Normalize aliases and keys like NSE:INFY to the stock's symbol.
+        
+        Symbols that aren't tracked as stocks (e.g. derivatives) are passed
+        to Kite unchanged.
+        """
+        exchange, symbol = parse_key(attrs['tradingsymbol'])
+        if exchange and exchange != attrs['exchange'].upper():
+            raise serializers.ValidationError({
+                'tradingsymbol': f"{attrs['tradingsymbol']} is not on exchange {attrs['exchange']}"
+            })
+        
+        match = get_symbol_resolver().resolve(symbol)
+        attrs['tradingsymbol'] = match.symbol if match is not None else symbol
+        return attrs
+
 
 class ZerodhaProfileSerializer(serializers.Serializer):
     """
@@ -65,3 +85,16 @@ class ZerodhaProfileSerializer(serializers.Serializer):
     email = serializers.EmailField()
     user_type = serializers.CharField()
     broker = serializers.CharField()
+
+
+class SyncJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for queued sync jobs.
+    """
+    class Meta:
+        model = SyncJob
+        fields = [
+            'id', 'kind', 'status', 'result', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
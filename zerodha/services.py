@@ -4,11 +4,18 @@ from typing import Dict, List, Optional, Any
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.utils import timezone
 
-from core.models import Stock, StockAlias
+from core.models import Stock
+from core.resolver import get_symbol_resolver
+from core.versioning import STOCK_TABLES, bump
 from portfolio.models import Holding
+from portfolio.summaries import refresh_summary
 from users.models import UserSettings
 from zerodha.kite_client import KiteClient, KiteHolding, ZerodhaException
+from zerodha.instruments import get_instrument_master
+from zerodha.quote_cache import get_quote_cache
+from zerodha.registry import client_registry
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -37,19 +44,15 @@ class ZerodhaService:
                 logger.warning(f"Zerodha API credentials not configured for user {user_id}")
                 return None
             
-            # Create client with credentials
-            client = KiteClient(
+            # Reuse a cached client; it is only re-validated once its TTL lapses
+            return client_registry.get_client(
+                user_id,
                 api_key=user_settings.zerodha_api_key,
                 api_secret=user_settings.zerodha_api_secret,
-                access_token=user_settings.zerodha_access_token
+                access_token=user_settings.zerodha_access_token,
+                session_expiry=user_settings.zerodha_session_expiry,
+                factory=KiteClient
             )
-            
-            # Check if the session is valid
-            if user_settings.zerodha_access_token and client.is_session_valid():
-                return client
-            else:
-                logger.info(f"Zerodha session invalid for user {user_id}")
-                return client  # Return client without valid session
                 
         except UserSettings.DoesNotExist:
             logger.error(f"UserSettings not found for user {user_id}")
@@ -102,17 +105,86 @@ class ZerodhaService:
             user_settings.zerodha_session_expiry = session_data.get("session_expiry")
             user_settings.save()
             
+            # The cached client was built with the old token
+            client_registry.evict(user_id)
+            
             return True
             
         except Exception as e:
             logger.error(f"Error generating Zerodha session for user {user_id}: {str(e)}")
             return False
     
+    @staticmethod
+    def instrument_name(holding: KiteHolding) -> str:
+        """
+        Get the company name for a Zerodha holding from the instrument master.
+        
+        Args:
+            holding: Holding returned by the Kite API
+            
+        Returns:
+            The instrument's name, or its trading symbol if it isn't known
+        """
+        master = get_instrument_master()
+        if master is not None:
+            instrument = master.by_symbol(holding.tradingsymbol, holding.exchange)
+            if instrument is None and holding.isin:
+                instrument = master.by_isin(holding.isin, holding.exchange)
+            if instrument is not None and instrument.name:
+                return instrument.name
+        return holding.tradingsymbol
+    
+    @staticmethod
+    def resolve_stocks(zerodha_holdings: List[KiteHolding]) -> Dict[str, int]:
+        """
+        Map the trading symbols of Zerodha holdings to stocks in bulk.
+        
+        Symbols are matched against stock symbols and aliases through the
+        in-memory SymbolResolver; stocks that match neither are created in
+        one statement.
+        
+        Args:
+            zerodha_holdings: Holdings returned by the Kite API
+            
+        Returns:
+            Dictionary of stock IDs indexed by trading symbol
+        """
+        symbols = {holding.tradingsymbol for holding in zerodha_holdings}
+        stocks = {
+            symbol: match.stock_id
+            for symbol, match in get_symbol_resolver().resolve_many(symbols).items()
+        }
+        
+        unresolved = symbols - stocks.keys()
+        if unresolved:
+            holdings_by_symbol = {holding.tradingsymbol: holding for holding in zerodha_holdings}
+            Stock.objects.bulk_create(
+                [
+                    Stock(
+                        symbol=symbol,
+                        name=ZerodhaService.instrument_name(holdings_by_symbol[symbol]),
+                        is_active=True
+                    )
+                    for symbol in sorted(unresolved)
+                ],
+                ignore_conflicts=True  # Another sync may have created them meanwhile
+            )
+            stocks.update(Stock.objects.filter(symbol__in=unresolved).values_list('symbol', 'id'))
+            # bulk_create skips the signals that keep the resolver current
+            bump(STOCK_TABLES)
+        
+        return stocks
+    
     @staticmethod
     def sync_holdings(user_id: int) -> Dict[str, Any]:
         """
         Sync holdings from Zerodha to the local database.
         
+        The sync is set-based: stocks are resolved, created, and holdings
+        upserted with a fixed number of queries however many holdings the
+        account has. Zerodha holdings that no longer exist upstream are marked
+        closed.
+        
         Args:
             user_id: ID of the user to sync holdings for
             
@@ -128,6 +200,8 @@ class ZerodhaService:
             zerodha_holdings = client.get_holdings()
             
             user = User.objects.get(id=user_id)
+            now = timezone.now()
+            today = datetime.now().date()  # We don't get purchase date from Zerodha
             
             # Start a transaction for database consistency
             with transaction.atomic():
@@ -136,54 +210,61 @@ class ZerodhaService:
                 updated_count = 0
                 skipped_count = 0
                 
-                # Process each holding
+                stocks = ZerodhaService.resolve_stocks(zerodha_holdings)
+                
+                existing = {}
+                for holding in Holding.objects.filter(user=user, source="zerodha").order_by('-id'):
+                    existing[holding.stock_id] = holding
+                
+                to_create = {}
+                to_update = {}
                 for zerodha_holding in zerodha_holdings:
-                    # Try to find the stock in our database
-                    stock = None
-                    try:
-                        # First try by symbol
-                        stock = Stock.objects.get(symbol=zerodha_holding.tradingsymbol)
-                    except Stock.DoesNotExist:
-                        # Then try by alias
-                        try:
-                            alias = StockAlias.objects.get(alias=zerodha_holding.tradingsymbol)
-                            stock = alias.stock
-                        except StockAlias.DoesNotExist:
-                            # Create a new stock if not found
-                            stock = Stock.objects.create(
-                                symbol=zerodha_holding.tradingsymbol,
-                                name=zerodha_holding.tradingsymbol,  # Use symbol as name temporarily
-                                is_active=True
-                            )
+                    stock_id = stocks.get(zerodha_holding.tradingsymbol)
                     
                     # If we don't have a stock, skip this holding
-                    if not stock:
+                    if not stock_id:
                         skipped_count += 1
                         continue
                     
-                    # Try to find an existing holding for this stock
-                    holding, created = Holding.objects.update_or_create(
-                        user=user,
-                        stock=stock,
-                        source="zerodha",
-                        defaults={
-                            "quantity": zerodha_holding.quantity,
-                            "avg_price": zerodha_holding.average_price,
-                            "purchase_date": datetime.now().date(),  # We don't get purchase date from Zerodha
-                            "external_id": f"{zerodha_holding.tradingsymbol}:{zerodha_holding.exchange}"
-                        }
-                    )
-                    
-                    if created:
+                    holding = to_create.get(stock_id) or existing.get(stock_id)
+                    if holding is None:
+                        holding = Holding(user=user, stock_id=stock_id, source="zerodha")
+                        to_create[stock_id] = holding
                         created_count += 1
                     else:
+                        if holding.pk:
+                            to_update[stock_id] = holding
                         updated_count += 1
+                    
+                    holding.quantity = zerodha_holding.quantity
+                    holding.avg_price = zerodha_holding.average_price
+                    holding.purchase_date = today
+                    holding.external_id = f"{zerodha_holding.tradingsymbol}:{zerodha_holding.exchange}"
+                    holding.closed_at = None
+                    holding.updated_at = now
+                
+                Holding.objects.bulk_create(to_create.values())
+                Holding.objects.bulk_update(
+                    to_update.values(),
+                    ["quantity", "avg_price", "purchase_date", "external_id", "closed_at", "updated_at"]
+                )
+                
+                # Holdings that disappeared upstream were sold or transferred out
+                closed_count = Holding.objects.filter(
+                    user=user,
+                    source="zerodha",
+                    closed_at__isnull=True
+                ).exclude(stock_id__in=list(stocks.values())).update(closed_at=now)
+                
+                # Bulk writes skip the model signals that keep the summary current
+                refresh_summary(user.id)
                 
                 return {
                     "success": True,
                     "created": created_count,
                     "updated": updated_count,
                     "skipped": skipped_count,
+                    "closed": closed_count,
                     "total": len(zerodha_holdings)
                 }
                 
@@ -191,6 +272,42 @@ class ZerodhaService:
             logger.error(f"Error syncing Zerodha holdings for user {user_id}: {str(e)}")
             return {"success": False, "message": str(e)}
     
+    @staticmethod
+    def get_quotes(user_id: int, instruments: List[str], mode: str = "quote") -> Dict[str, Any]:
+        """
+        Get quotes for instruments through the shared quote cache.
+        
+        The user's client is only built when some instruments miss the
+        cache, so cached quotes are served without a Zerodha session.
+        
+        Args:
+            user_id: ID of the user whose session is used for cache misses
+            instruments: Instruments in the format 'exchange:tradingsymbol'
+            mode: 'quote' for full quotes, 'ohlc' or 'ltp' for lighter ones
+            
+        Returns:
+            Dictionary of quotes indexed by the instrument
+            
+        Raises:
+            ZerodhaException: If quotes miss the cache and the client is
+                unavailable, or the fetch fails
+        """
+        fetchers = {
+            "quote": "get_quote",
+            "ohlc": "get_ohlc",
+            "ltp": "get_ltp",
+        }
+        if mode not in fetchers:
+            raise ValueError(f"Unknown quote mode: {mode}")
+        
+        def fetch(*missing):
+            client = ZerodhaService.get_client_for_user(user_id)
+            if not client:
+                raise ZerodhaException("Zerodha client not available")
+            return getattr(client, fetchers[mode])(*missing)
+        
+        return get_quote_cache().get(instruments, fetch, kind=mode)
+    
     @staticmethod
     def place_order(
         user_id: int, 
@@ -0,0 +1,137 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Union
+from urllib.parse import urlparse
+
+from zerodha.rate_limit import DEFAULT_RATE_LIMITS, RateLimiter
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that connections are kept alive between requests
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self):
+        server = self.server
+        path = urlparse(self.path).path
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        with server.lock:
+            server.request_log.append((self.command, self.path))
+
+        route = server.routes.get((self.command, path))
+        if route is None:
+            status, body, headers = 404, {"status": "error", "message": "Not found"}, {}
+        elif callable(route):
+            status, body, headers = route(self)
+        else:
+            status, body, headers = 200, {"status": "success", "data": route}, {}
+
+        if server.latency:
+            server.latency_event.wait(server.latency)
+
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", headers.pop("Content-Type", "application/json"))
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _respond
+    do_POST = _respond
+    do_PUT = _respond
+    do_DELETE = _respond
+
+
+RouteValue = Union[Any, Callable[[BaseHTTPRequestHandler], tuple]]
+
+
+class StubKiteServer:
+    """
+    A local HTTP server that mimics the Kite API for tests and benchmarks.
+
+    Routes map (method, path) to either the `data` payload of a successful
+    response, or a callable taking the request handler and returning
+    (status, body, headers).
+    """
+    def __init__(self, routes: Optional[Dict[tuple, RouteValue]] = None, latency: float = 0.0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.routes = dict(routes or {})
+        self.httpd.latency = latency
+        self.httpd.latency_event = threading.Event()
+        self.httpd.request_log = []
+        self.httpd.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def routes(self) -> Dict[tuple, RouteValue]:
+        return self.httpd.routes
+
+    @property
+    def request_log(self):
+        return self.httpd.request_log
+
+    def start(self) -> "StubKiteServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubKiteServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def unlimited_rate_limiter() -> RateLimiter:
+    """
+    A rate limiter that never blocks, for talking to the stub server.
+    """
+    return RateLimiter({budget: (1e9, 1e9) for budget in DEFAULT_RATE_LIMITS})
+
+
+HOLDING = {
+    "tradingsymbol": "INFY",
+    "exchange": "NSE",
+    "isin": "INE009A01021",
+    "quantity": 5,
+    "average_price": 1500.0,
+    "last_price": 1600.0,
+    "pnl": 500.0,
+    "product": "CNC"
+}
+
+ORDER = {
+    "order_id": "order1",
+    "exchange": "NSE",
+    "tradingsymbol": "INFY",
+    "transaction_type": "BUY",
+    "order_type": "MARKET",
+    "quantity": 5,
+    "status": "COMPLETE"
+}
+
+# Routes for one account snapshot: holdings, positions, orders and a quote
+ACCOUNT_ROUTES = {
+    ("GET", "/portfolio/holdings"): [HOLDING],
+    ("GET", "/portfolio/positions"): {"net": [], "day": []},
+    ("GET", "/orders"): [ORDER],
+    ("GET", "/quote"): {"NSE:INFY": {"last_price": 1601.5}},
+}
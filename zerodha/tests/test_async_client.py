@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from django.test import SimpleTestCase
+
+from zerodha.async_client import AccountSnapshot, AsyncKiteClient
+from zerodha.kite_client import KiteHolding, KiteOrder, ZerodhaException
+from zerodha.tests.stub_server import ACCOUNT_ROUTES, StubKiteServer, unlimited_rate_limiter
+from zerodha.transport import reset_transport
+
+
+class AsyncKiteClientTest(SimpleTestCase):
+    """
+    Test suite for the AsyncKiteClient class.
+    """
+    def setUp(self):
+        reset_transport()
+        self.addCleanup(reset_transport)
+        self.server = StubKiteServer(ACCOUNT_ROUTES, latency=0.3).start()
+        self.addCleanup(self.server.stop)
+        self.client = AsyncKiteClient(api_key="key", api_secret="secret", access_token="token")
+        self.client.client.BASE_URL = self.server.url
+        self.client.client.rate_limiter = unlimited_rate_limiter()
+
+    def test_get_holdings(self):
+        holdings = asyncio.run(self.client.get_holdings())
+
+        self.assertEqual(len(holdings), 1)
+        self.assertIsInstance(holdings[0], KiteHolding)
+        self.assertEqual(holdings[0].tradingsymbol, "INFY")
+
+    def test_fetch_account_snapshot_runs_concurrently(self):
+        start = time.perf_counter()
+        snapshot = asyncio.run(self.client.fetch_account_snapshot(["NSE:INFY"]))
+        elapsed = time.perf_counter() - start
+
+        self.assertIsInstance(snapshot, AccountSnapshot)
+        self.assertIsInstance(snapshot.orders[0], KiteOrder)
+        self.assertEqual(snapshot.positions, {"net": [], "day": []})
+        self.assertEqual(snapshot.quotes["NSE:INFY"]["last_price"], 1601.5)
+        # Four calls at 0.3s each would take 1.2s back to back
+        self.assertLess(elapsed, 0.9)
+
+    def test_fetch_account_snapshot_quotes_holdings_by_default(self):
+        snapshot = asyncio.run(self.client.fetch_account_snapshot())
+
+        self.assertEqual(snapshot.quotes, {"NSE:INFY": {"last_price": 1601.5}})
+        self.assertIn(("GET", "/quote?i=NSE%3AINFY"), self.server.request_log)
+
+    def test_errors_propagate(self):
+        del self.server.routes[("GET", "/orders")]
+
+        with self.assertRaises(ZerodhaException):
+            asyncio.run(self.client.fetch_account_snapshot(["NSE:INFY"]))
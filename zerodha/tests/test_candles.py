@@ -0,0 +1,198 @@
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from zerodha.candles import (
+    CANDLE_DTYPE, CandleStore, daily_closes, parse_historical, request_ranges, to_epoch
+)
+from zerodha.kite_client import KiteClient
+from zerodha.tests.stub_server import unlimited_rate_limiter
+
+
+def day_candles(first, closes):
+    """
+    Build consecutive daily candles starting on `first`.
+    """
+    candles = np.zeros(len(closes), dtype=CANDLE_DTYPE)
+    candles["timestamp"] = [to_epoch(first + timedelta(days=i)) for i in range(len(closes))]
+    for name in ("open", "high", "low", "close"):
+        candles[name] = closes
+    candles["volume"] = 100
+    return candles
+
+
+class CandleStoreTest(SimpleTestCase):
+    """
+    Test suite for the memory-mapped candle store.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = CandleStore(self.tmp.name)
+
+    def test_append_and_read_range(self):
+        self.store.write(408065, "day", day_candles(date(2024, 1, 1), [1, 2, 3]))
+        self.store.write(408065, "day", day_candles(date(2024, 1, 4), [4, 5]))
+
+        candles = self.store.read(408065, "day")
+        self.assertEqual(len(candles), 5)
+        self.assertEqual(candles["close"].tolist(), [1, 2, 3, 4, 5])
+        self.assertIsInstance(candles["close"], np.memmap)
+
+        # Dates include the whole day at the end of the range
+        middle = self.store.read(408065, "day", date(2024, 1, 2), date(2024, 1, 4))
+        self.assertEqual(middle["close"].tolist(), [2, 3, 4])
+        self.assertEqual(self.store.last_timestamp(408065, "day"), to_epoch(date(2024, 1, 5)))
+        self.assertEqual(self.store.instruments("day"), [408065])
+
+    def test_older_candles_are_merged_in_order(self):
+        self.store.write(408065, "day", day_candles(date(2024, 1, 3), [3, 4, 5]))
+        self.store.write(408065, "day", day_candles(date(2024, 1, 1), [1, 2, 3, 40]))
+
+        candles = self.store.read(408065, "day").to_array()
+        self.assertEqual(candles["close"].tolist(), [1, 2, 3, 40, 5])
+        self.assertTrue(np.all(np.diff(candles["timestamp"]) > 0))
+
+    def test_interrupted_append_is_dropped(self):
+        self.store.write(408065, "day", day_candles(date(2024, 1, 1), [1, 2]))
+        # A close written without its timestamp is not a complete row
+        with open(os.path.join(self.store.path(408065, "day"), "close"), "ab") as f:
+            f.write(np.array([99.0]).tobytes())
+
+        self.assertEqual(len(self.store.read(408065, "day")), 2)
+        self.store.write(408065, "day", day_candles(date(2024, 1, 3), [3]))
+        self.assertEqual(self.store.read(408065, "day")["close"].tolist(), [1, 2, 3])
+
+    def test_adjust_once(self):
+        self.store.write(408065, "day", day_candles(date(2024, 1, 1), [100, 100, 20]))
+
+        self.assertEqual(self.store.adjust(408065, "day", date(2024, 1, 3), 0.2, 5, "split"), 2)
+        self.assertEqual(self.store.adjust(408065, "day", date(2024, 1, 3), 0.2, 5, "split"), 0)
+        self.store.write(408065, "day", day_candles(date(2024, 1, 4), [21]))
+
+        candles = self.store.read(408065, "day")
+        self.assertEqual(candles["close"].tolist(), [20, 20, 20, 21])
+        self.assertEqual(candles["volume"].tolist(), [500, 500, 100, 100])
+        self.assertEqual(self.store.adjustments(408065, "day"), ["split"])
+        self.assertEqual(self.store.adjust(738561, "day", date(2024, 1, 3), 0.2, 5, "split"), 0)
+
+    def test_missing_ranges(self):
+        # Nothing traded on the 3rd, but the range was fetched
+        candles = day_candles(date(2024, 1, 1), [1, 2, 3, 4, 5])
+        self.store.write(408065, "day", np.delete(candles, 2), covered=(date(2024, 1, 1), date(2024, 1, 5)))
+
+        self.assertEqual(self.store.missing_ranges(408065, "day", date(2024, 1, 1), date(2024, 1, 5)), [])
+        self.assertEqual(
+            self.store.missing_ranges(408065, "day", date(2023, 12, 31), date(2024, 1, 7)),
+            [
+                (to_epoch(date(2023, 12, 31)), to_epoch(date(2023, 12, 31), end_of_day=True)),
+                (to_epoch(date(2024, 1, 6)), to_epoch(date(2024, 1, 7), end_of_day=True)),
+            ]
+        )
+
+    def test_daily_closes_carry_forward(self):
+        candles = day_candles(date(2024, 1, 2), [10, 11, 12])
+        self.store.write(408065, "day", np.delete(candles, 1))
+
+        days = np.array(["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"], dtype="M8[D]")
+        closes = daily_closes(self.store, [408065, 738561], days)
+        np.testing.assert_array_equal(closes[0], [np.nan, 10, 10, 12])
+        self.assertTrue(np.isnan(closes[1]).all())
+
+    def test_parse_historical(self):
+        candles = parse_historical([
+            ["2024-01-02T00:00:00+0530", 100, 110, 95, 105, 1000],
+            ["2024-01-03T00:00:00+0530", 105, 112, 101, 111, 2000, 50],
+        ])
+        self.assertEqual(candles["timestamp"].tolist(), [to_epoch(date(2024, 1, 2)), to_epoch(date(2024, 1, 3))])
+        self.assertEqual(candles["close"].tolist(), [105, 111])
+        self.assertEqual(candles["oi"].tolist(), [0, 50])
+
+    def test_request_ranges(self):
+        start = to_epoch(date(2024, 1, 1))
+        end = to_epoch(date(2024, 5, 29), end_of_day=True)
+        ranges = request_ranges("minute", start, end)
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[0][0], start)
+        self.assertEqual(ranges[-1][1], end)
+        self.assertTrue(all(high - low < 60 * 86400 for low, high in ranges))
+
+
+class HistoricalDataTest(SimpleTestCase):
+    """
+    Test suite for fetching historical candles and filling store gaps.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = CandleStore(self.tmp.name)
+        self.client = KiteClient(api_key="key", api_secret="secret", access_token="token")
+        self.client.rate_limiter = unlimited_rate_limiter()
+        self.requests = []
+
+    def respond(self, method, endpoint, params=None, **kwargs):
+        self.requests.append(params)
+        first = date.fromisoformat(params["from"][:10])
+        last = date.fromisoformat(params["to"][:10])
+        days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        return {"candles": [
+            [f"{day.isoformat()}T00:00:00+0530", 1, 2, 0.5, float(day.day), 100]
+            for day in days if day.weekday() < 5
+        ]}
+
+    def test_fills_only_gaps(self):
+        with patch.object(self.client, "_make_request", side_effect=self.respond):
+            first = self.client.get_historical_data(408065, "day", date(2024, 1, 1), date(2024, 1, 10), store=self.store)
+            self.assertEqual(len(self.requests), 1)
+            self.assertEqual(len(first), 8)
+
+            again = self.client.get_historical_data(408065, "day", date(2024, 1, 1), date(2024, 1, 10), store=self.store)
+            self.assertEqual(len(self.requests), 1)
+            self.assertEqual(again.tolist(), first.tolist())
+
+            longer = self.client.get_historical_data(408065, "day", date(2024, 1, 1), date(2024, 1, 20), store=self.store)
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[1]["from"], "2024-01-11 00:00:00")
+        self.assertEqual(self.requests[1]["to"], "2024-01-20 23:59:59")
+        self.assertEqual(len(longer), 15)
+
+    def test_long_ranges_are_split(self):
+        with patch.object(self.client, "_make_request", side_effect=self.respond):
+            candles = self.client.get_historical_data(408065, "day", date(2015, 1, 1), date(2024, 12, 31))
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(candles.dtype, CANDLE_DTYPE)
+        self.assertTrue(np.all(np.diff(candles["timestamp"]) > 0))
+
+
+class LoadCandlesCommandTest(SimpleTestCase):
+    """
+    Test suite for the load_candles management command.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.csv = os.path.join(self.tmp.name, "infy.csv")
+        with open(self.csv, "w") as f:
+            f.write("date,open,high,low,close,volume\n")
+            f.write("2024-01-03,101,103,100,102,2000\n")
+            f.write("2024-01-02,100,102,99,101,1000\n")
+            f.write("2024-01-05,103,105,102,104,3000\n")
+
+    def test_load_csv(self):
+        base = os.path.join(self.tmp.name, "candles")
+        with override_settings(ZERODHA_CANDLES_DIR=base):
+            call_command("load_candles", self.csv, "--token", "408065", "--chunk-size", "2", stdout=open(os.devnull, "w"))
+
+        store = CandleStore(base)
+        candles = store.read(408065, "day")
+        self.assertEqual(candles["close"].tolist(), [101, 102, 104])
+        self.assertEqual(candles["volume"].tolist(), [1000, 2000, 3000])
+        # Loaded files count as fetched between their first and last candle
+        self.assertEqual(store.missing_ranges(408065, "day", date(2024, 1, 2), date(2024, 1, 5)), [])
@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from users.models import UserSettings
+from zerodha.fleet import connected_user_ids, percentile, refresh_holdings
+from zerodha.models import SyncJob
+
+User = get_user_model()
+
+
+class ConnectedUsersTest(TestCase):
+    """
+    Test suite for selecting users with a live Zerodha session.
+    """
+    def setUp(self):
+        future = timezone.now() + timedelta(hours=6)
+        past = timezone.now() - timedelta(hours=1)
+        self.connected = self.create_user("connected", "token", future)
+        self.create_user("expired", "token", past)
+        self.create_user("no_token", None, future)
+        self.create_user("empty_token", "", future)
+
+    def create_user(self, username, access_token, session_expiry):
+        user = User.objects.create_user(
+            username=username, email=f"{username}@example.com", password="testpass123"
+        )
+        UserSettings.objects.create(
+            user=user,
+            zerodha_api_key="key",
+            zerodha_api_secret="secret",
+            zerodha_access_token=access_token,
+            zerodha_session_expiry=session_expiry
+        )
+        return user
+
+    def test_only_live_sessions(self):
+        self.assertEqual(connected_user_ids(), [self.connected.id])
+
+    def test_command_enqueue(self):
+        out = StringIO()
+        call_command('refresh_all_holdings', '--enqueue', stdout=out)
+        call_command('refresh_all_holdings', '--enqueue', stdout=out)
+
+        self.assertEqual(SyncJob.objects.filter(user=self.connected).count(), 1)
+        self.assertIn("Queued 0 sync jobs (1 already in flight)", out.getvalue())
+
+
+class RefreshHoldingsTest(SimpleTestCase):
+    """
+    Test suite for the parallel fleet refresh.
+    """
+    def test_percentile(self):
+        self.assertEqual(percentile([], 95), 0.0)
+        self.assertEqual(percentile([3, 1, 2, 4], 50), 2)
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+
+    def test_concurrency_cap_and_failures(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def sync(user_id):
+            with lock:
+                running.append(user_id)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(user_id)
+            if user_id == 3:
+                raise RuntimeError("broker down")
+            if user_id == 5:
+                return {"success": False, "message": "Zerodha client not available"}
+            return {"success": True}
+
+        report = refresh_holdings(list(range(10)), concurrency=3, rate=1000, sync=sync)
+        summary = report.summary()
+
+        self.assertLessEqual(max(peak), 3)
+        self.assertEqual(summary["users"], 10)
+        self.assertEqual(summary["succeeded"], 8)
+        self.assertEqual(report.failures, {3: "broker down", 5: "Zerodha client not available"})
+        self.assertGreater(summary["throughput"], 0)
+        self.assertGreaterEqual(summary["latency_p95"], summary["latency_p50"])
+
+    def test_global_rate(self):
+        started = time.perf_counter()
+        refresh_holdings(
+            list(range(5)), concurrency=5, rate=20, burst=1,
+            sync=lambda user_id: {"success": True}
+        )
+
+        # One start immediately, then one every 50ms
+        self.assertGreaterEqual(time.perf_counter() - started, 0.18)
@@ -0,0 +1,132 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from zerodha.instruments import (
+    InstrumentMaster, get_instrument_master, refresh_instrument_master, reset_instrument_master
+)
+from zerodha.kite_client import KiteClient
+from zerodha.tests.stub_server import StubKiteServer, unlimited_rate_limiter
+from zerodha.transport import reset_transport
+
+INSTRUMENTS_CSV = """instrument_token,exchange_token,tradingsymbol,name,last_price,expiry,strike,tick_size,lot_size,instrument_type,segment,exchange
+408065,1594,INFY,INFOSYS,0,,0,0.05,1,EQ,NSE,NSE
+738561,2885,RELIANCE,RELIANCE INDUSTRIES,0,,0,0.05,1,EQ,NSE,NSE
+128053508,500209,INFY,INFOSYS,0,,0,0.05,1,EQ,BSE,BSE
+12345602,48225,NIFTY24JAN21000CE,NIFTY,0,2024-01-25,21000,0.05,50,CE,NFO-OPT,NFO
+"""
+
+
+def csv_rows(text=INSTRUMENTS_CSV):
+    return csv.DictReader(io.StringIO(text))
+
+
+class InstrumentMasterTest(SimpleTestCase):
+    """
+    Test suite for the InstrumentMaster class.
+    """
+    def setUp(self):
+        self.master = InstrumentMaster.from_rows(csv_rows(), as_of=date(2024, 1, 2))
+
+    def test_lookup_by_token(self):
+        instrument = self.master.by_token(738561)
+
+        self.assertEqual(instrument.tradingsymbol, "RELIANCE")
+        self.assertEqual(instrument.name, "RELIANCE INDUSTRIES")
+        self.assertEqual(instrument.key, "NSE:RELIANCE")
+        self.assertIsNone(instrument.expiry)
+        self.assertIsNone(self.master.by_token(1))
+
+    def test_lookup_by_key(self):
+        self.assertEqual(self.master.by_key("NSE:INFY").instrument_token, 408065)
+        self.assertEqual(self.master.by_key("bse:infy").instrument_token, 128053508)
+        self.assertEqual(self.master.by_symbol("INFY", "BSE").exchange, "BSE")
+        self.assertIsNone(self.master.by_key("NSE:UNKNOWN"))
+
+    def test_derivative_fields(self):
+        option = self.master.by_key("NFO:NIFTY24JAN21000CE")
+
+        self.assertEqual(option.expiry, date(2024, 1, 25))
+        self.assertEqual(option.strike, 21000.0)
+        self.assertEqual(option.lot_size, 50)
+
+    def test_lookup_by_isin(self):
+        text = "instrument_token,tradingsymbol,name,exchange,isin\n1,INFY,INFOSYS,NSE,INE009A01021\n2,INFY,INFOSYS,BSE,INE009A01021\n"
+        master = InstrumentMaster.from_rows(csv_rows(text))
+
+        self.assertEqual(master.by_isin("INE009A01021", "BSE").instrument_token, 2)
+        self.assertEqual(master.by_isin("ine009a01021").tradingsymbol, "INFY")
+        self.assertIsNone(master.by_isin("INE000000000"))
+        self.assertIsNone(self.master.by_isin("INE009A01021"))
+
+    def test_tokens_for_keys(self):
+        tokens = self.master.tokens_for_keys(["NSE:RELIANCE", "NSE:NOPE", "NSE:INFY"])
+
+        self.assertEqual(tokens.tolist(), [738561, -1, 408065])
+
+    def test_save_and_load_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = os.path.join(tmp, "2024-01-02")
+            self.master.save(directory)
+            loaded = InstrumentMaster.load(directory)
+
+            self.assertEqual(len(loaded), 4)
+            self.assertEqual(loaded.as_of, date(2024, 1, 2))
+            self.assertEqual(loaded.by_key("NSE:INFY"), self.master.by_key("NSE:INFY"))
+            self.assertEqual(type(loaded.records).__name__, "memmap")
+
+    def test_empty_dump(self):
+        master = InstrumentMaster.from_rows(csv_rows(INSTRUMENTS_CSV.splitlines()[0] + "\n"))
+
+        self.assertEqual(len(master), 0)
+        self.assertIsNone(master.by_key("NSE:INFY"))
+        self.assertEqual(master.tokens_for_keys(["NSE:INFY"]).tolist(), [-1])
+
+
+class InstrumentDownloadTest(SimpleTestCase):
+    """
+    Test suite for downloading and refreshing the instrument master.
+    """
+    def setUp(self):
+        reset_transport()
+        self.addCleanup(reset_transport)
+        self.server = StubKiteServer({
+            ("GET", "/instruments"): lambda handler: (
+                200, INSTRUMENTS_CSV.encode(), {"Content-Type": "text/csv"}
+            ),
+        }).start()
+        self.addCleanup(self.server.stop)
+        self.client = KiteClient(api_key="key")
+        self.client.BASE_URL = self.server.url
+        self.client.rate_limiter = unlimited_rate_limiter()
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        reset_instrument_master()
+        self.addCleanup(reset_instrument_master)
+
+    def test_get_instruments_parses_csv(self):
+        instruments = self.client.get_instruments()
+
+        self.assertEqual(len(instruments), 4)
+        self.assertEqual(instruments[0]["tradingsymbol"], "INFY")
+        self.assertEqual(instruments[1]["instrument_token"], "738561")
+
+    def test_refresh_saves_daily_snapshot(self):
+        with override_settings(ZERODHA_INSTRUMENTS_DIR=self.tmp.name):
+            self.assertIsNone(get_instrument_master())
+
+            with patch("zerodha.instruments.today_ist", return_value=date(2024, 1, 2)):
+                refresh_instrument_master(self.client)
+            with patch("zerodha.instruments.today_ist", return_value=date(2024, 1, 3)):
+                refresh_instrument_master(self.client, keep=1)
+
+            self.assertEqual(os.listdir(self.tmp.name), ["2024-01-03"])
+            master = get_instrument_master()
+            self.assertEqual(master.as_of, date(2024, 1, 3))
+            self.assertEqual(master.by_key("NSE:RELIANCE").instrument_token, 738561)
@@ -0,0 +1,167 @@
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from zerodha.jobs import SyncWorker, claim_job, enqueue_job, requeue_stale_jobs, run_job
+from zerodha.models import SyncJob
+
+User = get_user_model()
+
+
+class SyncJobQueueTest(TestCase):
+    """
+    Test suite for queueing, claiming and running sync jobs.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.other = User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpass123"
+        )
+
+    def test_enqueue_deduplicates_in_flight_jobs(self):
+        job, created = enqueue_job(self.user.id)
+        again, created_again = enqueue_job(self.user.id)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.id, job.id)
+
+        claim_job()
+        running, created = enqueue_job(self.user.id)
+        self.assertFalse(created)
+        self.assertEqual(running.id, job.id)
+
+    def test_enqueue_after_job_finishes(self):
+        job, _ = enqueue_job(self.user.id)
+        SyncJob.objects.filter(id=job.id).update(status=SyncJob.STATUS_SUCCEEDED)
+
+        new_job, created = enqueue_job(self.user.id)
+
+        self.assertTrue(created)
+        self.assertNotEqual(new_job.id, job.id)
+
+    def test_claim_in_queue_order(self):
+        first, _ = enqueue_job(self.user.id)
+        second, _ = enqueue_job(self.other.id)
+
+        claimed = claim_job()
+
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual(claimed.status, SyncJob.STATUS_RUNNING)
+        self.assertIsNotNone(claimed.started_at)
+        self.assertEqual(claim_job().id, second.id)
+        self.assertIsNone(claim_job())
+
+    def test_claim_respects_per_user_limit(self):
+        # A job left running for the user blocks their next one
+        SyncJob.objects.create(user=self.user, kind="other", status=SyncJob.STATUS_RUNNING)
+        enqueue_job(self.user.id)
+        other_job, _ = enqueue_job(self.other.id)
+
+        self.assertEqual(claim_job(per_user_limit=1).id, other_job.id)
+        self.assertIsNone(claim_job(per_user_limit=1))
+        self.assertIsNotNone(claim_job(per_user_limit=2))
+
+    @patch('zerodha.jobs.ZerodhaService.sync_holdings')
+    def test_run_job_stores_result(self, mock_sync_holdings):
+        mock_sync_holdings.return_value = {"success": True, "created": 1, "total": 1}
+        enqueue_job(self.user.id)
+
+        job = run_job(claim_job())
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, SyncJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.result, {"success": True, "created": 1, "total": 1})
+        self.assertIsNotNone(job.finished_at)
+        mock_sync_holdings.assert_called_once_with(self.user.id)
+
+    @patch('zerodha.jobs.ZerodhaService.sync_holdings')
+    def test_run_job_records_exception(self, mock_sync_holdings):
+        mock_sync_holdings.side_effect = RuntimeError("broker down")
+        enqueue_job(self.user.id)
+
+        job = run_job(claim_job())
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, SyncJob.STATUS_FAILED)
+        self.assertEqual(job.error, "broker down")
+
+    def test_requeue_stale_jobs(self):
+        stale = SyncJob.objects.create(
+            user=self.user,
+            status=SyncJob.STATUS_RUNNING,
+            started_at=timezone.now() - timedelta(hours=1)
+        )
+        fresh = SyncJob.objects.create(
+            user=self.other,
+            status=SyncJob.STATUS_RUNNING,
+            started_at=timezone.now()
+        )
+
+        self.assertEqual(requeue_stale_jobs(timeout=600), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, SyncJob.STATUS_QUEUED)
+        self.assertEqual(fresh.status, SyncJob.STATUS_RUNNING)
+
+
+class SyncWorkerTest(TransactionTestCase):
+    """
+    Test suite for the SyncWorker thread pool.
+    """
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com", password="testpass123"
+            )
+            for i in range(4)
+        ]
+
+    @patch('zerodha.jobs.ZerodhaService.sync_holdings')
+    def test_drains_queue_in_parallel(self, mock_sync_holdings):
+        running = set()
+        peak = []
+        lock = threading.Lock()
+
+        def sync(user_id):
+            with lock:
+                running.add(user_id)
+                peak.append(len(running))
+            time.sleep(0.1)
+            with lock:
+                running.discard(user_id)
+            return {"success": True, "total": 0}
+
+        mock_sync_holdings.side_effect = sync
+        for user in self.users:
+            enqueue_job(user.id)
+
+        # SQLite test databases reject writes from one thread while another
+        # is reading, so queries take turns; the syncs still overlap
+        database = threading.RLock()
+        save = SyncJob.save
+
+        def locked_claim(*args, **kwargs):
+            with database:
+                return claim_job(*args, **kwargs)
+
+        def locked_save(job, *args, **kwargs):
+            with database:
+                return save(job, *args, **kwargs)
+
+        with patch('zerodha.jobs.claim_job', side_effect=locked_claim), \
+                patch.object(SyncJob, 'save', locked_save):
+            processed = SyncWorker(workers=4, poll_interval=0.05).run(once=True)
+
+        self.assertEqual(processed, 4)
+        self.assertGreater(max(peak), 1)
+        self.assertEqual(
+            SyncJob.objects.filter(status=SyncJob.STATUS_SUCCEEDED).count(), 4
+        )
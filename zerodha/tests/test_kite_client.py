@@ -1,8 +1,10 @@
 from datetime import datetime
 from unittest.mock import patch, MagicMock
 
+import requests
 from django.test import TestCase
 from zerodha.kite_client import KiteClient, ZerodhaException, KiteHolding
+from zerodha.tests.stub_server import unlimited_rate_limiter
 
 
 class KiteClientTest(TestCase):
@@ -18,6 +20,7 @@ class KiteClientTest(TestCase):
             api_secret=self.api_secret,
             access_token=self.access_token
         )
+        self.client.rate_limiter = unlimited_rate_limiter()
     
     def test_initialization(self):
         self.assertEqual(self.client.api_key, self.api_key)
@@ -67,6 +70,62 @@ class KiteClientTest(TestCase):
         
         self.assertIn("Test error message", str(context.exception))
     
+    @patch("zerodha.kite_client.time.sleep")
+    @patch("zerodha.kite_client.requests.Session.request")
+    def test_make_request_retries_server_errors(self, mock_request, mock_sleep):
+        unavailable = MagicMock(status_code=503, headers={"Retry-After": "1"})
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"status": "success", "data": {"key": "value"}}
+        mock_request.side_effect = [unavailable, ok]
+        
+        result = self.client._make_request("GET", "/test/endpoint")
+        
+        self.assertEqual(result, {"key": "value"})
+        self.assertEqual(mock_request.call_count, 2)
+        mock_sleep.assert_called_once_with(1.0)
+    
+    @patch("zerodha.kite_client.time.sleep")
+    @patch("zerodha.kite_client.requests.Session.request")
+    def test_make_request_gives_up_after_max_retries(self, mock_request, mock_sleep):
+        throttled = MagicMock(status_code=429, headers={})
+        throttled.raise_for_status.side_effect = requests.HTTPError("429 Too Many Requests")
+        mock_request.return_value = throttled
+        
+        with self.assertRaises(ZerodhaException):
+            self.client._make_request("GET", "/test/endpoint")
+        
+        self.assertEqual(mock_request.call_count, self.client.retry_policy.max_retries + 1)
+    
+    @patch("zerodha.kite_client.time.sleep")
+    @patch("zerodha.kite_client.requests.Session.request")
+    def test_place_order_not_retried_on_server_error(self, mock_request, mock_sleep):
+        failed = MagicMock(status_code=502, headers={})
+        failed.raise_for_status.side_effect = requests.HTTPError("502 Bad Gateway")
+        mock_request.return_value = failed
+        
+        with self.assertRaises(ZerodhaException):
+            self.client.place_order(
+                exchange="NSE",
+                tradingsymbol="RELIANCE",
+                transaction_type="BUY",
+                quantity=1,
+                product="CNC",
+                order_type="MARKET"
+            )
+        
+        mock_request.assert_called_once()
+        mock_sleep.assert_not_called()
+    
+    @patch("zerodha.kite_client.time.sleep")
+    @patch("zerodha.kite_client.requests.Session.request")
+    def test_place_order_not_retried_on_read_timeout(self, mock_request, mock_sleep):
+        mock_request.side_effect = requests.ReadTimeout("timed out")
+        
+        with self.assertRaises(ZerodhaException):
+            self.client._make_request("POST", "/orders/regular", data={})
+        
+        mock_request.assert_called_once()
+    
     @patch("zerodha.kite_client.requests.Session.request")
     def test_generate_session(self, mock_request):
         # Mock the response
@@ -166,3 +225,39 @@ class KiteClientTest(TestCase):
                 "disclosed_quantity": 0.0,
             }
         )
+    
+    @patch("zerodha.kite_client.KiteClient._make_request")
+    def test_get_quote_chunks_large_requests(self, mock_make_request):
+        mock_make_request.side_effect = lambda method, endpoint, params: {
+            instrument: {"last_price": 1.0} for instrument in params["i"]
+        }
+        instruments = [f"NSE:SYM{i}" for i in range(1203)]
+        
+        # Duplicates are only requested once
+        quotes = self.client.get_quote(*instruments, "NSE:SYM0")
+        
+        self.assertEqual(len(quotes), 1203)
+        self.assertEqual(set(quotes), set(instruments))
+        chunk_sizes = sorted(len(c.kwargs["params"]["i"]) for c in mock_make_request.call_args_list)
+        self.assertEqual(chunk_sizes, [203, 500, 500])
+        self.assertTrue(all(c.args == ("GET", "/quote") for c in mock_make_request.call_args_list))
+    
+    @patch("zerodha.kite_client.KiteClient._make_request")
+    def test_get_ltp_and_ohlc(self, mock_make_request):
+        mock_make_request.return_value = {"NSE:INFY": {"last_price": 1600.0}}
+        
+        self.assertEqual(self.client.get_ltp("NSE:INFY"), {"NSE:INFY": {"last_price": 1600.0}})
+        mock_make_request.assert_called_with("GET", "/quote/ltp", params={"i": ["NSE:INFY"]})
+        
+        self.client.get_ohlc("NSE:INFY")
+        mock_make_request.assert_called_with("GET", "/quote/ohlc", params={"i": ["NSE:INFY"]})
+        
+        # LTP and OHLC allow larger chunks than full quotes
+        mock_make_request.reset_mock()
+        self.client.get_ltp(*[f"NSE:SYM{i}" for i in range(1000)])
+        mock_make_request.assert_called_once()
+    
+    @patch("zerodha.kite_client.KiteClient._make_request")
+    def test_get_quote_no_instruments(self, mock_make_request):
+        self.assertEqual(self.client.get_quote(), {})
+        mock_make_request.assert_not_called()
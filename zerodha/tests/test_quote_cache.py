@@ -0,0 +1,128 @@
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase, override_settings
+
+from zerodha.kite_client import ZerodhaException
+from zerodha.quote_cache import (
+    DjangoQuoteBackend, MemoryQuoteBackend, QuoteCache, is_market_open, quote_ttl
+)
+
+
+def fake_fetch(*instruments):
+    return {instrument: {"last_price": 100.0} for instrument in instruments if instrument != "NSE:BOGUS"}
+
+
+class QuoteCacheTest(SimpleTestCase):
+    """
+    Test suite for the QuoteCache class.
+    """
+    def setUp(self):
+        self.cache = QuoteCache(ttl=lambda: 60)
+        self.fetch = MagicMock(side_effect=fake_fetch)
+
+    def test_second_lookup_is_a_hit(self):
+        first = self.cache.get(["NSE:INFY", "NSE:TCS"], self.fetch)
+        second = self.cache.get(["NSE:INFY"], self.fetch)
+
+        self.assertEqual(first, {"NSE:INFY": {"last_price": 100.0}, "NSE:TCS": {"last_price": 100.0}})
+        self.assertEqual(second, {"NSE:INFY": {"last_price": 100.0}})
+        self.fetch.assert_called_once_with("NSE:INFY", "NSE:TCS")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_only_misses_are_fetched(self):
+        self.cache.get(["NSE:INFY"], self.fetch)
+        self.cache.get(["NSE:INFY", "NSE:TCS"], self.fetch)
+
+        self.fetch.assert_called_with("NSE:TCS")
+
+    def test_kinds_cached_separately(self):
+        self.cache.get(["NSE:INFY"], self.fetch, kind="ltp")
+        self.cache.get(["NSE:INFY"], self.fetch, kind="quote")
+
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_expired_entries_refetched(self):
+        cache = QuoteCache(ttl=lambda: 0.01)
+        cache.get(["NSE:INFY"], self.fetch)
+        time.sleep(0.02)
+        cache.get(["NSE:INFY"], self.fetch)
+
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_unknown_instruments_left_out(self):
+        quotes = self.cache.get(["NSE:BOGUS", "NSE:INFY"], self.fetch)
+
+        self.assertEqual(list(quotes), ["NSE:INFY"])
+
+    def test_concurrent_requests_coalesced(self):
+        release = threading.Event()
+
+        def slow_fetch(*instruments):
+            release.wait(5)
+            return fake_fetch(*instruments)
+
+        fetch = MagicMock(side_effect=slow_fetch)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get(["NSE:INFY"], fetch)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while self.cache.stats()["misses"] + self.cache.stats()["coalesced"] < 5:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        fetch.assert_called_once_with("NSE:INFY")
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result == {"NSE:INFY": {"last_price": 100.0}} for result in results))
+        self.assertEqual(self.cache.stats()["coalesced"], 4)
+        self.assertEqual(self.cache.stats()["inflight"], 0)
+
+    def test_fetch_errors_propagate_and_are_not_cached(self):
+        failing = MagicMock(side_effect=ZerodhaException("boom"))
+
+        with self.assertRaises(ZerodhaException):
+            self.cache.get(["NSE:INFY"], failing)
+
+        self.assertEqual(self.cache.stats()["inflight"], 0)
+        self.assertEqual(self.cache.get(["NSE:INFY"], self.fetch), {"NSE:INFY": {"last_price": 100.0}})
+
+    def test_django_backend(self):
+        cache = QuoteCache(backend=DjangoQuoteBackend("default"), ttl=lambda: 0.5)
+        cache.get(["NSE:INFY"], self.fetch)
+        cache.get(["NSE:INFY"], self.fetch)
+
+        self.fetch.assert_called_once()
+
+
+class QuoteTtlTest(SimpleTestCase):
+    """
+    Test suite for the market-hours aware quote TTL.
+    """
+    def test_market_hours(self):
+        # 2024-01-03 was a Wednesday; 05:00 UTC is 10:30 IST
+        self.assertTrue(is_market_open(datetime(2024, 1, 3, 5, 0, tzinfo=timezone.utc)))
+        # 11:00 UTC is 16:30 IST, after close
+        self.assertFalse(is_market_open(datetime(2024, 1, 3, 11, 0, tzinfo=timezone.utc)))
+        # Saturday
+        self.assertFalse(is_market_open(datetime(2024, 1, 6, 5, 0, tzinfo=timezone.utc)))
+
+    @override_settings(ZERODHA_QUOTE_TTL_MARKET=0.25, ZERODHA_QUOTE_TTL_CLOSED=600)
+    def test_ttl_follows_market_hours(self):
+        self.assertEqual(quote_ttl(datetime(2024, 1, 3, 5, 0, tzinfo=timezone.utc)), 0.25)
+        self.assertEqual(quote_ttl(datetime(2024, 1, 3, 11, 0, tzinfo=timezone.utc)), 600)
+
+    def test_memory_backend_prunes_expired_entries(self):
+        backend = MemoryQuoteBackend(max_entries=2)
+        backend.set_many({"a": 1, "b": 2}, ttl=-1)
+        backend.set_many({"c": 3}, ttl=60)
+
+        self.assertEqual(backend.get_many(["a", "b", "c"]), {"c": 3})
+        self.assertEqual(len(backend._entries), 1)
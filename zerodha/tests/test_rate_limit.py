@@ -0,0 +1,113 @@
+import os
+import tempfile
+import time
+from email.utils import formatdate
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from zerodha.rate_limit import (
+    FileBucketStore, MemoryBucketStore, RateLimiter, RetryPolicy,
+    endpoint_class, parse_retry_after
+)
+
+
+class EndpointClassTest(SimpleTestCase):
+    """
+    Test suite for mapping endpoints to rate limit budgets.
+    """
+    def test_endpoint_classes(self):
+        self.assertEqual(endpoint_class("GET", "/quote"), "quote")
+        self.assertEqual(endpoint_class("GET", "/quote/ltp"), "quote")
+        self.assertEqual(endpoint_class("POST", "/orders/regular"), "orders")
+        self.assertEqual(endpoint_class("DELETE", "/orders/regular/123"), "orders")
+        self.assertEqual(endpoint_class("GET", "/orders"), "general")
+        self.assertEqual(endpoint_class("GET", "/instruments/historical/1/day"), "historical")
+        self.assertEqual(endpoint_class("GET", "/portfolio/holdings"), "general")
+
+
+class BucketStoreTest(SimpleTestCase):
+    """
+    Test suite for the token bucket stores.
+    """
+    def assert_bucket_behaviour(self, store):
+        # A burst of 2 at 1 token/s: two free tokens, then wait
+        self.assertEqual(store.reserve("k", 1, 2, 100.0), 0.0)
+        self.assertEqual(store.reserve("k", 1, 2, 100.0), 0.0)
+        self.assertAlmostEqual(store.reserve("k", 1, 2, 100.0), 1.0)
+        self.assertAlmostEqual(store.reserve("k", 1, 2, 100.0), 2.0)
+        # Refill is capped at capacity
+        self.assertEqual(store.reserve("k", 1, 2, 1000.0), 0.0)
+        # Buckets are independent
+        self.assertEqual(store.reserve("other", 1, 1, 1000.0), 0.0)
+
+    def test_memory_store(self):
+        self.assert_bucket_behaviour(MemoryBucketStore())
+
+    def test_file_store_shared_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "buckets.json")
+            self.assert_bucket_behaviour(FileBucketStore(path))
+
+            # A second store on the same file (e.g. another worker) sees the state
+            self.assertAlmostEqual(FileBucketStore(path).reserve("other", 1, 1, 1000.0), 1.0)
+
+
+class RateLimiterTest(SimpleTestCase):
+    """
+    Test suite for the RateLimiter class.
+    """
+    @patch("zerodha.rate_limit.time.sleep")
+    def test_acquire_sleeps_when_budget_exhausted(self, mock_sleep):
+        limiter = RateLimiter({"quote": (1, 1)})
+
+        limiter.acquire("quote", "key")
+        mock_sleep.assert_not_called()
+
+        limiter.acquire("quote", "key")
+        mock_sleep.assert_called_once()
+        self.assertGreater(mock_sleep.call_args.args[0], 0.9)
+
+        # Other API keys and budgets are not affected
+        mock_sleep.reset_mock()
+        limiter.acquire("quote", "other_key")
+        limiter.acquire("general", "key")
+        mock_sleep.assert_not_called()
+
+
+class RetryPolicyTest(SimpleTestCase):
+    """
+    Test suite for the RetryPolicy class.
+    """
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=3, backoff_base=0.5, backoff_max=8.0)
+
+    def test_idempotent_requests_retry_5xx_and_429(self):
+        self.assertTrue(self.policy.should_retry_status("GET", 503, 0))
+        self.assertTrue(self.policy.should_retry_status("GET", 429, 2))
+        self.assertFalse(self.policy.should_retry_status("GET", 503, 3))
+        self.assertFalse(self.policy.should_retry_status("GET", 400, 0))
+
+    def test_orders_never_retried_after_reaching_server(self):
+        self.assertTrue(self.policy.should_retry_status("POST", 429, 0))
+        self.assertFalse(self.policy.should_retry_status("POST", 500, 0))
+        self.assertFalse(self.policy.should_retry_status("POST", 503, 0))
+        self.assertFalse(self.policy.should_retry_error("POST", False, 0))
+        self.assertTrue(self.policy.should_retry_error("POST", True, 0))
+
+    def test_delay_uses_jittered_backoff(self):
+        for attempt in range(6):
+            delay = self.policy.delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(8.0, 0.5 * 2 ** attempt))
+
+    def test_delay_honors_retry_after(self):
+        self.assertEqual(self.policy.delay(0, "2"), 2.0)
+        self.assertEqual(self.policy.delay(0, "120"), 8.0)
+
+    def test_parse_retry_after(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        http_date = formatdate(time.time() + 5, usegmt=True)
+        self.assertAlmostEqual(parse_retry_after(http_date), 5, delta=1.5)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from zerodha.registry import KiteClientRegistry
+
+
+class KiteClientRegistryTest(SimpleTestCase):
+    """
+    Test suite for the KiteClientRegistry class.
+    """
+    def setUp(self):
+        self.registry = KiteClientRegistry(validation_ttl=60)
+        self.factory = MagicMock()
+        self.factory.return_value.is_session_valid.return_value = True
+
+    def get_client(self, user_id=1, access_token="token", session_expiry=None):
+        return self.registry.get_client(
+            user_id,
+            api_key="key",
+            api_secret="secret",
+            access_token=access_token,
+            session_expiry=session_expiry,
+            factory=self.factory
+        )
+
+    def test_reuses_client_within_ttl(self):
+        first = self.get_client()
+        second = self.get_client()
+
+        self.assertIs(first, second)
+        self.factory.assert_called_once_with(
+            api_key="key", api_secret="secret", access_token="token"
+        )
+        first.is_session_valid.assert_called_once()
+
+    def test_revalidates_after_ttl(self):
+        client = self.get_client()
+        later = timezone.now() + timedelta(seconds=61)
+
+        with patch("zerodha.registry.timezone.now", return_value=later):
+            self.get_client()
+
+        self.assertEqual(client.is_session_valid.call_count, 2)
+        self.factory.assert_called_once()
+
+    def test_ttl_capped_by_session_expiry(self):
+        client = self.get_client(session_expiry=timezone.now() - timedelta(seconds=1))
+        self.get_client()
+
+        # The session had already expired, so the validation is never trusted
+        self.assertEqual(client.is_session_valid.call_count, 2)
+
+    def test_invalid_session_not_trusted(self):
+        self.factory.return_value.is_session_valid.return_value = False
+        client = self.get_client()
+        self.get_client()
+
+        self.assertEqual(client.is_session_valid.call_count, 2)
+
+    def test_no_access_token_skips_validation(self):
+        client = self.get_client(access_token=None)
+
+        client.is_session_valid.assert_not_called()
+
+    def test_token_change_replaces_entry(self):
+        self.get_client(access_token="old")
+        self.get_client(access_token="new")
+
+        self.assertEqual(self.factory.call_count, 2)
+        self.assertEqual(len(self.registry), 1)
+
+    def test_evict(self):
+        self.get_client()
+        self.registry.evict(1)
+        self.get_client()
+
+        self.assertEqual(self.factory.call_count, 2)
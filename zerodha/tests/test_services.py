@@ -1,14 +1,20 @@
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
-from core.models import Stock
+from core.models import Stock, StockAlias
+from core.resolver import get_symbol_resolver
 from portfolio.models import Holding
 from users.models import UserSettings
 from zerodha.services import ZerodhaService
-from zerodha.kite_client import KiteHolding
+from zerodha.instruments import InstrumentMaster
+from zerodha.kite_client import KiteHolding, ZerodhaException
+from zerodha.quote_cache import QuoteCache
+from zerodha.registry import client_registry
 
 User = get_user_model()
 
@@ -18,6 +24,8 @@ class ZerodhaServiceTest(TestCase):
     Test suite for the ZerodhaService class.
     """
     def setUp(self):
+        client_registry.clear()
+        
         # Create a test user
         self.user = User.objects.create_user(
             username="testuser",
@@ -68,6 +76,34 @@ class ZerodhaServiceTest(TestCase):
         # Check that the client was returned
         self.assertEqual(client, mock_client)
     
+    @patch("zerodha.services.KiteClient")
+    def test_get_client_for_user_reuses_validated_client(self, MockKiteClient):
+        mock_client = MagicMock()
+        mock_client.is_session_valid.return_value = True
+        MockKiteClient.return_value = mock_client
+        
+        first = ZerodhaService.get_client_for_user(self.user.id)
+        second = ZerodhaService.get_client_for_user(self.user.id)
+        
+        # The client is built and validated only once
+        self.assertIs(first, second)
+        MockKiteClient.assert_called_once()
+        mock_client.is_session_valid.assert_called_once()
+    
+    @patch("zerodha.services.KiteClient")
+    def test_get_client_for_user_rebuilds_after_token_change(self, MockKiteClient):
+        MockKiteClient.return_value.is_session_valid.return_value = True
+        ZerodhaService.get_client_for_user(self.user.id)
+        
+        self.user_settings.zerodha_access_token = "rotated_access_token"
+        self.user_settings.save()
+        ZerodhaService.get_client_for_user(self.user.id)
+        
+        self.assertEqual(MockKiteClient.call_count, 2)
+        self.assertEqual(
+            MockKiteClient.call_args.kwargs["access_token"], "rotated_access_token"
+        )
+    
     @patch("zerodha.services.KiteClient")
     def test_get_client_no_credentials(self, MockKiteClient):
         # Remove credentials
@@ -192,6 +228,106 @@ class ZerodhaServiceTest(TestCase):
         self.assertEqual(holdings[2].quantity, 10)
         self.assertEqual(holdings[2].avg_price, 2100.5)
     
+    @patch("zerodha.services.get_instrument_master")
+    @patch("zerodha.services.ZerodhaService.get_client_for_user")
+    def test_sync_holdings_names_new_stocks_from_instruments(self, mock_get_client, mock_master):
+        mock_master.return_value = InstrumentMaster.from_rows([
+            {"instrument_token": "1", "tradingsymbol": "NEWSTOCK", "name": "NEW STOCK LTD", "exchange": "NSE"}
+        ])
+        mock_get_client.return_value.get_holdings.return_value = [
+            KiteHolding(
+                tradingsymbol="NEWSTOCK",
+                exchange="NSE",
+                quantity=3,
+                average_price=100.0,
+                last_price=110.0,
+                pnl=30.0,
+                product="CNC"
+            )
+        ]
+        
+        result = ZerodhaService.sync_holdings(self.user.id)
+        
+        self.assertTrue(result["success"])
+        self.assertEqual(Stock.objects.get(symbol="NEWSTOCK").name, "NEW STOCK LTD")
+    
+    def make_holdings(self, count):
+        return [
+            KiteHolding(
+                tradingsymbol=f"SYM{i}",
+                exchange="NSE",
+                quantity=i + 1,
+                average_price=100.0 + i,
+                last_price=110.0,
+                pnl=0.0,
+                product="CNC"
+            )
+            for i in range(count)
+        ]
+    
+    def count_sync_queries(self, mock_get_client, holdings):
+        mock_get_client.return_value.get_holdings.return_value = holdings
+        # Symbols are resolved in memory once the resolver is loaded
+        get_symbol_resolver()
+        with CaptureQueriesContext(connection) as context:
+            result = ZerodhaService.sync_holdings(self.user.id)
+        self.assertTrue(result["success"], result)
+        return len(context.captured_queries)
+    
+    @patch("zerodha.services.ZerodhaService.get_client_for_user")
+    def test_sync_holdings_query_count_is_constant(self, mock_get_client):
+        StockAlias.objects.create(stock=self.stock1, alias="SYM0")
+        
+        # First sync creates stocks and holdings, the second updates them
+        small_create = self.count_sync_queries(mock_get_client, self.make_holdings(3))
+        small_update = self.count_sync_queries(mock_get_client, self.make_holdings(3))
+        Holding.objects.all().delete()
+        large_create = self.count_sync_queries(mock_get_client, self.make_holdings(60))
+        large_update = self.count_sync_queries(mock_get_client, self.make_holdings(60))
+        
+        self.assertEqual(small_create, large_create)
+        self.assertEqual(small_update, large_update)
+        # Includes the three queries that refresh the portfolio summary
+        self.assertLessEqual(large_create, 11)
+        self.assertEqual(Holding.objects.filter(user=self.user).count(), 60)
+        # SYM0 resolved through its alias rather than creating a new stock
+        self.assertFalse(Stock.objects.filter(symbol="SYM0").exists())
+    
+    @patch("zerodha.services.ZerodhaService.get_client_for_user")
+    def test_sync_holdings_updates_and_closes(self, mock_get_client):
+        manual = Holding.objects.create(
+            user=self.user, stock=self.stock1, quantity=1, avg_price=10, purchase_date="2023-01-01"
+        )
+        mock_get_client.return_value.get_holdings.return_value = self.make_holdings(3)
+        ZerodhaService.sync_holdings(self.user.id)
+        
+        # SYM2 was sold, SYM0 changed, SYM3 is new
+        holdings = self.make_holdings(4)
+        del holdings[2]
+        holdings[0].quantity = 50
+        mock_get_client.return_value.get_holdings.return_value = holdings
+        result = ZerodhaService.sync_holdings(self.user.id)
+        
+        self.assertEqual(
+            {key: result[key] for key in ("created", "updated", "skipped", "closed", "total")},
+            {"created": 1, "updated": 2, "skipped": 0, "closed": 1, "total": 3}
+        )
+        zerodha_holdings = Holding.objects.filter(user=self.user, source="zerodha")
+        self.assertEqual(zerodha_holdings.count(), 4)
+        self.assertEqual(zerodha_holdings.get(stock__symbol="SYM0").quantity, 50)
+        self.assertIsNotNone(zerodha_holdings.get(stock__symbol="SYM2").closed_at)
+        self.assertIsNone(zerodha_holdings.get(stock__symbol="SYM3").closed_at)
+        
+        # Manually added holdings are never touched
+        manual.refresh_from_db()
+        self.assertIsNone(manual.closed_at)
+        
+        # A closed holding is reopened when it comes back
+        mock_get_client.return_value.get_holdings.return_value = self.make_holdings(4)
+        result = ZerodhaService.sync_holdings(self.user.id)
+        self.assertEqual(result["closed"], 0)
+        self.assertIsNone(zerodha_holdings.get(stock__symbol="SYM2").closed_at)
+    
     @patch("zerodha.services.ZerodhaService.get_client_for_user")
     def test_place_order(self, mock_get_client):
         # Mock the client
@@ -218,3 +354,16 @@ class ZerodhaServiceTest(TestCase):
         # Verify that the order was placed correctly
         mock_get_client.assert_called_once_with(self.user.id)
         mock_client.place_order.assert_called_once_with(**order_data)
+    
+    @patch("zerodha.services.ZerodhaService.get_client_for_user", return_value=None)
+    def test_get_quotes_serves_cache_without_client(self, mock_get_client):
+        cache = QuoteCache(ttl=lambda: 60)
+        cache.backend.set_many({"ohlc:NSE:INFY": {"last_price": 1600.0}}, 60)
+        
+        with patch("zerodha.services.get_quote_cache", return_value=cache):
+            quotes = ZerodhaService.get_quotes(self.user.id, ["NSE:INFY"], "ohlc")
+            with self.assertRaises(ZerodhaException):
+                ZerodhaService.get_quotes(self.user.id, ["NSE:INFY", "NSE:TCS"], "ohlc")
+        
+        self.assertEqual(quotes, {"NSE:INFY": {"last_price": 1600.0}})
+        mock_get_client.assert_called_once_with(self.user.id)
@@ -0,0 +1,244 @@
+import os
+import struct
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Stock
+from portfolio.models import Holding, Watchlist, WatchlistItem
+from zerodha.instruments import InstrumentMaster
+from zerodha.tests.test_instruments import csv_rows
+from zerodha.tick_table import TickTable, reset_tick_table
+from zerodha.ticker import (
+    MODE_FULL, MODE_LTP, MODE_QUOTE, FrameRecorder, ReplaySource, Tick, TickerService,
+    build_frame, encode_packet, held_instrument_tokens, parse_frame, subscribed_instrument_tokens
+)
+
+User = get_user_model()
+
+INFY = Tick(
+    408065, MODE_QUOTE, True, 1601.5, open=1590.0, high=1605.0, low=1588.25,
+    close=1592.0, volume=1204331, last_quantity=10, average_price=1598.4,
+    buy_quantity=5000, sell_quantity=4200
+)
+RELIANCE = Tick(738561, MODE_QUOTE, True, 2450.0, open=2440.0, high=2460.0, low=2430.0, close=2445.0)
+
+
+class ParseFrameTest(SimpleTestCase):
+    """
+    Test suite for decoding binary tick frames.
+    """
+    def test_quote_packet(self):
+        [tick] = parse_frame(build_frame([encode_packet(INFY, MODE_QUOTE)]))
+
+        self.assertEqual(tick.instrument_token, 408065)
+        self.assertEqual(tick.mode, MODE_QUOTE)
+        self.assertTrue(tick.tradable)
+        self.assertEqual(tick.last_price, 1601.5)
+        self.assertEqual((tick.open, tick.high, tick.low, tick.close), (1590.0, 1605.0, 1588.25, 1592.0))
+        self.assertEqual(tick.volume, 1204331)
+        self.assertEqual(tick.average_price, 1598.4)
+        self.assertAlmostEqual(tick.change, (1601.5 - 1592.0) * 100 / 1592.0)
+
+    def test_ltp_and_full_packets(self):
+        full = INFY._replace(oi=12, exchange_timestamp=1700000000)
+        ltp, quote = parse_frame(build_frame([
+            encode_packet(RELIANCE, MODE_LTP), encode_packet(full, MODE_FULL)
+        ]))
+
+        self.assertEqual(ltp.mode, MODE_LTP)
+        self.assertEqual(ltp.last_price, 2450.0)
+        self.assertEqual(quote.mode, MODE_FULL)
+        self.assertEqual(quote.oi, 12)
+        self.assertEqual(quote.exchange_timestamp, 1700000000)
+
+    def test_index_packet(self):
+        # NIFTY 50 on the indices segment: token, ltp, high, low, open, close, change
+        packet = struct.pack(">Iiiiiii", 256265, 2150000, 2160000, 2140000, 2145000, 2148000, 2000)
+        [tick] = parse_frame(build_frame([packet]))
+
+        self.assertFalse(tick.tradable)
+        self.assertEqual(tick.last_price, 21500.0)
+        self.assertEqual(tick.high, 21600.0)
+        self.assertEqual(tick.open, 21450.0)
+
+    def test_currency_divisor(self):
+        usdinr = Tick(412675, MODE_LTP, True, 83.1225)  # Segment 3 (CDS)
+        [tick] = parse_frame(build_frame([encode_packet(usdinr, MODE_LTP)]))
+
+        self.assertAlmostEqual(tick.last_price, 83.1225)
+
+    def test_heartbeat_and_unknown_packets(self):
+        self.assertEqual(parse_frame(b"\x00"), [])
+        ticks = parse_frame(build_frame([b"\x00" * 12, encode_packet(INFY, MODE_LTP)]))
+        self.assertEqual([tick.instrument_token for tick in ticks], [408065])
+
+
+class TickTableTest(SimpleTestCase):
+    """
+    Test suite for the shared tick table.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ticks.bin")
+        self.table = TickTable.create(self.path, capacity=4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reader_sees_writer_updates(self):
+        self.table.set_tokens([738561, 408065])
+        reader = TickTable.open(self.path)
+
+        self.assertEqual(reader.get([408065]), {})
+
+        self.assertEqual(self.table.update([INFY, Tick(1, MODE_LTP, True, 1.0)]), 1)
+        prices = reader.get([408065, 738561, 999])
+
+        self.assertEqual(list(prices), [408065])
+        self.assertEqual(prices[408065]["last_price"], 1601.5)
+        self.assertEqual(prices[408065]["close"], 1592.0)
+        self.assertGreater(prices[408065]["updated_at"], 0)
+
+    def test_resubscribe_keeps_prices(self):
+        self.table.set_tokens([408065, 738561])
+        self.table.update([INFY, RELIANCE])
+        self.table.set_tokens([408065, 5633])
+
+        prices = self.table.get([408065, 738561, 5633])
+
+        self.assertEqual(list(prices), [408065])
+        self.assertEqual(prices[408065]["last_price"], 1601.5)
+
+    def test_capacity(self):
+        with self.assertRaises(ValueError):
+            self.table.set_tokens(range(1, 6))
+
+    def test_rejects_other_files(self):
+        path = os.path.join(self.tmp.name, "other.bin")
+        with open(path, "wb") as handle:
+            handle.write(b"\x00" * 128)
+
+        with self.assertRaises(ValueError):
+            TickTable.open(path)
+
+
+class TickerServiceTest(SimpleTestCase):
+    """
+    Test suite for the ticker service fed from a replay.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.table = TickTable.create(os.path.join(self.tmp.name, "ticks.bin"), capacity=16)
+        self.recording = os.path.join(self.tmp.name, "frames.bin")
+
+        recorder = FrameRecorder(self.recording)
+        for i in range(10):
+            recorder.write(build_frame([
+                encode_packet(INFY._replace(last_price=1600.0 + i)),
+                encode_packet(RELIANCE._replace(last_price=2400.0 + i)),
+            ]), received=1000.0 + i)
+        recorder.write(b"\x00", received=1010.0)
+        recorder.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replay_into_table(self):
+        source = ReplaySource(self.recording)
+        service = TickerService(source, self.table, tokens=lambda: [408065])
+
+        stats = service.run()
+
+        self.assertEqual(stats, {"frames": 11, "ticks": 20, "written": 10})
+        self.assertEqual(source.subscriptions, {408065: MODE_QUOTE})
+        self.assertEqual(self.table.get([408065])[408065]["last_price"], 1609.0)
+        self.assertEqual(self.table.get([738561]), {})
+
+    def test_refresh_subscriptions(self):
+        held = [[408065], [408065, 738561], [738561]]
+        source = ReplaySource(self.recording)
+        service = TickerService(source, self.table, tokens=lambda: held.pop(0))
+
+        service.refresh_subscriptions()
+        service.refresh_subscriptions()
+        self.assertEqual(source.subscriptions, {408065: MODE_QUOTE, 738561: MODE_QUOTE})
+
+        service.refresh_subscriptions()
+        self.assertEqual(source.subscriptions, {738561: MODE_QUOTE})
+        self.assertEqual(len(self.table), 1)
+
+
+class LiveQuoteTest(TestCase):
+    """
+    Test suite for reading ticker prices through the API.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ticks.bin")
+        self.master = InstrumentMaster.from_rows(csv_rows(), as_of=date(2024, 1, 2))
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        reset_tick_table()
+
+    def tearDown(self):
+        reset_tick_table()
+        self.tmp.cleanup()
+
+    def add_holding(self, symbol, source=None, external_id=None, closed=False):
+        stock, _ = Stock.objects.get_or_create(symbol=symbol, defaults={"name": symbol})
+        return Holding.objects.create(
+            user=self.user, stock=stock, quantity=Decimal("1"), avg_price=Decimal("100"),
+            purchase_date=date(2024, 1, 1), source=source, external_id=external_id,
+            closed_at="2024-01-02T00:00:00Z" if closed else None
+        )
+
+    def test_held_instrument_tokens(self):
+        self.add_holding("RELIANCE")
+        self.add_holding("INFY", source="zerodha", external_id="INFY:BSE")
+        self.add_holding("UNKNOWN")
+
+        with patch("zerodha.ticker.get_instrument_master", return_value=self.master):
+            self.assertEqual(held_instrument_tokens(), [738561, 128053508])
+
+    def test_subscribed_instrument_tokens(self):
+        self.add_holding("RELIANCE")
+        watchlist = Watchlist.objects.create(user=self.user, name="Tech")
+        infy = Stock.objects.create(symbol="INFY", name="Infosys")
+        WatchlistItem.objects.create(watchlist=watchlist, stock=infy)
+        WatchlistItem.objects.create(watchlist=watchlist, stock=Stock.objects.get(symbol="RELIANCE"))
+
+        with patch("zerodha.ticker.get_instrument_master", return_value=self.master):
+            self.assertEqual(subscribed_instrument_tokens(), [408065, 738561])
+
+    def test_live_quote_view(self):
+        table = TickTable.create(self.path, capacity=4)
+        table.set_tokens([408065])
+        table.update([INFY])
+
+        with override_settings(ZERODHA_TICKER_TABLE=self.path), \
+                patch("zerodha.ticker.get_instrument_master", return_value=self.master):
+            response = self.client.get(
+                reverse("zerodha-live-quote"), {"i": ["NSE:INFY", "NSE:RELIANCE"]}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data), ["NSE:INFY"])
+        self.assertEqual(response.data["NSE:INFY"]["last_price"], 1601.5)
+
+    def test_live_quote_view_without_ticker(self):
+        with override_settings(ZERODHA_TICKER_TABLE=self.path):
+            response = self.client.get(reverse("zerodha-live-quote"), {"i": "NSE:INFY"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {})
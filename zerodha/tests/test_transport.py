@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase
+
+from zerodha.kite_client import KiteClient
+from zerodha.tests.stub_server import StubKiteServer, unlimited_rate_limiter
+from zerodha.transport import PooledTransport, get_transport, reset_transport
+
+
+class PooledTransportTest(SimpleTestCase):
+    """
+    Test suite for the shared Kite connection pool.
+    """
+    def setUp(self):
+        reset_transport()
+        self.addCleanup(reset_transport)
+        self.server = StubKiteServer({("GET", "/user/profile"): {"user_id": "AB1234"}}).start()
+        self.addCleanup(self.server.stop)
+
+    def make_client(self):
+        client = KiteClient(api_key="key", api_secret="secret", access_token="token")
+        client.BASE_URL = self.server.url
+        client.rate_limiter = unlimited_rate_limiter()
+        return client
+
+    def test_clients_share_adapter(self):
+        first = self.make_client()
+        second = self.make_client()
+
+        self.assertIs(
+            first._session.get_adapter("https://api.kite.trade"),
+            second._session.get_adapter("https://api.kite.trade")
+        )
+        self.assertIs(first._session.get_adapter(self.server.url), get_transport().adapter)
+
+    def test_connections_reused_across_clients(self):
+        for _ in range(3):
+            client = self.make_client()
+            self.assertEqual(client.get_profile(), {"user_id": "AB1234"})
+            self.assertEqual(client.get_profile(), {"user_id": "AB1234"})
+
+        stats = get_transport().stats()
+        self.assertEqual(stats["requests"], 6)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["reused_requests"], 5)
+        self.assertAlmostEqual(stats["reuse_rate"], 5 / 6)
+        self.assertEqual(len(stats["hosts"]), 1)
+
+    def test_config_overrides(self):
+        transport = PooledTransport(pool_maxsize=2, keepalive=False)
+
+        self.assertEqual(transport.config["pool_maxsize"], 2)
+        self.assertEqual(transport.stats()["requests"], 0)
+        self.assertEqual(transport.stats()["reuse_rate"], 0.0)
@@ -6,6 +6,8 @@ from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 
 from users.models import UserSettings
+from zerodha.jobs import claim_job, run_job
+from zerodha.models import SyncJob
 
 User = get_user_model()
 
@@ -172,8 +174,29 @@ class ZerodhaHoldingsViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("error", response.data)
 
+    def test_sync_holdings_view_queues_job(self):
+        # Make the request
+        response = self.client.post(self.sync_holdings_url)
+        
+        # Check the response
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(response.data["created"])
+        self.assertEqual(response.data["status"], SyncJob.STATUS_QUEUED)
+        job = SyncJob.objects.get(id=response.data["id"])
+        self.assertEqual(job.user, self.user)
+        self.assertEqual(job.kind, SyncJob.KIND_SYNC_HOLDINGS)
+
+    def test_sync_holdings_view_deduplicates_in_flight_job(self):
+        first = self.client.post(self.sync_holdings_url)
+        second = self.client.post(self.sync_holdings_url)
+        
+        self.assertEqual(second.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(second.data["created"])
+        self.assertEqual(second.data["id"], first.data["id"])
+        self.assertEqual(SyncJob.objects.count(), 1)
+
     @patch('zerodha.views.ZerodhaService.sync_holdings')
-    def test_sync_holdings_view_success(self, mock_sync_holdings):
+    def test_sync_job_view_success(self, mock_sync_holdings):
         # Mock successful sync
         mock_sync_holdings.return_value = {
             "success": True,
@@ -182,32 +205,48 @@ class ZerodhaHoldingsViewTest(APITestCase):
             "skipped": 0,
             "total": 3
         }
+        job_id = self.client.post(self.sync_holdings_url).data["id"]
+        run_job(claim_job())
         
-        # Make the request
-        response = self.client.post(self.sync_holdings_url)
+        # Poll the job
+        response = self.client.get(reverse('zerodha-sync-job', args=[job_id]))
         
         # Check the response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(response.data["success"])
-        self.assertEqual(response.data["created"], 2)
-        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(response.data["status"], SyncJob.STATUS_SUCCEEDED)
+        self.assertEqual(response.data["result"]["created"], 2)
+        self.assertEqual(response.data["result"]["updated"], 1)
         mock_sync_holdings.assert_called_once_with(self.user.id)
 
     @patch('zerodha.views.ZerodhaService.sync_holdings')
-    def test_sync_holdings_view_failure(self, mock_sync_holdings):
+    def test_sync_job_view_failure(self, mock_sync_holdings):
         # Mock failed sync
         mock_sync_holdings.return_value = {
             "success": False,
             "message": "Failed to sync holdings"
         }
+        job_id = self.client.post(self.sync_holdings_url).data["id"]
+        run_job(claim_job())
         
-        # Make the request
-        response = self.client.post(self.sync_holdings_url)
+        # Poll the job
+        response = self.client.get(reverse('zerodha-sync-job', args=[job_id]))
         
         # Check the response
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertFalse(response.data["success"])
-        self.assertEqual(response.data["message"], "Failed to sync holdings")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], SyncJob.STATUS_FAILED)
+        self.assertEqual(response.data["error"], "Failed to sync holdings")
+
+    def test_sync_job_view_other_user(self):
+        other = User.objects.create_user(
+            username="otheruser",
+            email="other@example.com",
+            password="testpass123"
+        )
+        job = SyncJob.objects.create(user=other)
+        
+        response = self.client.get(reverse('zerodha-sync-job', args=[job.id]))
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
 class ZerodhaOrderViewTest(APITestCase):
@@ -364,3 +403,39 @@ class ZerodhaOrderViewTest(APITestCase):
         self.assertIn("quantity", response.data)
         self.assertIn("product", response.data)
         self.assertIn("order_type", response.data)
+
+
+class ZerodhaQuoteViewTest(APITestCase):
+    """
+    Test suite for the Zerodha quote view.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.quote_url = reverse('zerodha-quote')
+
+    @patch('zerodha.views.ZerodhaService.get_quotes')
+    def test_quote_view(self, mock_get_quotes):
+        mock_get_quotes.return_value = {"NSE:INFY": {"last_price": 1600.0}}
+        
+        response = self.client.get(f"{self.quote_url}?i=NSE:INFY&i=NSE:TCS&mode=ltp")
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"NSE:INFY": {"last_price": 1600.0}})
+        mock_get_quotes.assert_called_once_with(self.user.id, ["NSE:INFY", "NSE:TCS"], "ltp")
+
+    def test_quote_view_requires_instruments(self):
+        response = self.client.get(self.quote_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("error", response.data)
+
+    def test_quote_view_rejects_unknown_mode(self):
+        response = self.client.get(f"{self.quote_url}?i=NSE:INFY&mode=depth")
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
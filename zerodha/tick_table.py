@@ -0,0 +1,266 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TABLE_MAGIC = 0x544B5442  # 'TKTB'
+TABLE_VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "u4"),
+    ("version", "u4"),
+    ("capacity", "u4"),
+    ("count", "u4"),
+    ("generation", "u8"),   # Odd while the writer is changing the layout
+    ("pad", "V40"),
+])
+
+# One row per subscribed instrument, kept sorted by token
+TICK_DTYPE = np.dtype([
+    ("instrument_token", "u4"),
+    ("seq", "u4"),          # Odd while the writer is updating the row
+    ("last_price", "f8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("change", "f8"),
+    ("volume", "i8"),
+    ("oi", "i8"),
+    ("exchange_timestamp", "i8"),
+    ("updated_at", "f8"),   # Wall clock time of the last tick, 0 if none yet
+])
+
+FIELDS = TICK_DTYPE.names[2:]
+READ_RETRIES = 10
+
+
+def tick_table_path() -> str:
+    """
+    Get the path of the shared tick table, from ZERODHA_TICKER_TABLE.
+    """
+    return getattr(settings, "ZERODHA_TICKER_TABLE", os.path.join(settings.BASE_DIR, "var", "ticks.bin"))
+
+
+class TickTable:
+    """
+    Last price and OHLC per instrument, in a memory-mapped file.
+
+    The ticker process is the only writer. API workers map the same file
+    read-only and look up prices without any upstream call. Writes are
+    guarded by seqlocks (a table-wide generation for re-layouts and a
+    per-row sequence for ticks), so readers never need a lock and retry
+    the rare read that overlaps a write.
+    """
+    def __init__(self, path: str, mmap: np.memmap):
+        self.path = path
+        self._mmap = mmap
+        self.header = mmap[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0:1]
+        self.rows = mmap[HEADER_DTYPE.itemsize:].view(TICK_DTYPE)
+        self._slots: Dict[int, int] = {}
+
+    @classmethod
+    def create(cls, path: str, capacity: int) -> "TickTable":
+        """
+        Create an empty table for writing, replacing any existing file.
+
+        The new file is swapped in atomically; readers of the old file pick
+        up the new one when they next check for it.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        size = HEADER_DTYPE.itemsize + capacity * TICK_DTYPE.itemsize
+        mmap = np.memmap(tmp, dtype="u1", mode="w+", shape=(size,))
+        table = cls(path, mmap)
+        table.header["magic"] = TABLE_MAGIC
+        table.header["version"] = TABLE_VERSION
+        table.header["capacity"] = capacity
+        mmap.flush()
+        os.replace(tmp, path)
+        return table
+
+    @classmethod
+    def open(cls, path: str) -> "TickTable":
+        """
+        Map an existing table read-only.
+
+        Raises:
+            ValueError: If the file isn't a tick table
+        """
+        table = cls(path, np.memmap(path, dtype="u1", mode="r"))
+        if table.header["magic"][0] != TABLE_MAGIC or table.header["version"][0] != TABLE_VERSION:
+            raise ValueError(f"{path} is not a tick table")
+        return table
+
+    @property
+    def capacity(self) -> int:
+        return int(self.header["capacity"][0])
+
+    def __len__(self) -> int:
+        return int(self.header["count"][0])
+
+    def set_tokens(self, tokens: Iterable[int]) -> None:
+        """
+        Change the instruments the table holds (writer only).
+
+        Prices of instruments that stay subscribed are kept.
+
+        Raises:
+            ValueError: If there are more tokens than the table's capacity
+        """
+        tokens = np.unique(np.fromiter(tokens, dtype="u4"))
+        if len(tokens) > self.capacity:
+            raise ValueError(f"{len(tokens)} instruments exceed the tick table capacity of {self.capacity}")
+
+        count = len(self)
+        new_rows = np.zeros(len(tokens), dtype=TICK_DTYPE)
+        new_rows["instrument_token"] = tokens
+        if count:
+            old_rows = self.rows[:count]
+            kept = np.isin(old_rows["instrument_token"], tokens)
+            positions = np.searchsorted(tokens, old_rows["instrument_token"][kept])
+            new_rows[positions] = old_rows[kept]
+        new_rows["seq"] = 0
+
+        self.header["generation"] += 1
+        self.rows[:len(tokens)] = new_rows
+        self.header["count"] = len(tokens)
+        self.header["generation"] += 1
+        self._slots = {int(token): slot for slot, token in enumerate(tokens)}
+
+    def update(self, ticks: Iterable[Any]) -> int:
+        """
+        Write ticks to the table (writer only).
+
+        Args:
+            ticks: Objects with the attributes of a ticker.Tick
+
+        Returns:
+            Number of ticks written; ticks of unsubscribed instruments are
+            ignored
+        """
+        rows = self.rows
+        seq = rows["seq"]
+        slots = self._slots
+        now = time.time()
+        written = 0
+        for tick in ticks:
+            slot = slots.get(tick.instrument_token)
+            if slot is None:
+                continue
+            seq[slot] += 1
+            rows[slot] = (
+                tick.instrument_token, seq[slot], tick.last_price,
+                tick.open, tick.high, tick.low, tick.close, tick.change,
+                tick.volume, tick.oi, tick.exchange_timestamp or 0, now
+            )
+            seq[slot] += 1
+            written += 1
+        return written
+
+    def get(self, tokens: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Read the latest prices of instruments.
+
+        Args:
+            tokens: Instrument tokens
+
+        Returns:
+            Dictionary of prices indexed by token. Instruments that aren't
+            subscribed or haven't ticked yet are left out.
+        """
+        wanted = np.unique(np.fromiter((t for t in tokens if t >= 0), dtype="u4"))
+        if not len(wanted):
+            return {}
+
+        for _ in range(READ_RETRIES):
+            generation = self.header["generation"][0]
+            if generation & 1:
+                time.sleep(0)
+                continue
+
+            count = int(self.header["count"][0])
+            if not count:
+                return {}
+            table_tokens = self.rows["instrument_token"][:count]
+            positions = np.minimum(np.searchsorted(table_tokens, wanted), count - 1)
+            found = table_tokens[positions] == wanted
+            positions = positions[found]
+            snapshot = np.array(self.rows[positions])
+
+            if self.header["generation"][0] != generation:
+                continue
+            seq_now = self.rows["seq"][positions]
+            if ((snapshot["seq"] & 1) | (snapshot["seq"] != seq_now)).any():
+                continue
+            break
+        else:
+            logger.warning("Gave up reading the tick table after repeated concurrent writes")
+            return {}
+
+        return {
+            int(row["instrument_token"]): {field: row[field].item() for field in FIELDS}
+            for row in snapshot
+            if row["updated_at"] > 0
+        }
+
+    def flush(self) -> None:
+        self._mmap.flush()
+
+
+_table: Optional[TickTable] = None
+_table_inode: Optional[int] = None
+_table_checked = float("-inf")
+_table_lock = threading.Lock()
+RECHECK_SECONDS = 5
+
+
+def get_tick_table() -> Optional[TickTable]:
+    """
+    Get the shared tick table for reading.
+
+    The table is re-mapped when the ticker replaces the file (checked at
+    most every few seconds).
+
+    Returns:
+        The TickTable, or None if the ticker hasn't created one yet
+    """
+    global _table, _table_inode, _table_checked
+
+    now = time.monotonic()
+    if now - _table_checked < RECHECK_SECONDS:
+        return _table
+
+    with _table_lock:
+        _table_checked = now
+        path = tick_table_path()
+        try:
+            inode = os.stat(path).st_ino
+        except FileNotFoundError:
+            _table, _table_inode = None, None
+            return None
+        if inode != _table_inode:
+            try:
+                _table = TickTable.open(path)
+                _table_inode = inode
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to open tick table {path}: {str(e)}")
+        return _table
+
+
+def reset_tick_table() -> None:
+    """
+    Forget the mapped table so the next call re-opens it.
+    """
+    global _table, _table_inode, _table_checked
+
+    with _table_lock:
+        _table = None
+        _table_inode = None
+        _table_checked = float("-inf")
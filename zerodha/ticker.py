@@ -0,0 +1,512 @@
+import json
+import logging
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from zerodha.instruments import get_instrument_master, holding_instrument_key
+from zerodha.tick_table import TickTable, get_tick_table
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET_URL = "wss://ws.kite.trade"
+
+MODE_LTP = "ltp"
+MODE_QUOTE = "quote"
+MODE_FULL = "full"
+
+# Binary packet layouts, see https://kite.trade/docs/connect/v3/websocket/
+# All fields are big-endian; prices are integers in paise.
+_COUNT = struct.Struct(">H")
+_LTP = struct.Struct(">Ii")                       # 8: token, ltp
+_INDEX_QUOTE = struct.Struct(">Iiiiiii")          # 28: token, ltp, high, low, open, close, change
+_INDEX_FULL = struct.Struct(">Iiiiiiii")          # 32: ... + exchange timestamp
+_QUOTE = struct.Struct(">Iiiiiiiiiii")            # 44: token, ltp, last qty, avg price, volume,
+                                                  #     buy qty, sell qty, open, high, low, close
+_FULL = struct.Struct(">Iiiiiiiiiiiiiiii")        # 64 + 120 of depth: ... + last trade time,
+                                                  #     oi, oi day high, oi day low, exchange timestamp
+FULL_PACKET_LENGTH = 184
+
+# Segment (low byte of the token) -> price divisor
+_DIVISORS = {3: 10000000.0, 6: 10000.0}           # CDS, BCD
+INDICES_SEGMENT = 9
+
+
+class Tick(NamedTuple):
+    """
+    A decoded market data packet.
+    """
+    instrument_token: int
+    mode: str
+    tradable: bool
+    last_price: float
+    open: float = 0.0
+    high: float = 0.0
+    low: float = 0.0
+    close: float = 0.0
+    change: float = 0.0
+    volume: int = 0
+    last_quantity: int = 0
+    average_price: float = 0.0
+    buy_quantity: int = 0
+    sell_quantity: int = 0
+    oi: int = 0
+    exchange_timestamp: Optional[int] = None
+
+
+def _change(last_price: float, close: float) -> float:
+    return (last_price - close) * 100 / close if close else 0.0
+
+
+def parse_packet(view: memoryview, offset: int, length: int) -> Optional[Tick]:
+    """
+    Decode one packet of a binary frame in place.
+
+    Args:
+        view: The whole frame
+        offset: Start of the packet
+        length: Length of the packet, which determines its mode
+
+    Returns:
+        The Tick, or None for packets of an unknown length
+    """
+    token = _LTP.unpack_from(view, offset)[0]
+    segment = token & 0xFF
+    divisor = _DIVISORS.get(segment, 100.0)
+
+    if length == 8:
+        _, ltp = _LTP.unpack_from(view, offset)
+        return Tick(token, MODE_LTP, segment != INDICES_SEGMENT, ltp / divisor)
+
+    if length in (28, 32):
+        if length == 28:
+            _, ltp, high, low, open_, close, _change_abs = _INDEX_QUOTE.unpack_from(view, offset)
+            timestamp = None
+        else:
+            _, ltp, high, low, open_, close, _change_abs, timestamp = _INDEX_FULL.unpack_from(view, offset)
+        ltp, close = ltp / divisor, close / divisor
+        return Tick(
+            token, MODE_QUOTE if length == 28 else MODE_FULL, False, ltp,
+            open=open_ / divisor, high=high / divisor, low=low / divisor, close=close,
+            change=_change(ltp, close), exchange_timestamp=timestamp
+        )
+
+    if length in (44, FULL_PACKET_LENGTH):
+        if length == 44:
+            (_, ltp, last_qty, avg_price, volume, buy_qty, sell_qty,
+             open_, high, low, close) = _QUOTE.unpack_from(view, offset)
+            oi, timestamp = 0, None
+        else:
+            (_, ltp, last_qty, avg_price, volume, buy_qty, sell_qty,
+             open_, high, low, close, _last_trade_time, oi, _oi_high, _oi_low,
+             timestamp) = _FULL.unpack_from(view, offset)
+        ltp, close = ltp / divisor, close / divisor
+        return Tick(
+            token, MODE_QUOTE if length == 44 else MODE_FULL, segment != INDICES_SEGMENT, ltp,
+            open=open_ / divisor, high=high / divisor, low=low / divisor, close=close,
+            change=_change(ltp, close), volume=volume, last_quantity=last_qty,
+            average_price=avg_price / divisor, buy_quantity=buy_qty,
+            sell_quantity=sell_qty, oi=oi, exchange_timestamp=timestamp
+        )
+
+    return None
+
+
+def parse_frame(data: bytes) -> List[Tick]:
+    """
+    Decode a binary websocket frame into ticks.
+
+    Packets are unpacked straight from a memoryview of the frame, without
+    slicing out copies. Market depth in full mode packets is skipped.
+
+    Args:
+        data: Frame as received; 1-byte frames are heartbeats
+
+    Returns:
+        List of ticks in the frame
+    """
+    view = memoryview(data)
+    if len(view) < 2:
+        return []
+
+    count = _COUNT.unpack_from(view, 0)[0]
+    offset = 2
+    ticks = []
+    for _ in range(count):
+        length = _COUNT.unpack_from(view, offset)[0]
+        offset += 2
+        tick = parse_packet(view, offset, length)
+        if tick is not None:
+            ticks.append(tick)
+        offset += length
+    return ticks
+
+
+def encode_packet(tick: Tick, mode: str = MODE_QUOTE) -> bytes:
+    """
+    Encode a tick the way Kite sends it (for replay files and tests).
+
+    Market depth is zero-filled in full mode.
+    """
+    divisor = _DIVISORS.get(tick.instrument_token & 0xFF, 100.0)
+
+    def price(value):
+        return int(round(value * divisor))
+
+    if mode == MODE_LTP:
+        return _LTP.pack(tick.instrument_token, price(tick.last_price))
+
+    fields = (
+        tick.instrument_token, price(tick.last_price), tick.last_quantity,
+        price(tick.average_price), tick.volume, tick.buy_quantity, tick.sell_quantity,
+        price(tick.open), price(tick.high), price(tick.low), price(tick.close)
+    )
+    if mode == MODE_QUOTE:
+        return _QUOTE.pack(*fields)
+    packet = _FULL.pack(*fields, 0, tick.oi, 0, 0, tick.exchange_timestamp or 0)
+    return packet + bytes(FULL_PACKET_LENGTH - len(packet))
+
+
+def build_frame(packets: List[bytes]) -> bytes:
+    """
+    Assemble encoded packets into one binary frame.
+    """
+    parts = [_COUNT.pack(len(packets))]
+    for packet in packets:
+        parts.append(_COUNT.pack(len(packet)))
+        parts.append(packet)
+    return b"".join(parts)
+
+
+class TickSource:
+    """
+    A stream of binary tick frames.
+    """
+    def subscribe(self, tokens: List[int], mode: str) -> None:
+        raise NotImplementedError
+
+    def unsubscribe(self, tokens: List[int]) -> None:
+        raise NotImplementedError
+
+    def frames(self) -> Iterator[bytes]:
+        """
+        Yield binary frames until the source ends or is closed.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class KiteWebSocketSource(TickSource):
+    """
+    Tick frames from the Kite Connect websocket.
+
+    Reconnects with exponential backoff and restores subscriptions when the
+    connection drops.
+    """
+    def __init__(self, api_key: str, access_token: str, url: str = WEBSOCKET_URL,
+                 max_backoff: float = 60.0):
+        self.api_key = api_key
+        self.access_token = access_token
+        self.url = url
+        self.max_backoff = max_backoff
+        self._subscriptions: Dict[int, str] = {}
+        self._socket = None
+        self._closed = threading.Event()
+
+    def _send(self, message: Dict) -> None:
+        if self._socket is not None:
+            self._socket.send(json.dumps(message))
+
+    def subscribe(self, tokens: List[int], mode: str) -> None:
+        for token in tokens:
+            self._subscriptions[token] = mode
+        if tokens:
+            self._send({"a": "subscribe", "v": tokens})
+            self._send({"a": "mode", "v": [mode, tokens]})
+
+    def unsubscribe(self, tokens: List[int]) -> None:
+        for token in tokens:
+            self._subscriptions.pop(token, None)
+        if tokens:
+            self._send({"a": "unsubscribe", "v": tokens})
+
+    def _connect(self):
+        import websocket  # websocket-client is only needed by the ticker process
+
+        socket = websocket.create_connection(
+            f"{self.url}?api_key={self.api_key}&access_token={self.access_token}",
+            timeout=30
+        )
+        self._socket = socket
+        by_mode: Dict[str, List[int]] = {}
+        for token, mode in self._subscriptions.items():
+            by_mode.setdefault(mode, []).append(token)
+        for mode, tokens in by_mode.items():
+            self.subscribe(tokens, mode)
+        return socket
+
+    def frames(self) -> Iterator[bytes]:
+        import websocket
+
+        backoff = 1.0
+        while not self._closed.is_set():
+            try:
+                socket = self._connect()
+                backoff = 1.0
+                while not self._closed.is_set():
+                    opcode, data = socket.recv_data()
+                    if opcode == websocket.ABNF.OPCODE_BINARY:
+                        yield data
+                    elif opcode == websocket.ABNF.OPCODE_TEXT:
+                        logger.info(f"Ticker message: {data[:200]!r}")
+                    elif opcode == websocket.ABNF.OPCODE_CLOSE:
+                        raise ConnectionError("Ticker connection closed by server")
+            except Exception as e:
+                if self._closed.is_set():
+                    break
+                logger.warning(f"Ticker connection lost ({str(e)}), reconnecting in {backoff:.0f}s")
+                self._closed.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+            finally:
+                if self._socket is not None:
+                    self._socket.close()
+                    self._socket = None
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._socket is not None:
+            self._socket.close()
+
+
+_RECORD = struct.Struct(">dI")  # receive time, frame length
+
+
+class ReplaySource(TickSource):
+    """
+    Tick frames from a recording, as a local stand-in for the websocket.
+
+    A recording is a sequence of (receive time, length, frame) records as
+    written by FrameRecorder.
+    """
+    def __init__(self, path: str, speed: Optional[float] = None, loop: bool = False):
+        """
+        Initialize the replay.
+
+        Args:
+            path: Recording to play
+            speed: Replay at this multiple of the recorded pace; None plays
+                frames back to back as fast as they can be consumed
+            loop: Start over at the end of the recording
+        """
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.subscriptions: Dict[int, str] = {}
+        self._closed = threading.Event()
+
+    def subscribe(self, tokens: List[int], mode: str) -> None:
+        for token in tokens:
+            self.subscriptions[token] = mode
+
+    def unsubscribe(self, tokens: List[int]) -> None:
+        for token in tokens:
+            self.subscriptions.pop(token, None)
+
+    def frames(self) -> Iterator[bytes]:
+        while not self._closed.is_set():
+            with open(self.path, "rb") as handle:
+                first_recorded = started = None
+                while not self._closed.is_set():
+                    header = handle.read(_RECORD.size)
+                    if len(header) < _RECORD.size:
+                        break
+                    recorded, length = _RECORD.unpack(header)
+                    frame = handle.read(length)
+
+                    if self.speed:
+                        if first_recorded is None:
+                            first_recorded, started = recorded, time.monotonic()
+                        delay = (recorded - first_recorded) / self.speed - (time.monotonic() - started)
+                        if delay > 0:
+                            self._closed.wait(delay)
+                    yield frame
+            if not self.loop:
+                break
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class FrameRecorder:
+    """
+    Writes received frames to a file that ReplaySource can play.
+    """
+    def __init__(self, path: str):
+        self._handle = open(path, "ab")
+
+    def write(self, frame: bytes, received: Optional[float] = None) -> None:
+        self._handle.write(_RECORD.pack(received or time.time(), len(frame)))
+        self._handle.write(frame)
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def _tokens_for_keys(keys: Iterable[str]) -> List[int]:
+    master = get_instrument_master()
+    if master is None:
+        logger.warning("No instrument master available; run refresh_instruments first")
+        return []
+
+    tokens = master.tokens_for_keys(sorted(keys))
+    return sorted(int(token) for token in set(tokens.tolist()) if token >= 0)
+
+
+def _held_instrument_keys() -> set:
+    from portfolio.models import Holding
+
+    return {
+        holding_instrument_key(*row)
+        for row in Holding.objects.filter(closed_at__isnull=True, quantity__gt=0)
+        .values_list('stock__symbol', 'source', 'external_id')
+        .distinct()
+    }
+
+
+def held_instrument_tokens() -> List[int]:
+    """
+    Get the instrument tokens of stocks held by any user.
+
+    Zerodha holdings are looked up on the exchange they were synced from,
+    others on NSE.
+
+    Returns:
+        Sorted instrument tokens; empty if there is no instrument master
+    """
+    return _tokens_for_keys(_held_instrument_keys())
+
+
+def subscribed_instrument_tokens() -> List[int]:
+    """
+    Get the instrument tokens the ticker streams: stocks held by any user
+    and stocks on any active watchlist, each once however many users
+    follow it.
+
+    Returns:
+        Sorted instrument tokens; empty if there is no instrument master
+    """
+    from portfolio.watchlists import watched_instruments
+
+    return _tokens_for_keys(_held_instrument_keys() | set(watched_instruments()))
+
+
+class TickerService:
+    """
+    Keeps the shared tick table up to date from a tick source.
+    """
+    def __init__(
+        self,
+        source: TickSource,
+        table: TickTable,
+        mode: str = MODE_QUOTE,
+        tokens: Optional[Callable[[], Iterable[int]]] = None,
+        refresh_interval: float = 60.0,
+        recorder: Optional[FrameRecorder] = None
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            source: Where frames come from
+            table: Table to write prices to
+            mode: Subscription mode ('ltp', 'quote' or 'full')
+            tokens: Callable returning the tokens to subscribe to, checked
+                every refresh_interval seconds; defaults to subscribed_instrument_tokens
+            refresh_interval: Seconds between subscription refreshes
+            recorder: Optional recorder of every frame received
+        """
+        self.source = source
+        self.table = table
+        self.mode = mode
+        self.tokens = tokens or subscribed_instrument_tokens
+        self.refresh_interval = refresh_interval
+        self.recorder = recorder
+        self.subscribed: set = set()
+        self.stats = {"frames": 0, "ticks": 0, "written": 0}
+        self._refreshed = float("-inf")
+
+    def refresh_subscriptions(self) -> None:
+        """
+        Subscribe to newly held or watched instruments and drop ones no
+        longer followed.
+        """
+        wanted = set(self.tokens())
+        added = sorted(wanted - self.subscribed)
+        removed = sorted(self.subscribed - wanted)
+        if added or removed:
+            self.table.set_tokens(wanted)
+            self.source.unsubscribe(removed)
+            self.source.subscribe(added, self.mode)
+            self.subscribed = wanted
+            logger.info(f"Ticker subscribed to {len(wanted)} instruments (+{len(added)} -{len(removed)})")
+        self._refreshed = time.monotonic()
+
+    def handle_frame(self, frame: bytes) -> int:
+        """
+        Decode a frame and write its ticks to the table.
+
+        Returns:
+            Number of ticks decoded
+        """
+        if self.recorder is not None:
+            self.recorder.write(frame)
+        ticks = parse_frame(frame)
+        self.stats["frames"] += 1
+        self.stats["ticks"] += len(ticks)
+        self.stats["written"] += self.table.update(ticks)
+        return len(ticks)
+
+    def run(self) -> Dict[str, int]:
+        """
+        Process frames until the source ends or is closed.
+
+        Returns:
+            Counts of frames, ticks decoded and ticks written
+        """
+        self.refresh_subscriptions()
+        for frame in self.source.frames():
+            self.handle_frame(frame)
+            if time.monotonic() - self._refreshed >= self.refresh_interval:
+                self.refresh_subscriptions()
+        return self.stats
+
+    def stop(self) -> None:
+        self.source.close()
+
+
+def get_live_quotes(instruments: List[str]) -> Dict[str, Dict]:
+    """
+    Get prices from the ticker's shared table, without calling Kite.
+
+    Args:
+        instruments: Instruments in the format 'exchange:tradingsymbol'
+
+    Returns:
+        Dictionary of prices indexed by the instrument. Instruments the
+        ticker hasn't seen are left out.
+    """
+    table = get_tick_table()
+    master = get_instrument_master()
+    if table is None or master is None or not instruments:
+        return {}
+
+    tokens = master.tokens_for_keys(instruments).tolist()
+    prices = table.get(tokens)
+    return {
+        instrument: prices[token]
+        for instrument, token in zip(instruments, tokens)
+        if token in prices
+    }
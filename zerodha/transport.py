@@ -0,0 +1,177 @@
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONFIG = {
+    "pool_connections": 4,      # Number of hosts to keep pools for
+    "pool_maxsize": 16,         # Max connections kept per host
+    "pool_block": False,        # Block instead of opening extra connections
+    "keepalive": True,          # Enable TCP keep-alive probes
+    "keepalive_idle": 60,       # Seconds idle before the first probe
+    "keepalive_interval": 15,   # Seconds between probes
+    "keepalive_count": 4,       # Failed probes before dropping the socket
+}
+
+
+def _keepalive_socket_options(config: Dict[str, Any]) -> List[Tuple[int, int, int]]:
+    """
+    Build the socket options for pooled connections.
+    """
+    options = list(HTTPConnection.default_socket_options)
+    if not config["keepalive"]:
+        return options
+
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    # These are Linux-specific; other platforms fall back to OS defaults
+    for name, key in (
+        ("TCP_KEEPIDLE", "keepalive_idle"),
+        ("TCP_KEEPINTVL", "keepalive_interval"),
+        ("TCP_KEEPCNT", "keepalive_count"),
+    ):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), config[key]))
+    return options
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose pooled sockets have TCP keep-alive enabled.
+    """
+    def __init__(self, socket_options: Optional[List[Tuple[int, int, int]]] = None, **kwargs):
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs["socket_options"] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+class PooledTransport:
+    """
+    A shared connection pool for Kite API traffic.
+
+    All KiteClient instances in a process mount the same adapter, so
+    connections to api.kite.trade are reused across clients instead of being
+    opened and thrown away with each short-lived session.
+    """
+    def __init__(self, **config):
+        """
+        Initialize the transport.
+
+        Args:
+            **config: Overrides for DEFAULT_POOL_CONFIG
+        """
+        self.config = {**DEFAULT_POOL_CONFIG, **config}
+        self.adapter = KeepAliveHTTPAdapter(
+            socket_options=_keepalive_socket_options(self.config),
+            pool_connections=self.config["pool_connections"],
+            pool_maxsize=self.config["pool_maxsize"],
+            pool_block=self.config["pool_block"],
+            max_retries=0
+        )
+
+    def mount(self, session: requests.Session) -> requests.Session:
+        """
+        Route a session's HTTP and HTTPS traffic through the shared pool.
+
+        Args:
+            session: Session to mount the pooled adapter on
+
+        Returns:
+            The same session
+        """
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        return session
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get connection reuse statistics for the pool.
+
+        Returns:
+            Dictionary with totals and a per-host breakdown
+        """
+        hosts = []
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle_connections": pool.pool.qsize() if pool.pool else 0,
+            })
+
+        connections = sum(host["connections_opened"] for host in hosts)
+        requests_made = sum(host["requests"] for host in hosts)
+        reused = max(requests_made - connections, 0)
+
+        return {
+            "pool_maxsize": self.config["pool_maxsize"],
+            "connections_opened": connections,
+            "requests": requests_made,
+            "reused_requests": reused,
+            "reuse_rate": reused / requests_made if requests_made else 0.0,
+            "hosts": hosts,
+        }
+
+    def close(self) -> None:
+        """
+        Close all pooled connections.
+        """
+        self.adapter.close()
+
+
+_transport: Optional[PooledTransport] = None
+_transport_pid: Optional[int] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> PooledTransport:
+    """
+    Get the process-wide transport, creating it on first use.
+
+    The transport is rebuilt after a fork (e.g. gunicorn workers started from
+    a preloaded master) so that processes never share sockets.
+
+    Returns:
+        The shared PooledTransport
+    """
+    global _transport, _transport_pid
+
+    pid = os.getpid()
+    if _transport is not None and _transport_pid == pid:
+        return _transport
+
+    with _transport_lock:
+        if _transport is None or _transport_pid != pid:
+            config = getattr(settings, "ZERODHA_HTTP_POOL", {})
+            _transport = PooledTransport(**config)
+            _transport_pid = pid
+            logger.debug(f"Created Kite HTTP pool for process {pid}: {_transport.config}")
+        return _transport
+
+
+def reset_transport() -> None:
+    """
+    Close and discard the process-wide transport.
+    """
+    global _transport, _transport_pid
+
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = None
+        _transport_pid = None
@@ -1,7 +1,9 @@
 from django.urls import path
 from zerodha.views import (
     ZerodhaLoginView, ZerodhaCallbackView, ZerodhaHoldingsView, 
-    ZerodhaSyncHoldingsView, ZerodhaOrdersView, ZerodhaPlaceOrderView
+    ZerodhaSyncHoldingsView, ZerodhaOrdersView, ZerodhaPlaceOrderView,
+    ZerodhaAccountSnapshotView, ZerodhaPoolStatsView, ZerodhaQuoteView,
+    ZerodhaQuoteCacheStatsView, ZerodhaSyncJobView, ZerodhaLiveQuoteView
 )
 
 urlpatterns = [
@@ -12,8 +14,18 @@ urlpatterns = [
     # Holdings
     path('holdings/', ZerodhaHoldingsView.as_view(), name='zerodha-holdings'),
     path('sync-holdings/', ZerodhaSyncHoldingsView.as_view(), name='zerodha-sync-holdings'),
+    path('sync-jobs/<int:pk>/', ZerodhaSyncJobView.as_view(), name='zerodha-sync-job'),
+    path('snapshot/', ZerodhaAccountSnapshotView.as_view(), name='zerodha-snapshot'),
+    
+    # Market data
+    path('quote/', ZerodhaQuoteView.as_view(), name='zerodha-quote'),
+    path('live-quote/', ZerodhaLiveQuoteView.as_view(), name='zerodha-live-quote'),
     
     # Orders
     path('orders/', ZerodhaOrdersView.as_view(), name='zerodha-orders'),
     path('place-order/', ZerodhaPlaceOrderView.as_view(), name='zerodha-place-order'),
+    
+    # Diagnostics
+    path('pool-stats/', ZerodhaPoolStatsView.as_view(), name='zerodha-pool-stats'),
+    path('quote-cache-stats/', ZerodhaQuoteCacheStatsView.as_view(), name='zerodha-quote-cache-stats'),
 ]
@@ -1,11 +1,19 @@
+from asgiref.sync import async_to_sync
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
+from zerodha.async_client import AsyncKiteClient
+from zerodha.jobs import enqueue_job
+from zerodha.models import SyncJob
+from zerodha.quote_cache import get_quote_cache
 from zerodha.services import ZerodhaService
+from zerodha.ticker import get_live_quotes
+from zerodha.transport import get_transport
 from zerodha.serializers import (
-    ZerodhaHoldingSerializer, ZerodhaOrderSerializer, ZerodhaOrderRequestSerializer
+    ZerodhaHoldingSerializer, ZerodhaOrderSerializer, ZerodhaOrderRequestSerializer,
+    SyncJobSerializer
 )
 
 
@@ -87,6 +95,45 @@ class ZerodhaHoldingsView(APIView):
             )
 
 
+class ZerodhaAccountSnapshotView(APIView):
+    """
+    API endpoint to get holdings, positions, orders and quotes in one call.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        Get a snapshot of the current user's Zerodha account.
+        
+        The four broker calls run concurrently, so the response takes about
+        as long as the slowest of them rather than their sum.
+        """
+        client = ZerodhaService.get_client_for_user(request.user.id)
+        if not client:
+            return Response(
+                {"error": "Zerodha API client not available"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        instruments = request.query_params.getlist('i') or None
+        
+        try:
+            snapshot = async_to_sync(
+                AsyncKiteClient.from_client(client).fetch_account_snapshot
+            )(instruments)
+            return Response({
+                "holdings": ZerodhaHoldingSerializer(snapshot.holdings, many=True).data,
+                "positions": snapshot.positions,
+                "orders": ZerodhaOrderSerializer(snapshot.orders, many=True).data,
+                "quotes": snapshot.quotes,
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+
 class ZerodhaSyncHoldingsView(APIView):
     """
     API endpoint to sync holdings from Zerodha to the database.
@@ -95,13 +142,94 @@ class ZerodhaSyncHoldingsView(APIView):
     
     def post(self, request):
         """
-        Sync holdings from Zerodha to the database.
+        Queue a sync of holdings from Zerodha to the database.
+        
+        The sync runs in the background (see the run_sync_worker command).
+        If a sync is already queued or running for the user, that job is
+        returned instead of queueing another one.
         """
-        result = ZerodhaService.sync_holdings(request.user.id)
-        if result.get("success"):
-            return Response(result, status=status.HTTP_200_OK)
-        else:
-            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        job, created = enqueue_job(request.user.id, SyncJob.KIND_SYNC_HOLDINGS)
+        data = SyncJobSerializer(job).data
+        data["created"] = created
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+class ZerodhaSyncJobView(APIView):
+    """
+    API endpoint to poll the status of a sync job.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, pk):
+        """
+        Get a sync job of the current user, with its result once finished.
+        """
+        job = SyncJob.objects.filter(pk=pk, user=request.user).first()
+        if job is None:
+            return Response(
+                {"error": "Sync job not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(SyncJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class ZerodhaQuoteView(APIView):
+    """
+    API endpoint to get quotes for instruments.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        Get quotes for the instruments given as repeated `i` parameters.
+        
+        Quotes are served from a short-lived cache shared by all users; pass
+        `mode=ltp` or `mode=ohlc` when market depth isn't needed.
+        """
+        instruments = request.query_params.getlist('i')
+        mode = request.query_params.get('mode', 'quote')
+        if not instruments:
+            return Response(
+                {"error": "No instruments provided"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if mode not in ('quote', 'ohlc', 'ltp'):
+            return Response(
+                {"error": f"Unknown mode: {mode}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            quotes = ZerodhaService.get_quotes(request.user.id, instruments, mode)
+            return Response(quotes, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+
+class ZerodhaLiveQuoteView(APIView):
+    """
+    API endpoint to get streamed prices for instruments.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        Get the latest ticks for the instruments given as repeated `i` parameters.
+        
+        Prices come from the table kept by the run_ticker process, so no call
+        is made to Zerodha. Instruments the ticker isn't subscribed to are
+        left out.
+        """
+        instruments = request.query_params.getlist('i')
+        if not instruments:
+            return Response(
+                {"error": "No instruments provided"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(get_live_quotes(instruments), status=status.HTTP_200_OK)
 
 
 class ZerodhaOrdersView(APIView):
@@ -151,3 +279,29 @@ class ZerodhaPlaceOrderView(APIView):
             return Response(result, status=status.HTTP_200_OK)
         else:
             return Response(result, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ZerodhaPoolStatsView(APIView):
+    """
+    API endpoint exposing connection pool statistics for this worker process.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """
+        Get connection reuse statistics for the shared Kite HTTP pool.
+        """
+        return Response(get_transport().stats(), status=status.HTTP_200_OK)
+
+
+class ZerodhaQuoteCacheStatsView(APIView):
+    """
+    API endpoint exposing quote cache statistics for this worker process.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """
+        Get hit/miss counters for the shared quote cache.
+        """
+        return Response(get_quote_cache().stats(), status=status.HTTP_200_OK)